@@ -1,4 +1,5 @@
 import base64
+import datetime
 import json
 import logging
 import secrets
@@ -6,7 +7,8 @@ from typing import Optional
 
 import click
 from flask import current_app
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 from werkzeug.exceptions import NotFound
 
 from configs import dify_config
@@ -25,9 +27,10 @@ from libs.rsa import generate_key_pair
 from models import Tenant
 from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
 from models.dataset import Document as DatasetDocument
-from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
+from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, Message, MessageAnnotation
 from models.provider import Provider, ProviderModel
 from services.account_service import AccountService, RegisterService, TenantService
+from services.app_statistic_rollup_service import AppStatisticRollupService
 from services.clear_free_plan_tenant_expired_logs import ClearFreePlanTenantExpiredLogs
 from services.plugin.data_migration import PluginDataMigration
 from services.plugin.plugin_migration import PluginMigration
@@ -1154,3 +1157,28 @@ def remove_orphaned_files_on_storage(force: bool):
         click.echo(click.style(f"Removed {removed_files} orphaned files without errors.", fg="green"))
     else:
         click.echo(click.style(f"Removed {removed_files} orphaned files, with {error_files} errors.", fg="yellow"))
+
+
+@click.command("backfill-app-statistics", help="Build the hourly rollups of app statistics from the message history.")
+@click.option(
+    "--since",
+    type=click.DateTime(formats=["%Y-%m-%d", "%Y-%m-%d %H:%M"]),
+    default=None,
+    help="UTC time to backfill from, defaults to the first message.",
+)
+def backfill_app_statistics(since: Optional[datetime.datetime]):
+    """
+    Build the hourly rollups of app statistics back to the given time, can be interrupted and run again.
+    """
+    if since is None:
+        since = db.session.scalar(select(func.min(Message.created_at)))
+        db.session.close()
+        if since is None:
+            click.echo(click.style("No messages found. There is nothing to backfill.", fg="green"))
+            return
+
+    click.echo(click.style(f"Starting backfill app statistics since {since}.", fg="white"))
+    with Session(db.engine, expire_on_commit=False) as session:
+        hours = AppStatisticRollupService.backfill(session, since)
+
+    click.echo(click.style(f"Backfilled {hours} hours of app statistics.", fg="green"))
@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -65,6 +66,40 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of requests per app per day",
         default=5000,
     )
+    APP_MAX_REQUESTS_PER_SECOND: NonNegativeInt = Field(
+        description="Maximum number of requests per second per app (0 for unlimited)",
+        default=0,
+    )
+    APP_END_USER_MAX_REQUESTS_PER_SECOND: NonNegativeInt = Field(
+        description="Maximum number of requests per second per end user of an app (0 for unlimited)",
+        default=0,
+    )
+    APP_QUEUE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum number of pending events in a generate task queue before the producer is blocked"
+        " (0 for unbounded)",
+        default=0,
+    )
+    APP_QUEUE_CHUNK_MERGE_ENABLED: bool = Field(
+        description="Whether to coalesce consecutive text chunk events before they are put into the task queue",
+        default=False,
+    )
+    APP_QUEUE_CHUNK_MERGE_MAX_CHARS: PositiveInt = Field(
+        description="Maximum number of characters coalesced into a single text chunk event",
+        default=256,
+    )
+    APP_QUEUE_CHUNK_MERGE_MAX_DELAY_MS: PositiveInt = Field(
+        description="Maximum time in milliseconds a text chunk may be held back for coalescing",
+        default=50,
+    )
+    APP_QUEUE_STOP_SIGNAL_PUBSUB_ENABLED: bool = Field(
+        description="Whether task stop signals are pushed through Redis pub/sub instead of being polled",
+        default=True,
+    )
+    APP_STREAM_SESSION_CHECKPOINTS_ENABLED: bool = Field(
+        description="Whether streaming responses release the request database session once the generate records"
+        " are created, so a stream only holds connections while saving its progress",
+        default=False,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -137,6 +172,28 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=1000,
     )
 
+    CODE_EXECUTION_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections to the code execution service",
+        default=100,
+    )
+
+    CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle connections kept alive to the code execution service",
+        default=20,
+    )
+
+    CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY: NonNegativeFloat = Field(
+        description="Seconds an idle connection to the code execution service is kept alive",
+        default=5.0,
+    )
+
+    TEMPLATE_TRANSFORM_IN_PROCESS_RENDER_ENABLED: bool = Field(
+        description="Render the templates of template transform nodes in process with a sandboxed Jinja2"
+        " environment instead of sending them to the code execution service. The renders are not isolated from"
+        " the API process nor bounded by the sandbox timeouts.",
+        default=False,
+    )
+
 
 class PluginConfig(BaseSettings):
     """
@@ -153,6 +210,47 @@ class PluginConfig(BaseSettings):
         default="plugin-api-key",
     )
 
+    PLUGIN_DAEMON_HTTP_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of connections to the plugin daemon per process",
+        default=200,
+    )
+
+    PLUGIN_DAEMON_HTTP_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle connections to the plugin daemon kept alive per process",
+        default=50,
+    )
+
+    PLUGIN_DAEMON_HTTP_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds an idle connection to the plugin daemon is kept alive",
+        default=30.0,
+    )
+
+    PLUGIN_DAEMON_HTTP_CONNECT_TIMEOUT: NonNegativeFloat = Field(
+        description="Connect timeout in seconds for requests to the plugin daemon (0 for no timeout)",
+        default=10.0,
+    )
+
+    PLUGIN_DAEMON_HTTP_READ_TIMEOUT: NonNegativeFloat = Field(
+        description="Read timeout in seconds for requests to the plugin daemon (0 for no timeout,"
+        " model invocations may stream for a long time)",
+        default=0,
+    )
+
+    PLUGIN_DAEMON_HTTP_WRITE_TIMEOUT: NonNegativeFloat = Field(
+        description="Write timeout in seconds for requests to the plugin daemon (0 for no timeout)",
+        default=0,
+    )
+
+    PLUGIN_DAEMON_HTTP_POOL_TIMEOUT: NonNegativeFloat = Field(
+        description="Time in seconds to wait for a free connection to the plugin daemon (0 for no timeout)",
+        default=30.0,
+    )
+
+    PLUGIN_DAEMON_HTTP2_ENABLED: bool = Field(
+        description="Use HTTP/2 for requests to the plugin daemon when the h2 package is installed",
+        default=True,
+    )
+
     INNER_API_KEY_FOR_PLUGIN: str = Field(description="Inner api key for plugin", default="inner-api-key")
 
     PLUGIN_REMOTE_INSTALL_HOST: str = Field(
@@ -341,6 +439,17 @@ class HttpConfig(BaseSettings):
         default=True,
     )
 
+    HTTP_REQUEST_NODE_STREAMING_ENABLED: bool = Field(
+        description="Stream the responses of the HTTP request node, enforcing the size limits while reading and"
+        " spooling file bodies to disk instead of holding them in memory",
+        default=False,
+    )
+
+    HTTP_REQUEST_NODE_STREAMING_CHUNK_SIZE: PositiveInt = Field(
+        description="Size in bytes of the chunks read from a streamed HTTP request node response",
+        default=64 * 1024,
+    )
+
     SSRF_DEFAULT_MAX_RETRIES: PositiveInt = Field(
         description="Maximum number of retries for network requests (SSRF)",
         default=3,
@@ -381,6 +490,26 @@ class HttpConfig(BaseSettings):
         default=5,
     )
 
+    SSRF_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of connections of each pooled client used for network requests (SSRF)",
+        default=100,
+    )
+
+    SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle connections kept alive by each pooled client (SSRF)",
+        default=20,
+    )
+
+    SSRF_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds an idle connection of the pooled clients is kept alive (SSRF)",
+        default=5.0,
+    )
+
+    SSRF_POOL_MAX_CONNECTIONS_PER_HOST: NonNegativeInt = Field(
+        description="Maximum number of concurrent connections to a single host (SSRF), 0 for no per-host limit",
+        default=0,
+    )
+
     RESPECT_XFORWARD_HEADERS_ENABLED: bool = Field(
         description="Enable handling of X-Forwarded-For, X-Forwarded-Proto, and X-Forwarded-Port headers"
         " when the app is behind a single trusted reverse proxy.",
@@ -455,6 +584,20 @@ class ModelLoadBalanceConfig(BaseSettings):
         default=False,
     )
 
+    MODEL_LB_COOLDOWN_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds the cooldown state of load balanced credentials is cached in each process,"
+        " 0 to read it from Redis on each invocation",
+        default=5,
+    )
+
+    MODEL_LB_STATISTICS_DECAY: float = Field(
+        description="Weight of the latest invocation in the rolling latency and error rate of load balanced"
+        " credentials, between 0 and 1",
+        gt=0,
+        le=1,
+        default=0.2,
+    )
+
     PLUGIN_BASED_TOKEN_COUNTING_ENABLED: bool = Field(
         description="Enable or disable plugin based token counting. If disabled, token counting will return 0.",
         default=False,
@@ -471,6 +614,11 @@ class BillingConfig(BaseSettings):
         default=False,
     )
 
+    PAYMENT_CONFIRMATION_WAIT_TIMEOUT: PositiveInt = Field(
+        description="Maximum time in seconds a payment screen waits for the payment confirmation in one request",
+        default=25,
+    )
+
 
 class UpdateConfig(BaseSettings):
     """
@@ -513,6 +661,17 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs cached per process (0 to disable the cache)",
+        default=128,
+    )
+
+    WORKFLOW_ITERATION_PARALLEL_WINDOW_SIZE: NonNegativeInt = Field(
+        description="Maximum number of items in flight for a parallel iteration node"
+        " (0 to use the parallel number of the node)",
+        default=0,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -580,6 +739,37 @@ class AuthConfig(BaseSettings):
         default=86400,
     )
 
+    PRINCIPAL_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds an authenticated account or end user is cached in each process, 0 to disable",
+        default=60,
+    )
+
+    PRINCIPAL_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of authenticated accounts and end users cached in each process",
+        default=10000,
+    )
+
+    API_TOKEN_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds a service API token is cached in Redis, 0 to disable the token cache",
+        default=600,
+    )
+
+    API_TOKEN_LOCAL_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds a service API token is cached in each process,"
+        " a revoked token may be accepted for this long",
+        default=5,
+    )
+
+    API_TOKEN_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of service API tokens cached in each process",
+        default=10000,
+    )
+
+    API_TOKEN_LAST_USED_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in minutes to write the buffered last use times of the service API tokens",
+        default=1,
+    )
+
 
 class ModerationConfig(BaseSettings):
     """
@@ -602,6 +792,17 @@ class ToolConfig(BaseSettings):
         default=3600,
     )
 
+    TOOL_RUNTIME_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds resolved tools with their decrypted credentials are cached in each process,"
+        " 0 to disable",
+        default=300,
+    )
+
+    TOOL_RUNTIME_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of resolved tools cached in each process",
+        default=1024,
+    )
+
 
 class MailConfig(BaseSettings):
     """
@@ -732,6 +933,17 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    CLEAN_MESSAGES_BATCH_SIZE: PositiveInt = Field(
+        description="Number of messages scanned and deleted per batch by message cleanup operations",
+        default=1000,
+    )
+
+    CLEAN_MESSAGES_TIME_BUDGET: NonNegativeInt = Field(
+        description="Seconds a message cleanup run may take before stopping, the next run resumes where it"
+        " stopped. 0 means no limit.",
+        default=0,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -766,6 +978,23 @@ class MultiModalTransferConfig(BaseSettings):
         default="base64",
     )
 
+    MULTIMODAL_ENCODED_CACHE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum total size in bytes of the base64 encoded files kept in memory by each process,"
+        " stored files referenced again in prompts are then neither downloaded nor encoded again. 0 to disable.",
+        default=64 * 1024 * 1024,
+    )
+
+    MULTIMODAL_IMAGE_MAX_RESOLUTION: NonNegativeInt = Field(
+        description="Maximum width and height in pixels of images sent as base64, larger images are downscaled"
+        " before encoding. Requires Pillow. 0 to send images unchanged.",
+        default=0,
+    )
+
+    MULTIMODAL_IMAGE_QUALITY: PositiveInt = Field(
+        description="Quality from 1 to 95 of the JPEG and WebP images downscaled for multimodal contexts",
+        default=85,
+    )
+
 
 class CeleryBeatConfig(BaseSettings):
     CELERY_BEAT_SCHEDULER_TIME: int = Field(
@@ -774,6 +1003,60 @@ class CeleryBeatConfig(BaseSettings):
     )
 
 
+class AppStatisticConfig(BaseSettings):
+    """
+    Configuration for the hourly rollups of app statistics
+    """
+
+    APP_STATISTIC_ROLLUP_ENABLED: bool = Field(
+        description="Enable or disable maintaining hourly statistic rollups and reading app statistics from them",
+        default=False,
+    )
+
+    APP_STATISTIC_ROLLUP_INTERVAL: PositiveInt = Field(
+        description="Interval in minutes between two runs of the statistic rollup task",
+        default=10,
+    )
+
+    APP_STATISTIC_ROLLUP_DELAY: NonNegativeInt = Field(
+        description="Minutes to wait after the end of an hour before rolling it up, messages are still updated"
+        " for a while after they are created",
+        default=10,
+    )
+
+    APP_STATISTIC_ROLLUP_BATCH_HOURS: PositiveInt = Field(
+        description="Number of hours rolled up per transaction by the statistic rollup task and backfill",
+        default=24,
+    )
+
+
+class TenantUsageConfig(BaseSettings):
+    """
+    Configuration for the usage counters and feature snapshots of tenants
+    """
+
+    TENANT_USAGE_COUNTERS_ENABLED: bool = Field(
+        description="Enable or disable reading the resource usage of tenants from counters kept in Redis"
+        " instead of counting it on every feature check",
+        default=True,
+    )
+
+    TENANT_USAGE_COUNTER_TTL: PositiveInt = Field(
+        description="Time in seconds after which the usage counters of a tenant are counted again from the database",
+        default=3600,
+    )
+
+    TENANT_USAGE_RECONCILE_INTERVAL: PositiveInt = Field(
+        description="Interval in minutes between two runs of the task correcting drifted usage counters",
+        default=30,
+    )
+
+    FEATURE_SNAPSHOT_TTL: NonNegativeInt = Field(
+        description="Time in seconds the plan limits of a tenant are cached for feature checks, 0 to disable",
+        default=30,
+    )
+
+
 class PositionConfig(BaseSettings):
     POSITION_PROVIDER_PINS: str = Field(
         description="Comma-separated list of pinned model providers",
@@ -872,6 +1155,7 @@ class AccountConfig(BaseSettings):
 class FeatureConfig(
     # place the configs in alphabet order
     AppExecutionConfig,
+    AppStatisticConfig,
     AuthConfig,  # Changed from OAuthConfig to AuthConfig
     BillingConfig,
     CodeExecutionSandboxConfig,
@@ -892,6 +1176,7 @@ class FeatureConfig(
     PositionConfig,
     RagEtlConfig,
     SecurityConfig,
+    TenantUsageConfig,
     ToolConfig,
     UpdateConfig,
     WorkflowConfig,
@@ -12,6 +12,7 @@ from libs.helper import TimestampField
 from libs.login import login_required
 from models.dataset import Dataset
 from models.model import ApiToken, App
+from services.api_token_cache import api_token_cache
 
 from . import api
 from .wraps import account_initialization_required, setup_required
@@ -128,8 +129,10 @@ class BaseApiKeyResource(Resource):
         if key is None:
             flask_restful.abort(404, message="API key not found")
 
+        scope, token = key.type, key.token
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        api_token_cache.invalidate(scope, token)
 
         return {"result": "success"}, 204
 
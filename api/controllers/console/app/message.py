@@ -3,6 +3,7 @@ import logging
 from flask_login import current_user
 from flask_restful import Resource, fields, marshal_with, reqparse
 from flask_restful.inputs import int_range
+from sqlalchemy import select
 from werkzeug.exceptions import Forbidden, InternalServerError, NotFound
 
 from controllers.console import api
@@ -25,7 +26,7 @@ from core.model_runtime.errors.invoke import InvokeError
 from extensions.ext_database import db
 from fields.conversation_fields import annotation_fields, message_detail_fields
 from libs.helper import uuid_value
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import paginate_by_keyset
 from libs.login import login_required
 from models.model import AppMode, Conversation, Message, MessageAnnotation, MessageFeedback
 from services.annotation_service import AppAnnotationService
@@ -62,55 +63,20 @@ class ChatMessageListApi(Resource):
         if not conversation:
             raise NotFound("Conversation Not Exists.")
 
-        if args["first_id"]:
-            first_message = (
-                db.session.query(Message)
-                .filter(Message.conversation_id == conversation.id, Message.id == args["first_id"])
-                .first()
-            )
-
-            if not first_message:
-                raise NotFound("First message not found")
-
-            history_messages = (
-                db.session.query(Message)
-                .filter(
-                    Message.conversation_id == conversation.id,
-                    Message.created_at < first_message.created_at,
-                    Message.id != first_message.id,
-                )
-                .order_by(Message.created_at.desc())
-                .limit(args["limit"])
-                .all()
-            )
-        else:
-            history_messages = (
-                db.session.query(Message)
-                .filter(Message.conversation_id == conversation.id)
-                .order_by(Message.created_at.desc())
-                .limit(args["limit"])
-                .all()
-            )
-
-        has_more = False
-        if len(history_messages) == args["limit"]:
-            current_page_first_message = history_messages[-1]
-            rest_count = (
-                db.session.query(Message)
-                .filter(
-                    Message.conversation_id == conversation.id,
-                    Message.created_at < current_page_first_message.created_at,
-                    Message.id != current_page_first_message.id,
-                )
-                .count()
-            )
-
-            if rest_count > 0:
-                has_more = True
+        pagination = paginate_by_keyset(
+            db.session,
+            select(Message).where(Message.conversation_id == conversation.id),
+            keys=(Message.created_at, Message.id),
+            limit=args["limit"],
+            anchor_id=args["first_id"],
+        )
+        if pagination is None:
+            raise NotFound("First message not found")
 
-        history_messages = list(reversed(history_messages))
+        MessageService.preload_relations(pagination.data, app_model)
+        pagination.data = list(reversed(pagination.data))
 
-        return InfiniteScrollPagination(data=history_messages, limit=args["limit"], has_more=has_more)
+        return pagination
 
 
 class MessageFeedbackApi(Resource):
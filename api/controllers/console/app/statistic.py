@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 
 import pytz
 from flask import jsonify
@@ -12,7 +13,75 @@ from controllers.console.wraps import account_initialization_required, setup_req
 from extensions.ext_database import db
 from libs.helper import DatetimeString
 from libs.login import login_required
-from models.model import AppMode
+from models.model import App, AppMode
+from services.app_statistic_rollup_service import AppStatisticRollupService
+
+DATE_OF_CREATED_AT = "DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz ))"
+DATE_OF_HOUR = "DATE(DATE_TRUNC('day', hour AT TIME ZONE 'UTC' AT TIME ZONE :tz ))"
+
+
+def _parse_time_range(args, timezone: str) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Convert the start and end arguments, in the timezone of the account, to UTC.
+    """
+    tz = pytz.timezone(timezone)
+
+    def _to_utc(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        local_datetime = datetime.strptime(value, "%Y-%m-%d %H:%M").replace(second=0)
+        return tz.localize(local_datetime).astimezone(pytz.utc)
+
+    return _to_utc(args["start"]), _to_utc(args["end"])
+
+
+def _query_daily_statistics(
+    app_model: App,
+    timezone: str,
+    args,
+    *,
+    columns: str,
+    message_columns: str,
+    rollup_table: str,
+    rollup_columns: str,
+) -> list:
+    """
+    Query the statistics of an app by day of the timezone.
+
+    The hours covered by the hourly rollups are read from `rollup_table`, the rest of the range from the messages.
+    Each row of either gives the date and the `message_columns` or `rollup_columns`, which are aggregated by
+    `columns` per date.
+    """
+    start, end = _parse_time_range(args, timezone)
+    arg_dict = {"tz": timezone, "app_id": app_model.id}
+
+    message_query = f"SELECT {DATE_OF_CREATED_AT} AS date, {message_columns} FROM messages WHERE app_id = :app_id"
+    if start:
+        message_query += " AND created_at >= :start"
+        arg_dict["start"] = start
+    if end:
+        message_query += " AND created_at < :end"
+        arg_dict["end"] = end
+
+    sub_queries = [message_query]
+    rollup_range = AppStatisticRollupService.get_rollup_range(db.session, start, end, timezone)
+    if rollup_range:
+        arg_dict["rollup_start"], arg_dict["rollup_end"] = rollup_range
+        sub_queries[0] += " AND (created_at < :rollup_start OR created_at >= :rollup_end)"
+        sub_queries.append(
+            f"SELECT {DATE_OF_HOUR} AS date, {rollup_columns} FROM {rollup_table}"
+            " WHERE app_id = :app_id AND hour >= :rollup_start AND hour < :rollup_end"
+        )
+
+    sql_query = f"""SELECT
+    date,
+    {columns}
+FROM
+    ({" UNION ALL ".join(sub_queries)}) AS statistics
+GROUP BY date ORDER BY date"""
+
+    with db.engine.begin() as conn:
+        return list(conn.execute(db.text(sql_query), arg_dict))
 
 
 class DailyMessageStatistic(Resource):
@@ -28,46 +97,19 @@ class DailyMessageStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(*) AS message_count
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="CAST(SUM(message_count) AS BIGINT) AS message_count",
+            message_columns="1 AS message_count",
+            rollup_table="app_hourly_message_statistics",
+            rollup_columns="message_count",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "message_count": i.message_count})
+        for i in rs:
+            response_data.append({"date": str(i.date), "message_count": i.message_count})
 
         return jsonify({"data": response_data})
 
@@ -85,46 +127,19 @@ class DailyConversationStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(DISTINCT messages.conversation_id) AS conversation_count
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="COUNT(DISTINCT conversation_id) AS conversation_count",
+            message_columns="conversation_id",
+            rollup_table="app_hourly_conversation_statistics",
+            rollup_columns="conversation_id",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "conversation_count": i.conversation_count})
+        for i in rs:
+            response_data.append({"date": str(i.date), "conversation_count": i.conversation_count})
 
         return jsonify({"data": response_data})
 
@@ -142,46 +157,19 @@ class DailyTerminalsStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(DISTINCT messages.from_end_user_id) AS terminal_count
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="COUNT(DISTINCT end_user_id) AS terminal_count",
+            message_columns="from_end_user_id AS end_user_id",
+            rollup_table="app_hourly_end_user_statistics",
+            rollup_columns="end_user_id",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "terminal_count": i.terminal_count})
+        for i in rs:
+            response_data.append({"date": str(i.date), "terminal_count": i.terminal_count})
 
         return jsonify({"data": response_data})
 
@@ -199,49 +187,21 @@ class DailyTokenCostStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    (SUM(messages.message_tokens) + SUM(messages.answer_tokens)) AS token_count,
-    SUM(total_price) AS total_price
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="CAST(SUM(token_count) AS BIGINT) AS token_count, SUM(total_price) AS total_price",
+            message_columns="message_tokens + answer_tokens AS token_count, total_price",
+            rollup_table="app_hourly_message_statistics",
+            rollup_columns="message_tokens + answer_tokens AS token_count, total_price",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append(
-                    {"date": str(i.date), "token_count": i.token_count, "total_price": i.total_price, "currency": "USD"}
-                )
+        for i in rs:
+            response_data.append(
+                {"date": str(i.date), "token_count": i.token_count, "total_price": i.total_price, "currency": "USD"}
+            )
 
         return jsonify({"data": response_data})
 
@@ -401,46 +361,19 @@ class AverageResponseTimeStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    AVG(provider_response_latency) AS latency
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="SUM(latency) / SUM(message_count) AS latency",
+            message_columns="1 AS message_count, provider_response_latency AS latency",
+            rollup_table="app_hourly_message_statistics",
+            rollup_columns="message_count, provider_response_latency AS latency",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "latency": round(i.latency * 1000, 4)})
+        for i in rs:
+            response_data.append({"date": str(i.date), "latency": round(i.latency * 1000, 4)})
 
         return jsonify({"data": response_data})
 
@@ -458,49 +391,19 @@ class TokensPerSecondStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    CASE
-        WHEN SUM(provider_response_latency) = 0 THEN 0
-        ELSE (SUM(answer_tokens) / SUM(provider_response_latency))
-    END as tokens_per_second
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
-        arg_dict = {"tz": account.timezone, "app_id": app_model.id}
-
-        timezone = pytz.timezone(account.timezone)
-        utc_timezone = pytz.utc
-
-        if args["start"]:
-            start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
-            start_datetime = start_datetime.replace(second=0)
-
-            start_datetime_timezone = timezone.localize(start_datetime)
-            start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at >= :start"
-            arg_dict["start"] = start_datetime_utc
-
-        if args["end"]:
-            end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
-            end_datetime = end_datetime.replace(second=0)
-
-            end_datetime_timezone = timezone.localize(end_datetime)
-            end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-
-            sql_query += " AND created_at < :end"
-            arg_dict["end"] = end_datetime_utc
-
-        sql_query += " GROUP BY date ORDER BY date"
+        rs = _query_daily_statistics(
+            app_model,
+            account.timezone,
+            args,
+            columns="CASE WHEN SUM(latency) = 0 THEN 0 ELSE SUM(answer_tokens) / SUM(latency) END AS tokens_per_second",
+            message_columns="answer_tokens, provider_response_latency AS latency",
+            rollup_table="app_hourly_message_statistics",
+            rollup_columns="answer_tokens, provider_response_latency AS latency",
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "tps": round(i.tokens_per_second, 4)})
+        for i in rs:
+            response_data.append({"date": str(i.date), "tps": round(i.tokens_per_second, 4)})
 
         return jsonify({"data": response_data})
 
@@ -31,6 +31,7 @@ from fields.document_fields import document_status_fields
 from libs.login import login_required
 from models import ApiToken, Dataset, Document, DocumentSegment, UploadFile
 from models.dataset import DatasetPermissionEnum
+from services.api_token_cache import api_token_cache
 from services.dataset_service import DatasetPermissionService, DatasetService, DocumentService
 
 
@@ -635,8 +636,10 @@ class DatasetApiDeleteApi(Resource):
         if key is None:
             flask_restful.abort(404, message="API key not found")
 
+        scope, token = key.type, key.token
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        api_token_cache.invalidate(scope, token)
 
         return {"result": "success"}, 204
 
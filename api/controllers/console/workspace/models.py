@@ -6,6 +6,7 @@ from werkzeug.exceptions import Forbidden
 
 from controllers.console import api
 from controllers.console.wraps import account_initialization_required, setup_required
+from core.entities.provider_entities import LoadBalancingStrategy
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.errors.validate import CredentialsValidateFailedError
 from core.model_runtime.utils.encoders import jsonable_encoder
@@ -127,6 +128,8 @@ class ModelProviderModelApi(Resource):
         ):
             if "configs" not in args["load_balancing"]:
                 raise ValueError("invalid load balancing configs")
+            if args["load_balancing"].get("strategy") not in {None, *LoadBalancingStrategy}:
+                raise ValueError("invalid load balancing strategy")
 
             # save load balancing configs
             model_load_balancing_service.update_load_balancing_configs(
@@ -139,7 +142,11 @@ class ModelProviderModelApi(Resource):
 
             # enable load balancing
             model_load_balancing_service.enable_model_load_balancing(
-                tenant_id=tenant_id, provider=provider, model=args["model"], model_type=args["model_type"]
+                tenant_id=tenant_id,
+                provider=provider,
+                model=args["model"],
+                model_type=args["model_type"],
+                strategy=args["load_balancing"].get("strategy"),
             )
         else:
             # disable load balancing
@@ -221,13 +228,19 @@ class ModelProviderModelCredentialApi(Resource):
         )
 
         model_load_balancing_service = ModelLoadBalancingService()
-        is_load_balancing_enabled, load_balancing_configs = model_load_balancing_service.get_load_balancing_configs(
-            tenant_id=tenant_id, provider=provider, model=args["model"], model_type=args["model_type"]
+        is_load_balancing_enabled, load_balancing_strategy, load_balancing_configs = (
+            model_load_balancing_service.get_load_balancing_configs(
+                tenant_id=tenant_id, provider=provider, model=args["model"], model_type=args["model_type"]
+            )
         )
 
         return {
             "credentials": credentials,
-            "load_balancing": {"enabled": is_load_balancing_enabled, "configs": load_balancing_configs},
+            "load_balancing": {
+                "enabled": is_load_balancing_enabled,
+                "strategy": load_balancing_strategy,
+                "configs": load_balancing_configs,
+            },
         }
 
 
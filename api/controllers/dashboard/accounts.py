@@ -1,33 +1,24 @@
 
+from datetime import datetime, timedelta
+
 from flask import jsonify, request
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
+from flask_restful.inputs import int_range
+from pydantic import TypeAdapter, ValidationError
 
 from controllers.dashboard import api, api_key_required
+from libs.helper import DatetimeString, uuid_value
 from models import db
 from models.account import Account
+from services.account_admin_service import AccountAdminService
+from services.entities.account_entities import AccountAdminUpdate
+from services.feature_service import FeatureService
+from services.principal_cache import principal_cache
 
 
-def account_to_dict(account):
-    return {
-        "id": account.id,
-        "name": account.name,
-        "email": account.email,
-        "status": account.status,
-
-        "id_custom_plan": account.id_custom_plan,
-        "plan_expiration": account.plan_expiration,
-        "month_before_banned": account.month_before_banned,
-        "max_of_apps": account.max_of_apps,
-        "max_vector_space": account.max_vector_space,
-        "max_annotation_quota_limit": account.max_annotation_quota_limit,
-        "max_documents_upload_quota": account.max_documents_upload_quota,
-
-        "last_login_at": account.last_login_at,
-        "last_login_ip": account.last_login_ip,
-        "last_active_at": account.last_active_at,
-        "created_at": account.created_at,
-        "updated_at": account.updated_at
-    }
+def account_to_dict(account, fields=None):
+    # Only the loaded fields are returned, reading the other fields would query them one by one
+    return {field: getattr(account, field) for field in fields or AccountAdminService.LISTED_FIELDS}
 
 class ApiAccounts(Resource):
     method_decorators = [api_key_required]
@@ -41,26 +32,66 @@ class ApiAccounts(Resource):
             else:
                 return {"status": "error", "message": "Account not found."}, 404
         else:
-            accounts = db.session.query(Account).all()
-            return jsonify([account_to_dict(account) for account in accounts])
-    
+            parser = reqparse.RequestParser()
+            parser.add_argument("last_id", type=uuid_value, location="args")
+            parser.add_argument("limit", type=int_range(1, 500), default=100, location="args")
+            # Comma separated fields to return, all fields by default
+            parser.add_argument("fields", type=str, location="args")
+            parser.add_argument("email", type=str, location="args")
+            parser.add_argument("plan_id", type=str, location="args")
+            parser.add_argument("expiration_start", type=DatetimeString("%Y-%m-%d"), location="args")
+            parser.add_argument("expiration_end", type=DatetimeString("%Y-%m-%d"), location="args")
+            args = parser.parse_args()
+
+            try:
+                fields = AccountAdminService.get_fields(args["fields"].split(",") if args["fields"] else None)
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}, 400
+            # The end date is included in the range
+            expiration_start = (
+                datetime.strptime(args["expiration_start"], "%Y-%m-%d") if args["expiration_start"] else None
+            )
+            expiration_end = (
+                datetime.strptime(args["expiration_end"], "%Y-%m-%d") + timedelta(days=1)
+                if args["expiration_end"] else None
+            )
+
+            pagination = AccountAdminService.paginate(
+                db.session,
+                limit=args["limit"],
+                last_id=args["last_id"],
+                fields=fields,
+                email=args["email"],
+                plan_id=args["plan_id"],
+                expiration_start=expiration_start,
+                expiration_end=expiration_end,
+            )
+            if pagination is None:
+                return {"status": "error", "message": "Last account not found."}, 404
+
+            return jsonify({
+                "data": [account_to_dict(account, fields) for account in pagination.data],
+                "limit": pagination.limit,
+                "has_more": pagination.has_more,
+            })
+
     def put(self):
-        accounts = request.json
-        for account in accounts:
-            iter_acc = db.session.query(Account).get(account["id"])
-            iter_acc.status = account["status"]
-            iter_acc.id_custom_plan = account["id_custom_plan"]
-            iter_acc.plan_expiration = account["plan_expiration"]
-            iter_acc.month_before_banned = account["month_before_banned"]
-            iter_acc.max_of_apps = account["max_of_apps"]
-            iter_acc.max_vector_space = account["max_vector_space"]
-            iter_acc.max_annotation_quota_limit = account["max_annotation_quota_limit"]
-            iter_acc.max_documents_upload_quota = account["max_documents_upload_quota"]
+        # Update all the accounts of the payload in a single statement
+        try:
+            accounts = TypeAdapter(list[AccountAdminUpdate]).validate_python(request.json)
+        except ValidationError as e:
+            return {"status": "error", "message": str(e)}, 400
 
+        updated_ids = AccountAdminService.bulk_update(db.session, accounts)
         db.session.commit()
+        FeatureService.invalidate_owner_features(updated_ids)
+        # The bulk update bypasses the session, the cached principals are invalidated explicitly
+        principal_cache.invalidate(principal_cache.scope("account", account_id) for account_id in updated_ids)
         return {
             "status": "success",
-            "message": "Accounts updated successfully"
+            "message": "Accounts updated successfully",
+            "updated": len(updated_ids),
+            "not_found": sorted({account.id for account in accounts} - set(updated_ids)),
         }
 
     def delete(self, account_id):
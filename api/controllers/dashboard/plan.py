@@ -1,18 +1,25 @@
 import random
-import re
 import urllib.parse
-from datetime import UTC, datetime, timedelta
+from datetime import datetime, timedelta
 
 from flask import jsonify, request
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
+from flask_restful.inputs import int_range
 
+from configs import dify_config
 from controllers.console import api as api_console
 from controllers.dashboard import api, api_key_required
 from extensions.ext_database import db
+from libs.helper import DatetimeString, uuid_value
 from models.account import Account
 from models.alies_payments_custom import AliesPaymentsCustom
-from models.payments_history_custom import PaymentsHistoryCustom
+from models.payments_history_custom import PaymentStatus
 from models.system_custom_info import SystemCustomInfo
+from services.feature_service import FeatureService
+from services.payment_confirmation_service import PaymentConfirmationService
+from services.payment_history_service import PaymentHistoryService
+from services.payment_webhook_service import PaymentWebhookService
+from services.plan_catalog_service import PlanCatalogService
 
 from .models import *
 
@@ -22,13 +29,6 @@ from .models import *
 def generate_random_number():
     return str(random.randint(10000000, 99999999))
 
-def decode_description_pay(description):
-    # Lowercase the description
-    description = description.lower()
-    # Extract the plan ID from the description using regex
-    match = re.search(r'\bplan(\d{8})\b', description or '')
-    return match.group(1) if match else None
-
 def generate_image_url_pay(bank_id, account_id, amount, description, account_name):
     # Generate the image URL using the provided parameters
     # Encode the parameters to ensure they are URL-safe
@@ -40,30 +40,46 @@ def generate_image_url_pay(bank_id, account_id, amount, description, account_nam
     encoded_parameters = urllib.parse.urlencode(parameters)
     return f"https://img.vietqr.io/image/{bank_id}-{account_id}-print.png?{encoded_parameters}"
 
+def parse_date_range(args):
+    # The end date is included in the range
+    start = datetime.strptime(args["start"], "%Y-%m-%d") if args["start"] else None
+    end = datetime.strptime(args["end"], "%Y-%m-%d") + timedelta(days=1) if args["end"] else None
+    return {"start": start, "end": end}
+
+def payment_history_to_dict(history):
+    payment = PaymentHistoryModel.model_validate(history.value).model_dump(mode='json')
+    payment["history_id"] = history.id
+    payment["status"] = history.status
+    payment["transaction_at"] = history.transaction_at.isoformat()
+    return payment
+
+def get_or_create_payment_settings():
+    payment_settings = PlanCatalogService.get_payment_settings()
+    if payment_settings:
+        return payment_settings
+
+    system_custom_info = db.session.query(SystemCustomInfo).filter(
+        SystemCustomInfo.name == "payment_settings"
+    ).first()
+    if system_custom_info:
+        # The stored settings are not valid, raise the validation error
+        return PaymentSettingsModel.model_validate(system_custom_info.value)
+
+    # Create the default payment settings if they don't exist
+    payment_settings = PaymentSettingsModel()
+    db.session.add(SystemCustomInfo(name="payment_settings", value=payment_settings.model_dump(mode='json')))
+    db.session.commit()
+    PlanCatalogService.invalidate()
+    return payment_settings
+
 # API endpoint to get and update payment settings
 class ApiPaymentSettings(Resource):
     method_decorators = [api_key_required]
 
     def get(self):
-        # Get all system custom info
-        system_custom_info = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name.in_(["payment_settings"])
-        ).first()
-
-        # Check if system custom info exists
-        if not system_custom_info:
-            # Create a new system custom info if it doesn't exist
-            system_custom_info = SystemCustomInfo(name="payment_settings", value=PaymentSettingsModel().model_dump(mode='json'))
-            # Add default payment settings
-            db.session.add(system_custom_info)
-            db.session.commit()
-
-        # Pydantic v2 uses model_dump() instead of dict()
-        # Ensure the model loaded from DB is validated against the current model definition
-        settings_data = system_custom_info.value
-        # Add default values for potentially missing fields if loaded from an older schema
-        validated_settings = PaymentSettingsModel.model_validate(settings_data)
-        return jsonify(validated_settings.model_dump(mode='json'))
+        # Payment settings are read from the plan catalog
+        payment_settings = get_or_create_payment_settings()
+        return jsonify(payment_settings.model_dump(mode='json'))
 
     def put(self):
         # Get the request data
@@ -90,63 +106,26 @@ class ApiPaymentSettings(Resource):
         # Commit the changes to the database
         db.session.add(system_custom_info)
         db.session.commit()
+        PlanCatalogService.invalidate()
 
         # Return a success message
         return jsonify({"status": "success", "message": "Payment settings updated successfully."})
     
 class ApiPaymentSettingsPublic(Resource):
     def get(self):
-        # Get all system custom info
-        system_custom_info = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name.in_(["payment_settings"])
-        ).first()
-
-        # Check if system custom info exists
-        if not system_custom_info:
-            # Create a new system custom info if it doesn't exist
-            system_custom_info = SystemCustomInfo(name="payment_settings", value=PaymentSettingsModel().model_dump(mode='json'))
-            # Add default payment settings
-            db.session.add(system_custom_info)
-            db.session.commit()
-
-        # Pydantic v2 uses model_dump() instead of dict()
-        # Ensure the model loaded from DB is validated against the current model definition
-        settings_data = system_custom_info.value
-        # Add default values for potentially missing fields if loaded from an older schema
-        validated_settings = PaymentSettingsModelPublic.model_validate(settings_data)
-        return jsonify(validated_settings.model_dump(mode='json'))
+        # Payment settings are read from the plan catalog, only the public fields are returned
+        payment_settings = get_or_create_payment_settings()
+        public_settings = PaymentSettingsModelPublic.model_validate(payment_settings.model_dump())
+        return jsonify(public_settings.model_dump(mode='json'))
 
 # API endpoint to get and update plans
 class ApiPlan(Resource):
     method_decorators = [api_key_required]
 
     def get(self):
-        # Get all system custom info
-        system_custom_info = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name.in_(["plan"])
-        ).first()
+        # Plans are read from the plan catalog, plans with string expiration date are not listed
+        object_plans = PlanCatalogService.get_catalog().listed_plans
 
-        object_plans = []
-
-        # Check if system custom info exists
-        if not system_custom_info:
-           # Create a new system custom info if it doesn't exist
-            system_custom_info = SystemCustomInfo(name="plan", value=[])
-            # Add default plans
-            db.session.add(system_custom_info)
-            db.session.commit()
-        else:
-            # Convert the value from list[json] to list[PlanModel]
-            # Skip plans with string expiration date
-            raw_plans = system_custom_info.value
-            list_of_plans = []
-            for plan in raw_plans:
-                exp = plan.get("plan_expiration")
-                if isinstance(exp, str):
-                    continue
-                list_of_plans.append(plan)
-            object_plans = [PlanModel.model_validate(plan) for plan in list_of_plans]
-        
         # Pydantic v2 uses model_dump() instead of dict()
         return jsonify([plan.model_dump(mode='json') for plan in object_plans])
     
@@ -172,38 +151,16 @@ class ApiPlan(Resource):
         # Commit the changes to the database
         db.session.add(system_custom_info)
         db.session.commit()
+        PlanCatalogService.invalidate()
 
         # Return a success message
         return jsonify({"status": "success", "message": "Plan updated successfully."})
     
 class ApiPlanPublic(Resource):
     def get(self):
-        # Get all system custom info
-        system_custom_info = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name.in_(["plan"])
-        ).first()
-
-        object_plans = []
+        # Plans are read from the plan catalog, plans with string expiration date are not listed
+        object_plans = PlanCatalogService.get_catalog().listed_plans
 
-        # Check if system custom info exists
-        if not system_custom_info:
-           # Create a new system custom info if it doesn't exist
-            system_custom_info = SystemCustomInfo(name="plan", value=[])
-            # Add default plans
-            db.session.add(system_custom_info)
-            db.session.commit()
-        else:
-            # Convert the value from list[json] to list[PlanModel]
-            # Skip plans with string expiration date
-            raw_plans = system_custom_info.value
-            list_of_plans = []
-            for plan in raw_plans:
-                exp = plan.get("plan_expiration")
-                if isinstance(exp, str):
-                    continue
-                list_of_plans.append(plan)
-            object_plans = [PlanModel.model_validate(plan) for plan in list_of_plans]
-        
         # Pydantic v2 uses model_dump() instead of dict()
         return jsonify([plan.model_dump(mode='json') for plan in object_plans])
 
@@ -216,16 +173,8 @@ class ApiPayRequest(Resource):
         # Pydantic v2 uses model_validate
         pay_request = PayRequestModel.model_validate(data)
 
-        # Get the existing system custom info
-        system_custom_info = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name == "plan"
-        ).first()
-        # Check if system custom info exists
-        if not system_custom_info:
-            return jsonify({"status": "error", "message": "Plan not found."}), 404
-        # Get the plan data
-        plan_data = system_custom_info.value
-        plan = next((plan for plan in plan_data if plan["id"] == pay_request.id_plan), None)
+        # Get the plan from the plan catalog
+        plan = PlanCatalogService.get_plan(pay_request.id_plan)
         if not plan:
             return jsonify({"status": "error", "message": "Plan not found."}), 404
         # Get the account data
@@ -251,19 +200,10 @@ class ApiPayRequest(Resource):
         db.session.add(alies_payment)
         db.session.commit()
 
-        # Get the payment settings
-        payment_settings = db.session.query(SystemCustomInfo).filter(
-            SystemCustomInfo.name == "payment_settings"
-        ).first()
+        # Get the payment settings from the plan catalog
+        payment_settings = PlanCatalogService.get_payment_settings()
         if not payment_settings:
             return jsonify({"status": "error", "message": "Payment settings not found."}), 404
-        # Get the payment settings data
-        payment_settings_data = payment_settings.value
-        # Pydantic v2 uses model_validate
-        try:
-            payment_settings = PaymentSettingsModel.model_validate(payment_settings_data)
-        except Exception as e:
-            return jsonify({"status": "error", "message": f"Invalid payment settings format: {e}"}), 400
 
         # Return the payment URL
         return jsonify({
@@ -272,7 +212,7 @@ class ApiPayRequest(Resource):
             "url": generate_image_url_pay(
                 bank_id=payment_settings.bank_id,
                 account_id=payment_settings.account_id,
-                amount=int(plan["price"]),
+                amount=int(plan.price),
                 description=f"plan{alies_payment.alies}",
                 account_name=payment_settings.account_name
             ),
@@ -290,17 +230,76 @@ class ApiPayRequest(Resource):
         # Return dict directly
         return {"status": "success", "message": "Alies payment found.", "alies": alies_payment.alies}
 
+# API endpoint to wait for the confirmation of a payment request, instead of polling its alies payment
+class ApiPayRequestWait(Resource):
+    def get(self, id_account):
+        parser = reqparse.RequestParser()
+        parser.add_argument("alies", type=str, required=True, location="args")
+        args = parser.parse_args()
+
+        pending = {}
+
+        def is_pending():
+            alies_payment = db.session.query(AliesPaymentsCustom.alies).filter_by(id_account=id_account).first()
+            pending["alies"] = alies_payment.alies if alies_payment else None
+            # Release the database connection while waiting
+            db.session.close()
+            return pending["alies"] == args["alies"]
+
+        paid = PaymentConfirmationService.wait(
+            id_account, timeout=dify_config.PAYMENT_CONFIRMATION_WAIT_TIMEOUT, is_pending=is_pending
+        )
+        # The alies payment was replaced by a newer payment request
+        if pending["alies"] and pending["alies"] != args["alies"]:
+            return {"status": "error", "message": "Alies mismatch."}, 409
+
+        return {"status": "success", "paid": paid}
+
 # API endpoint to handle payment history
 class ApiPaymentHistory(Resource):
     method_decorators = [api_key_required]
 
     def get(self):
-        # Get PaymentsHistoryCustom
-        payments_history = db.session.query(PaymentsHistoryCustom).all()
-        # Convert the value from list[json] to list[PaymentHistoryModel]
-        object_payments = [PaymentHistoryModel.model_validate(payment.value) for payment in payments_history]
-        # Pydantic v2 uses model_dump() instead of dict()
-        return jsonify([payment.model_dump(mode='json') for payment in object_payments])
+        parser = reqparse.RequestParser()
+        parser.add_argument("last_id", type=uuid_value, location="args")
+        parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("account_id", type=uuid_value, location="args")
+        parser.add_argument("plan_id", type=str, location="args")
+        parser.add_argument("status", type=str, choices=[status.value for status in PaymentStatus], location="args")
+        parser.add_argument("start", type=DatetimeString("%Y-%m-%d"), location="args")
+        parser.add_argument("end", type=DatetimeString("%Y-%m-%d"), location="args")
+        args = parser.parse_args()
+
+        # Get a page of PaymentsHistoryCustom, from the latest payment
+        pagination = PaymentHistoryService.paginate(
+            db.session,
+            limit=args["limit"],
+            last_id=args["last_id"],
+            account_id=args["account_id"],
+            plan_id=args["plan_id"],
+            status=args["status"],
+            **parse_date_range(args),
+        )
+        if pagination is None:
+            return {"status": "error", "message": "Last payment not found."}, 404
+
+        return jsonify({
+            "data": [payment_history_to_dict(history) for history in pagination.data],
+            "limit": pagination.limit,
+            "has_more": pagination.has_more,
+        })
+
+# API endpoint to aggregate the payment history
+class ApiPaymentHistoryStatistics(Resource):
+    method_decorators = [api_key_required]
+
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument("start", type=DatetimeString("%Y-%m-%d"), location="args")
+        parser.add_argument("end", type=DatetimeString("%Y-%m-%d"), location="args")
+        args = parser.parse_args()
+
+        return jsonify(PaymentHistoryService.get_statistics(db.session, **parse_date_range(args)))
 
 # Webhook endpoint to handle payment notifications
 class ApiPlanWebhook(Resource):
@@ -311,10 +310,9 @@ class ApiPlanWebhook(Resource):
             return 'Access Token không được cung cấp hoặc không hợp lệ.', 401
         token = auth[7:]
         # fetch stored token
-        sys_info = db.session.query(SystemCustomInfo).filter_by(name='payment_settings').first()
-        if not sys_info:
+        settings = PlanCatalogService.get_payment_settings()
+        if not settings:
             return 'Access Token không được cung cấp hoặc không hợp lệ.', 401
-        settings = PaymentSettingsModel.model_validate(sys_info.value)
         if token != settings.access_token:
             return 'Chữ ký không hợp lệ.', 401
 
@@ -322,56 +320,20 @@ class ApiPlanWebhook(Resource):
         if not payload or not payload.get('status') or not payload.get('data'):
             return jsonify({'status': False, 'msg': 'Invalid payload'}), 400
 
-        for item in payload['data']:
-            try:
-                payment = PaymentHistoryModel.model_validate(item)
-            except Exception as e:
-                print(f"Error validating payment data: {e}")
-                continue
-            # record history
-            hist = PaymentsHistoryCustom(value=payment.model_dump(mode='json'))
-            db.session.add(hist)
-            # extract alies ID
-            alies_id = decode_description_pay(payment.description)
-            if not alies_id:
-                print(f"Invalid alies ID in description: {payment.description}")
-                continue
-            alies = db.session.query(AliesPaymentsCustom).filter_by(alies=alies_id).first()
-            if not alies:
-                print(f"Alies payment not found for ID: {alies_id}")
-                continue
-            info = AliesPaymentsInfo.model_validate(alies.value)
-
-            payment.id_account = info.id_account
-            payment.id_plan = info.id_plan
-            hist = PaymentsHistoryCustom(value=payment.model_dump(mode='json'))
-            db.session.add(hist)
-            
-            # get plan definitions
-            plan_cfg = db.session.query(SystemCustomInfo).filter_by(name='plan').first()
-            plans = plan_cfg.value if plan_cfg else []
-            plan = next((p for p in plans if p.get('id') == info.id_plan), None)
-            if not plan:
-                print(f"Plan not found for ID: {info.id_plan}")
-                continue
-            # find account
-            account = db.session.query(Account).filter_by(id=info.id_account).first()
-            if not account or payment.amount < plan.get('price', 0):
-                print(f"Account not found or payment amount is less than plan price for account ID: {info.id_account}")
-                continue
-            # assign plan and expiration
-            account.id_custom_plan = info.id_plan
-            account.plan_expiration = datetime.now(UTC) + timedelta(days=plan.get('plan_expiration', 0))
-            db.session.add(account)
-            db.session.delete(alies)
-
-        db.session.commit()
-        return jsonify({'status': True, 'msg': 'OK'})
+        # Resolve and record the whole batch, transactions already processed are skipped
+        result = PaymentWebhookService.process(payload['data'])
+        FeatureService.invalidate_owner_features(result.upgraded_account_ids)
+        # Notify the payment screens waiting on the upgraded accounts
+        for account_id in result.upgraded_account_ids:
+            PaymentConfirmationService.publish(account_id)
+        return jsonify({'status': True, 'msg': 'OK', 'data': [item.model_dump(mode='json') for item in result.results]})
 
 api.add_resource(ApiPlanWebhook, "/webhook/plan")
 api.add_resource(ApiPlan, "/plans")
 api.add_resource(ApiPaymentSettings, "/payment_settings")
 api.add_resource(ApiPaymentHistory, "/payment_history")
+api.add_resource(ApiPaymentHistoryStatistics, "/payment_history/statistics")
 api_console.add_resource(ApiPlanPublic, "/custom/plans")
 api_console.add_resource(ApiPaymentSettingsPublic, "/custom/payment_settings")
-api_console.add_resource(ApiPayRequest, "/custom/pay_request", "/custom/pay_request/<string:id_account>")
\ No newline at end of file
+api_console.add_resource(ApiPayRequest, "/custom/pay_request", "/custom/pay_request/<string:id_account>")
+api_console.add_resource(ApiPayRequestWait, "/custom/pay_request/<string:id_account>/wait")
\ No newline at end of file
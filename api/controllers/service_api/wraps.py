@@ -19,6 +19,7 @@ from libs.login import _get_user
 from models.account import Account, Tenant, TenantAccountJoin, TenantStatus
 from models.dataset import RateLimitLog
 from models.model import ApiToken, App, EndUser
+from services.api_token_cache import api_token_cache
 from services.feature_service import FeatureService
 
 
@@ -256,6 +257,12 @@ def validate_and_get_api_token(scope: str | None = None):
     if auth_scheme != "bearer":
         raise Unauthorized("Authorization scheme must be 'Bearer'")
 
+    if api_token_cache.enabled:
+        api_token = api_token_cache.get(scope, auth_token)
+        if not api_token:
+            raise Unauthorized("Access token is invalid")
+        return api_token
+
     current_time = datetime.now(UTC).replace(tzinfo=None)
     cutoff_time = current_time - timedelta(minutes=1)
     with Session(db.engine, expire_on_commit=False) as session:
@@ -11,6 +11,7 @@ from libs.passport import PassportService
 from models.model import App, EndUser, Site
 from services.enterprise.enterprise_service import EnterpriseService, WebAppSettings
 from services.feature_service import FeatureService
+from services.principal_cache import principal_cache
 from services.webapp_auth_service import WebAppAuthService
 
 
@@ -48,18 +49,8 @@ def decode_jwt_token():
         decoded = PassportService().verify(tk)
         app_code = decoded.get("app_code")
         app_id = decoded.get("app_id")
-        app_model = db.session.query(App).filter(App.id == app_id).first()
-        site = db.session.query(Site).filter(Site.code == app_code).first()
-        if not app_model:
-            raise NotFound()
-        if not app_code or not site:
-            raise BadRequest("Site URL is no longer valid.")
-        if app_model.enable_site is False:
-            raise BadRequest("Site is disabled.")
         end_user_id = decoded.get("end_user_id")
-        end_user = db.session.query(EndUser).filter(EndUser.id == end_user_id).first()
-        if not end_user:
-            raise NotFound()
+        app_model, end_user = _load_app_and_end_user(app_id, app_code, end_user_id)
 
         # for enterprise webapp auth
         app_web_auth_enabled = False
@@ -89,6 +80,36 @@ def decode_jwt_token():
         raise Unauthorized(e.description)
 
 
+def _load_app_and_end_user(app_id, app_code, end_user_id) -> tuple[App, EndUser]:
+    # the app and end user are served from the principal cache when they, or the site of the app, did not change
+    cache_key = f"web_app:{app_id}:{app_code}:{end_user_id}"
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return (
+            principal_cache.restore(db.session, App, principal["app"]),
+            principal_cache.restore(db.session, EndUser, principal["end_user"]),
+        )
+
+    app_model = db.session.query(App).filter(App.id == app_id).first()
+    site = db.session.query(Site).filter(Site.code == app_code).first()
+    if not app_model:
+        raise NotFound()
+    if not app_code or not site:
+        raise BadRequest("Site URL is no longer valid.")
+    if app_model.enable_site is False:
+        raise BadRequest("Site is disabled.")
+    end_user = db.session.query(EndUser).filter(EndUser.id == end_user_id).first()
+    if not end_user:
+        raise NotFound()
+
+    principal_cache.put(
+        cache_key,
+        [principal_cache.scope("app", app_model.id), principal_cache.scope("end_user", end_user.id)],
+        {"app": principal_cache.snapshot(app_model), "end_user": principal_cache.snapshot(end_user)},
+    )
+    return app_model, end_user
+
+
 def _validate_webapp_token(decoded, app_web_auth_enabled: bool, system_webapp_auth_enabled: bool):
     # Check if authentication is enforced for web app, and if the token source is not webapp,
     # raise an error and redirect to login
@@ -79,6 +79,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_iteration_run.node_id,
                 user_inputs=dict(self.application_generate_entity.single_iteration_run.inputs),
             )
+            graph_config = workflow.graph_dict
         elif self.application_generate_entity.single_loop_run:
             # if only single loop run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_loop(
@@ -86,6 +87,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_loop_run.node_id,
                 user_inputs=dict(self.application_generate_entity.single_loop_run.inputs),
             )
+            graph_config = workflow.graph_dict
         else:
             inputs = self.application_generate_entity.inputs
             query = self.application_generate_entity.query
@@ -152,7 +154,9 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            compiled_graph = self._get_compiled_graph(workflow)
+            graph = compiled_graph.graph
+            graph_config = compiled_graph.graph_config
 
         db.session.close()
 
@@ -163,7 +167,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
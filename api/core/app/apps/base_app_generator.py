@@ -2,8 +2,12 @@ import json
 from collections.abc import Generator, Mapping, Sequence
 from typing import TYPE_CHECKING, Any, Optional, Union
 
+from flask import has_app_context
+
+from configs import dify_config
 from core.app.app_config.entities import VariableEntityType
 from core.file import File, FileUploadConfig
+from extensions.ext_database import db
 from factories import file_factory
 
 if TYPE_CHECKING:
@@ -152,6 +156,8 @@ class BaseAppGenerator:
         else:
 
             def gen():
+                if dify_config.APP_STREAM_SESSION_CHECKPOINTS_ENABLED:
+                    cls._release_db_session()
                 for message in generator:
                     if isinstance(message, Mapping | dict):
                         yield f"data: {json.dumps(message)}\n\n"
@@ -159,3 +165,13 @@ class BaseAppGenerator:
                         yield f"event: {message}\n\n"
 
             return gen()
+
+    @staticmethod
+    def _release_db_session() -> None:
+        """
+        Close the request session before streaming, so its connection is returned to the pool.
+        The generate records are committed before the stream starts, and the task pipelines only open
+        short-lived sessions to save their progress, objects loaded by the request are detached.
+        """
+        if has_app_context():
+            db.session.close()
@@ -1,9 +1,13 @@
+import logging
 import queue
+import threading
 import time
+import weakref
 from abc import abstractmethod
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Optional, cast
 
+from opentelemetry.metrics import get_meter
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
@@ -12,18 +16,114 @@ from core.app.entities.queue_entities import (
     AppQueueEvent,
     MessageQueueMessage,
     QueueErrorEvent,
+    QueueLLMChunkEvent,
     QueuePingEvent,
     QueueStopEvent,
+    QueueTextChunkEvent,
     WorkflowQueueMessage,
 )
 from extensions.ext_redis import redis_client
 
+logger = logging.getLogger(__name__)
+
+# when stop signals are pushed via pub/sub, the stop flag is still polled at this interval (in seconds)
+# as a fallback for signals lost while the subscriber was reconnecting
+STOP_FLAG_POLL_INTERVAL = 10
+
+_meter = get_meter("app_queue_manager")
+_queue_depth_histogram = _meter.create_histogram(
+    "app.queue.depth",
+    description="Number of pending events in a generate task queue when an event is consumed",
+    unit="{event}",
+)
+_backpressure_wait_histogram = _meter.create_histogram(
+    "app.queue.backpressure.wait",
+    description="Time a producer was blocked because the generate task queue was full",
+    unit="s",
+)
+_coalesced_chunk_counter = _meter.create_counter(
+    "app.queue.coalesced_chunks",
+    description="Number of text chunk events merged into a preceding chunk event",
+    unit="{event}",
+)
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
     TASK_PIPELINE = 2
 
 
+class TaskStopSignalSubscriber:
+    """
+    Process-wide Redis pub/sub subscriber for task stop signals.
+
+    A single subscription is shared by all queue managers of the process, stop signals published by
+    `AppQueueManager.set_stop_flag` are dispatched to the `threading.Event` registered for the task.
+    """
+
+    CHANNEL = "generate_task_stopped"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: weakref.WeakValueDictionary[str, threading.Event] = weakref.WeakValueDictionary()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, task_id: str) -> Optional[threading.Event]:
+        """
+        Register a task and return the event set when the task is stopped,
+        or None if the subscription could not be established
+        :param task_id: task id
+        :return:
+        """
+        with self._lock:
+            if not self._ensure_started():
+                return None
+
+            event = self._events.get(task_id)
+            if event is None:
+                event = threading.Event()
+                self._events[task_id] = event
+            return event
+
+    def _ensure_started(self) -> bool:
+        if self._thread is not None and self._thread.is_alive():
+            return True
+
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.CHANNEL)
+        except Exception:
+            logger.exception("Failed to subscribe to task stop signals, falling back to polling")
+            return False
+
+        self._thread = threading.Thread(target=self._run, args=(pubsub,), name="task-stop-signal", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, pubsub: Any) -> None:
+        try:
+            for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+
+                data = message.get("data")
+                task_id = data.decode("utf-8") if isinstance(data, bytes) else str(data)
+                with self._lock:
+                    event = self._events.get(task_id)
+                if event is not None:
+                    event.set()
+        except Exception:
+            logger.exception("Task stop signal subscriber exited")
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+task_stop_signal_subscriber = TaskStopSignalSubscriber()
+
+
 class AppQueueManager:
     def __init__(self, task_id: str, user_id: str, invoke_from: InvokeFrom) -> None:
         if not user_id:
@@ -38,9 +138,43 @@ class AppQueueManager:
             AppQueueManager._generate_task_belong_cache_key(self._task_id), 1800, f"{user_prefix}-{self._user_id}"
         )
 
+        # the bound only applies to events published by the application manager, events published by the
+        # task pipeline come from the listening thread itself and must never block
         q: queue.Queue[WorkflowQueueMessage | MessageQueueMessage | None] = queue.Queue()
 
         self._q = q
+        self._max_size = dify_config.APP_QUEUE_MAX_SIZE
+        self._not_full = threading.Condition()
+        self._max_depth = 0
+        self._created_at = time.time()
+        self._listener_closed = False
+
+        self._stopped = False
+        self._last_stop_poll_time: float = 0
+        self._stop_event: Optional[threading.Event] = None
+        if dify_config.APP_QUEUE_STOP_SIGNAL_PUBSUB_ENABLED:
+            self._stop_event = task_stop_signal_subscriber.register(self._task_id)
+
+        self._chunk_merge_enabled = dify_config.APP_QUEUE_CHUNK_MERGE_ENABLED
+        self._chunk_merge_max_chars = dify_config.APP_QUEUE_CHUNK_MERGE_MAX_CHARS
+        self._chunk_merge_max_delay = dify_config.APP_QUEUE_CHUNK_MERGE_MAX_DELAY_MS / 1000
+        self._pending_chunk_lock = threading.Lock()
+        self._pending_chunk: Optional[AppQueueEvent] = None
+        self._pending_chunk_since: float = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of events waiting to be consumed
+        """
+        return self._q.qsize()
+
+    @property
+    def max_queue_depth(self) -> int:
+        """
+        Highest number of events that were waiting to be consumed at the same time
+        """
+        return self._max_depth
 
     def listen(self):
         """
@@ -49,29 +183,43 @@ class AppQueueManager:
         """
         # wait for APP_MAX_EXECUTION_TIME seconds to stop listen
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
+        get_timeout = min(1.0, self._chunk_merge_max_delay) if self._chunk_merge_enabled else 1
         start_time = time.time()
         last_ping_time: int | float = 0
-        while True:
-            try:
-                message = self._q.get(timeout=1)
-                if message is None:
-                    break
-
-                yield message
-            except queue.Empty:
-                continue
-            finally:
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= listen_timeout or self._is_stopped():
-                    # publish two messages to make sure the client can receive the stop signal
-                    # and stop listening after the stop signal processed
-                    self.publish(
-                        QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
-                    )
-
-                if elapsed_time // 10 > last_ping_time:
-                    self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
-                    last_ping_time = elapsed_time // 10
+        try:
+            while True:
+                try:
+                    message = self._q.get(timeout=get_timeout)
+                    if self._max_size:
+                        with self._not_full:
+                            self._not_full.notify_all()
+                    if message is None:
+                        break
+
+                    _queue_depth_histogram.record(self._q.qsize())
+                    yield message
+                except queue.Empty:
+                    continue
+                finally:
+                    if self._chunk_merge_enabled:
+                        self._flush_expired_chunk()
+
+                    elapsed_time = time.time() - start_time
+                    if elapsed_time >= listen_timeout or self._is_stopped():
+                        # publish two messages to make sure the client can receive the stop signal
+                        # and stop listening after the stop signal processed
+                        self.publish(
+                            QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
+                        )
+
+                    if elapsed_time // 10 > last_ping_time:
+                        self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                        last_ping_time = elapsed_time // 10
+        finally:
+            self._listener_closed = True
+            if self._max_size:
+                with self._not_full:
+                    self._not_full.notify_all()
 
     def stop_listen(self) -> None:
         """
@@ -97,6 +245,10 @@ class AppQueueManager:
         :return:
         """
         self._check_for_sqlalchemy_models(event.model_dump())
+        if self._chunk_merge_enabled and pub_from == PublishFrom.APPLICATION_MANAGER:
+            with self._pending_chunk_lock:
+                if self._coalesce_chunk(event, pub_from):
+                    return
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -109,6 +261,85 @@ class AppQueueManager:
         """
         raise NotImplementedError
 
+    def _put(self, message: WorkflowQueueMessage | MessageQueueMessage, pub_from: PublishFrom) -> None:
+        """
+        Put message into queue, blocking the application manager while the queue is full
+        :param message: queue message
+        :param pub_from: publish from
+        :return:
+        """
+        if self._max_size and pub_from == PublishFrom.APPLICATION_MANAGER and self._q.qsize() >= self._max_size:
+            wait_start = time.perf_counter()
+            with self._not_full:
+                while self._q.qsize() >= self._max_size:
+                    if (
+                        self._listener_closed
+                        or time.time() - self._created_at >= dify_config.APP_MAX_EXECUTION_TIME
+                        or self._is_stopped()
+                    ):
+                        raise GenerateTaskStoppedError()
+                    self._not_full.wait(timeout=1)
+            _backpressure_wait_histogram.record(time.perf_counter() - wait_start)
+
+        self._q.put(message)
+        self._max_depth = max(self._max_depth, self._q.qsize())
+
+    def _coalesce_chunk(self, event: AppQueueEvent, pub_from: PublishFrom) -> bool:
+        """
+        Merge text chunk event into the pending chunk, must be called with the pending chunk lock held
+        :param event: event
+        :param pub_from: publish from
+        :return: True if the event was absorbed and must not be published
+        """
+        pending = self._pending_chunk
+        if pending is not None:
+            merged = _merge_chunk_events(pending, event)
+            if merged is not None:
+                _coalesced_chunk_counter.add(1)
+                self._pending_chunk = merged
+                if _chunk_text_length(merged) >= self._chunk_merge_max_chars:
+                    self._flush_pending_chunk(pub_from)
+                return True
+
+            self._flush_pending_chunk(pub_from)
+
+        if _chunk_text_length(event) is None:
+            return False
+
+        self._pending_chunk = event
+        self._pending_chunk_since = time.monotonic()
+        if _chunk_text_length(event) >= self._chunk_merge_max_chars:
+            self._flush_pending_chunk(pub_from)
+        return True
+
+    def _flush_pending_chunk(self, pub_from: PublishFrom) -> None:
+        pending = self._pending_chunk
+        if pending is None:
+            return
+
+        self._pending_chunk = None
+        self._publish(pending, pub_from)
+
+    def _flush_expired_chunk(self) -> None:
+        """
+        Flush the pending chunk once it has been held back longer than the merge delay,
+        called from the listening thread
+        """
+        if self._pending_chunk is None:
+            return
+
+        # never wait for the producer here, it may hold the lock while blocked on a full queue
+        if not self._pending_chunk_lock.acquire(blocking=False):
+            return
+        try:
+            if (
+                self._pending_chunk is not None
+                and time.monotonic() - self._pending_chunk_since >= self._chunk_merge_max_delay
+            ):
+                self._flush_pending_chunk(PublishFrom.TASK_PIPELINE)
+        finally:
+            self._pending_chunk_lock.release()
+
     @classmethod
     def set_stop_flag(cls, task_id: str, invoke_from: InvokeFrom, user_id: str) -> None:
         """
@@ -125,15 +356,31 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        if dify_config.APP_QUEUE_STOP_SIGNAL_PUBSUB_ENABLED:
+            redis_client.publish(TaskStopSignalSubscriber.CHANNEL, task_id)
 
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
         :return:
         """
+        if self._stopped:
+            return True
+
+        if self._stop_event is not None:
+            if self._stop_event.is_set():
+                self._stopped = True
+                return True
+
+            now = time.monotonic()
+            if now - self._last_stop_poll_time < STOP_FLAG_POLL_INTERVAL:
+                return False
+            self._last_stop_poll_time = now
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stopped = True
             return True
 
         return False
@@ -171,5 +418,55 @@ class AppQueueManager:
                 )
 
 
+def _chunk_text_length(event: AppQueueEvent) -> Optional[int]:
+    """
+    Get the text length of a chunk event that can be coalesced, None if the event can't be coalesced
+    """
+    if isinstance(event, QueueTextChunkEvent):
+        return len(event.text)
+
+    if isinstance(event, QueueLLMChunkEvent):
+        delta = event.chunk.delta
+        if (
+            delta.usage is not None
+            or delta.finish_reason is not None
+            or delta.message.tool_calls
+            or not isinstance(delta.message.content, str)
+        ):
+            return None
+        return len(delta.message.content)
+
+    return None
+
+
+def _merge_chunk_events(pending: AppQueueEvent, event: AppQueueEvent) -> Optional[AppQueueEvent]:
+    """
+    Merge event into the pending chunk event, None if the two events can't be merged
+    """
+    if _chunk_text_length(event) is None:
+        return None
+
+    if isinstance(pending, QueueTextChunkEvent) and isinstance(event, QueueTextChunkEvent):
+        if (
+            pending.from_variable_selector != event.from_variable_selector
+            or pending.in_iteration_id != event.in_iteration_id
+            or pending.in_loop_id != event.in_loop_id
+        ):
+            return None
+        return pending.model_copy(update={"text": pending.text + event.text})
+
+    if isinstance(pending, QueueLLMChunkEvent) and isinstance(event, QueueLLMChunkEvent):
+        pending_chunk, chunk = pending.chunk, event.chunk
+        if pending_chunk.model != chunk.model or pending_chunk.delta.index > chunk.delta.index:
+            return None
+        message = pending_chunk.delta.message.model_copy(
+            update={"content": cast(str, pending_chunk.delta.message.content) + cast(str, chunk.delta.message.content)}
+        )
+        delta = pending_chunk.delta.model_copy(update={"message": message})
+        return pending.model_copy(update={"chunk": pending_chunk.model_copy(update={"delta": delta})})
+
+    return None
+
+
 class GenerateTaskStoppedError(Exception):
     pass
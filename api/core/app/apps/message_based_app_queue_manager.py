@@ -45,7 +45,7 @@ class MessageBasedAppQueueManager(AppQueueManager):
             event=event,
         )
 
-        self._q.put(message)
+        self._put(message, pub_from)
 
         if isinstance(
             event, QueueStopEvent | QueueErrorEvent | QueueMessageEndEvent | QueueAdvancedChatMessageEndEvent
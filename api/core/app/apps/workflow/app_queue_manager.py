@@ -27,7 +27,7 @@ class WorkflowAppQueueManager(AppQueueManager):
         """
         message = WorkflowQueueMessage(task_id=self._task_id, app_mode=self._app_mode, event=event)
 
-        self._q.put(message)
+        self._put(message, pub_from)
 
         if isinstance(
             event,
@@ -78,6 +78,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_iteration_run.node_id,
                 user_inputs=self.application_generate_entity.single_iteration_run.inputs,
             )
+            graph_config = workflow.graph_dict
         elif self.application_generate_entity.single_loop_run:
             # if only single loop run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_loop(
@@ -85,6 +86,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_loop_run.node_id,
                 user_inputs=self.application_generate_entity.single_loop_run.inputs,
             )
+            graph_config = workflow.graph_dict
         else:
             inputs = self.application_generate_entity.inputs
             files = self.application_generate_entity.files
@@ -106,7 +108,9 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            compiled_graph = self._get_compiled_graph(workflow)
+            graph = compiled_graph.graph
+            graph_config = compiled_graph.graph_config
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
@@ -115,7 +119,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
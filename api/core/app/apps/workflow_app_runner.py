@@ -60,6 +60,7 @@ from core.workflow.graph_engine.entities.event import (
     ParallelBranchRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import CompiledGraph, graph_cache
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.node_mapping import NODE_TYPE_CLASSES_MAPPING
 from core.workflow.workflow_entry import WorkflowEntry
@@ -72,25 +73,11 @@ class WorkflowBasedAppRunner(AppRunner):
     def __init__(self, queue_manager: AppQueueManager):
         self.queue_manager = queue_manager
 
-    def _init_graph(self, graph_config: Mapping[str, Any]) -> Graph:
+    def _get_compiled_graph(self, workflow: Workflow) -> CompiledGraph:
         """
-        Init graph
+        Get compiled graph of the workflow, shared by all runs of the same workflow version
         """
-        if "nodes" not in graph_config or "edges" not in graph_config:
-            raise ValueError("nodes or edges not found in workflow graph")
-
-        if not isinstance(graph_config.get("nodes"), list):
-            raise ValueError("nodes in workflow graph must be a list")
-
-        if not isinstance(graph_config.get("edges"), list):
-            raise ValueError("edges in workflow graph must be a list")
-        # init graph
-        graph = Graph.init(graph_config=graph_config)
-
-        if not graph:
-            raise ValueError("graph not found in workflow")
-
-        return graph
+        return graph_cache.get(workflow.id, workflow.graph)
 
     def _get_graph_and_variable_pool_of_single_iteration(
         self,
@@ -1 +1 @@
-from .rate_limit import RateLimit
+from .rate_limit import RateLimit, RequestRateLimit
@@ -3,20 +3,61 @@ import time
 import uuid
 from collections.abc import Generator, Mapping
 from datetime import timedelta
+from threading import Lock
 from typing import Any, Optional, Union
 
+from cachetools import TTLCache
+
 from core.errors.error import AppInvokeQuotaExceededError
 from extensions.ext_redis import redis_client
 
 logger = logging.getLogger(__name__)
 
+# KEYS[1]: active requests sorted set, scored by request start time
+# ARGV: request id, max alive time, max active requests, key ttl
+# the time is read from redis so that the scores of every process come from one clock
+_ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tostring(now - tonumber(ARGV[2])))
+local active = redis.call('ZCARD', KEYS[1])
+if active >= tonumber(ARGV[3]) then
+    return {0, active}
+end
+redis.call('ZADD', KEYS[1], tostring(now), ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, active + 1}
+"""
+
+# KEYS[1]: token bucket hash
+# ARGV: tokens per second, bucket capacity
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return allowed
+"""
+
 
 class RateLimit:
     _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:max_active_requests"
-    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests"
+    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_request_set"
     _UNLIMITED_REQUEST_ID = "unlimited_request_id"
     _REQUEST_MAX_ALIVE_TIME = 10 * 60  # 10 minutes
-    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # recalculate request_count from request_detail every 5 minutes
+    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # re-sync max_active_requests from redis every 5 minutes
+    _SATURATED_LOCAL_TTL = 1  # reject locally for 1 second once redis reported the limit as saturated
     _instance_dict: dict[str, "RateLimit"] = {}
 
     def __new__(cls: type["RateLimit"], client_id: str, max_active_requests: int):
@@ -37,6 +78,8 @@ class RateLimit:
         self.active_requests_key = self._ACTIVE_REQUESTS_KEY.format(client_id)
         self.max_active_requests_key = self._MAX_ACTIVE_REQUESTS_KEY.format(client_id)
         self.last_recalculate_time = float("-inf")
+        self.saturated_until = float("-inf")
+        self.acquire_script = redis_client.register_script(_ACQUIRE_SCRIPT)
         self.flush_cache(use_local_value=True)
 
     def flush_cache(self, use_local_value=False):
@@ -50,40 +93,44 @@ class RateLimit:
             self.max_active_requests = int(redis_client.get(self.max_active_requests_key).decode("utf-8"))
             redis_client.expire(self.max_active_requests_key, timedelta(days=1))
 
-        # flush max active requests (in-transit request list)
-        if not redis_client.exists(self.active_requests_key):
-            return
-        request_details = redis_client.hgetall(self.active_requests_key)
-        redis_client.expire(self.active_requests_key, timedelta(days=1))
-        timeout_requests = [
-            k
-            for k, v in request_details.items()
-            if time.time() - float(v.decode("utf-8")) > RateLimit._REQUEST_MAX_ALIVE_TIME
-        ]
-        if timeout_requests:
-            redis_client.hdel(self.active_requests_key, *timeout_requests)
-
     def enter(self, request_id: Optional[str] = None) -> str:
         if self.disabled():
             return RateLimit._UNLIMITED_REQUEST_ID
-        if time.time() - self.last_recalculate_time > RateLimit._ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL:
+        now = time.time()
+        if now - self.last_recalculate_time > RateLimit._ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL:
             self.flush_cache()
+        if now < self.saturated_until:
+            self._raise_quota_exceeded()
         if not request_id:
             request_id = RateLimit.gen_request_key()
 
-        active_requests_count = redis_client.hlen(self.active_requests_key)
-        if active_requests_count >= self.max_active_requests:
-            raise AppInvokeQuotaExceededError(
-                f"Too many requests. Please try again later. The current maximum concurrent requests allowed "
-                f"for {self.client_id} is {self.max_active_requests}."
-            )
-        redis_client.hset(self.active_requests_key, request_id, str(time.time()))
+        # stale requests are evicted by start time and the slot is taken atomically in one round trip
+        acquired, _ = self.acquire_script(
+            keys=[self.active_requests_key],
+            args=[
+                request_id,
+                RateLimit._REQUEST_MAX_ALIVE_TIME,
+                self.max_active_requests,
+                int(timedelta(days=1).total_seconds()),
+            ],
+        )
+        if not acquired:
+            self.saturated_until = now + RateLimit._SATURATED_LOCAL_TTL
+            self._raise_quota_exceeded()
         return request_id
 
     def exit(self, request_id: str):
         if request_id == RateLimit._UNLIMITED_REQUEST_ID:
             return
-        redis_client.hdel(self.active_requests_key, request_id)
+        redis_client.zrem(self.active_requests_key, request_id)
+        # a slot has just been released, let the next local request go to redis
+        self.saturated_until = float("-inf")
+
+    def _raise_quota_exceeded(self):
+        raise AppInvokeQuotaExceededError(
+            f"Too many requests. Please try again later. The current maximum concurrent requests allowed "
+            f"for {self.client_id} is {self.max_active_requests}."
+        )
 
     def disabled(self):
         return self.max_active_requests <= 0
@@ -99,6 +146,53 @@ class RateLimit:
             return RateLimitGenerator(rate_limit=self, generator=generator, request_id=request_id)
 
 
+class RequestRateLimit:
+    """
+    Token bucket limit of requests per second, shared across processes through redis.
+    """
+
+    _BUCKET_KEY = "dify:rate_limit:{}:request_bucket"
+    # client id -> time until which the bucket is known to be empty
+    _empty_until: TTLCache[str, float] = TTLCache(maxsize=10000, ttl=60)
+    _empty_until_lock = Lock()
+    _script: Optional[Any] = None
+
+    def __init__(self, client_id: str, max_requests_per_second: int):
+        self.client_id = client_id
+        self.max_requests_per_second = max_requests_per_second
+        self.bucket_key = self._BUCKET_KEY.format(client_id)
+
+    def disabled(self):
+        return self.max_requests_per_second <= 0
+
+    def acquire(self) -> None:
+        if self.disabled():
+            return
+        now = time.time()
+        with self._empty_until_lock:
+            empty_until = self._empty_until.get(self.client_id)
+        if empty_until is not None and now < empty_until:
+            self._raise_rate_limited()
+
+        if RequestRateLimit._script is None:
+            RequestRateLimit._script = redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+        allowed = RequestRateLimit._script(
+            keys=[self.bucket_key],
+            args=[self.max_requests_per_second, self.max_requests_per_second],
+        )
+        if not allowed:
+            # the next token can't be refilled before 1 / rate seconds
+            with self._empty_until_lock:
+                self._empty_until[self.client_id] = now + 1 / self.max_requests_per_second
+            self._raise_rate_limited()
+
+    def _raise_rate_limited(self):
+        raise AppInvokeQuotaExceededError(
+            f"Too many requests. Please try again later. The current maximum requests per second allowed "
+            f"for {self.client_id} is {self.max_requests_per_second}."
+        )
+
+
 class RateLimitGenerator:
     def __init__(self, rate_limit: RateLimit, generator: Generator[str, None, None], request_id: str):
         self.rate_limit = rate_limit
@@ -469,9 +469,10 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
         :param event: agent thought event
         :return:
         """
-        agent_thought: Optional[MessageAgentThought] = (
-            db.session.query(MessageAgentThought).filter(MessageAgentThought.id == event.agent_thought_id).first()
-        )
+        with Session(db.engine, expire_on_commit=False) as session:
+            agent_thought: Optional[MessageAgentThought] = session.scalar(
+                select(MessageAgentThought).where(MessageAgentThought.id == event.agent_thought_id)
+            )
 
         if agent_thought:
             return AgentThoughtStreamResponse(
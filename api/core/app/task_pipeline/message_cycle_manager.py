@@ -3,6 +3,8 @@ from threading import Thread
 from typing import Optional, Union
 
 from flask import Flask, current_app
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from configs import dify_config
 from core.app.entities.app_invoke_entities import (
@@ -28,8 +30,8 @@ from core.app.entities.task_entities import (
 from core.llm_generator.llm_generator import LLMGenerator
 from core.tools.signature import sign_tool_file
 from extensions.ext_database import db
+from models.account import Account
 from models.model import AppMode, Conversation, MessageAnnotation, MessageFile
-from services.annotation_service import AppAnnotationService
 
 
 class MessageCycleManager:
@@ -110,20 +112,23 @@ class MessageCycleManager:
         :param event: event
         :return:
         """
-        annotation = AppAnnotationService.get_annotation_by_id(event.message_annotation_id)
-        if annotation:
-            account = annotation.account
-            self._task_state.metadata.annotation_reply = AnnotationReply(
-                id=annotation.id,
-                account=AnnotationReplyAccount(
-                    id=annotation.account_id,
-                    name=account.name if account else "Dify user",
-                ),
+        with Session(db.engine, expire_on_commit=False) as session:
+            annotation = session.scalar(
+                select(MessageAnnotation).where(MessageAnnotation.id == event.message_annotation_id)
             )
+            if not annotation:
+                return None
+            account_name = session.scalar(select(Account.name).where(Account.id == annotation.account_id))
+
+        self._task_state.metadata.annotation_reply = AnnotationReply(
+            id=annotation.id,
+            account=AnnotationReplyAccount(
+                id=annotation.account_id,
+                name=account_name or "Dify user",
+            ),
+        )
 
-            return annotation
-
-        return None
+        return annotation
 
     def handle_retriever_resources(self, event: QueueRetrieverResourcesEvent) -> None:
         """
@@ -140,7 +145,8 @@ class MessageCycleManager:
         :param event: event
         :return:
         """
-        message_file = db.session.query(MessageFile).filter(MessageFile.id == event.message_file_id).first()
+        with Session(db.engine, expire_on_commit=False) as session:
+            message_file = session.scalar(select(MessageFile).where(MessageFile.id == event.message_file_id))
 
         if message_file and message_file.url is not None:
             # get tool file id
@@ -12,6 +12,7 @@ from constants import HIDDEN_VALUE
 from core.entities.model_entities import ModelStatus, ModelWithProviderEntity, SimpleModelProviderEntity
 from core.entities.provider_entities import (
     CustomConfiguration,
+    LoadBalancingStrategy,
     ModelSettings,
     SystemConfiguration,
     SystemConfigurationStatus,
@@ -569,11 +570,14 @@ class ProviderConfiguration(BaseModel):
             .first()
         )
 
-    def enable_model_load_balancing(self, model_type: ModelType, model: str) -> ProviderModelSetting:
+    def enable_model_load_balancing(
+        self, model_type: ModelType, model: str, strategy: Optional[LoadBalancingStrategy] = None
+    ) -> ProviderModelSetting:
         """
         Enable model load balancing.
         :param model_type: model type
         :param model: model name
+        :param strategy: strategy to choose the credentials, unchanged if not provided
         :return:
         """
         model_provider_id = ModelProviderID(self.provider.provider)
@@ -599,6 +603,8 @@ class ProviderConfiguration(BaseModel):
 
         if model_setting:
             model_setting.load_balancing_enabled = True
+            if strategy:
+                model_setting.load_balancing_strategy = strategy
             model_setting.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
             db.session.commit()
         else:
@@ -608,6 +614,7 @@ class ProviderConfiguration(BaseModel):
             model_setting.model_type = model_type.to_origin_model_type()
             model_setting.model_name = model
             model_setting.load_balancing_enabled = True
+            model_setting.load_balancing_strategy = strategy or LoadBalancingStrategy.ROUND_ROBIN
             db.session.add(model_setting)
             db.session.commit()
 
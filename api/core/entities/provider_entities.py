@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, StrEnum
 from typing import Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -110,6 +110,21 @@ class CustomConfiguration(BaseModel):
     models: list[CustomModelConfiguration] = []
 
 
+class LoadBalancingStrategy(StrEnum):
+    """
+    Strategy to choose the credentials of a load balanced model.
+    """
+
+    ROUND_ROBIN = "round_robin"
+    """each credentials in turn"""
+
+    WEIGHTED = "weighted"
+    """randomly, weighted by the rolling latency and error rate of each credentials"""
+
+    LEAST_OUTSTANDING = "least_outstanding"
+    """the credentials with the fewest in-flight requests"""
+
+
 class ModelLoadBalancingConfiguration(BaseModel):
     """
     Class for model load balancing configuration.
@@ -129,6 +144,7 @@ class ModelSettings(BaseModel):
     model_type: ModelType
     enabled: bool = True
     load_balancing_configs: list[ModelLoadBalancingConfiguration] = []
+    load_balancing_strategy: LoadBalancingStrategy = LoadBalancingStrategy.ROUND_ROBIN
 
     # pydantic configs
     model_config = ConfigDict(protected_namespaces=())
@@ -0,0 +1,102 @@
+"""
+Base64 encoding of files for multimodal prompts
+"""
+
+import importlib.util
+import io
+import logging
+import threading
+from collections.abc import Callable, Hashable
+
+from cachetools import LRUCache
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+# images are only downscaled when the optional `Pillow` package is installed
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# formats written back as they were read, so that the format and mime type of the file stay valid
+_DOWNSCALABLE_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+
+class EncodedFileCache:
+    """
+    Size-bounded LRU cache of base64 encoded file contents, the size of an entry is the length of its string.
+
+    Stored files are never rewritten under the same storage key, so the storage key and size of a file with the
+    options of the encoding address its encoded content.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._cache: LRUCache[Hashable, str] = LRUCache(maxsize=max(max_size, 1), getsizeof=len)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, encode: Callable[[], str]) -> str:
+        """
+        Get the encoded content of a file, encode it on cache miss
+
+        :param key: content address of the encoded file
+        :param encode: function encoding the file
+        :return: base64 encoded content
+        """
+        if self._max_size <= 0:
+            return encode()
+
+        with self._lock:
+            encoded = self._cache.get(key)
+        if encoded is None:
+            encoded = encode()
+            # a single entry larger than the cache would evict everything else
+            if len(encoded) <= self._max_size:
+                with self._lock:
+                    self._cache[key] = encoded
+
+        return encoded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def downscale_image(data: bytes, max_resolution: int, quality: int) -> bytes:
+    """
+    Downscale an image to fit in max_resolution x max_resolution pixels, keeping its format and aspect ratio.
+
+    The original data is returned when the image fits already, is animated, can not be read or would not get smaller.
+    """
+    if not PILLOW_AVAILABLE:
+        return data
+
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format
+            if (
+                image_format not in _DOWNSCALABLE_FORMATS
+                or getattr(image, "n_frames", 1) > 1
+                or max(image.size) <= max_resolution
+            ):
+                return data
+
+            # the EXIF orientation is not kept by the resized image, apply it to the pixels
+            resized = ImageOps.exif_transpose(image)
+            resized.thumbnail((max_resolution, max_resolution))
+
+            output = io.BytesIO()
+            if image_format == "PNG":
+                resized.save(output, format=image_format, optimize=True)
+            else:
+                resized.save(output, format=image_format, quality=quality)
+    except Exception:
+        logger.warning("Failed to downscale image, sending it unchanged", exc_info=True)
+        return data
+
+    downscaled = output.getvalue()
+    return downscaled if len(downscaled) < len(data) else data
+
+
+encoded_file_cache = EncodedFileCache(max_size=dify_config.MULTIMODAL_ENCODED_CACHE_MAX_SIZE)
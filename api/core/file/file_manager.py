@@ -14,6 +14,7 @@ from core.tools.signature import sign_tool_file
 from extensions.ext_storage import storage
 
 from . import helpers
+from .encoding import downscale_image, encoded_file_cache
 from .enums import FileAttribute
 from .models import File, FileTransferMethod, FileType
 
@@ -107,11 +108,25 @@ def _get_encoded_string(f: File, /):
         case FileTransferMethod.REMOTE_URL:
             response = ssrf_proxy.get(f.remote_url, follow_redirects=True)
             response.raise_for_status()
-            data = response.content
-        case FileTransferMethod.LOCAL_FILE:
-            data = _download_file_content(f._storage_key)
-        case FileTransferMethod.TOOL_FILE:
-            data = _download_file_content(f._storage_key)
+            return _encode(f, response.content)
+        case FileTransferMethod.LOCAL_FILE | FileTransferMethod.TOOL_FILE:
+            # a file referenced again, in later turns or by other nodes, is neither downloaded nor encoded again
+            key = (f._storage_key, f.size, *_get_encoding_options(f))
+            return encoded_file_cache.get(key, lambda: _encode(f, _download_file_content(f._storage_key)))
+        case _:
+            raise ValueError(f"unsupported transfer method: {f.transfer_method}")
+
+
+def _get_encoding_options(f: File, /) -> tuple[int, ...]:
+    if f.type == FileType.IMAGE and dify_config.MULTIMODAL_IMAGE_MAX_RESOLUTION:
+        return dify_config.MULTIMODAL_IMAGE_MAX_RESOLUTION, dify_config.MULTIMODAL_IMAGE_QUALITY
+    return ()
+
+
+def _encode(f: File, data: bytes, /) -> str:
+    options = _get_encoding_options(f)
+    if options:
+        data = downscale_image(data, *options)
 
     encoded_string = base64.b64encode(data).decode("utf-8")
     return encoded_string
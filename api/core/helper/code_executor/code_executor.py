@@ -1,10 +1,11 @@
 import logging
+import os
 from collections.abc import Mapping
 from enum import StrEnum
 from threading import Lock
 from typing import Any, Optional
 
-from httpx import Timeout, post
+from httpx import Client, Limits, Timeout
 from pydantic import BaseModel
 from yarl import URL
 
@@ -42,6 +43,11 @@ class CodeExecutor:
     dependencies_cache: dict[str, str] = {}
     dependencies_cache_lock = Lock()
 
+    # connections to the sandbox are kept alive and reused, one client per process
+    _client: Optional[Client] = None
+    _client_pid: Optional[int] = None
+    _client_lock = Lock()
+
     code_template_transformers: dict[CodeLanguage, type[TemplateTransformer]] = {
         CodeLanguage.PYTHON3: Python3TemplateTransformer,
         CodeLanguage.JINJA2: Jinja2TemplateTransformer,
@@ -56,6 +62,27 @@ class CodeExecutor:
 
     supported_dependencies_languages: set[CodeLanguage] = {CodeLanguage.PYTHON3}
 
+    @classmethod
+    def get_client(cls) -> Client:
+        """
+        Get the pooled client of the sandbox, a forked worker creates its own client
+        """
+        client, pid = cls._client, os.getpid()
+        if client is not None and cls._client_pid == pid:
+            return client
+
+        with cls._client_lock:
+            if cls._client is None or cls._client_pid != pid:
+                cls._client = Client(
+                    limits=Limits(
+                        max_connections=dify_config.CODE_EXECUTION_POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=dify_config.CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=dify_config.CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY,
+                    )
+                )
+                cls._client_pid = pid
+            return cls._client
+
     @classmethod
     def execute_code(cls, language: CodeLanguage, preload: str, code: str) -> str:
         """
@@ -77,7 +104,7 @@ class CodeExecutor:
         }
 
         try:
-            response = post(
+            response = cls.get_client().post(
                 str(url),
                 json=data,
                 headers=headers,
@@ -3,9 +3,16 @@ Proxy requests to avoid SSRF
 """
 
 import logging
+import os
+import threading
 import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Optional
 
 import httpx
+from httpx._utils import get_environment_proxies
 
 from configs import dify_config
 
@@ -27,6 +34,9 @@ except NameError:
 BACKOFF_FACTOR = 0.5
 STATUS_FORCELIST = [429, 500, 502, 503, 504]
 
+# request extension carrying the number of retries of a request to the retry transport
+MAX_RETRIES_EXTENSION = "ssrf_max_retries"
+
 
 class MaxRetriesExceededError(ValueError):
     """Raised when the maximum number of retries is exceeded."""
@@ -34,7 +44,161 @@ class MaxRetriesExceededError(ValueError):
     pass
 
 
-def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+class RetryTransport(httpx.BaseTransport):
+    """
+    Transport retrying the requests that fail to connect or get a status in STATUS_FORCELIST, with exponential
+    backoff. The number of retries is taken from the request extensions.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_connections_per_host: int = 0) -> None:
+        self._transport = transport
+        self._max_connections_per_host = max_connections_per_host
+        self._host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._host_semaphores_lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        max_retries = request.extensions.get(MAX_RETRIES_EXTENSION, SSRF_DEFAULT_MAX_RETRIES)
+        retries = 0
+        while True:
+            try:
+                response = self._send(request)
+                if response.status_code not in STATUS_FORCELIST or retries >= max_retries:
+                    return response
+                logging.warning(
+                    f"Received status code {response.status_code} for URL {request.url} which is in the force list"
+                )
+                response.close()
+            except httpx.RequestError as e:
+                logging.warning(f"Request to URL {request.url} failed on attempt {retries + 1}: {e}")
+                if retries >= max_retries:
+                    raise
+
+            retries += 1
+            time.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
+
+    def close(self) -> None:
+        self._transport.close()
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        if not self._max_connections_per_host:
+            return self._transport.handle_request(request)
+
+        semaphore = self._get_host_semaphore(request.url.host)
+        timeout = request.extensions.get("timeout", {}).get("pool")
+        if not semaphore.acquire(timeout=timeout):
+            raise httpx.PoolTimeout(f"Too many connections to host {request.url.host}", request=request)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        # the connection slot of the host is held until the response is closed
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingByteStream(response, semaphore),
+            extensions=response.extensions,
+        )
+
+    def _get_host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_semaphores_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._max_connections_per_host)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+
+class _ReleasingByteStream(httpx.SyncByteStream):
+    def __init__(self, response: httpx.Response, semaphore: threading.BoundedSemaphore) -> None:
+        self._response = response
+        self._semaphore: Optional[threading.BoundedSemaphore] = semaphore
+
+    def __iter__(self):
+        yield from self._response.stream
+
+    def close(self) -> None:
+        try:
+            self._response.close()
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+                self._semaphore = None
+
+
+_clients: dict[tuple, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(ssl_verify: bool = HTTP_REQUEST_NODE_SSL_VERIFY) -> httpx.Client:
+    """
+    Get the pooled client for the current proxy config and SSL verify setting, clients are created once per
+    process and reused, so that connections through the SSRF proxy are kept alive.
+    """
+    key = (
+        os.getpid(),
+        dify_config.SSRF_PROXY_ALL_URL,
+        dify_config.SSRF_PROXY_HTTP_URL,
+        dify_config.SSRF_PROXY_HTTPS_URL,
+        ssl_verify,
+    )
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _create_client(ssl_verify)
+            _clients[key] = client
+        return client
+
+
+def close_clients() -> None:
+    """
+    Close the pooled clients of the current process.
+    """
+    with _clients_lock:
+        pid = os.getpid()
+        for key, client in list(_clients.items()):
+            if key[0] == pid:
+                client.close()
+            del _clients[key]
+
+
+def _create_client(ssl_verify: bool) -> httpx.Client:
+    limits = httpx.Limits(
+        max_connections=dify_config.SSRF_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+    )
+
+    def retry_transport(proxy: Optional[str] = None) -> RetryTransport:
+        return RetryTransport(
+            httpx.HTTPTransport(proxy=proxy, verify=ssl_verify, limits=limits),
+            max_connections_per_host=dify_config.SSRF_POOL_MAX_CONNECTIONS_PER_HOST,
+        )
+
+    # the clients are shared by every tenant, so cookies set by a response must never be sent on other requests
+    cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    if dify_config.SSRF_PROXY_ALL_URL:
+        return httpx.Client(
+            transport=retry_transport(dify_config.SSRF_PROXY_ALL_URL), verify=ssl_verify, cookies=cookies
+        )
+    elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
+        proxy_mounts = {
+            "http://": retry_transport(dify_config.SSRF_PROXY_HTTP_URL),
+            "https://": retry_transport(dify_config.SSRF_PROXY_HTTPS_URL),
+        }
+        return httpx.Client(mounts=proxy_mounts, verify=ssl_verify, cookies=cookies)
+    else:
+        # httpx ignores the proxy environment variables once a transport is given, mount them as it would
+        env_proxy_mounts = {pattern: retry_transport(proxy) for pattern, proxy in get_environment_proxies().items()}
+        return httpx.Client(transport=retry_transport(), mounts=env_proxy_mounts, verify=ssl_verify, cookies=cookies)
+
+
+def _prepare_kwargs(max_retries: int, kwargs: dict) -> tuple[bool, dict]:
     if "allow_redirects" in kwargs:
         allow_redirects = kwargs.pop("allow_redirects")
         if "follow_redirects" not in kwargs:
@@ -48,42 +212,48 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
             write=dify_config.SSRF_DEFAULT_WRITE_TIME_OUT,
         )
 
-    if "ssl_verify" not in kwargs:
-        kwargs["ssl_verify"] = HTTP_REQUEST_NODE_SSL_VERIFY
+    ssl_verify = kwargs.pop("ssl_verify", HTTP_REQUEST_NODE_SSL_VERIFY)
+    kwargs["extensions"] = {**kwargs.get("extensions", {}), MAX_RETRIES_EXTENSION: max_retries}
+    return ssl_verify, kwargs
 
-    ssl_verify = kwargs.pop("ssl_verify")
 
-    retries = 0
-    while retries <= max_retries:
-        try:
-            if dify_config.SSRF_PROXY_ALL_URL:
-                with httpx.Client(proxy=dify_config.SSRF_PROXY_ALL_URL, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
-                proxy_mounts = {
-                    "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL, verify=ssl_verify),
-                    "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL, verify=ssl_verify),
-                }
-                with httpx.Client(mounts=proxy_mounts, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            else:
-                with httpx.Client(verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-
-            if response.status_code not in STATUS_FORCELIST:
-                return response
-            else:
-                logging.warning(f"Received status code {response.status_code} for URL {url} which is in the force list")
+def _check_retries_exceeded(response: httpx.Response, url, max_retries: int) -> None:
+    # the transport returns the last response once the retries are exhausted
+    if response.status_code in STATUS_FORCELIST:
+        response.close()
+        raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+
+
+def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    ssl_verify, kwargs = _prepare_kwargs(max_retries, kwargs)
+    try:
+        response = get_client(ssl_verify).request(method=method, url=url, **kwargs)
+    except httpx.RequestError as e:
+        if max_retries == 0:
+            raise
+        raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}") from e
+
+    _check_retries_exceeded(response, url, max_retries)
+    return response
+
 
+@contextmanager
+def stream_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs) -> Iterator[httpx.Response]:
+    """
+    Same as make_request, but the body is not read into memory. It is iterated with `response.iter_bytes()`
+    inside the context, and the response is closed when leaving it.
+    """
+    ssl_verify, kwargs = _prepare_kwargs(max_retries, kwargs)
+    with ExitStack() as stack:
+        try:
+            response = stack.enter_context(get_client(ssl_verify).stream(method=method, url=url, **kwargs))
         except httpx.RequestError as e:
-            logging.warning(f"Request to URL {url} failed on attempt {retries + 1}: {e}")
             if max_retries == 0:
                 raise
+            raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}") from e
 
-        retries += 1
-        if retries <= max_retries:
-            time.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
-    raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+        _check_retries_exceeded(response, url, max_retries)
+        yield response
 
 
 def get(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
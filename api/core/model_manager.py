@@ -1,11 +1,18 @@
 import logging
+import random
+import time
+import uuid
 from collections.abc import Callable, Generator, Iterable, Sequence
+from dataclasses import dataclass
+from threading import Lock
 from typing import IO, Any, Literal, Optional, Union, cast, overload
 
+from cachetools import TTLCache
+
 from configs import dify_config
 from core.entities.embedding_type import EmbeddingInputType
 from core.entities.provider_configuration import ProviderConfiguration, ProviderModelBundle
-from core.entities.provider_entities import ModelLoadBalancingConfiguration
+from core.entities.provider_entities import LoadBalancingStrategy, ModelLoadBalancingConfiguration
 from core.errors.error import ProviderTokenNotInitError
 from core.model_runtime.callbacks.base_callback import Callback
 from core.model_runtime.entities.llm_entities import LLMResult
@@ -92,6 +99,7 @@ class ModelInstance:
                     model=model,
                     load_balancing_configs=current_model_setting.load_balancing_configs,
                     managed_credentials=credentials if configuration.custom_configuration.provider else None,
+                    strategy=current_model_setting.load_balancing_strategy,
                 )
 
                 return lb_model_manager
@@ -378,23 +386,38 @@ class ModelInstance:
                 else:
                     raise last_exception
 
+            invocation_id = self.load_balancing_manager.start_invocation(lb_config)
+            started_at = time.perf_counter()
             try:
                 if "credentials" in kwargs:
                     del kwargs["credentials"]
-                return function(*args, **kwargs, credentials=lb_config.credentials)
+                result = function(*args, **kwargs, credentials=lb_config.credentials)
             except InvokeRateLimitError as e:
+                self.load_balancing_manager.end_invocation(lb_config, invocation_id, failed=True)
                 # expire in 60 seconds
                 self.load_balancing_manager.cooldown(lb_config, expire=60)
                 last_exception = e
                 continue
             except (InvokeAuthorizationError, InvokeConnectionError) as e:
+                self.load_balancing_manager.end_invocation(lb_config, invocation_id, failed=True)
                 # expire in 10 seconds
                 self.load_balancing_manager.cooldown(lb_config, expire=10)
                 last_exception = e
                 continue
             except Exception as e:
+                # other errors, e.g. invalid parameters, do not count against the credentials
+                self.load_balancing_manager.end_invocation(lb_config, invocation_id)
                 raise e
 
+            if not self.load_balancing_manager.tracks_statistics:
+                return result
+            if isinstance(result, Generator):
+                return self.load_balancing_manager.track_stream(lb_config, invocation_id, result, started_at)
+            self.load_balancing_manager.end_invocation(
+                lb_config, invocation_id, latency=time.perf_counter() - started_at, failed=False
+            )
+            return result
+
     def get_tts_voices(self, language: Optional[str] = None) -> list:
         """
         Invoke large language tts model voices
@@ -462,7 +485,74 @@ class ModelManager:
         )
 
 
+# KEYS[1]: rolling statistics hash
+# ARGV: decay, whether the invocation failed (0 or 1), latency in milliseconds or -1, key ttl
+_LB_STATISTICS_SCRIPT = """
+local decay = tonumber(ARGV[1])
+local failed = tonumber(ARGV[2])
+local latency = tonumber(ARGV[3])
+local statistics = redis.call('HMGET', KEYS[1], 'latency', 'error_rate')
+if latency >= 0 then
+    local current = tonumber(statistics[1])
+    if current then
+        latency = current + decay * (latency - current)
+    end
+    redis.call('HSET', KEYS[1], 'latency', tostring(latency))
+end
+local error_rate = tonumber(statistics[2]) or 0
+redis.call('HSET', KEYS[1], 'error_rate', tostring(error_rate + decay * (failed - error_rate)))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# KEYS[1]: in flight invocations sorted set, scored by invocation start time
+# ARGV: invocation id, max alive time, key ttl
+_LB_START_INVOCATION_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+redis.call('ZADD', KEYS[1], now, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# KEYS[1]: in flight invocations sorted set, scored by invocation start time
+# ARGV: max alive time
+_LB_IN_FLIGHT_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[1]))
+return redis.call('ZCARD', KEYS[1])
+"""
+
+
+@dataclass(frozen=True)
+class LBConfigStatistics:
+    """
+    Rolling statistics of load balanced credentials, shared by every process
+    """
+
+    latency: Optional[float] = None
+    """moving average of the latency in milliseconds, None before the first successful invocation"""
+
+    error_rate: float = 0.0
+    """moving average of the failed invocations, between 0 and 1"""
+
+    in_flight: int = 0
+
+
 class LBModelManager:
+    # rolling statistics are dropped after an hour without invocations
+    _STATISTICS_TTL = 3600
+    # invocations never ended, e.g. by a killed worker or an abandoned stream,
+    # stop counting as in flight after 10 minutes
+    _INVOCATION_MAX_ALIVE_TIME = 10 * 60
+    # lowest share of the traffic kept by credentials which keep failing
+    _MIN_SUCCESS_RATE = 0.05
+    # cooldown cache key -> time until which the credentials are in cooldown, 0 if they are not
+    _cooldowns: TTLCache[str, float] = TTLCache(maxsize=10000, ttl=max(dify_config.MODEL_LB_COOLDOWN_CACHE_TTL, 1))
+    _cooldowns_lock = Lock()
+    _statistics_script: Optional[Any] = None
+    _start_invocation_script: Optional[Any] = None
+
     def __init__(
         self,
         tenant_id: str,
@@ -471,6 +561,7 @@ class LBModelManager:
         model: str,
         load_balancing_configs: list[ModelLoadBalancingConfiguration],
         managed_credentials: Optional[dict] = None,
+        strategy: LoadBalancingStrategy = LoadBalancingStrategy.ROUND_ROBIN,
     ) -> None:
         """
         Load balancing model manager
@@ -480,12 +571,14 @@ class LBModelManager:
         :param model: model name
         :param load_balancing_configs: all load balancing configurations
         :param managed_credentials: credentials if load balancing configuration name is __inherit__
+        :param strategy: strategy to choose the next configuration
         """
         self._tenant_id = tenant_id
         self._provider = provider
         self._model_type = model_type
         self._model = model
         self._load_balancing_configs = load_balancing_configs
+        self._strategy = strategy
 
         for load_balancing_config in self._load_balancing_configs[:]:  # Iterate over a shallow copy of the list
             if load_balancing_config.name == "__inherit__":
@@ -495,12 +588,34 @@ class LBModelManager:
                 else:
                     load_balancing_config.credentials = managed_credentials
 
+    @property
+    def tracks_statistics(self) -> bool:
+        """
+        Whether the invocations are recorded, only the load-aware strategies use the statistics
+        """
+        return self._strategy != LoadBalancingStrategy.ROUND_ROBIN
+
     def fetch_next(self) -> Optional[ModelLoadBalancingConfiguration]:
         """
         Get next model load balancing config
-        Strategy: Round Robin
+        Strategy: Round Robin, Weighted or Least Outstanding requests, see LoadBalancingStrategy
         :return:
         """
+        if self._strategy == LoadBalancingStrategy.ROUND_ROBIN:
+            config = self._fetch_next_round_robin()
+        else:
+            config = self._fetch_next_by_statistics()
+
+        if config and dify_config.DEBUG:
+            logger.info(
+                f"Model LB\nid: {config.id}\nname:{config.name}\nstrategy: {self._strategy}\n"
+                f"tenant_id: {self._tenant_id}\nprovider: {self._provider}\n"
+                f"model_type: {self._model_type.value}\nmodel: {self._model}"
+            )
+
+        return config
+
+    def _fetch_next_round_robin(self) -> Optional[ModelLoadBalancingConfiguration]:
         cache_key = "model_lb_index:{}:{}:{}:{}".format(
             self._tenant_id, self._provider, self._model_type.value, self._model
         )
@@ -533,16 +648,149 @@ class LBModelManager:
 
                 continue
 
-            if dify_config.DEBUG:
-                logger.info(
-                    f"Model LB\nid: {config.id}\nname:{config.name}\n"
-                    f"tenant_id: {self._tenant_id}\nprovider: {self._provider}\n"
-                    f"model_type: {self._model_type.value}\nmodel: {self._model}"
-                )
-
             return config
 
-        return None
+    def _fetch_next_by_statistics(self) -> Optional[ModelLoadBalancingConfiguration]:
+        candidates = [config for config in self._load_balancing_configs if not self.in_cooldown(config)]
+        if not candidates:
+            return None
+
+        statistics = self.get_statistics(candidates)
+        if self._strategy == LoadBalancingStrategy.LEAST_OUTSTANDING:
+            fewest_in_flight = min(item.in_flight for item in statistics)
+            candidates, statistics = (
+                [config for config, item in zip(candidates, statistics) if item.in_flight == fewest_in_flight],
+                [item for item in statistics if item.in_flight == fewest_in_flight],
+            )
+
+        # ties and the weighted strategy are broken by the latency and error rate of each credentials
+        return random.choices(candidates, weights=self._get_weights(statistics))[0]
+
+    @classmethod
+    def _get_weights(cls, statistics: Sequence[LBConfigStatistics]) -> list[float]:
+        known_latencies = [item.latency for item in statistics if item.latency]
+        # credentials without latency yet get the average one, so they receive their share of the traffic
+        default_latency = sum(known_latencies) / len(known_latencies) if known_latencies else 1.0
+        return [
+            max(1 - item.error_rate, cls._MIN_SUCCESS_RATE) / max(item.latency or default_latency, 1.0)
+            for item in statistics
+        ]
+
+    def get_statistics(self, configs: Sequence[ModelLoadBalancingConfiguration]) -> list[LBConfigStatistics]:
+        """
+        Get the rolling statistics of model load balancing configs, in a single round trip
+        :param configs: model load balancing configs
+        :return:
+        """
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for config in configs:
+                pipeline.hmget(self._statistics_cache_key(config.id), "latency", "error_rate")
+                # stale invocations are dropped before counting, the script is sent as is to work in pipelines
+                pipeline.eval(
+                    _LB_IN_FLIGHT_SCRIPT, 1, self._in_flight_cache_key(config.id), self._INVOCATION_MAX_ALIVE_TIME
+                )
+            results = pipeline.execute()
+        except Exception:
+            logger.warning("Failed to get the statistics of the model load balancing configs", exc_info=True)
+            return [LBConfigStatistics() for _ in configs]
+
+        return [
+            LBConfigStatistics(
+                latency=float(latency) if latency is not None else None,
+                error_rate=float(error_rate) if error_rate is not None else 0.0,
+                in_flight=int(in_flight),
+            )
+            for (latency, error_rate), in_flight in zip(results[::2], results[1::2])
+        ]
+
+    def start_invocation(self, config: ModelLoadBalancingConfiguration) -> Optional[str]:
+        """
+        Count an invocation of model load balancing config as in flight
+        :param config: model load balancing config
+        :return: id of the invocation to end, None if the invocations are not recorded
+        """
+        if not self.tracks_statistics:
+            return None
+
+        invocation_id = str(uuid.uuid4())
+        if LBModelManager._start_invocation_script is None:
+            LBModelManager._start_invocation_script = redis_client.register_script(_LB_START_INVOCATION_SCRIPT)
+        try:
+            LBModelManager._start_invocation_script(
+                keys=[self._in_flight_cache_key(config.id)],
+                args=[invocation_id, self._INVOCATION_MAX_ALIVE_TIME, self._STATISTICS_TTL],
+            )
+        except Exception:
+            logger.warning("Failed to record the invocation of a model load balancing config", exc_info=True)
+        return invocation_id
+
+    def end_invocation(
+        self,
+        config: ModelLoadBalancingConfiguration,
+        invocation_id: Optional[str],
+        latency: Optional[float] = None,
+        failed: Optional[bool] = None,
+    ) -> None:
+        """
+        Record the end of an invocation of model load balancing config in its rolling statistics
+        :param config: model load balancing config
+        :param invocation_id: id returned by start_invocation
+        :param latency: latency in seconds, None if the invocation did not succeed
+        :param failed: whether the invocation failed because of the credentials or the provider,
+            None if the outcome does not tell anything about the credentials, only the invocation is ended then
+        :return:
+        """
+        if not self.tracks_statistics or invocation_id is None:
+            return
+
+        if LBModelManager._statistics_script is None:
+            LBModelManager._statistics_script = redis_client.register_script(_LB_STATISTICS_SCRIPT)
+        try:
+            redis_client.zrem(self._in_flight_cache_key(config.id), invocation_id)
+            if failed is not None:
+                LBModelManager._statistics_script(
+                    keys=[self._statistics_cache_key(config.id)],
+                    args=[
+                        dify_config.MODEL_LB_STATISTICS_DECAY,
+                        int(failed),
+                        latency * 1000 if latency is not None else -1,
+                        self._STATISTICS_TTL,
+                    ],
+                )
+        except Exception:
+            logger.warning("Failed to record the invocation of a model load balancing config", exc_info=True)
+
+    def track_stream(
+        self,
+        config: ModelLoadBalancingConfiguration,
+        invocation_id: Optional[str],
+        generator: Generator,
+        started_at: float,
+    ) -> Generator:
+        """
+        Record the end of a streamed invocation once the stream is consumed,
+        its latency is the time to the first chunk
+        :param config: model load balancing config
+        :param invocation_id: id returned by start_invocation
+        :param generator: stream of the invocation
+        :param started_at: performance counter when the invocation started
+        :return:
+        """
+        latency: Optional[float] = None
+        # the outcome of a stream closed early or interrupted by other errors is unknown
+        failed: Optional[bool] = None
+        try:
+            for chunk in generator:
+                if latency is None:
+                    latency = time.perf_counter() - started_at
+                yield chunk
+            failed = False
+        except (InvokeRateLimitError, InvokeAuthorizationError, InvokeConnectionError):
+            failed = True
+            raise
+        finally:
+            self.end_invocation(config, invocation_id, latency=latency if failed is False else None, failed=failed)
 
     def cooldown(self, config: ModelLoadBalancingConfiguration, expire: int = 60) -> None:
         """
@@ -551,24 +799,56 @@ class LBModelManager:
         :param expire: cooldown time
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model, config.id
-        )
+        cooldown_cache_key = self._cooldown_cache_key(config.id)
 
         redis_client.setex(cooldown_cache_key, expire, "true")
+        if dify_config.MODEL_LB_COOLDOWN_CACHE_TTL > 0:
+            with self._cooldowns_lock:
+                self._cooldowns[cooldown_cache_key] = time.time() + expire
 
     def in_cooldown(self, config: ModelLoadBalancingConfiguration) -> bool:
         """
-        Check if model load balancing config is in cooldown
+        Check if model load balancing config is in cooldown,
+        the state is cached in each process for MODEL_LB_COOLDOWN_CACHE_TTL seconds
         :param config: model load balancing config
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model, config.id
+        cooldown_cache_key = self._cooldown_cache_key(config.id)
+        now = time.time()
+        if dify_config.MODEL_LB_COOLDOWN_CACHE_TTL > 0:
+            with self._cooldowns_lock:
+                cooldown_until = self._cooldowns.get(cooldown_cache_key)
+            if cooldown_until is not None:
+                return cooldown_until > now
+
+        ttl = cast(int, redis_client.pttl(cooldown_cache_key))
+        if ttl == -2:
+            cooldown_until = 0.0
+        elif ttl == -1:
+            # a cooldown without expiration is checked again once the cached state expires
+            cooldown_until = now + self._cooldowns.ttl
+        else:
+            cooldown_until = now + ttl / 1000
+
+        if dify_config.MODEL_LB_COOLDOWN_CACHE_TTL > 0:
+            with self._cooldowns_lock:
+                self._cooldowns[cooldown_cache_key] = cooldown_until
+        return cooldown_until > now
+
+    def _cooldown_cache_key(self, config_id: str) -> str:
+        return "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
+            self._tenant_id, self._provider, self._model_type.value, self._model, config_id
         )
 
-        res: bool = redis_client.exists(cooldown_cache_key)
-        return res
+    def _statistics_cache_key(self, config_id: str) -> str:
+        return "model_lb_stats:{}:{}:{}:{}:{}".format(
+            self._tenant_id, self._provider, self._model_type.value, self._model, config_id
+        )
+
+    def _in_flight_cache_key(self, config_id: str) -> str:
+        return "model_lb_in_flight:{}:{}:{}:{}:{}".format(
+            self._tenant_id, self._provider, self._model_type.value, self._model, config_id
+        )
 
     @staticmethod
     def get_config_in_cooldown_and_ttl(
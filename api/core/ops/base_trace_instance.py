@@ -29,6 +29,13 @@ class BaseTraceInstance(ABC):
         """
         ...
 
+    def flush(self):  # noqa: B027
+        """
+        Send the traces buffered by the client of the service.
+        Called once per batch of traces, the services without a buffering client have nothing to flush.
+        """
+        pass
+
     def get_service_account_with_tenant(self, app_id: str) -> Account:
         """
         Get service account for an app and set up its tenant.
@@ -446,6 +446,9 @@ class LangFuseDataTrace(BaseTraceInstance):
 
         generation.end(**format_generation_data)
 
+    def flush(self):
+        self.langfuse_client.flush()
+
     def api_check(self):
         try:
             return self.langfuse_client.auth_check()
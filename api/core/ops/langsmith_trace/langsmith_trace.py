@@ -499,6 +499,11 @@ class LangSmithDataTrace(BaseTraceInstance):
         except Exception as e:
             raise ValueError(f"LangSmith Failed to update run: {str(e)}")
 
+    def flush(self):
+        # the runs with a trace id and dotted order are sent by the batch ingestion queue of the client
+        if self.langsmith_client.tracing_queue is not None:
+            self.langsmith_client.tracing_queue.join()
+
     def api_check(self):
         try:
             random_project_name = f"test_project_{datetime.now().strftime('%Y%m%d%H%M%S')}"
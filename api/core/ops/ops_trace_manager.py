@@ -1,3 +1,4 @@
+import gzip
 import json
 import logging
 import os
@@ -15,6 +16,7 @@ from sqlalchemy.orm import Session
 
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
+    OPS_BATCH_FILE_PATH,
     OPS_FILE_PATH,
     TracingProviderEnum,
 )
@@ -35,7 +37,7 @@ from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_batch_tasks, process_trace_tasks
 
 
 class OpsTraceProviderConfigMap(dict[str, dict[str, Any]]):
@@ -786,9 +788,13 @@ class TraceTask:
 
 
 trace_manager_timer: Optional[threading.Timer] = None
-trace_manager_queue: queue.Queue = queue.Queue()
 trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
 trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
+# the queue is bounded, new traces are dropped while it is full, 0 for an unbounded queue
+trace_manager_max_queue_size = int(os.getenv("TRACE_QUEUE_MANAGER_MAX_QUEUE_SIZE", 10000))
+# ship each batch as one storage object and one celery task instead of one per trace
+trace_manager_batch_export = os.getenv("TRACE_QUEUE_MANAGER_BATCH_EXPORT", "false").lower() == "true"
+trace_manager_queue: queue.Queue = queue.Queue(maxsize=trace_manager_max_queue_size)
 
 
 class TraceQueueManager:
@@ -807,7 +813,9 @@ class TraceQueueManager:
         try:
             if self.trace_instance:
                 trace_task.app_id = self.app_id
-                trace_manager_queue.put(trace_task)
+                trace_manager_queue.put_nowait(trace_task)
+        except queue.Full:
+            logging.warning(f"Trace queue is full, dropping trace task, trace_type {trace_task.trace_type}")
         except Exception as e:
             logging.exception(f"Error adding trace task, trace_type {trace_task.trace_type}")
         finally:
@@ -824,9 +832,12 @@ class TraceQueueManager:
 
     def run(self):
         try:
-            tasks = self.collect_tasks()
-            if tasks:
-                self.send_to_celery(tasks)
+            # drain the queue, one batch at a time
+            while tasks := self.collect_tasks():
+                if trace_manager_batch_export:
+                    self.send_batch_to_celery(tasks)
+                else:
+                    self.send_to_celery(tasks)
         except Exception as e:
             logging.exception("Error processing trace tasks")
 
@@ -857,3 +868,28 @@ class TraceQueueManager:
                     "app_id": task.app_id,
                 }
                 process_trace_tasks.delay(file_info)
+
+    def send_batch_to_celery(self, tasks: list[TraceTask]):
+        """
+        Ship the tasks as one gzip compressed, newline delimited JSON storage object and one celery task
+        """
+        with self.flask_app.app_context():
+            lines: list[bytes] = []
+            for task in tasks:
+                if task.app_id is None:
+                    continue
+                trace_info = task.execute()
+                task_data = TaskData(
+                    app_id=task.app_id,
+                    trace_info_type=type(trace_info).__name__,
+                    trace_info=trace_info.model_dump() if trace_info else None,
+                )
+                lines.append(task_data.model_dump_json().encode("utf-8"))
+
+            if not lines:
+                return
+
+            file_id = uuid4().hex
+            file_path = f"{OPS_BATCH_FILE_PATH}{file_id}.jsonl.gz"
+            storage.save(file_path, gzip.compress(b"\n".join(lines)))
+            process_trace_batch_tasks.delay({"file_id": file_id})
@@ -389,6 +389,9 @@ class WeaveDataTrace(BaseTraceInstance):
         self.start_call(name_run)
         self.finish_call(name_run)
 
+    def flush(self):
+        self.weave_client.flush()
+
     def api_check(self):
         try:
             if self.host:
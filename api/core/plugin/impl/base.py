@@ -4,9 +4,8 @@ import logging
 from collections.abc import Callable, Generator
 from typing import TypeVar
 
-import requests
+import httpx
 from pydantic import BaseModel
-from requests.exceptions import HTTPError
 from yarl import URL
 
 from configs import dify_config
@@ -30,6 +29,7 @@ from core.plugin.impl.exc import (
     PluginPermissionDeniedError,
     PluginUniqueIdentifierError,
 )
+from core.plugin.impl.http_client import get_plugin_daemon_client
 
 plugin_daemon_inner_api_baseurl = URL(str(dify_config.PLUGIN_DAEMON_URL))
 
@@ -48,23 +48,36 @@ class BasePluginClient:
         params: dict | None = None,
         files: dict | None = None,
         stream: bool = False,
-    ) -> requests.Response:
+    ) -> httpx.Response:
         """
         Make a request to the plugin daemon inner API.
+
+        Requests go through the pooled client of the process, the response of a stream request must be closed
+        by the caller to release its connection.
         """
         url = plugin_daemon_inner_api_baseurl / path
         headers = headers or {}
         headers["X-Api-Key"] = dify_config.PLUGIN_DAEMON_KEY
-        headers["Accept-Encoding"] = "gzip, deflate, br"
 
         if headers.get("Content-Type") == "application/json" and isinstance(data, dict):
             data = json.dumps(data)
 
+        if params:
+            # keep the behavior of requests, which drops the params without value
+            params = {key: value for key, value in params.items() if value is not None}
+
+        client = get_plugin_daemon_client()
         try:
-            response = requests.request(
-                method=method, url=str(url), headers=headers, data=data, params=params, stream=stream, files=files
+            request = client.build_request(
+                method=method,
+                url=str(url),
+                headers=headers,
+                params=params,
+                files=files,
+                **({"data": data} if isinstance(data, dict) else {"content": data}),
             )
-        except requests.exceptions.ConnectionError:
+            response = client.send(request, stream=stream)
+        except httpx.RequestError:
             logger.exception("Request to Plugin Daemon Service failed")
             raise PluginDaemonInnerError(code=-500, message="Request to Plugin Daemon Service failed")
 
@@ -81,14 +94,35 @@ class BasePluginClient:
     ) -> Generator[bytes, None, None]:
         """
         Make a stream request to the plugin daemon inner API
+
+        Lines are split from the raw byte stream and yielded without the `data:` prefix, they are not decoded
+        so that they can be validated as JSON directly.
         """
         response = self._request(method, path, headers, data, params, files, stream=True)
-        for line in response.iter_lines(chunk_size=1024 * 8):
-            line = line.decode("utf-8").strip()
-            if line.startswith("data:"):
-                line = line[5:].strip()
+        try:
+            # pieces of the current line, joined once the line is complete so that large lines are copied once
+            pending: list[bytes] = []
+            for chunk in response.iter_bytes():
+                if b"\n" not in chunk:
+                    pending.append(chunk)
+                    continue
+                *lines, rest = chunk.split(b"\n")
+                if pending:
+                    pending.append(lines[0])
+                    lines[0] = b"".join(pending)
+                pending = [rest] if rest else []
+                for line in lines:
+                    line = _strip_event_line(line)
+                    if line:
+                        yield line
+            line = _strip_event_line(b"".join(pending))
             if line:
                 yield line
+        except httpx.RequestError:
+            logger.exception("Stream from Plugin Daemon Service failed")
+            raise PluginDaemonInnerError(code=-500, message="Stream from Plugin Daemon Service failed")
+        finally:
+            response.close()
 
     def _stream_request_with_model(
         self,
@@ -139,7 +173,7 @@ class BasePluginClient:
         try:
             response = self._request(method, path, headers, data, params, files)
             response.raise_for_status()
-        except HTTPError as e:
+        except httpx.HTTPStatusError as e:
             msg = f"Failed to request plugin daemon, status: {e.response.status_code}, url: {path}"
             logging.exception(msg)
             raise e
@@ -187,19 +221,21 @@ class BasePluginClient:
         """
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
+        response_type = PluginDaemonBasicResponse[type]  # type: ignore
         for line in self._stream_request(method, path, params, headers, data, files):
             try:
-                rep = PluginDaemonBasicResponse[type].model_validate_json(line)  # type: ignore
+                rep = response_type.model_validate_json(line)
             except (ValueError, TypeError):
+                text = line.decode("utf-8", errors="replace")
                 # TODO modify this when line_data has code and message
                 try:
-                    line_data = json.loads(line)
+                    line_data = json.loads(text)
                 except (ValueError, TypeError):
-                    raise ValueError(line)
+                    raise ValueError(text)
                 # If the dictionary contains the `error` key, use its value as the argument
                 # for `ValueError`.
                 # Otherwise, use the `line` to provide better contextual information about the error.
-                raise ValueError(line_data.get("error", line))
+                raise ValueError(line_data.get("error", text) if isinstance(line_data, dict) else text)
 
             if rep.code != 0:
                 if rep.code == -500:
@@ -259,3 +295,13 @@ class BasePluginClient:
                 raise PluginPermissionDeniedError(description=message)
             case _:
                 raise Exception(f"got unknown error from plugin daemon: {error_type}, message: {message}")
+
+
+def _strip_event_line(line: bytes) -> bytes:
+    """
+    Strip a line of the event stream and its `data:` prefix.
+    """
+    line = line.strip()
+    if line.startswith(b"data:"):
+        line = line[5:].strip()
+    return line
@@ -0,0 +1,116 @@
+"""
+Process-wide HTTP client for the plugin daemon inner API
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+from typing import Optional
+
+import httpx
+from opentelemetry.metrics import CallbackOptions, Observation, get_meter
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 is only negotiated when the optional `h2` package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_plugin_daemon_client() -> httpx.Client:
+    """
+    Get the pooled client of the current process, connections to the plugin daemon are kept alive and reused
+    across requests. A forked worker creates its own client instead of sharing the sockets of its parent.
+    """
+    global _client, _client_pid
+
+    client, pid = _client, os.getpid()
+    if client is not None and _client_pid == pid:
+        return client
+
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = _create_client()
+            _client_pid = pid
+        return _client
+
+
+def close_plugin_daemon_client() -> None:
+    """
+    Close the pooled client and its connections, a new client is created on next use.
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def get_pool_stats() -> dict[str, int]:
+    """
+    Connection pool stats of the pooled client.
+    """
+    stats = {"connections": 0, "idle_connections": 0, "active_connections": 0, "pending_requests": 0}
+    client = _client
+    if client is None or _client_pid != os.getpid():
+        return stats
+
+    # the connection pool of httpcore is not part of the public API of httpx
+    pool = getattr(client._transport, "_pool", None)
+    if pool is None:
+        return stats
+
+    connections = list(pool.connections)
+    idle_connections = sum(1 for connection in connections if connection.is_idle())
+    stats["connections"] = len(connections)
+    stats["idle_connections"] = idle_connections
+    stats["active_connections"] = len(connections) - idle_connections
+    stats["pending_requests"] = sum(1 for request in getattr(pool, "_requests", []) if request.connection is None)
+    return stats
+
+
+def _create_client() -> httpx.Client:
+    def _timeout(value: float) -> Optional[float]:
+        # 0 means no timeout
+        return value or None
+
+    return httpx.Client(
+        http2=dify_config.PLUGIN_DAEMON_HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=dify_config.PLUGIN_DAEMON_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=dify_config.PLUGIN_DAEMON_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=dify_config.PLUGIN_DAEMON_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=_timeout(dify_config.PLUGIN_DAEMON_HTTP_CONNECT_TIMEOUT),
+            read=_timeout(dify_config.PLUGIN_DAEMON_HTTP_READ_TIMEOUT),
+            write=_timeout(dify_config.PLUGIN_DAEMON_HTTP_WRITE_TIMEOUT),
+            pool=_timeout(dify_config.PLUGIN_DAEMON_HTTP_POOL_TIMEOUT),
+        ),
+        # the plugin daemon is reached directly, never through the environment proxies
+        trust_env=False,
+    )
+
+
+def _observe_pool(options: CallbackOptions):
+    stats = get_pool_stats()
+    yield Observation(stats["idle_connections"], {"state": "idle"})
+    yield Observation(stats["active_connections"], {"state": "active"})
+    yield Observation(stats["pending_requests"], {"state": "pending"})
+
+
+_meter = get_meter("plugin_daemon_client")
+_meter.create_observable_gauge(
+    name="plugin_daemon.http.pool.connections",
+    callbacks=[_observe_pool],
+    description="Connections of the plugin daemon HTTP pool by state, pending counts requests waiting for one",
+    unit="{connection}",
+)
@@ -14,6 +14,7 @@ from core.entities.provider_entities import (
     CustomConfiguration,
     CustomModelConfiguration,
     CustomProviderConfiguration,
+    LoadBalancingStrategy,
     ModelLoadBalancingConfiguration,
     ModelSettings,
     ProviderQuotaType,
@@ -967,6 +968,9 @@ class ProviderManager:
                     model_type=ModelType.value_of(provider_model_setting.model_type),
                     enabled=provider_model_setting.enabled,
                     load_balancing_configs=load_balancing_configs if len(load_balancing_configs) > 1 else [],
+                    load_balancing_strategy=(
+                        provider_model_setting.load_balancing_strategy or LoadBalancingStrategy.ROUND_ROBIN
+                    ),
                 )
             )
 
@@ -6,7 +6,7 @@ import os
 import time
 from collections.abc import Generator
 from mimetypes import guess_extension, guess_type
-from typing import Optional, Union
+from typing import IO, Optional, Union
 from uuid import uuid4
 
 import httpx
@@ -76,6 +76,52 @@ class ToolFileManager:
         mimetype: str,
         filename: Optional[str] = None,
     ) -> ToolFile:
+        unique_filename, present_filename = self._get_filenames(mimetype, filename)
+        filepath = f"tools/{tenant_id}/{unique_filename}"
+        storage.save(filepath, file_binary)
+
+        return self._create_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            file_key=filepath,
+            mimetype=mimetype,
+            name=present_filename,
+            size=len(file_binary),
+        )
+
+    def create_file_by_stream(
+        self,
+        *,
+        user_id: str,
+        tenant_id: str,
+        conversation_id: Optional[str],
+        stream: IO[bytes],
+        mimetype: str,
+        filename: Optional[str] = None,
+    ) -> ToolFile:
+        """
+        Same as create_file_by_raw, but the content is read from a seekable binary file object and saved in chunks.
+        """
+        unique_filename, present_filename = self._get_filenames(mimetype, filename)
+        filepath = f"tools/{tenant_id}/{unique_filename}"
+
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(0)
+        storage.save_stream(filepath, stream)
+
+        return self._create_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            file_key=filepath,
+            mimetype=mimetype,
+            name=present_filename,
+            size=size,
+        )
+
+    @staticmethod
+    def _get_filenames(mimetype: str, filename: Optional[str]) -> tuple[str, str]:
         extension = guess_extension(mimetype) or ".bin"
         unique_name = uuid4().hex
         unique_filename = f"{unique_name}{extension}"
@@ -85,19 +131,11 @@ class ToolFileManager:
             has_extension = len(filename.split(".")) > 1
             # Add extension flexibly
             present_filename = filename if has_extension else f"{filename}{extension}"
-        filepath = f"tools/{tenant_id}/{unique_filename}"
-        storage.save(filepath, file_binary)
+        return unique_filename, present_filename
 
+    def _create_tool_file(self, **kwargs) -> ToolFile:
         with Session(self._engine, expire_on_commit=False) as session:
-            tool_file = ToolFile(
-                user_id=user_id,
-                tenant_id=tenant_id,
-                conversation_id=conversation_id,
-                file_key=filepath,
-                mimetype=mimetype,
-                name=present_filename,
-                size=len(file_binary),
-            )
+            tool_file = ToolFile(**kwargs)
 
             session.add(tool_file)
             session.commit()
@@ -43,6 +43,7 @@ from core.tools.entities.tool_entities import (
 )
 from core.tools.errors import ToolNotFoundError, ToolProviderNotFoundError
 from core.tools.tool_label_manager import ToolLabelManager
+from core.tools.tool_runtime_cache import tool_runtime_cache
 from core.tools.utils.configuration import (
     ProviderConfigEncrypter,
     ToolParameterConfigurationManager,
@@ -169,6 +170,51 @@ class ToolManager:
 
         :return: the tool
         """
+        if provider_type in {ToolProviderType.BUILT_IN, ToolProviderType.API, ToolProviderType.WORKFLOW}:
+            return cast(
+                Union[BuiltinTool, PluginTool, ApiTool, WorkflowTool],
+                tool_runtime_cache.get(
+                    tenant_id=tenant_id,
+                    provider_type=provider_type,
+                    provider_id=provider_id,
+                    tool_name=tool_name,
+                    runtime=ToolRuntime(
+                        tenant_id=tenant_id,
+                        runtime_parameters={},
+                        invoke_from=invoke_from,
+                        tool_invoke_from=tool_invoke_from,
+                    ),
+                    resolve=lambda: cls._resolve_tool_runtime(
+                        provider_type=provider_type,
+                        provider_id=provider_id,
+                        tool_name=tool_name,
+                        tenant_id=tenant_id,
+                        invoke_from=invoke_from,
+                        tool_invoke_from=tool_invoke_from,
+                    ),
+                ),
+            )
+        elif provider_type == ToolProviderType.APP:
+            raise NotImplementedError("app provider not implemented")
+        elif provider_type == ToolProviderType.PLUGIN:
+            return cls.get_plugin_provider(provider_id, tenant_id).get_tool(tool_name)
+        else:
+            raise ToolProviderNotFoundError(f"provider type {provider_type.value} not found")
+
+    @classmethod
+    def _resolve_tool_runtime(
+        cls,
+        provider_type: ToolProviderType,
+        provider_id: str,
+        tool_name: str,
+        tenant_id: str,
+        invoke_from: InvokeFrom,
+        tool_invoke_from: ToolInvokeFrom,
+    ) -> Union[BuiltinTool, PluginTool, ApiTool, WorkflowTool]:
+        """
+        resolve a builtin, api or workflow tool with the decrypted credentials of the tenant,
+        the result is cached by `get_tool_runtime`
+        """
         if provider_type == ToolProviderType.BUILT_IN:
             # check if the builtin tool need credentials
             provider_controller = cls.get_builtin_provider(provider_id, tenant_id)
@@ -288,10 +334,6 @@ class ToolManager:
                     )
                 ),
             )
-        elif provider_type == ToolProviderType.APP:
-            raise NotImplementedError("app provider not implemented")
-        elif provider_type == ToolProviderType.PLUGIN:
-            return cls.get_plugin_provider(provider_id, tenant_id).get_tool(tool_name)
         else:
             raise ToolProviderNotFoundError(f"provider type {provider_type.value} not found")
 
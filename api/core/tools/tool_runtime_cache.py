@@ -0,0 +1,124 @@
+"""
+Process-local cache of resolved tool runtimes
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+
+from cachetools import TTLCache
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+from core.tools.__base.tool import Tool
+from core.tools.__base.tool_runtime import ToolRuntime
+from core.tools.entities.tool_entities import ToolProviderType
+from core.tools.plugin_tool.tool import PluginTool
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("tool_runtime_cache")
+_request_counter = _meter.create_counter(
+    "tool.runtime_cache.requests",
+    description="Number of tool runtime lookups, by result (hit or miss)",
+    unit="{request}",
+)
+
+CacheKey = tuple[str, int, str, str, str]
+
+
+class ToolRuntimeCache:
+    """
+    Tenant-scoped, TTL-bounded cache of resolved tools: the tool of the provider controller with the decrypted
+    credentials of the tenant and, for plugin tools, the runtime parameters fetched from the plugin daemon.
+
+    Entries are keyed by a version stamp of the tenant kept in Redis, bumping it with `invalidate` after a tool
+    provider of the tenant changed makes every process miss the stale entries, which then expire with their TTL.
+    """
+
+    def __init__(self, ttl: int, max_size: int) -> None:
+        self._ttl = ttl
+        self._cache: TTLCache[CacheKey, Tool] = TTLCache(maxsize=max(max_size, 1), ttl=max(ttl, 1))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(tenant_id: str) -> str:
+        return f"tool_runtime_cache_version:{tenant_id}"
+
+    def _get_version(self, tenant_id: str) -> int:
+        version = redis_client.get(self._version_key(tenant_id))
+        return int(version) if version else 0
+
+    def get(
+        self,
+        tenant_id: str,
+        provider_type: ToolProviderType,
+        provider_id: str,
+        tool_name: str,
+        runtime: ToolRuntime,
+        resolve: Callable[[], Tool],
+    ) -> Tool:
+        """
+        Get a tool with its own runtime, resolve it on cache miss
+
+        :param tenant_id: the tenant id
+        :param provider_type: the type of the provider
+        :param provider_id: the id of the provider
+        :param tool_name: the name of the tool
+        :param runtime: runtime of the returned tool, the cached credentials are copied into it
+        :param resolve: function resolving the tool with the decrypted credentials of the tenant
+        :return: a fork of the resolved tool
+        """
+        if self._ttl <= 0:
+            return self._fork(resolve(), runtime)
+
+        key = (tenant_id, self._get_version(tenant_id), provider_type.value, provider_id, tool_name)
+        with self._lock:
+            tool = self._cache.get(key)
+
+        if tool is None:
+            _request_counter.add(1, {"result": "miss"})
+            tool = resolve()
+            if isinstance(tool, PluginTool):
+                # fetched once per entry instead of once per run
+                tool.get_runtime_parameters()
+            with self._lock:
+                self._cache[key] = tool
+        else:
+            _request_counter.add(1, {"result": "hit"})
+
+        return self._fork(tool, runtime)
+
+    @staticmethod
+    def _fork(tool: Tool, runtime: ToolRuntime) -> Tool:
+        # the runtime of a returned tool is updated by its caller, the cached tool must not share it
+        credentials = tool.runtime.credentials if tool.runtime else {}
+        runtime.credentials = dict(credentials)
+        forked = tool.fork_tool_runtime(runtime=runtime)
+        if isinstance(tool, PluginTool) and isinstance(forked, PluginTool):
+            forked.runtime_parameters = tool.runtime_parameters
+        return forked
+
+    def invalidate(self, tenant_id: str) -> None:
+        """
+        Invalidate the cached tools of a tenant in every process, call it after a tool provider changed
+
+        :param tenant_id: the tenant id
+        """
+        if self._ttl <= 0:
+            return
+
+        try:
+            redis_client.incr(self._version_key(tenant_id))
+        except Exception:
+            logger.exception("Failed to invalidate the tool runtime cache of tenant %s", tenant_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+tool_runtime_cache = ToolRuntimeCache(
+    ttl=dify_config.TOOL_RUNTIME_CACHE_TTL, max_size=dify_config.TOOL_RUNTIME_CACHE_MAX_SIZE
+)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from cachetools import LRUCache
+
+from configs import dify_config
+from core.workflow.graph_engine.entities.graph import Graph
+
+
+@dataclass(frozen=True)
+class CompiledGraph:
+    """
+    Parsed graph config and graph of a workflow version.
+
+    Compiled graphs are shared by every run of the version in the process and must not be mutated.
+    """
+
+    graph_config: Mapping[str, Any]
+    graph: Graph
+
+
+class GraphCache:
+    """
+    Size-bounded LRU cache of compiled graphs keyed by workflow id and graph hash
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._cache: LRUCache[tuple[str, str], CompiledGraph] = LRUCache(maxsize=max(max_size, 1))
+        self._lock = threading.Lock()
+
+    def get(self, workflow_id: str, graph: str) -> CompiledGraph:
+        """
+        Get compiled graph of a workflow version, compile it on cache miss
+
+        :param workflow_id: workflow id
+        :param graph: serialized graph of the workflow
+        :return: compiled graph
+        """
+        if self._max_size <= 0:
+            return self.compile(graph)
+
+        # drafts are updated in place, so the graph content is part of the key
+        key = (workflow_id, hashlib.sha256(graph.encode("utf-8")).hexdigest())
+        with self._lock:
+            compiled_graph = self._cache.get(key)
+        if compiled_graph is None:
+            compiled_graph = self.compile(graph)
+            with self._lock:
+                self._cache[key] = compiled_graph
+
+        return compiled_graph
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def compile(graph: str) -> CompiledGraph:
+        """
+        Parse and init graph
+
+        :param graph: serialized graph of the workflow
+        :return: compiled graph
+        """
+        graph_config = json.loads(graph) if graph else {}
+        if not graph_config:
+            raise ValueError("workflow graph not found")
+
+        if "nodes" not in graph_config or "edges" not in graph_config:
+            raise ValueError("nodes or edges not found in workflow graph")
+
+        if not isinstance(graph_config.get("nodes"), list):
+            raise ValueError("nodes in workflow graph must be a list")
+
+        if not isinstance(graph_config.get("edges"), list):
+            raise ValueError("edges in workflow graph must be a list")
+
+        return CompiledGraph(graph_config=graph_config, graph=Graph.init(graph_config=graph_config))
+
+
+graph_cache = GraphCache(dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
@@ -1,7 +1,8 @@
 import mimetypes
+import os
 from collections.abc import Sequence
 from email.message import Message
-from typing import Any, Literal, Optional
+from typing import IO, Any, Literal, Optional
 
 import httpx
 from pydantic import BaseModel, Field, ValidationInfo, field_validator
@@ -93,13 +94,23 @@ class HttpRequestNodeData(BaseNodeData):
     ssl_verify: Optional[bool] = dify_config.HTTP_REQUEST_NODE_SSL_VERIFY
 
 
+# number of leading bytes of a response sampled to detect text content
+CONTENT_SAMPLE_SIZE = 1024
+
+
 class Response:
     headers: dict[str, str]
     response: httpx.Response
+    body: Optional[IO[bytes]]
 
-    def __init__(self, response: httpx.Response):
+    def __init__(self, response: httpx.Response, body: Optional[IO[bytes]] = None):
+        """
+        :param response: http response, the content is read from it unless body is given
+        :param body: decoded content of a streamed response, spooled into a seekable file
+        """
         self.response = response
         self.headers = dict(response.headers)
+        self.body = body
 
     @property
     def is_file(self):
@@ -135,7 +146,7 @@ class Response:
             # Try to detect if content is text-based by sampling first few bytes
             try:
                 # Sample first 1024 bytes for text detection
-                content_sample = self.response.content[:1024]
+                content_sample = self.content_sample
                 content_sample.decode("utf-8")
                 # If we can decode as UTF-8 and find common text patterns, likely not a file
                 text_markers = (b"{", b"[", b"<", b"function", b"var ", b"const ", b"let ")
@@ -159,11 +170,26 @@ class Response:
 
     @property
     def text(self) -> str:
-        return self.response.text
+        if self.body is None:
+            return self.response.text
+        return self.content.decode(self.response.encoding or "utf-8", errors="replace")
 
     @property
     def content(self) -> bytes:
-        return self.response.content
+        if self.body is None:
+            return self.response.content
+        self.body.seek(0)
+        return self.body.read()
+
+    @property
+    def content_sample(self) -> bytes:
+        if self.body is None:
+            return self.response.content[:CONTENT_SAMPLE_SIZE]
+        position = self.body.tell()
+        self.body.seek(0)
+        sample = self.body.read(CONTENT_SAMPLE_SIZE)
+        self.body.seek(position)
+        return sample
 
     @property
     def status_code(self) -> int:
@@ -171,7 +197,12 @@ class Response:
 
     @property
     def size(self) -> int:
-        return len(self.content)
+        if self.body is None:
+            return len(self.content)
+        position = self.body.tell()
+        size = self.body.seek(0, os.SEEK_END)
+        self.body.seek(position)
+        return size
 
     @property
     def readable_size(self) -> str:
@@ -190,3 +221,10 @@ class Response:
             msg["content-disposition"] = content_disposition
             return msg
         return None
+
+    def close(self) -> None:
+        """
+        Release the spooled body of a streamed response.
+        """
+        if self.body is not None:
+            self.body.close()
@@ -2,9 +2,10 @@ import base64
 import json
 import secrets
 import string
+import tempfile
 from collections.abc import Mapping
 from copy import deepcopy
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 from urllib.parse import urlencode, urlparse
 
 import httpx
@@ -16,6 +17,7 @@ from core.variables.segments import ArrayFileSegment, FileSegment
 from core.workflow.entities.variable_pool import VariablePool
 
 from .entities import (
+    CONTENT_SAMPLE_SIZE,
     HttpRequestNodeAuthorization,
     HttpRequestNodeData,
     HttpRequestNodeTimeout,
@@ -279,12 +281,19 @@ class Executor:
 
     def _validate_and_parse_response(self, response: httpx.Response) -> Response:
         executor_response = Response(response)
+        self._validate_response_size(executor_response)
+        return executor_response
 
-        threshold_size = (
+    @staticmethod
+    def _get_threshold_size(executor_response: Response) -> int:
+        return (
             dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE
             if executor_response.is_file
             else dify_config.HTTP_REQUEST_NODE_MAX_TEXT_SIZE
         )
+
+    def _validate_response_size(self, executor_response: Response, threshold_size: Optional[int] = None) -> None:
+        threshold_size = threshold_size or self._get_threshold_size(executor_response)
         if executor_response.size > threshold_size:
             raise ResponseSizeError(
                 f"{'File' if executor_response.is_file else 'Text'} size is too large,"
@@ -292,12 +301,7 @@ class Executor:
                 f" but current size is {executor_response.readable_size}."
             )
 
-        return executor_response
-
-    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
-        """
-        do http request depending on api bundle
-        """
+    def _get_request_args(self, headers: dict[str, Any]) -> dict[str, Any]:
         if self.method not in {
             "get",
             "head",
@@ -330,6 +334,13 @@ class Executor:
             "max_retries": self.max_retries,
         }
         # request_args = {k: v for k, v in request_args.items() if v is not None}
+        return request_args
+
+    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
+        """
+        do http request depending on api bundle
+        """
+        request_args = self._get_request_args(headers)
         try:
             response = getattr(ssrf_proxy, self.method.lower())(**request_args)
         except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
@@ -337,9 +348,57 @@ class Executor:
         # FIXME: fix type ignore, this maybe httpx type issue
         return response  # type: ignore
 
+    def _do_streaming_http_request(self, headers: dict[str, Any]) -> Response:
+        """
+        do http request and read the response in chunks, the size limits are enforced while reading
+        """
+        request_args = self._get_request_args(headers)
+        try:
+            with ssrf_proxy.stream_request(self.method.upper(), **request_args) as response:
+                return self._read_streaming_response(response)
+        except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
+            raise HttpRequestNodeError(str(e))
+
+    def _read_streaming_response(self, response: httpx.Response) -> Response:
+        # the decoded content is kept in memory up to the max text size, larger file bodies roll over to disk
+        body = tempfile.SpooledTemporaryFile(max_size=dify_config.HTTP_REQUEST_NODE_MAX_TEXT_SIZE)  # noqa: SIM115
+        executor_response = Response(response, body=body)
+        try:
+            # a body declared larger than both limits is rejected before reading it
+            content_length = response.headers.get("content-length", "")
+            if content_length.isdigit() and "content-encoding" not in response.headers:
+                max_size = max(
+                    dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE, dify_config.HTTP_REQUEST_NODE_MAX_TEXT_SIZE
+                )
+                if int(content_length) > max_size:
+                    raise ResponseSizeError(
+                        f"Response size is too large, max size is {max_size / 1024 / 1024:.2f} MB,"
+                        f" but content length is {int(content_length) / 1024 / 1024:.2f} MB."
+                    )
+
+            # iter_bytes decodes gzip, deflate and br content encodings incrementally
+            threshold_size = None
+            for chunk in response.iter_bytes(chunk_size=dify_config.HTTP_REQUEST_NODE_STREAMING_CHUNK_SIZE):
+                body.write(chunk)
+                if threshold_size is None and body.tell() >= CONTENT_SAMPLE_SIZE:
+                    # enough content to tell text from file
+                    threshold_size = self._get_threshold_size(executor_response)
+                if threshold_size is not None and body.tell() > threshold_size:
+                    self._validate_response_size(executor_response, threshold_size)
+
+            self._validate_response_size(executor_response, threshold_size)
+        except BaseException:
+            executor_response.close()
+            raise
+
+        return executor_response
+
     def invoke(self) -> Response:
         # assemble headers
         headers = self._assembling_headers()
+        if dify_config.HTTP_REQUEST_NODE_STREAMING_ENABLED:
+            # do http request, reading and validating the response in chunks
+            return self._do_streaming_http_request(headers)
         # do http request
         response = self._do_http_request(headers)
         # validate response
@@ -72,13 +72,17 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
             process_data["request"] = http_executor.to_log()
 
             response = http_executor.invoke()
-            files = self.extract_files(url=http_executor.url, response=response)
+            try:
+                files = self.extract_files(url=http_executor.url, response=response)
+                body = response.text if not files else ""
+            finally:
+                response.close()
             if not response.response.is_success and (self.should_continue_on_error or self.should_retry):
                 return NodeRunResult(
                     status=WorkflowNodeExecutionStatus.FAILED,
                     outputs={
                         "status_code": response.status_code,
-                        "body": response.text if not files else "",
+                        "body": body,
                         "headers": response.headers,
                         "files": files,
                     },
@@ -92,7 +96,7 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
                 status=WorkflowNodeExecutionStatus.SUCCEEDED,
                 outputs={
                     "status_code": response.status_code,
-                    "body": response.text if not files else "",
+                    "body": body,
                     "headers": response.headers,
                     "files": files,
                 },
@@ -173,7 +177,6 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
         files: list[File] = []
         is_file = response.is_file
         content_type = response.content_type
-        content = response.content
         parsed_content_disposition = response.parsed_content_disposition
         content_disposition_type = None
 
@@ -193,13 +196,23 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
         )
         tool_file_manager = ToolFileManager()
 
-        tool_file = tool_file_manager.create_file_by_raw(
-            user_id=self.user_id,
-            tenant_id=self.tenant_id,
-            conversation_id=None,
-            file_binary=content,
-            mimetype=mime_type,
-        )
+        if response.body is not None:
+            # the body of a streamed response is saved in chunks from its spooled file
+            tool_file = tool_file_manager.create_file_by_stream(
+                user_id=self.user_id,
+                tenant_id=self.tenant_id,
+                conversation_id=None,
+                stream=response.body,
+                mimetype=mime_type,
+            )
+        else:
+            tool_file = tool_file_manager.create_file_by_raw(
+                user_id=self.user_id,
+                tenant_id=self.tenant_id,
+                conversation_id=None,
+                file_binary=response.content,
+                mimetype=mime_type,
+            )
 
         mapping = {
             "tool_file_id": tool_file.id,
@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+from functools import cached_property
 from typing import Literal
 
 from typing_extensions import deprecated
@@ -9,13 +11,23 @@ from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.if_else.entities import IfElseNodeData
 from core.workflow.utils.condition.entities import Condition
-from core.workflow.utils.condition.processor import ConditionProcessor
+from core.workflow.utils.condition.processor import CompiledConditions, ConditionProcessor
 
 
 class IfElseNode(BaseNode[IfElseNodeData]):
     _node_data_cls = IfElseNodeData
     _node_type = NodeType.IF_ELSE
 
+    @cached_property
+    def _compiled_cases(self) -> Sequence[tuple[IfElseNodeData.Case, CompiledConditions]]:
+        """
+        Cases with their conditions compiled once per node instance.
+        """
+        return [
+            (case, CompiledConditions(conditions=case.conditions, operator=case.logical_operator))
+            for case in self.node_data.cases or []
+        ]
+
     def _run(self) -> NodeRunResult:
         """
         Run node
@@ -28,15 +40,12 @@ class IfElseNode(BaseNode[IfElseNodeData]):
         input_conditions = []
         final_result = False
         selected_case_id = None
-        condition_processor = ConditionProcessor()
         try:
             # Check if the new cases structure is used
             if self.node_data.cases:
-                for case in self.node_data.cases:
-                    input_conditions, group_result, final_result = condition_processor.process_conditions(
-                        variable_pool=self.graph_runtime_state.variable_pool,
-                        conditions=case.conditions,
-                        operator=case.logical_operator,
+                for case, compiled_conditions in self._compiled_cases:
+                    input_conditions, group_result, final_result = compiled_conditions.evaluate(
+                        self.graph_runtime_state.variable_pool
                     )
 
                     process_data["condition_results"].append(
@@ -56,7 +65,7 @@ class IfElseNode(BaseNode[IfElseNodeData]):
                 # TODO: Update database then remove this
                 # Fallback to old structure if cases are not defined
                 input_conditions, group_result, final_result = _should_not_use_old_function(
-                    condition_processor=condition_processor,
+                    condition_processor=ConditionProcessor(),
                     variable_pool=self.graph_runtime_state.variable_pool,
                     conditions=self.node_data.conditions or [],
                     operator=self.node_data.logical_operator or "and",
@@ -37,6 +37,7 @@ from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode, IterationNodeData
+from core.workflow.nodes.iteration.output_buffer import IterationOutputBuffer
 
 from .exc import (
     InvalidIteratorValueError,
@@ -119,7 +120,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         variable_pool.add([self.node_id, "item"], iterator_list_value[0])
 
         # init graph engine
-        from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineThreadPool
+        from core.workflow.graph_engine.graph_engine import GraphEngine
 
         graph_engine = GraphEngine(
             tenant_id=self.tenant_id,
@@ -161,57 +162,18 @@ class IterationNode(BaseNode[IterationNodeData]):
             duration=None,
         )
         iter_run_map: dict[str, float] = {}
-        outputs: list[Any] = [None] * len(iterator_list_value)
+        outputs = IterationOutputBuffer(len(iterator_list_value))
         try:
             if self.node_data.is_parallel:
-                futures: list[Future] = []
-                q: Queue = Queue()
-                thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+                yield from self._run_parallel(
+                    iterator_list_value=iterator_list_value,
+                    inputs=inputs,
+                    outputs=outputs,
+                    start_at=start_at,
+                    graph_engine=graph_engine,
+                    iteration_graph=iteration_graph,
+                    iter_run_map=iter_run_map,
                 )
-                for index, item in enumerate(iterator_list_value):
-                    future: Future = thread_pool.submit(
-                        self._run_single_iter_parallel,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        q=q,
-                        context=contextvars.copy_context(),
-                        iterator_list_value=iterator_list_value,
-                        inputs=inputs,
-                        outputs=outputs,
-                        start_at=start_at,
-                        graph_engine=graph_engine,
-                        iteration_graph=iteration_graph,
-                        index=index,
-                        item=item,
-                        iter_run_map=iter_run_map,
-                    )
-                    future.add_done_callback(thread_pool.task_done_callback)
-                    futures.append(future)
-                succeeded_count = 0
-                while True:
-                    try:
-                        event = q.get(timeout=1)
-                        if event is None:
-                            break
-                        if isinstance(event, IterationRunNextEvent):
-                            succeeded_count += 1
-                            if succeeded_count == len(futures):
-                                q.put(None)
-                        yield event
-                        if isinstance(event, RunCompletedEvent):
-                            q.put(None)
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            yield event
-                        if isinstance(event, IterationRunFailedEvent):
-                            q.put(None)
-                            yield event
-                    except Empty:
-                        continue
-
-                # wait all threads
-                wait(futures)
             else:
                 for _ in range(len(iterator_list_value)):
                     yield from self._run_single_iter(
@@ -224,12 +186,13 @@ class IterationNode(BaseNode[IterationNodeData]):
                         iteration_graph=iteration_graph,
                         iter_run_map=iter_run_map,
                     )
+            output_list = outputs.to_list()
             if self.node_data.error_handle_mode == ErrorHandleMode.REMOVE_ABNORMAL_OUTPUT:
-                outputs = [output for output in outputs if output is not None]
+                output_list = [output for output in output_list if output is not None]
 
             # Flatten the list of lists
-            if isinstance(outputs, list) and all(isinstance(output, list) for output in outputs):
-                outputs = [item for sublist in outputs for item in sublist]
+            if all(isinstance(output, list) for output in output_list):
+                output_list = [item for sublist in output_list for item in sublist]
 
             yield IterationRunSucceededEvent(
                 iteration_id=self.id,
@@ -238,7 +201,7 @@ class IterationNode(BaseNode[IterationNodeData]):
                 iteration_node_data=self.node_data,
                 start_at=start_at,
                 inputs=inputs,
-                outputs={"output": outputs},
+                outputs={"output": output_list},
                 steps=len(iterator_list_value),
                 metadata={"total_tokens": graph_engine.graph_runtime_state.total_tokens},
             )
@@ -246,7 +209,7 @@ class IterationNode(BaseNode[IterationNodeData]):
             yield RunCompletedEvent(
                 run_result=NodeRunResult(
                     status=WorkflowNodeExecutionStatus.SUCCEEDED,
-                    outputs={"output": outputs},
+                    outputs={"output": output_list},
                     metadata={
                         WorkflowNodeExecutionMetadataKey.ITERATION_DURATION_MAP: iter_run_map,
                         WorkflowNodeExecutionMetadataKey.TOTAL_TOKENS: graph_engine.graph_runtime_state.total_tokens,
@@ -263,7 +226,7 @@ class IterationNode(BaseNode[IterationNodeData]):
                 iteration_node_data=self.node_data,
                 start_at=start_at,
                 inputs=inputs,
-                outputs={"output": outputs},
+                outputs={"output": outputs.to_list()},
                 steps=len(iterator_list_value),
                 metadata={"total_tokens": graph_engine.graph_runtime_state.total_tokens},
                 error=str(e),
@@ -380,7 +343,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         iterator_list_value: Sequence[str],
         variable_pool: VariablePool,
         inputs: Mapping[str, list],
-        outputs: list,
+        outputs: IterationOutputBuffer,
         start_at: datetime,
         graph_engine: "GraphEngine",
         iteration_graph: Graph,
@@ -428,7 +391,7 @@ class IterationNode(BaseNode[IterationNodeData]):
                                 parallel_mode_run_id=parallel_mode_run_id,
                                 start_at=start_at,
                                 inputs=inputs,
-                                outputs={"output": outputs},
+                                outputs={"output": outputs.to_list()},
                                 steps=len(iterator_list_value),
                                 metadata={"total_tokens": graph_engine.graph_runtime_state.total_tokens},
                                 error=event.error,
@@ -441,7 +404,7 @@ class IterationNode(BaseNode[IterationNodeData]):
                                 iteration_node_data=self.node_data,
                                 start_at=start_at,
                                 inputs=inputs,
-                                outputs={"output": outputs},
+                                outputs={"output": outputs.to_list()},
                                 steps=len(iterator_list_value),
                                 metadata={"total_tokens": graph_engine.graph_runtime_state.total_tokens},
                                 error=event.error,
@@ -459,33 +422,16 @@ class IterationNode(BaseNode[IterationNodeData]):
                         event=event, iter_run_index=current_index, parallel_mode_run_id=parallel_mode_run_id
                     )
                     if isinstance(event, NodeRunFailedEvent):
-                        if self.node_data.error_handle_mode == ErrorHandleMode.CONTINUE_ON_ERROR:
+                        if self.node_data.error_handle_mode in {
+                            ErrorHandleMode.CONTINUE_ON_ERROR,
+                            ErrorHandleMode.REMOVE_ABNORMAL_OUTPUT,
+                        }:
+                            # the failed output is None, it is removed at the end in remove-abnormal-output mode
                             yield NodeInIterationFailedEvent(
                                 **metadata_event.model_dump(),
                             )
                             outputs[current_index] = None
                             variable_pool.add([self.node_id, "index"], next_index)
-                            if next_index < len(iterator_list_value):
-                                variable_pool.add([self.node_id, "item"], iterator_list_value[next_index])
-                            duration = (datetime.now(UTC).replace(tzinfo=None) - iter_start_at).total_seconds()
-                            iter_run_map[iteration_run_id] = duration
-                            yield IterationRunNextEvent(
-                                iteration_id=self.id,
-                                iteration_node_id=self.node_id,
-                                iteration_node_type=self.node_type,
-                                iteration_node_data=self.node_data,
-                                index=next_index,
-                                parallel_mode_run_id=parallel_mode_run_id,
-                                pre_iteration_output=None,
-                                duration=duration,
-                            )
-                            return
-                        elif self.node_data.error_handle_mode == ErrorHandleMode.REMOVE_ABNORMAL_OUTPUT:
-                            yield NodeInIterationFailedEvent(
-                                **metadata_event.model_dump(),
-                            )
-                            variable_pool.add([self.node_id, "index"], next_index)
-
                             if next_index < len(iterator_list_value):
                                 variable_pool.add([self.node_id, "item"], iterator_list_value[next_index])
                             duration = (datetime.now(UTC).replace(tzinfo=None) - iter_start_at).total_seconds()
@@ -564,6 +510,100 @@ class IterationNode(BaseNode[IterationNodeData]):
                 )
             )
 
+    def _run_parallel(
+        self,
+        *,
+        iterator_list_value: Sequence[str],
+        inputs: Mapping[str, list],
+        outputs: IterationOutputBuffer,
+        start_at: datetime,
+        graph_engine: "GraphEngine",
+        iteration_graph: Graph,
+        iter_run_map: dict[str, float],
+    ) -> Generator[NodeEvent | InNodeEvent, None, None]:
+        """
+        run iterations in parallel mode
+
+        items are submitted within a bounded in-flight window, a new item is submitted whenever one completes,
+        and the iteration next events are reordered so that they are emitted in item order
+        """
+        from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+
+        window_size = min(
+            dify_config.WORKFLOW_ITERATION_PARALLEL_WINDOW_SIZE or self.node_data.parallel_nums,
+            dify_config.MAX_SUBMIT_COUNT,
+        )
+        q: Queue = Queue()
+        thread_pool = GraphEngineThreadPool(
+            max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+        )
+        flask_app = current_app._get_current_object()  # type: ignore
+        items = iter(enumerate(iterator_list_value))
+        futures: list[Future] = []
+
+        def submit_next() -> None:
+            next_item = next(items, None)
+            if next_item is None:
+                return
+            index, item = next_item
+            future: Future = thread_pool.submit(
+                self._run_single_iter_parallel,
+                flask_app=flask_app,
+                q=q,
+                context=contextvars.copy_context(),
+                iterator_list_value=iterator_list_value,
+                inputs=inputs,
+                outputs=outputs,
+                start_at=start_at,
+                graph_engine=graph_engine,
+                iteration_graph=iteration_graph,
+                index=index,
+                item=item,
+                iter_run_map=iter_run_map,
+            )
+            future.add_done_callback(thread_pool.task_done_callback)
+            futures[:] = [f for f in futures if not f.done()]
+            futures.append(future)
+
+        for _ in range(window_size):
+            submit_next()
+
+        # iteration next events waiting for an earlier item, keyed by item index
+        reorder_buffer: dict[int, IterationRunNextEvent] = {}
+        next_event_index = 0
+        completed_count = 0
+        try:
+            while completed_count < len(iterator_list_value):
+                try:
+                    event = q.get(timeout=1)
+                except Empty:
+                    continue
+                if event is None:
+                    break
+                if isinstance(event, IterationRunNextEvent):
+                    completed_count += 1
+                    submit_next()
+                    reorder_buffer[event.index - 1] = event
+                    while next_event_index in reorder_buffer:
+                        yield reorder_buffer.pop(next_event_index)
+                        next_event_index += 1
+                    continue
+                yield event
+                if isinstance(event, RunCompletedEvent):
+                    q.put(None)
+                    for f in futures:
+                        if not f.done():
+                            f.cancel()
+                    yield event
+                if isinstance(event, IterationRunFailedEvent):
+                    q.put(None)
+                    yield event
+        finally:
+            # stop submitting the rest of the items and wait for the in-flight ones
+            items = iter(())
+            wait(futures)
+            thread_pool.shutdown(wait=False)
+
     def _run_single_iter_parallel(
         self,
         *,
@@ -572,7 +612,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         q: Queue,
         iterator_list_value: Sequence[str],
         inputs: Mapping[str, list],
-        outputs: list,
+        outputs: IterationOutputBuffer,
         start_at: datetime,
         graph_engine: "GraphEngine",
         iteration_graph: Graph,
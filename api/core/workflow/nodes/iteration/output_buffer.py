@@ -0,0 +1,61 @@
+import threading
+from typing import Any
+
+
+class IterationOutputBuffer:
+    """
+    Reorder buffer for iteration outputs.
+
+    In parallel mode the iterations complete out of order, only the outputs that can not be committed yet
+    (because an earlier index is still running) are held by index. The committed, ordered prefix is kept in a list.
+    """
+
+    def __init__(self, length: int) -> None:
+        """
+        :param length: number of items being iterated
+        """
+        self._length = length
+        self._lock = threading.Lock()
+        self._pending: dict[int, Any] = {}
+        self._committed: list[Any] = []
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        if not 0 <= index < self._length:
+            raise IndexError(f"iteration output index {index} out of range")
+
+        with self._lock:
+            if index < len(self._committed):
+                # the output of this index has been committed already, overwrite it
+                self._committed[index] = value
+                return
+
+            self._pending[index] = value
+            while len(self._committed) in self._pending:
+                self._committed.append(self._pending.pop(len(self._committed)))
+
+    @property
+    def committed_count(self) -> int:
+        """
+        Number of outputs committed in order.
+        """
+        return len(self._committed)
+
+    @property
+    def pending_count(self) -> int:
+        """
+        Number of completed outputs waiting for an earlier index.
+        """
+        return len(self._pending)
+
+    def to_list(self) -> list[Any]:
+        """
+        Materialize the outputs in order, the indexes without output are None.
+        """
+        with self._lock:
+            outputs = list(self._committed)
+            outputs.extend(self._pending.get(index) for index in range(len(self._committed), self._length))
+
+        return outputs
@@ -93,36 +93,41 @@ class ListOperatorNode(BaseNode[ListOperatorNodeData]):
     def _apply_filter(
         self, variable: Union[ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment]
     ) -> Union[ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment]:
-        filter_func: Callable[[Any], bool]
-        result: list[Any] = []
+        # the conditions are resolved once, then each of them filters the whole array in a single pass
+        filter_funcs: list[Callable[[Sequence[Any]], list[Any]]] = []
         for condition in self.node_data.filter_by.conditions:
             if isinstance(variable, ArrayStringSegment):
                 if not isinstance(condition.value, str):
                     raise InvalidFilterValueError(f"Invalid filter value: {condition.value}")
                 value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
-                filter_func = _get_string_filter_func(condition=condition.comparison_operator, value=value)
-                result = list(filter(filter_func, variable.value))
-                variable = variable.model_copy(update={"value": result})
+                filter_funcs.append(_get_string_array_filter_func(condition=condition.comparison_operator, value=value))
             elif isinstance(variable, ArrayNumberSegment):
                 if not isinstance(condition.value, str):
                     raise InvalidFilterValueError(f"Invalid filter value: {condition.value}")
                 value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
-                filter_func = _get_number_filter_func(condition=condition.comparison_operator, value=float(value))
-                result = list(filter(filter_func, variable.value))
-                variable = variable.model_copy(update={"value": result})
+                filter_funcs.append(
+                    _get_number_array_filter_func(condition=condition.comparison_operator, value=float(value))
+                )
             elif isinstance(variable, ArrayFileSegment):
                 if isinstance(condition.value, str):
                     value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
                 else:
                     value = condition.value
-                filter_func = _get_file_filter_func(
-                    key=condition.key,
-                    condition=condition.comparison_operator,
-                    value=value,
+                filter_funcs.append(
+                    _get_file_array_filter_func(
+                        key=condition.key,
+                        condition=condition.comparison_operator,
+                        value=value,
+                    )
                 )
-                result = list(filter(filter_func, variable.value))
-                variable = variable.model_copy(update={"value": result})
-        return variable
+
+        if not filter_funcs:
+            return variable
+
+        result: list[Any] = list(variable.value)
+        for filter_func in filter_funcs:
+            result = filter_func(result)
+        return variable.model_copy(update={"value": result})
 
     def _apply_order(
         self, variable: Union[ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment]
@@ -240,19 +245,69 @@ def _get_number_filter_func(*, condition: str, value: int | float) -> Callable[[
             raise InvalidConditionError(f"Invalid condition: {condition}")
 
 
-def _get_file_filter_func(*, key: str, condition: str, value: str | Sequence[str]) -> Callable[[File], bool]:
+def _get_string_array_filter_func(*, condition: str, value: str) -> Callable[[Sequence[str]], list[str]]:
+    match condition:
+        case "contains":
+            return lambda array: [x for x in array if value in x]
+        case "start with":
+            return lambda array: [x for x in array if x.startswith(value)]
+        case "end with":
+            return lambda array: [x for x in array if x.endswith(value)]
+        case "is":
+            return lambda array: [x for x in array if x == value]
+        case "in":
+            return lambda array: [x for x in array if x in value]
+        case "empty":
+            return lambda array: [x for x in array if x == ""]
+        case "not contains":
+            return lambda array: [x for x in array if value not in x]
+        case "is not":
+            return lambda array: [x for x in array if x != value]
+        case "not in":
+            return lambda array: [x for x in array if x not in value]
+        case "not empty":
+            return lambda array: [x for x in array if x != ""]
+        case _:
+            raise InvalidConditionError(f"Invalid condition: {condition}")
+
+
+def _get_number_array_filter_func(
+    *, condition: str, value: int | float
+) -> Callable[[Sequence[int | float]], list[int | float]]:
+    match condition:
+        case "=":
+            return lambda array: [x for x in array if x == value]
+        case "≠":
+            return lambda array: [x for x in array if x != value]
+        case "<":
+            return lambda array: [x for x in array if x < value]
+        case "≤":
+            return lambda array: [x for x in array if x <= value]
+        case ">":
+            return lambda array: [x for x in array if x > value]
+        case "≥":
+            return lambda array: [x for x in array if x >= value]
+        case _:
+            raise InvalidConditionError(f"Invalid condition: {condition}")
+
+
+def _get_file_array_filter_func(
+    *, key: str, condition: str, value: str | Sequence[str]
+) -> Callable[[Sequence[File]], list[File]]:
     extract_func: Callable[[File], Any]
+    filter_func: Callable[[Any], bool]
     if key in {"name", "extension", "mime_type", "url"} and isinstance(value, str):
         extract_func = _get_file_extract_string_func(key=key)
-        return lambda x: _get_string_filter_func(condition=condition, value=value)(extract_func(x))
-    if key in {"type", "transfer_method"} and isinstance(value, Sequence):
+        filter_func = _get_string_filter_func(condition=condition, value=value)
+    elif key in {"type", "transfer_method"} and isinstance(value, Sequence):
         extract_func = _get_file_extract_string_func(key=key)
-        return lambda x: _get_sequence_filter_func(condition=condition, value=value)(extract_func(x))
+        filter_func = _get_sequence_filter_func(condition=condition, value=value)
     elif key == "size" and isinstance(value, str):
         extract_func = _get_file_extract_number_func(key=key)
-        return lambda x: _get_number_filter_func(condition=condition, value=float(value))(extract_func(x))
+        filter_func = _get_number_filter_func(condition=condition, value=float(value))
     else:
         raise InvalidKeyError(f"Invalid key: {key}")
+    return lambda array: [x for x in array if filter_func(extract_func(x))]
 
 
 def _contains(value: str) -> Callable[[str], bool]:
@@ -268,7 +323,7 @@ def _endswith(value: str) -> Callable[[str], bool]:
 
 
 def _is(value: str) -> Callable[[str], bool]:
-    return lambda x: x is value
+    return lambda x: x == value
 
 
 def _in(value: str | Sequence[str]) -> Callable[[str], bool]:
@@ -300,20 +355,20 @@ def _ge(value: int | float) -> Callable[[int | float], bool]:
 
 
 def _order_number(*, order: Literal["asc", "desc"], array: Sequence[int | float]):
-    return sorted(array, key=lambda x: x, reverse=order == "desc")
+    return sorted(array, reverse=order == "desc")
 
 
 def _order_string(*, order: Literal["asc", "desc"], array: Sequence[str]):
-    return sorted(array, key=lambda x: x, reverse=order == "desc")
+    return sorted(array, reverse=order == "desc")
 
 
 def _order_file(*, order: Literal["asc", "desc"], order_by: str = "", array: Sequence[File]):
     extract_func: Callable[[File], Any]
     if order_by in {"name", "type", "extension", "mime_type", "transfer_method", "url"}:
         extract_func = _get_file_extract_string_func(key=order_by)
-        return sorted(array, key=lambda x: extract_func(x), reverse=order == "desc")
+        return sorted(array, key=extract_func, reverse=order == "desc")
     elif order_by == "size":
         extract_func = _get_file_extract_number_func(key=order_by)
-        return sorted(array, key=lambda x: extract_func(x), reverse=order == "desc")
+        return sorted(array, key=extract_func, reverse=order == "desc")
     else:
         raise InvalidKeyError(f"Invalid order key: {order_by}")
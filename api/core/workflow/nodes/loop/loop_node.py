@@ -2,7 +2,7 @@ import json
 import logging
 from collections.abc import Generator, Mapping, Sequence
 from datetime import UTC, datetime
-from typing import TYPE_CHECKING, Any, Literal, cast
+from typing import TYPE_CHECKING, Any, cast
 
 from configs import dify_config
 from core.variables import (
@@ -37,7 +37,7 @@ from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.loop.entities import LoopNodeData
-from core.workflow.utils.condition.processor import ConditionProcessor
+from core.workflow.utils.condition.processor import CompiledConditions
 
 if TYPE_CHECKING:
     from core.workflow.entities.variable_pool import VariablePool
@@ -117,7 +117,8 @@ class LoopNode(BaseNode[LoopNodeData]):
         )
 
         start_at = datetime.now(UTC).replace(tzinfo=None)
-        condition_processor = ConditionProcessor()
+        # break conditions are checked after every node of every loop, compile them once
+        compiled_break_conditions = CompiledConditions(conditions=break_conditions, operator=logical_operator)
 
         # Start Loop event
         yield LoopRunStartedEvent(
@@ -152,8 +153,7 @@ class LoopNode(BaseNode[LoopNodeData]):
                     variable_pool=variable_pool,
                     loop_variable_selectors=loop_variable_selectors,
                     break_conditions=break_conditions,
-                    logical_operator=logical_operator,
-                    condition_processor=condition_processor,
+                    compiled_break_conditions=compiled_break_conditions,
                     current_index=i,
                     start_at=start_at,
                     inputs=inputs,
@@ -251,8 +251,7 @@ class LoopNode(BaseNode[LoopNodeData]):
         variable_pool: "VariablePool",
         loop_variable_selectors: dict,
         break_conditions: list,
-        logical_operator: Literal["and", "or"],
-        condition_processor: ConditionProcessor,
+        compiled_break_conditions: CompiledConditions,
         current_index: int,
         start_at: datetime,
         inputs: dict,
@@ -302,10 +301,8 @@ class LoopNode(BaseNode[LoopNodeData]):
                     else:
                         exists_variable = True
                 if exists_variable:
-                    input_conditions, group_result, check_break_result = condition_processor.process_conditions(
-                        variable_pool=self.graph_runtime_state.variable_pool,
-                        conditions=break_conditions,
-                        operator=logical_operator,
+                    input_conditions, group_result, check_break_result = compiled_break_conditions.evaluate(
+                        self.graph_runtime_state.variable_pool
                     )
                     if check_break_result:
                         break
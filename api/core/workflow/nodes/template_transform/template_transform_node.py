@@ -2,7 +2,9 @@ import os
 from collections.abc import Mapping, Sequence
 from typing import Any, Optional
 
+from configs import dify_config
 from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2SandboxRenderer
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.nodes.base import BaseNode
@@ -37,9 +39,12 @@ class TemplateTransformNode(BaseNode[TemplateTransformNodeData]):
             variables[variable_name] = value.to_object() if value else None
         # Run code
         try:
-            result = CodeExecutor.execute_workflow_code_template(
-                language=CodeLanguage.JINJA2, code=self.node_data.template, inputs=variables
-            )
+            if dify_config.TEMPLATE_TRANSFORM_IN_PROCESS_RENDER_ENABLED:
+                result = {"result": Jinja2SandboxRenderer.render(template=self.node_data.template, inputs=variables)}
+            else:
+                result = CodeExecutor.execute_workflow_code_template(
+                    language=CodeLanguage.JINJA2, code=self.node_data.template, inputs=variables
+                )
         except CodeExecutionError as e:
             return NodeRunResult(inputs=variables, status=WorkflowNodeExecutionStatus.FAILED, error=str(e))
 
@@ -1,9 +1,9 @@
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from typing import Any, Literal
 
 from core.file import FileAttribute, file_manager
-from core.variables import ArrayFileSegment
-from core.workflow.entities.variable_pool import VariablePool
+from core.variables import ArrayFileSegment, Segment
+from core.workflow.entities.variable_pool import VARIABLE_PATTERN, VariablePool
 
 from .entities import Condition, SubCondition, SupportedComparisonOperator
 
@@ -16,114 +16,144 @@ class ConditionProcessor:
         conditions: Sequence[Condition],
         operator: Literal["and", "or"],
     ):
-        input_conditions = []
-        group_results = []
-
-        for condition in conditions:
-            variable = variable_pool.get(condition.variable_selector)
-            if variable is None:
-                raise ValueError(f"Variable {condition.variable_selector} not found")
-
-            if isinstance(variable, ArrayFileSegment) and condition.comparison_operator in {
-                "contains",
-                "not contains",
-                "all of",
-            }:
-                # check sub conditions
-                if not condition.sub_variable_condition:
-                    raise ValueError("Sub variable is required")
-                result = _process_sub_conditions(
-                    variable=variable,
-                    sub_conditions=condition.sub_variable_condition.conditions,
-                    operator=condition.sub_variable_condition.logical_operator,
-                )
-            elif condition.comparison_operator in {
-                "exists",
-                "not exists",
-            }:
-                result = _evaluate_condition(
-                    value=variable.value,
-                    operator=condition.comparison_operator,
-                    expected=None,
-                )
-            else:
-                actual_value = variable.value if variable else None
-                expected_value = condition.value
-                if isinstance(expected_value, str):
-                    expected_value = variable_pool.convert_template(expected_value).text
-                input_conditions.append(
-                    {
-                        "actual_value": actual_value,
-                        "expected_value": expected_value,
-                        "comparison_operator": condition.comparison_operator,
-                    }
-                )
-                result = _evaluate_condition(
-                    value=actual_value,
-                    operator=condition.comparison_operator,
-                    expected=expected_value,
-                )
+        return CompiledConditions(conditions=conditions, operator=operator).evaluate(variable_pool)
+
+
+class CompiledConditions:
+    """
+    A group of conditions compiled into closures.
+
+    Selectors, expected value templates and comparison operators are resolved once, so that the conditions can be
+    evaluated repeatedly (e.g. the break conditions of a loop) with direct variable pool lookups.
+    """
+
+    def __init__(self, *, conditions: Sequence[Condition], operator: Literal["and", "or"]) -> None:
+        self._checks = [_compile_condition(condition) for condition in conditions]
+        self._is_and = operator == "and"
+
+    def evaluate(self, variable_pool: VariablePool) -> tuple[list[dict[str, Any]], list[bool], bool]:
+        """
+        Evaluate the conditions against the variable pool.
+        :return: input conditions, results of each condition and the final result
+        """
+        input_conditions: list[dict[str, Any]] = []
+        group_results: list[bool] = []
+
+        for check in self._checks:
+            result = check(variable_pool, input_conditions)
             group_results.append(result)
             # Implemented short-circuit evaluation for logical conditions
-            if (operator == "and" and not result) or (operator == "or" and result):
-                final_result = result
-                return input_conditions, group_results, final_result
+            if result != self._is_and:
+                return input_conditions, group_results, result
 
-        final_result = all(group_results) if operator == "and" else any(group_results)
+        final_result = all(group_results) if self._is_and else any(group_results)
         return input_conditions, group_results, final_result
 
 
+def _compile_condition(condition: Condition) -> Callable[[VariablePool, list[dict[str, Any]]], bool]:
+    variable_selector = condition.variable_selector
+    comparison_operator = condition.comparison_operator
+    lookup = _compile_selector(variable_selector)
+    assert_func = _get_assert_func(comparison_operator)
+
+    sub_conditions_check: Callable[[ArrayFileSegment], bool] | None = None
+    if condition.sub_variable_condition:
+        sub_conditions_check = _compile_sub_conditions(
+            sub_conditions=condition.sub_variable_condition.conditions,
+            operator=condition.sub_variable_condition.logical_operator,
+        )
+
+    expected_value = condition.value
+    render_expected = _compile_template(expected_value) if isinstance(expected_value, str) else None
+
+    def check(variable_pool: VariablePool, input_conditions: list[dict[str, Any]]) -> bool:
+        variable = lookup(variable_pool)
+        if variable is None:
+            raise ValueError(f"Variable {variable_selector} not found")
+
+        if isinstance(variable, ArrayFileSegment) and comparison_operator in {"contains", "not contains", "all of"}:
+            # check sub conditions
+            if sub_conditions_check is None:
+                raise ValueError("Sub variable is required")
+            return sub_conditions_check(variable)
+
+        if comparison_operator in {"exists", "not exists"}:
+            return assert_func(variable.value, None)
+
+        actual_value = variable.value
+        expected = render_expected(variable_pool) if render_expected else expected_value
+        input_conditions.append(
+            {
+                "actual_value": actual_value,
+                "expected_value": expected,
+                "comparison_operator": comparison_operator,
+            }
+        )
+        return assert_func(actual_value, expected)
+
+    return check
+
+
+def _compile_selector(selector: Sequence[str]) -> Callable[[VariablePool], Segment | None]:
+    """
+    Resolve a selector to a direct lookup in the variable dictionary of the pool, the lookups that miss (e.g.
+    file attributes) fall back to `VariablePool.get`.
+    """
+    if len(selector) < 2:
+        return lambda variable_pool: None
+
+    selector = list(selector)
+    node_id = selector[0]
+    hash_key = hash(tuple(selector[1:]))
+
+    def lookup(variable_pool: VariablePool) -> Segment | None:
+        variables = variable_pool.variable_dictionary.get(node_id) if isinstance(variable_pool, VariablePool) else None
+        if variables:
+            variable = variables.get(hash_key)
+            if variable is not None:
+                return variable
+        return variable_pool.get(selector)
+
+    return lookup
+
+
+def _compile_template(template: str) -> Callable[[VariablePool], str]:
+    """
+    Pre-split a template, the same way as `VariablePool.convert_template`, into literal text and variable references.
+    """
+    parts = [part for part in VARIABLE_PATTERN.split(template) if part]
+    if not any("." in part for part in parts):
+        text = "".join(parts)
+        return lambda variable_pool: text
+
+    references: list[tuple[str, Callable[[VariablePool], Segment | None] | None]] = [
+        (part, _compile_selector(part.split(".")) if "." in part else None) for part in parts
+    ]
+
+    def render(variable_pool: VariablePool) -> str:
+        texts = []
+        for part, lookup in references:
+            variable = lookup(variable_pool) if lookup else None
+            texts.append(variable.text if variable else part)
+        return "".join(texts)
+
+    return render
+
+
 def _evaluate_condition(
     *,
     operator: SupportedComparisonOperator,
     value: Any,
     expected: str | Sequence[str] | None,
 ) -> bool:
-    match operator:
-        case "contains":
-            return _assert_contains(value=value, expected=expected)
-        case "not contains":
-            return _assert_not_contains(value=value, expected=expected)
-        case "start with":
-            return _assert_start_with(value=value, expected=expected)
-        case "end with":
-            return _assert_end_with(value=value, expected=expected)
-        case "is":
-            return _assert_is(value=value, expected=expected)
-        case "is not":
-            return _assert_is_not(value=value, expected=expected)
-        case "empty":
-            return _assert_empty(value=value)
-        case "not empty":
-            return _assert_not_empty(value=value)
-        case "=":
-            return _assert_equal(value=value, expected=expected)
-        case "≠":
-            return _assert_not_equal(value=value, expected=expected)
-        case ">":
-            return _assert_greater_than(value=value, expected=expected)
-        case "<":
-            return _assert_less_than(value=value, expected=expected)
-        case "≥":
-            return _assert_greater_than_or_equal(value=value, expected=expected)
-        case "≤":
-            return _assert_less_than_or_equal(value=value, expected=expected)
-        case "null":
-            return _assert_null(value=value)
-        case "not null":
-            return _assert_not_null(value=value)
-        case "in":
-            return _assert_in(value=value, expected=expected)
-        case "not in":
-            return _assert_not_in(value=value, expected=expected)
-        case "all of" if isinstance(expected, list):
-            return _assert_all_of(value=value, expected=expected)
-        case "exists":
-            return _assert_exists(value=value)
-        case "not exists":
-            return _assert_not_exists(value=value)
-        case _:
-            raise ValueError(f"Unsupported operator: {operator}")
+    return _get_assert_func(operator)(value, expected)
+
+
+def _get_assert_func(operator: SupportedComparisonOperator) -> Callable[[Any, Any], bool]:
+    assert_func = _ASSERT_FUNCTIONS.get(operator)
+    if assert_func is None:
+        raise ValueError(f"Unsupported operator: {operator}")
+    return assert_func
 
 
 def _assert_contains(*, value: Any, expected: Any) -> bool:
@@ -349,6 +379,9 @@ def _assert_not_in(*, value: Any, expected: Any) -> bool:
 
 
 def _assert_all_of(*, value: Any, expected: Sequence[str]) -> bool:
+    if not isinstance(expected, list):
+        raise ValueError("Unsupported operator: all of")
+
     if not value:
         return False
 
@@ -365,39 +398,74 @@ def _assert_not_exists(*, value: Any) -> bool:
     return value is None
 
 
-def _process_sub_conditions(
-    variable: ArrayFileSegment,
+_ASSERT_FUNCTIONS: dict[str, Callable[[Any, Any], bool]] = {
+    "contains": lambda value, expected: _assert_contains(value=value, expected=expected),
+    "not contains": lambda value, expected: _assert_not_contains(value=value, expected=expected),
+    "start with": lambda value, expected: _assert_start_with(value=value, expected=expected),
+    "end with": lambda value, expected: _assert_end_with(value=value, expected=expected),
+    "is": lambda value, expected: _assert_is(value=value, expected=expected),
+    "is not": lambda value, expected: _assert_is_not(value=value, expected=expected),
+    "empty": lambda value, expected: _assert_empty(value=value),
+    "not empty": lambda value, expected: _assert_not_empty(value=value),
+    "=": lambda value, expected: _assert_equal(value=value, expected=expected),
+    "≠": lambda value, expected: _assert_not_equal(value=value, expected=expected),
+    ">": lambda value, expected: _assert_greater_than(value=value, expected=expected),
+    "<": lambda value, expected: _assert_less_than(value=value, expected=expected),
+    "≥": lambda value, expected: _assert_greater_than_or_equal(value=value, expected=expected),
+    "≤": lambda value, expected: _assert_less_than_or_equal(value=value, expected=expected),
+    "null": lambda value, expected: _assert_null(value=value),
+    "not null": lambda value, expected: _assert_not_null(value=value),
+    "in": lambda value, expected: _assert_in(value=value, expected=expected),
+    "not in": lambda value, expected: _assert_not_in(value=value, expected=expected),
+    "all of": lambda value, expected: _assert_all_of(value=value, expected=expected),
+    "exists": lambda value, expected: _assert_exists(value=value),
+    "not exists": lambda value, expected: _assert_not_exists(value=value),
+}
+
+
+def _compile_sub_conditions(
+    *,
     sub_conditions: Sequence[SubCondition],
     operator: Literal["and", "or"],
-) -> bool:
-    files = variable.value
-    group_results = []
-    for condition in sub_conditions:
+) -> Callable[[ArrayFileSegment], bool]:
+    checks = [_compile_sub_condition(condition) for condition in sub_conditions]
+
+    def check(variable: ArrayFileSegment) -> bool:
+        group_results = [sub_check(variable.value) for sub_check in checks]
+        return all(group_results) if operator == "and" else any(group_results)
+
+    return check
+
+
+def _compile_sub_condition(condition: SubCondition) -> Callable[[Sequence[Any]], bool]:
+    try:
         key = FileAttribute(condition.key)
-        values = [file_manager.get_attr(file=file, attr=key) for file in files]
+        assert_func = _get_assert_func(condition.comparison_operator)
         expected_value = condition.value
         if key == FileAttribute.EXTENSION:
             if not isinstance(expected_value, str):
                 raise TypeError("Expected value must be a string when key is FileAttribute.EXTENSION")
             if expected_value and not expected_value.startswith("."):
                 expected_value = "." + expected_value
+    except (TypeError, ValueError) as e:
+        # invalid sub conditions fail when they are evaluated, not when they are compiled
+        error = e
+
+        def fail(files: Sequence[Any]) -> bool:
+            raise error
+
+        return fail
+
+    # Determine the result based on the presence of "not" in the comparison operator
+    aggregate = all if "not" in condition.comparison_operator else any
+
+    def check(files: Sequence[Any]) -> bool:
+        values = [file_manager.get_attr(file=file, attr=key) for file in files]
+        if key == FileAttribute.EXTENSION:
+            values = [
+                "." + value if value and isinstance(value, str) and not value.startswith(".") else value
+                for value in values
+            ]
+        return aggregate([assert_func(value, expected_value) for value in values])
 
-            normalized_values = []
-            for value in values:
-                if value and isinstance(value, str):
-                    if not value.startswith("."):
-                        value = "." + value
-                normalized_values.append(value)
-            values = normalized_values
-        sub_group_results = [
-            _evaluate_condition(
-                value=value,
-                operator=condition.comparison_operator,
-                expected=expected_value,
-            )
-            for value in values
-        ]
-        # Determine the result based on the presence of "not" in the comparison operator
-        result = all(sub_group_results) if "not" in condition.comparison_operator else any(sub_group_results)
-        group_results.append(result)
-    return all(group_results) if operator == "and" else any(group_results)
+    return check
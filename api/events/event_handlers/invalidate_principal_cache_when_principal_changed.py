@@ -0,0 +1,59 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.account import Account, Tenant, TenantAccountJoin
+from models.model import App, EndUser, Site
+from services.principal_cache import principal_cache
+
+_SCOPES_KEY = "principal_cache_scopes"
+
+
+def _get_scope(instance) -> str | None:
+    if isinstance(instance, Account):
+        return principal_cache.scope("account", instance.id)
+    if isinstance(instance, TenantAccountJoin):
+        # the membership decides the current tenant and role of the account
+        return principal_cache.scope("account", instance.account_id)
+    if isinstance(instance, Tenant):
+        return principal_cache.scope("tenant", instance.id)
+    if isinstance(instance, EndUser):
+        return principal_cache.scope("end_user", instance.id)
+    if isinstance(instance, App):
+        return principal_cache.scope("app", instance.id)
+    if isinstance(instance, Site):
+        return principal_cache.scope("app", instance.app_id)
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def handle(session: Session, flush_context):
+    """Record the scopes of the flushed principal changes, they are invalidated when the session commits."""
+    if not principal_cache.enabled:
+        return
+
+    scopes: set[str] = session.info.setdefault(_SCOPES_KEY, set())
+    for instance in session.deleted:
+        scope = _get_scope(instance)
+        if scope:
+            scopes.add(scope)
+    for instance in session.dirty:
+        if session.is_modified(instance, include_collections=False):
+            scope = _get_scope(instance)
+            if scope:
+                scopes.add(scope)
+    # new principals are not cached yet, except the accounts whose memberships are created
+    for instance in session.new:
+        if isinstance(instance, TenantAccountJoin):
+            scopes.add(principal_cache.scope("account", instance.account_id))
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_principals(session: Session):
+    scopes: set[str] = session.info.pop(_SCOPES_KEY, set())
+    if scopes:
+        principal_cache.invalidate(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_principals(session: Session):
+    session.info.pop(_SCOPES_KEY, None)
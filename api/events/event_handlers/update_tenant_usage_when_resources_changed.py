@@ -0,0 +1,70 @@
+import logging
+from collections import Counter
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models.account import TenantAccountJoin
+from models.dataset import Dataset, Document
+from models.model import App, MessageAnnotation
+from services.tenant_usage_service import TenantUsageResource, TenantUsageService
+
+logger = logging.getLogger(__name__)
+
+_DELTAS_KEY = "tenant_usage_deltas"
+_RESETS_KEY = "tenant_usage_resets"
+
+_RESOURCES: dict[type, TenantUsageResource] = {
+    TenantAccountJoin: TenantUsageResource.MEMBERS,
+    App: TenantUsageResource.APPS,
+    Dataset: TenantUsageResource.DATASETS,
+    Document: TenantUsageResource.DOCUMENTS,
+}
+
+
+def _get_app_tenant_id(session: Session, app_id: str) -> str | None:
+    app = session.identity_map.get(session.identity_key(App, app_id))
+    if app is not None:
+        return app.tenant_id
+    return session.connection().scalar(select(App.tenant_id).where(App.id == app_id))
+
+
+@event.listens_for(Session, "after_flush")
+def handle(session: Session, flush_context):
+    """Record the usage changes of the flushed inserts and deletes, they are applied when the session commits."""
+    deltas: Counter = session.info.setdefault(_DELTAS_KEY, Counter())
+    resets: set[str] = session.info.setdefault(_RESETS_KEY, set())
+
+    for instances, amount in ((session.new, 1), (session.deleted, -1)):
+        for instance in instances:
+            resource = _RESOURCES.get(type(instance))
+            if resource is not None:
+                deltas[(instance.tenant_id, resource)] += amount
+                # the annotations of a deleted app are no longer counted
+                if isinstance(instance, App) and amount < 0:
+                    resets.add(instance.tenant_id)
+            elif isinstance(instance, MessageAnnotation):
+                tenant_id = _get_app_tenant_id(session, instance.app_id)
+                if tenant_id:
+                    deltas[(tenant_id, TenantUsageResource.ANNOTATIONS)] += amount
+
+
+@event.listens_for(Session, "after_commit")
+def apply_usage_changes(session: Session):
+    deltas: Counter = session.info.pop(_DELTAS_KEY, Counter())
+    resets: set[str] = session.info.pop(_RESETS_KEY, set())
+    if not deltas and not resets:
+        return
+
+    try:
+        TenantUsageService.reset(resets)
+        TenantUsageService.increment(Counter({key: amount for key, amount in deltas.items() if key[0] not in resets}))
+    except Exception:
+        # the counters are recounted when they expire or are reconciled
+        logger.exception("Failed to update tenant usage counters")
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_usage_changes(session: Session):
+    session.info.pop(_DELTAS_KEY, None)
+    session.info.pop(_RESETS_KEY, None)
@@ -71,6 +71,9 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.clean_messages",
         "schedule.mail_clean_document_notify_task",
         "schedule.queue_monitor_task",
+        "schedule.app_statistic_rollup_task",
+        "schedule.reconcile_tenant_usage_task",
+        "schedule.flush_api_token_last_used_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -105,6 +108,18 @@ def init_app(app: DifyApp) -> Celery:
                 minutes=dify_config.QUEUE_MONITOR_INTERVAL if dify_config.QUEUE_MONITOR_INTERVAL else 30
             ),
         },
+        "app_statistic_rollup_task": {
+            "task": "schedule.app_statistic_rollup_task.app_statistic_rollup_task",
+            "schedule": timedelta(minutes=dify_config.APP_STATISTIC_ROLLUP_INTERVAL),
+        },
+        "reconcile_tenant_usage_task": {
+            "task": "schedule.reconcile_tenant_usage_task.reconcile_tenant_usage_task",
+            "schedule": timedelta(minutes=dify_config.TENANT_USAGE_RECONCILE_INTERVAL),
+        },
+        "flush_api_token_last_used_task": {
+            "task": "schedule.flush_api_token_last_used_task.flush_api_token_last_used_task",
+            "schedule": timedelta(minutes=dify_config.API_TOKEN_LAST_USED_FLUSH_INTERVAL),
+        },
     }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
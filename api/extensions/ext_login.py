@@ -12,6 +12,7 @@ from libs.passport import PassportService
 from models.account import Account, Tenant, TenantAccountJoin
 from models.model import EndUser
 from services.account_service import AccountService
+from services.principal_cache import principal_cache
 
 login_manager = flask_login.LoginManager()
 
@@ -70,9 +71,15 @@ def load_user_from_request(request_from_flask_login):
         end_user_id = decoded.get("end_user_id")
         if not end_user_id:
             raise Unauthorized("Invalid Authorization token.")
+        # the end user is served from the principal cache when it did not change
+        cache_key = principal_cache.scope("end_user", end_user_id)
+        principal = principal_cache.get(cache_key)
+        if principal is not None:
+            return principal_cache.restore(db.session, EndUser, principal["end_user"])
         end_user = db.session.query(EndUser).filter(EndUser.id == decoded["end_user_id"]).first()
         if not end_user:
             raise NotFound("End user not found.")
+        principal_cache.put(cache_key, [cache_key], {"end_user": principal_cache.snapshot(end_user)})
         return end_user
 
 
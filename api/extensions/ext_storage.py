@@ -1,6 +1,6 @@
 import logging
 from collections.abc import Callable, Generator
-from typing import Literal, Union, overload
+from typing import IO, Literal, Union, overload
 
 from flask import Flask
 
@@ -75,6 +75,9 @@ class Storage:
     def save(self, filename, data):
         self.storage_runner.save(filename, data)
 
+    def save_stream(self, filename: str, stream: IO[bytes]):
+        self.storage_runner.save_stream(filename, stream)
+
     @overload
     def load(self, filename: str, /, *, stream: Literal[False] = False) -> bytes: ...
 
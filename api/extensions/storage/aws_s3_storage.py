@@ -51,6 +51,10 @@ class AwsS3Storage(BaseStorage):
     def save(self, filename, data):
         self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=data)
 
+    def save_stream(self, filename, stream):
+        # uploaded in parts, without reading the whole stream into memory
+        self.client.upload_fileobj(stream, self.bucket_name, filename)
+
     def load_once(self, filename: str) -> bytes:
         try:
             data: bytes = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
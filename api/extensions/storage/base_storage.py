@@ -2,6 +2,7 @@
 
 from abc import ABC, abstractmethod
 from collections.abc import Generator
+from typing import IO
 
 
 class BaseStorage(ABC):
@@ -11,6 +12,13 @@ class BaseStorage(ABC):
     def save(self, filename, data):
         raise NotImplementedError
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        """
+        Save the content of a binary file object.
+        The default implementation reads it into memory, backends supporting chunked uploads override it.
+        """
+        self.save(filename, stream.read())
+
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
         raise NotImplementedError
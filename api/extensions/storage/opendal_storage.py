@@ -2,6 +2,7 @@ import logging
 import os
 from collections.abc import Generator
 from pathlib import Path
+from typing import IO
 
 import opendal  # type: ignore[import]
 from dotenv import dotenv_values
@@ -44,6 +45,13 @@ class OpenDALStorage(BaseStorage):
         self.op.write(path=filename, bs=data)
         logger.debug(f"file {filename} saved")
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        batch_size = 64 * 1024
+        with self.op.open(path=filename, mode="wb") as file:
+            while chunk := stream.read(batch_size):
+                file.write(chunk)
+        logger.debug(f"file {filename} saved as stream")
+
     def load_once(self, filename: str) -> bytes:
         if not self.exists(filename):
             raise FileNotFoundError("File not found")
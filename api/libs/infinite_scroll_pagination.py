@@ -1,5 +1,55 @@
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Session
+
+
 class InfiniteScrollPagination:
     def __init__(self, data, limit, has_more):
         self.data = data
         self.limit = limit
         self.has_more = has_more
+
+
+def paginate_by_keyset(
+    session: Session,
+    stmt: Select,
+    *,
+    keys: Sequence[Any],
+    limit: int,
+    descending: bool = True,
+    anchor_id: Optional[str] = None,
+) -> Optional[InfiniteScrollPagination]:
+    """
+    Paginate the rows of a statement in the order of `keys`, starting after the row `anchor_id`.
+
+    The last key must be the unique id of the rows so that rows with equal sort values are neither skipped nor
+    repeated. The position of the anchor is looked up within the page query, and limit + 1 rows are fetched to
+    know whether there are more.
+
+    :param session: session to run the query
+    :param stmt: select statement of the rows, with its filters
+    :param keys: columns to order by, ending with the id column
+    :param limit: page size
+    :param descending: order the rows from the largest keys
+    :param anchor_id: id of the last row of the previous page
+    :return: the page, None if the anchor is not one of the rows
+    """
+    id_column = keys[-1]
+    page_stmt = stmt
+    if anchor_id:
+        anchor_keys = tuple_(
+            *(stmt.with_only_columns(key).where(id_column == anchor_id).scalar_subquery() for key in keys)
+        )
+        page_stmt = page_stmt.where(tuple_(*keys) < anchor_keys if descending else tuple_(*keys) > anchor_keys)
+
+    page_stmt = page_stmt.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(limit + 1)
+    rows = list(session.scalars(page_stmt).all())
+
+    # an empty page may also mean the anchor does not exist, which the page query can not tell
+    if anchor_id and not rows:
+        if session.scalar(stmt.with_only_columns(id_column).where(id_column == anchor_id)) is None:
+            return None
+
+    return InfiniteScrollPagination(data=rows[:limit], limit=limit, has_more=len(rows) > limit)
@@ -0,0 +1,47 @@
+"""add composite indexes for the keyset pagination of conversations and messages
+
+Revision ID: 3b7e9d52a1c6
+Revises: 8c1f3a2d9e47
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9d52a1c6'
+down_revision = '8c1f3a2d9e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # `CREATE INDEX CONCURRENTLY` cannot run within a transaction, so use the `autocommit_block`
+    # context manager to wrap the index creation statement.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'conversation_app_end_user_updated_at_idx',
+            'conversations',
+            ['app_id', 'from_end_user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'message_conversation_created_at_idx',
+            'messages',
+            ['conversation_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    # `DROP INDEX CONCURRENTLY` cannot run within a transaction, so use the `autocommit_block`
+    # context manager to wrap the index deletion statement.
+    with op.get_context().autocommit_block():
+        op.drop_index('message_conversation_created_at_idx', table_name='messages', postgresql_concurrently=True)
+        op.drop_index(
+            'conversation_app_end_user_updated_at_idx', table_name='conversations', postgresql_concurrently=True
+        )
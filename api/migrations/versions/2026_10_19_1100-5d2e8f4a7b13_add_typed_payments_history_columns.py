@@ -0,0 +1,73 @@
+"""add typed and indexed columns to the payment history
+
+Revision ID: 5d2e8f4a7b13
+Revises: 3b7e9d52a1c6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8f4a7b13'
+down_revision = '3b7e9d52a1c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments_history_custom', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('account_id', models.types.StringUUID(), nullable=True))
+        batch_op.add_column(sa.Column('plan_id', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('amount', sa.Numeric(precision=20, scale=2), server_default=sa.text('0'), nullable=False))
+        batch_op.add_column(sa.Column('transaction_id', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('transaction_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+        batch_op.add_column(sa.Column('status', sa.String(length=32), server_default=sa.text("'received'"), nullable=False))
+
+    # backfill the columns from the stored payloads, values that can not be converted are left empty,
+    # payments without a valid date keep the time of the migration.
+    # the old webhook stored the plan before checking the plan, account and amount, so whether a payment was
+    # completed is unknown and every existing payment keeps the 'received' status
+    op.execute(
+        r"""
+        UPDATE payments_history_custom SET
+            account_id = CASE
+                WHEN value->>'id_account' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+                THEN (value->>'id_account')::uuid
+            END,
+            plan_id = NULLIF(value->>'id_plan', ''),
+            amount = CASE
+                WHEN value->>'amount' ~ '^-?[0-9]+(\.[0-9]+)?$' THEN (value->>'amount')::numeric
+                ELSE 0
+            END,
+            transaction_id = NULLIF(value->>'transactionID', ''),
+            transaction_at = CASE
+                WHEN value->>'date' ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}([ T][0-9]{2}:[0-9]{2}(:[0-9]{2})?)?$'
+                THEN (value->>'date')::timestamp
+                ELSE transaction_at
+            END
+        WHERE value IS NOT NULL
+        """
+    )
+
+    with op.batch_alter_table('payments_history_custom', schema=None) as batch_op:
+        batch_op.create_index('payments_history_custom_transaction_at_idx', ['transaction_at', 'id'], unique=False)
+        batch_op.create_index('payments_history_custom_account_idx', ['account_id', 'transaction_at'], unique=False)
+        batch_op.create_index('payments_history_custom_plan_idx', ['plan_id', 'transaction_at'], unique=False)
+        batch_op.create_index('payments_history_custom_transaction_id_idx', ['transaction_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payments_history_custom', schema=None) as batch_op:
+        batch_op.drop_index('payments_history_custom_transaction_id_idx')
+        batch_op.drop_index('payments_history_custom_plan_idx')
+        batch_op.drop_index('payments_history_custom_account_idx')
+        batch_op.drop_index('payments_history_custom_transaction_at_idx')
+        batch_op.drop_column('status')
+        batch_op.drop_column('transaction_at')
+        batch_op.drop_column('transaction_id')
+        batch_op.drop_column('amount')
+        batch_op.drop_column('plan_id')
+        batch_op.drop_column('account_id')
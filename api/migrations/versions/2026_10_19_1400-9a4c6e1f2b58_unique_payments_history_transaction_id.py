@@ -0,0 +1,52 @@
+"""make the transaction id of the payment history unique
+
+Revision ID: 9a4c6e1f2b58
+Revises: 5d2e8f4a7b13
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c6e1f2b58'
+down_revision = '5d2e8f4a7b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # matched payments used to be recorded twice and retried webhooks recorded their payments again,
+    # keep a single record per transaction: the completed one, then the rejected one, then the latest
+    op.execute(
+        """
+        DELETE FROM payments_history_custom
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY transaction_id
+                    ORDER BY
+                        CASE status WHEN 'completed' THEN 0 WHEN 'rejected' THEN 1 ELSE 2 END,
+                        account_id IS NULL,
+                        transaction_at DESC,
+                        id
+                ) AS position
+                FROM payments_history_custom
+                WHERE transaction_id IS NOT NULL
+            ) AS ranked
+            WHERE ranked.position > 1
+        )
+        """
+    )
+
+    with op.batch_alter_table('payments_history_custom', schema=None) as batch_op:
+        batch_op.drop_index('payments_history_custom_transaction_id_idx')
+        batch_op.create_index('payments_history_custom_transaction_id_idx', ['transaction_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('payments_history_custom', schema=None) as batch_op:
+        batch_op.drop_index('payments_history_custom_transaction_id_idx')
+        batch_op.create_index('payments_history_custom_transaction_id_idx', ['transaction_id'], unique=False)
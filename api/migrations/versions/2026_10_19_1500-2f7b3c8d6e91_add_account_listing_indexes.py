@@ -0,0 +1,29 @@
+"""add indexes for the paginated account listing
+
+Revision ID: 2f7b3c8d6e91
+Revises: 9a4c6e1f2b58
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f7b3c8d6e91'
+down_revision = '9a4c6e1f2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.create_index('account_created_at_idx', ['created_at', 'id'], unique=False)
+        batch_op.create_index('account_plan_expiration_idx', ['plan_expiration'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.drop_index('account_plan_expiration_idx')
+        batch_op.drop_index('account_created_at_idx')
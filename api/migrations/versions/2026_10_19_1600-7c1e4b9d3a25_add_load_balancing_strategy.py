@@ -0,0 +1,27 @@
+"""add load balancing strategy to provider model settings
+
+Revision ID: 7c1e4b9d3a25
+Revises: 2f7b3c8d6e91
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b9d3a25'
+down_revision = '2f7b3c8d6e91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('provider_model_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('load_balancing_strategy', sa.String(length=40), server_default=sa.text("'round_robin'::character varying"), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('provider_model_settings', schema=None) as batch_op:
+        batch_op.drop_column('load_balancing_strategy')
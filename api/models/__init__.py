@@ -70,6 +70,12 @@ from .provider import (
     TenantPreferredModelProvider,
 )
 from .source import DataSourceApiKeyAuthBinding, DataSourceOauthBinding
+from .statistic import (
+    AppHourlyConversationStatistic,
+    AppHourlyEndUserStatistic,
+    AppHourlyMessageStatistic,
+    StatisticRollupWatermark,
+)
 
 # Custom additions
 from .system_custom_info import SystemCustomInfo
@@ -108,6 +114,9 @@ __all__ = [
     "AppAnnotationHitHistory",
     "AppAnnotationSetting",
     "AppDatasetJoin",
+    "AppHourlyConversationStatistic",
+    "AppHourlyEndUserStatistic",
+    "AppHourlyMessageStatistic",
     "AppMode",
     "AppModelConfig",
     "BuiltinToolProvider",
@@ -154,6 +163,7 @@ __all__ = [
     "RecommendedApp",
     "SavedMessage",
     "Site",
+    "StatisticRollupWatermark",
     "Tag",
     "TagBinding",
     "Tenant",
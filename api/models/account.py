@@ -27,6 +27,8 @@ class Account(UserMixin, Base):
         db.PrimaryKeyConstraint("id", name="account_pkey"),
         db.Index("account_email_idx", "email"),
         db.Index("id_custom_plan_idx", "id_custom_plan"),
+        db.Index("account_created_at_idx", "created_at", "id"),
+        db.Index("account_plan_expiration_idx", "plan_expiration"),
     )
 
     id: Mapped[str] = mapped_column(StringUUID, server_default=db.text("uuid_generate_v4()"))
@@ -96,6 +98,11 @@ class Account(UserMixin, Base):
         self.role = join.role
         self._current_tenant = tenant
 
+    def set_current_tenant(self, tenant: Optional["Tenant"], role: Optional[str]):
+        """Set a current tenant and role already resolved by the caller, without querying the membership"""
+        self.role = role
+        self._current_tenant = tenant
+
     @property
     def current_role(self):
         return self.role
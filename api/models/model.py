@@ -616,6 +616,7 @@ class Conversation(Base):
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="conversation_pkey"),
         db.Index("conversation_app_from_user_idx", "app_id", "from_source", "from_end_user_id"),
+        db.Index("conversation_app_end_user_updated_at_idx", "app_id", "from_end_user_id", "updated_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(StringUUID, server_default=db.text("uuid_generate_v4()"))
@@ -879,6 +880,7 @@ class Message(Base):
         PrimaryKeyConstraint("id", name="message_pkey"),
         Index("message_app_id_idx", "app_id", "created_at"),
         Index("message_conversation_id_idx", "conversation_id"),
+        Index("message_conversation_created_at_idx", "conversation_id", "created_at", "id"),
         Index("message_end_user_idx", "app_id", "from_source", "from_end_user_id"),
         Index("message_account_idx", "app_id", "from_source", "from_account_id"),
         Index("message_workflow_run_id_idx", "conversation_id", "workflow_run_id"),
@@ -1026,8 +1028,22 @@ class Message(Base):
 
         return re_sign_file_url_answer
 
+    def preload_relations(self, **relations: Any) -> None:
+        """
+        Attach related records loaded in batch for a list of messages, the properties of these relations return them
+        instead of querying the database. See MessageService.preload_relations.
+        """
+        self._preloaded_relations = {**self._get_preloaded_relations(), **relations}
+
+    def _get_preloaded_relations(self) -> dict[str, Any]:
+        return getattr(self, "_preloaded_relations", None) or {}
+
     @property
     def user_feedback(self):
+        preloaded = self._get_preloaded_relations()
+        if "feedbacks" in preloaded:
+            return next((feedback for feedback in preloaded["feedbacks"] if feedback.from_source == "user"), None)
+
         feedback = (
             db.session.query(MessageFeedback)
             .filter(MessageFeedback.message_id == self.id, MessageFeedback.from_source == "user")
@@ -1037,6 +1053,10 @@ class Message(Base):
 
     @property
     def admin_feedback(self):
+        preloaded = self._get_preloaded_relations()
+        if "feedbacks" in preloaded:
+            return next((feedback for feedback in preloaded["feedbacks"] if feedback.from_source == "admin"), None)
+
         feedback = (
             db.session.query(MessageFeedback)
             .filter(MessageFeedback.message_id == self.id, MessageFeedback.from_source == "admin")
@@ -1046,16 +1066,28 @@ class Message(Base):
 
     @property
     def feedbacks(self):
+        preloaded = self._get_preloaded_relations()
+        if "feedbacks" in preloaded:
+            return preloaded["feedbacks"]
+
         feedbacks = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id).all()
         return feedbacks
 
     @property
     def annotation(self):
+        preloaded = self._get_preloaded_relations()
+        if "annotation" in preloaded:
+            return preloaded["annotation"]
+
         annotation = db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == self.id).first()
         return annotation
 
     @property
     def annotation_hit_history(self):
+        preloaded = self._get_preloaded_relations()
+        if "annotation_hit_history" in preloaded:
+            return preloaded["annotation_hit_history"]
+
         annotation_history = (
             db.session.query(AppAnnotationHitHistory).filter(AppAnnotationHitHistory.message_id == self.id).first()
         )
@@ -1088,6 +1120,10 @@ class Message(Base):
 
     @property
     def agent_thoughts(self):
+        preloaded = self._get_preloaded_relations()
+        if "agent_thoughts" in preloaded:
+            return preloaded["agent_thoughts"]
+
         return (
             db.session.query(MessageAgentThought)
             .filter(MessageAgentThought.message_id == self.id)
@@ -1103,12 +1139,24 @@ class Message(Base):
     def message_files(self):
         from factories import file_factory
 
-        message_files = db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
-        current_app = db.session.query(App).filter(App.id == self.app_id).first()
+        preloaded = self._get_preloaded_relations()
+        if "message_files" in preloaded:
+            message_files = preloaded["message_files"]
+        else:
+            message_files = db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
+        if not message_files:
+            return []
+
+        if "app" in preloaded:
+            current_app = preloaded["app"]
+        else:
+            current_app = db.session.query(App).filter(App.id == self.app_id).first()
         if not current_app:
             raise ValueError(f"App {self.app_id} not found")
 
         files = []
+        # the upload file id of old tool files is filled in from their url
+        upload_file_id_filled = False
         for message_file in message_files:
             if message_file.transfer_method == FileTransferMethod.LOCAL_FILE.value:
                 if message_file.upload_file_id is None:
@@ -1139,6 +1187,7 @@ class Message(Base):
                 if message_file.upload_file_id is None:
                     assert message_file.url is not None
                     message_file.upload_file_id = message_file.url.split("/")[-1].split(".")[0]
+                    upload_file_id_filled = True
                 mapping = {
                     "id": message_file.id,
                     "type": message_file.type,
@@ -1160,7 +1209,8 @@ class Message(Base):
             for (file, message_file) in zip(files, message_files)
         ]
 
-        db.session.commit()
+        if upload_file_id_filled:
+            db.session.commit()
         return result
 
     @property
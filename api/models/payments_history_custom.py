@@ -1,3 +1,6 @@
+from enum import StrEnum
+
+from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 
 from models.base import Base
@@ -6,12 +9,32 @@ from .engine import db
 from .types import StringUUID
 
 
-# This model is used to store custom information about the system.
+class PaymentStatus(StrEnum):
+    # recorded from the webhook, not matched to a payment request
+    RECEIVED = "received"
+    # matched to a payment request and the plan was assigned
+    COMPLETED = "completed"
+    # matched to a payment request, but the plan or account is missing or the amount is too low
+    REJECTED = "rejected"
+
+
+# This model is used to store the payments received by the webhook.
+# `value` keeps the payload of the payment, the typed columns are extracted from it for filtering and aggregation.
 class PaymentsHistoryCustom(Base):
     __tablename__ = "payments_history_custom"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="pk_payments_history_custom_id"),
+        db.Index("payments_history_custom_transaction_at_idx", "transaction_at", "id"),
+        db.Index("payments_history_custom_account_idx", "account_id", "transaction_at"),
+        db.Index("payments_history_custom_plan_idx", "plan_id", "transaction_at"),
+        db.Index("payments_history_custom_transaction_id_idx", "transaction_id", unique=True),
     )
 
     id = db.Column(StringUUID, server_default=db.text("uuid_generate_v4()"))
     value = db.Column(JSONB, nullable=True)
+    account_id = db.Column(StringUUID, nullable=True)
+    plan_id = db.Column(db.String(255), nullable=True)
+    amount = db.Column(db.Numeric(20, 2), nullable=False, server_default=db.text("0"))
+    transaction_id = db.Column(db.String(255), nullable=True)
+    transaction_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+    status = db.Column(db.String(32), nullable=False, server_default=db.text("'received'"))
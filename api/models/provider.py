@@ -198,6 +198,9 @@ class ProviderModelSetting(Base):
     model_type: Mapped[str] = mapped_column(db.String(40), nullable=False)
     enabled: Mapped[bool] = mapped_column(db.Boolean, nullable=False, server_default=text("true"))
     load_balancing_enabled: Mapped[bool] = mapped_column(db.Boolean, nullable=False, server_default=text("false"))
+    load_balancing_strategy: Mapped[str] = mapped_column(
+        db.String(40), nullable=False, server_default=text("'round_robin'::character varying")
+    )
     created_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, server_default=func.current_timestamp())
     updated_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, server_default=func.current_timestamp())
 
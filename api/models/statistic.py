@@ -0,0 +1,73 @@
+from sqlalchemy import func
+
+from .base import Base
+from .engine import db
+from .types import StringUUID
+
+
+class AppHourlyMessageStatistic(Base):
+    """
+    Hourly rollup of the messages of an app, `hour` is the start of the UTC hour.
+    """
+
+    __tablename__ = "app_hourly_message_statistics"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("app_id", "hour", name="app_hourly_message_statistic_pkey"),
+        db.Index("app_hourly_message_statistic_hour_idx", "hour"),
+    )
+
+    app_id = db.Column(StringUUID, nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    message_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text("0"))
+    answer_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text("0"))
+    total_price = db.Column(db.Numeric(20, 7), nullable=False, server_default=db.text("0"))
+    provider_response_latency = db.Column(db.Float, nullable=False, server_default=db.text("0"))
+
+
+class AppHourlyConversationStatistic(Base):
+    """
+    Hourly rollup of the messages of an app by conversation, used to count distinct conversations over days.
+    """
+
+    __tablename__ = "app_hourly_conversation_statistics"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("app_id", "hour", "conversation_id", name="app_hourly_conversation_statistic_pkey"),
+        db.Index("app_hourly_conversation_statistic_hour_idx", "hour"),
+    )
+
+    app_id = db.Column(StringUUID, nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    conversation_id = db.Column(StringUUID, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+
+
+class AppHourlyEndUserStatistic(Base):
+    """
+    Hourly rollup of the messages of an app by end user, used to count distinct end users over days.
+    """
+
+    __tablename__ = "app_hourly_end_user_statistics"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("app_id", "hour", "end_user_id", name="app_hourly_end_user_statistic_pkey"),
+        db.Index("app_hourly_end_user_statistic_hour_idx", "hour"),
+    )
+
+    app_id = db.Column(StringUUID, nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    end_user_id = db.Column(StringUUID, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+
+
+class StatisticRollupWatermark(Base):
+    """
+    Range of hours covered by a rollup, the rollup rows are complete in [rolled_from, rolled_until).
+    """
+
+    __tablename__ = "statistic_rollup_watermarks"
+    __table_args__ = (db.PrimaryKeyConstraint("name", name="statistic_rollup_watermark_pkey"),)
+
+    name = db.Column(db.String(255), nullable=False)
+    rolled_from = db.Column(db.DateTime, nullable=False)
+    rolled_until = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
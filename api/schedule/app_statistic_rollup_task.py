@@ -0,0 +1,23 @@
+import time
+
+import click
+from sqlalchemy.orm import Session
+
+import app
+from configs import dify_config
+from extensions.ext_database import db
+from services.app_statistic_rollup_service import AppStatisticRollupService
+
+
+@app.celery.task(queue="dataset")
+def app_statistic_rollup_task():
+    if not dify_config.APP_STATISTIC_ROLLUP_ENABLED:
+        return
+    click.echo(click.style("Start roll up app statistics.", fg="green"))
+    start_at = time.perf_counter()
+
+    with Session(db.engine, expire_on_commit=False) as session:
+        hours = AppStatisticRollupService.advance(session)
+
+    end_at = time.perf_counter()
+    click.echo(click.style(f"Rolled up {hours} hours of app statistics, latency: {end_at - start_at}", fg="green"))
@@ -3,26 +3,20 @@ import logging
 import time
 
 import click
-from werkzeug.exceptions import NotFound
+from sqlalchemy.orm import Session
 
 import app
 from configs import dify_config
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
-from models.model import (
-    App,
-    Message,
-    MessageAgentThought,
-    MessageAnnotation,
-    MessageChain,
-    MessageFeedback,
-    MessageFile,
-)
-from models.web import SavedMessage
 from services.feature_service import FeatureService
+from services.message_purge_service import MessagePurgeCursor, MessagePurgeService
 
 _logger = logging.getLogger(__name__)
 
+# cursor of an unfinished purge, the next run resumes from it
+CLEAN_MESSAGES_CURSOR_KEY = "clean_messages:cursor"
+
 
 @app.celery.task(queue="dataset")
 def clean_messages():
@@ -31,60 +25,46 @@ def clean_messages():
     plan_sandbox_clean_message_day = datetime.datetime.now() - datetime.timedelta(
         days=dify_config.PLAN_SANDBOX_CLEAN_MESSAGE_DAY_SETTING
     )
-    while True:
-        try:
-            # Main query with join and filter
-            messages = (
-                db.session.query(Message)
-                .filter(Message.created_at < plan_sandbox_clean_message_day)
-                .order_by(Message.created_at.desc())
-                .limit(100)
-                .all()
-            )
 
-        except NotFound:
-            break
-        if not messages:
-            break
-        for message in messages:
-            plan_sandbox_clean_message_day = message.created_at
-            app = db.session.query(App).filter_by(id=message.app_id).first()
-            if not app:
-                _logger.warning(
-                    "Expected App record to exist, but none was found, app_id=%s, message_id=%s",
-                    message.app_id,
-                    message.id,
-                )
-                continue
-            features_cache_key = f"features:{app.tenant_id}"
-            plan_cache = redis_client.get(features_cache_key)
-            if plan_cache is None:
-                features = FeatureService.get_features(app.tenant_id)
-                redis_client.setex(features_cache_key, 600, features.billing.subscription.plan)
-                plan = features.billing.subscription.plan
-            else:
-                plan = plan_cache.decode()
-            if plan == "sandbox":
-                # clean related message
-                db.session.query(MessageFeedback).filter(MessageFeedback.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageChain).filter(MessageChain.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageAgentThought).filter(MessageAgentThought.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageFile).filter(MessageFile.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(SavedMessage).filter(SavedMessage.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(Message).filter(Message.id == message.id).delete()
-                db.session.commit()
+    cursor_value = redis_client.get(CLEAN_MESSAGES_CURSOR_KEY)
+    cursor = MessagePurgeCursor.loads(cursor_value.decode()) if cursor_value else None
+    if cursor is not None:
+        click.echo(click.style(f"Resume clean messages after {cursor.created_at}.", fg="green"))
+
+    with Session(db.engine, expire_on_commit=False) as session:
+        result = MessagePurgeService.purge(
+            session,
+            before=plan_sandbox_clean_message_day,
+            is_tenant_eligible=lambda tenant_id: _get_plan(tenant_id) == "sandbox",
+            batch_size=dify_config.CLEAN_MESSAGES_BATCH_SIZE,
+            cursor=cursor,
+            time_budget=dify_config.CLEAN_MESSAGES_TIME_BUDGET,
+        )
+
+    if result.cursor is None:
+        redis_client.delete(CLEAN_MESSAGES_CURSOR_KEY)
+    else:
+        redis_client.set(CLEAN_MESSAGES_CURSOR_KEY, result.cursor.dumps())
+        click.echo(click.style(f"Time budget reached, stopped after {result.cursor.created_at}.", fg="yellow"))
+
+    for table_name, deleted in sorted(result.deleted.items()):
+        click.echo(click.style(f"Deleted {deleted} rows from {table_name}.", fg="green"))
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned messages from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            f"Cleaned messages from db success latency: {end_at - start_at}, scanned messages: {result.scanned}",
+            fg="green",
+        )
+    )
+
+
+def _get_plan(tenant_id: str) -> str:
+    features_cache_key = f"features:{tenant_id}"
+    plan_cache = redis_client.get(features_cache_key)
+    if plan_cache is not None:
+        return plan_cache.decode()
+
+    features = FeatureService.get_features(tenant_id)
+    plan = features.billing.subscription.plan
+    redis_client.setex(features_cache_key, 600, plan)
+    return plan
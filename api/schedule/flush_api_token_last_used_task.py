@@ -0,0 +1,20 @@
+import time
+
+import click
+from sqlalchemy.orm import Session
+
+import app
+from extensions.ext_database import db
+from services.api_token_cache import api_token_cache
+
+
+@app.celery.task(queue="dataset")
+def flush_api_token_last_used_task():
+    click.echo(click.style("Start flush last use of API tokens.", fg="green"))
+    start_at = time.perf_counter()
+
+    with Session(db.engine) as session:
+        flushed = api_token_cache.flush_last_used(session)
+
+    end_at = time.perf_counter()
+    click.echo(click.style(f"Flushed last use of {flushed} API tokens, latency: {end_at - start_at}", fg="green"))
@@ -0,0 +1,23 @@
+import time
+
+import click
+from sqlalchemy.orm import Session
+
+import app
+from configs import dify_config
+from extensions.ext_database import db
+from services.tenant_usage_service import TenantUsageService
+
+
+@app.celery.task(queue="dataset")
+def reconcile_tenant_usage_task():
+    if not dify_config.TENANT_USAGE_COUNTERS_ENABLED:
+        return
+    click.echo(click.style("Start reconcile tenant usage counters.", fg="green"))
+    start_at = time.perf_counter()
+
+    with Session(db.engine) as session:
+        drifted = TenantUsageService.reconcile(session)
+
+    end_at = time.perf_counter()
+    click.echo(click.style(f"Corrected usage counters of {drifted} tenants, latency: {end_at - start_at}", fg="green"))
@@ -0,0 +1,126 @@
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from sqlalchemy import String, cast, column, select, update, values
+from sqlalchemy.orm import Session, load_only
+
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
+from models.account import Account
+from services.entities.account_entities import AccountAdminUpdate
+
+
+class AccountAdminService:
+    """
+    Listing and bulk editing of the accounts from the dashboard
+    """
+
+    LISTED_FIELDS = (
+        "id",
+        "name",
+        "email",
+        "status",
+        "id_custom_plan",
+        "plan_expiration",
+        "month_before_banned",
+        "max_of_apps",
+        "max_vector_space",
+        "max_annotation_quota_limit",
+        "max_documents_upload_quota",
+        "last_login_at",
+        "last_login_ip",
+        "last_active_at",
+        "created_at",
+        "updated_at",
+    )
+    EDITABLE_FIELDS = tuple(name for name in AccountAdminUpdate.model_fields if name != "id")
+
+    @classmethod
+    def paginate(
+        cls,
+        session: Session,
+        *,
+        limit: int,
+        last_id: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        email: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        expiration_start: Optional[datetime] = None,
+        expiration_end: Optional[datetime] = None,
+    ) -> Optional[InfiniteScrollPagination]:
+        """
+        Get a page of the accounts, from the oldest account
+
+        :param last_id: id of the last account of the previous page
+        :param fields: columns to load, all the listed fields by default
+        :param email: part of the email to search
+        :return: the page, None if the last account is not in the filtered accounts
+        """
+        stmt = select(Account).options(load_only(*(getattr(Account, name) for name in cls.get_fields(fields))))
+        if email:
+            stmt = stmt.where(Account.email.ilike(f"%{email}%"))
+        if plan_id:
+            stmt = stmt.where(Account.id_custom_plan == plan_id)
+        if expiration_start:
+            stmt = stmt.where(Account.plan_expiration >= expiration_start)
+        if expiration_end:
+            stmt = stmt.where(Account.plan_expiration < expiration_end)
+
+        return paginate_by_keyset(
+            session,
+            stmt,
+            keys=(Account.created_at, Account.id),
+            limit=limit,
+            descending=False,
+            anchor_id=last_id,
+        )
+
+    @classmethod
+    def get_fields(cls, fields: Optional[Sequence[str]] = None) -> list[str]:
+        """
+        Get the listed fields to load, the id is always included
+
+        :raises ValueError: if a field is not listed
+        """
+        if not fields:
+            return list(cls.LISTED_FIELDS)
+        unknown = set(fields) - set(cls.LISTED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown account fields: {', '.join(sorted(unknown))}")
+        return ["id", *(name for name in cls.LISTED_FIELDS if name in fields and name != "id")]
+
+    @classmethod
+    def bulk_update(cls, session: Session, accounts: Sequence[AccountAdminUpdate]) -> list[str]:
+        """
+        Update the editable fields of the accounts with a single `UPDATE ... FROM (VALUES ...)` statement,
+        the caller commits
+
+        :return: ids of the updated accounts
+        """
+        if not accounts:
+            return []
+
+        names = ("id", *cls.EDITABLE_FIELDS)
+        # the values are sent as text and cast to the types of the columns, so a single statement fits every row
+        rows = values(*(column(name, String) for name in names), name="account_updates").data(
+            [tuple(cls._to_text(getattr(account, name)) for name in names) for account in accounts]
+        )
+        stmt = (
+            update(Account)
+            .where(Account.id == cast(rows.c.id, Account.id.type))
+            .values({name: cast(rows.c[name], getattr(Account, name).type) for name in cls.EDITABLE_FIELDS})
+            .returning(Account.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(session.scalars(stmt).all())
+
+    @staticmethod
+    def _to_text(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            # the columns store naive UTC times
+            if value.tzinfo is not None:
+                value = value.astimezone(UTC).replace(tzinfo=None)
+            return value.isoformat()
+        return str(value)
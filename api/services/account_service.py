@@ -50,6 +50,7 @@ from services.errors.account import (
 )
 from services.errors.workspace import WorkSpaceNotAllowedCreateError, WorkspacesLimitExceededError
 from services.feature_service import FeatureService
+from services.principal_cache import principal_cache
 from tasks.delete_account_task import delete_account_task
 from tasks.mail_account_deletion_task import send_account_deletion_verification_code
 from tasks.mail_email_code_login import send_email_code_login_mail_task
@@ -100,6 +101,41 @@ class AccountService:
 
     @staticmethod
     def load_user(user_id: str) -> None | Account:
+        # the account, its current tenant and role are served from the principal cache when they did not change
+        cache_key = principal_cache.scope("account", user_id)
+        principal = principal_cache.get(cache_key)
+        if principal is not None:
+            account = principal_cache.restore(db.session, Account, principal["account"])
+            if account.status == AccountStatus.BANNED.value:
+                raise Unauthorized("Account is banned.")
+            tenant = principal_cache.restore(db.session, Tenant, principal["tenant"])
+            account.set_current_tenant(tenant, principal["role"])
+        else:
+            loaded_account = AccountService._load_user_with_tenant(user_id)
+            if not loaded_account:
+                return None
+            account = loaded_account
+
+            tenant = account.current_tenant
+            if tenant:
+                principal_cache.put(
+                    cache_key,
+                    [principal_cache.scope("account", account.id), principal_cache.scope("tenant", tenant.id)],
+                    {
+                        "account": principal_cache.snapshot(account),
+                        "tenant": principal_cache.snapshot(tenant),
+                        "role": account.role,
+                    },
+                )
+
+        if datetime.now(UTC).replace(tzinfo=None) - account.last_active_at > timedelta(minutes=10):
+            account.last_active_at = datetime.now(UTC).replace(tzinfo=None)
+            db.session.commit()
+
+        return cast(Account, account)
+
+    @staticmethod
+    def _load_user_with_tenant(user_id: str) -> None | Account:
         account = db.session.query(Account).filter_by(id=user_id).first()
         if not account:
             return None
@@ -107,6 +143,8 @@ class AccountService:
         if account.status == AccountStatus.BANNED.value:
             raise Unauthorized("Account is banned.")
 
+        # the current tenant stays unset if the membership disappeared meanwhile
+        account.set_current_tenant(None, None)
         current_tenant = db.session.query(TenantAccountJoin).filter_by(account_id=account.id, current=True).first()
         if current_tenant:
             account.set_tenant_id(current_tenant.tenant_id)
@@ -124,11 +162,7 @@ class AccountService:
             available_ta.current = True
             db.session.commit()
 
-        if datetime.now(UTC).replace(tzinfo=None) - account.last_active_at > timedelta(minutes=10):
-            account.last_active_at = datetime.now(UTC).replace(tzinfo=None)
-            db.session.commit()
-
-        return cast(Account, account)
+        return account
 
     @staticmethod
     def get_account_jwt_token(account: Account) -> str:
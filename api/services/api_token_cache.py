@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from cachetools import TTLCache
+from opentelemetry.metrics import get_meter
+from redis.exceptions import ResponseError
+from sqlalchemy import DateTime, String, cast, column, or_, select, update, values
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import ApiToken
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("api_token_cache")
+_request_counter = _meter.create_counter(
+    "auth.api_token_cache.requests",
+    description="Number of service API token lookups, by result (local, redis or database)",
+    unit="{request}",
+)
+
+# the token itself is not cached, it is known by the caller
+_TOKEN_FIELDS = ("id", "app_id", "tenant_id", "type", "last_used_at", "created_at")
+
+
+class ApiTokenCache:
+    """
+    Resolver of the service API tokens, backed by a short-lived local cache and a Redis cache.
+
+    A revoked token is removed from Redis by `invalidate`, and rejected by every process once its local entry expired.
+    Uses of the tokens are buffered in each process, pushed to a Redis hash every few seconds and written
+    to `api_tokens.last_used_at` in batches by `flush_last_used`, instead of updating the token on each request.
+    """
+
+    _KEY_PREFIX = "api_token:"
+    _LAST_USED_KEY = "api_token_last_used"
+    _LAST_USED_FLUSHING_KEY = "api_token_last_used:flushing"
+    _FLUSH_BATCH_SIZE = 1000
+
+    def __init__(self, ttl: int, local_ttl: int, max_size: int, usage_buffer_seconds: float = 5) -> None:
+        self._ttl = ttl
+        self._local_ttl = local_ttl
+        self._lock = threading.Lock()
+        self._entries: TTLCache[tuple[str, str], dict[str, Any]] = TTLCache(maxsize=max_size, ttl=max(local_ttl, 1))
+        self._usage_buffer_seconds = usage_buffer_seconds
+        self._usage: dict[str, datetime] = {}
+        self._usage_flushed_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    def get(self, scope: Optional[str], token: str) -> Optional[ApiToken]:
+        """
+        Resolve a token of a scope (`app` or `dataset`) and record its use
+
+        :return: a detached token, None if the token does not exist
+        """
+        fields = self._get_fields(scope, token)
+        if fields is None:
+            return None
+
+        self.record_usage(fields["id"])
+        return ApiToken(**{**fields, "token": token})
+
+    def invalidate(self, scope: Optional[str], token: str) -> None:
+        """
+        Reject a revoked token, call it after the deletion was committed
+        """
+        with self._lock:
+            self._entries.pop((str(scope), token), None)
+        try:
+            redis_client.delete(self._redis_key(scope, token))
+        except Exception:
+            logger.exception("Failed to invalidate the cached API token")
+
+    def _get_fields(self, scope: Optional[str], token: str) -> Optional[dict[str, Any]]:
+        local_key = (str(scope), token)
+        if self._local_ttl > 0:
+            with self._lock:
+                fields = self._entries.get(local_key)
+            if fields is not None:
+                _request_counter.add(1, {"result": "local"})
+                return fields
+
+        redis_key = self._redis_key(scope, token)
+        try:
+            cached = redis_client.get(redis_key)
+        except Exception:
+            logger.warning("Failed to read the cached API token", exc_info=True)
+            cached = None
+
+        if cached:
+            _request_counter.add(1, {"result": "redis"})
+            fields = self._deserialize(cached)
+        else:
+            _request_counter.add(1, {"result": "database"})
+            with Session(db.engine) as session:
+                api_token = session.scalar(select(ApiToken).where(ApiToken.token == token, ApiToken.type == scope))
+                if not api_token:
+                    return None
+                fields = {field: getattr(api_token, field) for field in _TOKEN_FIELDS}
+            try:
+                redis_client.setex(redis_key, self._ttl, self._serialize(fields))
+            except Exception:
+                logger.warning("Failed to cache the API token", exc_info=True)
+
+        if self._local_ttl > 0:
+            with self._lock:
+                self._entries[local_key] = fields
+        return fields
+
+    def record_usage(self, token_id: str) -> None:
+        """
+        Buffer the use of a token, the buffer is pushed to Redis every few seconds
+        """
+        now = datetime.now(UTC).replace(tzinfo=None)
+        with self._lock:
+            self._usage[token_id] = now
+            if time.monotonic() - self._usage_flushed_at < self._usage_buffer_seconds:
+                return
+            usage, self._usage = self._usage, {}
+            self._usage_flushed_at = time.monotonic()
+
+        try:
+            redis_client.hset(
+                self._LAST_USED_KEY, mapping={token_id: used_at.isoformat() for token_id, used_at in usage.items()}
+            )
+        except Exception:
+            # the last use time is informative, losing a few updates is acceptable
+            logger.warning("Failed to record the use of API tokens", exc_info=True)
+
+    def flush_last_used(self, session: Session) -> int:
+        """
+        Write the last use times pushed to Redis to the tokens, with a batched `UPDATE ... FROM (VALUES ...)`
+
+        :return: number of tokens whose use was flushed
+        """
+        flushed = 0
+        # uses left by a failed flush would be overwritten by the rename, flush them first
+        if redis_client.exists(self._LAST_USED_FLUSHING_KEY):
+            flushed += self._flush_hash(session)
+
+        if not redis_client.exists(self._LAST_USED_KEY):
+            return flushed
+        # new uses are pushed to a new hash while this one is flushed
+        try:
+            renamed = redis_client.renamenx(self._LAST_USED_KEY, self._LAST_USED_FLUSHING_KEY)
+        except ResponseError:
+            # the hash was renamed by another flush since it was checked
+            renamed = False
+        if not renamed:
+            logger.info("Another flush of the last use of API tokens is running")
+            return flushed
+        return flushed + self._flush_hash(session)
+
+    def _flush_hash(self, session: Session) -> int:
+        usage = redis_client.hgetall(self._LAST_USED_FLUSHING_KEY)
+        rows = [(self._decode(token_id), self._decode(used_at)) for token_id, used_at in usage.items()]
+        for start in range(0, len(rows), self._FLUSH_BATCH_SIZE):
+            self._update_last_used(session, rows[start : start + self._FLUSH_BATCH_SIZE])
+        session.commit()
+
+        redis_client.delete(self._LAST_USED_FLUSHING_KEY)
+        return len(rows)
+
+    @staticmethod
+    def _update_last_used(session: Session, rows: Sequence[tuple[str, str]]) -> None:
+        usages = values(column("id", String), column("last_used_at", String), name="token_usages").data(list(rows))
+        used_at = cast(usages.c.last_used_at, DateTime)
+        stmt = (
+            update(ApiToken)
+            .where(ApiToken.id == cast(usages.c.id, ApiToken.id.type))
+            .where(or_(ApiToken.last_used_at.is_(None), ApiToken.last_used_at < used_at))
+            .values(last_used_at=used_at)
+            .execution_options(synchronize_session=False)
+        )
+        session.execute(stmt)
+
+    @classmethod
+    def _redis_key(cls, scope: Optional[str], token: str) -> str:
+        # the token itself is never part of a key
+        return f"{cls._KEY_PREFIX}{scope}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    @staticmethod
+    def _serialize(fields: dict[str, Any]) -> str:
+        return json.dumps(
+            {key: value.isoformat() if isinstance(value, datetime) else value for key, value in fields.items()}
+        )
+
+    @staticmethod
+    def _deserialize(data: bytes | str) -> dict[str, Any]:
+        fields = json.loads(data)
+        for key in ("last_used_at", "created_at"):
+            if fields.get(key):
+                fields[key] = datetime.fromisoformat(fields[key])
+        return fields
+
+    @staticmethod
+    def _decode(value: bytes | str) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+
+api_token_cache = ApiTokenCache(
+    ttl=dify_config.API_TOKEN_CACHE_TTL,
+    local_ttl=dify_config.API_TOKEN_LOCAL_CACHE_TTL,
+    max_size=dify_config.API_TOKEN_CACHE_MAX_SIZE,
+)
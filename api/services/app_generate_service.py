@@ -10,7 +10,7 @@ from core.app.apps.chat.app_generator import ChatAppGenerator
 from core.app.apps.completion.app_generator import CompletionAppGenerator
 from core.app.apps.workflow.app_generator import WorkflowAppGenerator
 from core.app.entities.app_invoke_entities import InvokeFrom
-from core.app.features.rate_limiting import RateLimit
+from core.app.features.rate_limiting import RateLimit, RequestRateLimit
 from libs.helper import RateLimiter
 from models.model import Account, App, AppMode, EndUser
 from models.workflow import Workflow
@@ -52,6 +52,13 @@ class AppGenerateService:
                     )
                 cls.system_rate_limiter.increment_rate_limit(app_model.tenant_id)
 
+        # app and end user level requests per second limiter
+        RequestRateLimit(f"app:{app_model.id}", dify_config.APP_MAX_REQUESTS_PER_SECOND).acquire()
+        if isinstance(user, EndUser):
+            RequestRateLimit(
+                f"end_user:{app_model.id}:{user.id}", dify_config.APP_END_USER_MAX_REQUESTS_PER_SECOND
+            ).acquire()
+
         # app level rate limiter
         max_active_request = AppGenerateService._get_max_active_requests(app_model)
         rate_limit = RateLimit(app_model.id, max_active_request)
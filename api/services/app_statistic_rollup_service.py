@@ -0,0 +1,227 @@
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+import pytz
+from sqlalchemy import delete, func, insert, literal_column, select
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from models.model import Message
+from models.statistic import (
+    AppHourlyConversationStatistic,
+    AppHourlyEndUserStatistic,
+    AppHourlyMessageStatistic,
+    StatisticRollupWatermark,
+)
+
+logger = logging.getLogger(__name__)
+
+ONE_HOUR = timedelta(hours=1)
+
+
+class AppStatisticRollupService:
+    """
+    Maintain the hourly rollups of the messages read by the app statistics.
+
+    The rollups are complete for the hours in [rolled_from, rolled_until) of the watermark, the scheduled task moves
+    rolled_until forward and the backfill moves rolled_from back in history.
+    """
+
+    watermark_name = "app_hourly_statistics"
+
+    rollup_models = (AppHourlyMessageStatistic, AppHourlyConversationStatistic, AppHourlyEndUserStatistic)
+
+    @classmethod
+    def roll_up(cls, session: Session, start: datetime, end: datetime) -> None:
+        """
+        Recompute the rollups of the hours in [start, end), the bounds are naive UTC datetimes at the start of an hour.
+        Changes are not committed.
+        """
+        for model in cls.rollup_models:
+            session.execute(delete(model).where(model.hour >= start, model.hour < end))
+
+        # a literal unit so that the GROUP BY expression matches the selected one
+        hour = func.date_trunc(literal_column("'hour'"), Message.created_at)
+        in_range = (Message.created_at >= start, Message.created_at < end)
+
+        session.execute(
+            insert(AppHourlyMessageStatistic).from_select(
+                [
+                    "app_id",
+                    "hour",
+                    "message_count",
+                    "message_tokens",
+                    "answer_tokens",
+                    "total_price",
+                    "provider_response_latency",
+                ],
+                select(
+                    Message.app_id,
+                    hour,
+                    func.count(),
+                    func.coalesce(func.sum(Message.message_tokens), 0),
+                    func.coalesce(func.sum(Message.answer_tokens), 0),
+                    func.coalesce(func.sum(Message.total_price), 0),
+                    func.coalesce(func.sum(Message.provider_response_latency), 0),
+                )
+                .where(*in_range)
+                .group_by(Message.app_id, hour),
+            )
+        )
+        session.execute(
+            insert(AppHourlyConversationStatistic).from_select(
+                ["app_id", "hour", "conversation_id", "message_count"],
+                select(Message.app_id, hour, Message.conversation_id, func.count())
+                .where(*in_range)
+                .group_by(Message.app_id, hour, Message.conversation_id),
+            )
+        )
+        session.execute(
+            insert(AppHourlyEndUserStatistic).from_select(
+                ["app_id", "hour", "end_user_id", "message_count"],
+                select(Message.app_id, hour, Message.from_end_user_id, func.count())
+                .where(*in_range, Message.from_end_user_id.is_not(None))
+                .group_by(Message.app_id, hour, Message.from_end_user_id),
+            )
+        )
+
+    @classmethod
+    def advance(cls, session: Session, now: Optional[datetime] = None) -> int:
+        """
+        Roll up the hours ended since the last run, an hour is rolled up once APP_STATISTIC_ROLLUP_DELAY minutes
+        have passed since its end.
+
+        :return: number of hours rolled up
+        """
+        now = now or datetime.now(UTC).replace(tzinfo=None)
+        until = floor_hour(now - timedelta(minutes=dify_config.APP_STATISTIC_ROLLUP_DELAY))
+        batch = timedelta(hours=dify_config.APP_STATISTIC_ROLLUP_BATCH_HOURS)
+
+        if cls._get_watermark(session) is None:
+            # nothing to catch up with, the history is rolled up by the backfill
+            session.add(StatisticRollupWatermark(name=cls.watermark_name, rolled_from=until, rolled_until=until))
+            session.commit()
+            return 0
+
+        hours = 0
+        while True:
+            # the row lock serializes the concurrent runs, a run waiting for it sees the hours rolled up meanwhile
+            watermark = cls._get_watermark(session, for_update=True)
+            assert watermark is not None
+            if watermark.rolled_until >= until:
+                session.rollback()
+                return hours
+
+            start = watermark.rolled_until
+            end = min(start + batch, until)
+            cls.roll_up(session, start, end)
+            watermark.rolled_until = end
+            watermark.updated_at = datetime.now(UTC).replace(tzinfo=None)
+            session.commit()
+            hours += (end - start) // ONE_HOUR
+            logger.info("Rolled up app statistics of [%s, %s)", start, end)
+
+    @classmethod
+    def backfill(cls, session: Session, since: datetime) -> int:
+        """
+        Roll up the history back to the hour of `since`, a naive UTC datetime. The rollups are valid as soon as
+        each batch is committed, an interrupted backfill continues from where it stopped.
+
+        :return: number of hours rolled up
+        """
+        since = floor_hour(since)
+        batch = timedelta(hours=dify_config.APP_STATISTIC_ROLLUP_BATCH_HOURS)
+
+        if cls._get_watermark(session) is None:
+            cls.advance(session)
+
+        hours = 0
+        while True:
+            watermark = cls._get_watermark(session, for_update=True)
+            assert watermark is not None
+            if watermark.rolled_from <= since:
+                session.rollback()
+                return hours
+
+            end = watermark.rolled_from
+            start = max(end - batch, since)
+            cls.roll_up(session, start, end)
+            watermark.rolled_from = start
+            watermark.updated_at = datetime.now(UTC).replace(tzinfo=None)
+            session.commit()
+            hours += (end - start) // ONE_HOUR
+            logger.info("Backfilled app statistics of [%s, %s)", start, end)
+
+    @classmethod
+    def get_rollup_range(
+        cls, session: Session, start: Optional[datetime], end: Optional[datetime], timezone: str
+    ) -> Optional[tuple[datetime, datetime]]:
+        """
+        Get the whole hours of [start, end) that can be read from the rollups, as naive UTC datetimes.
+
+        None when the rollups are disabled or do not cover any hour of the range, or when the days of the timezone
+        do not start on a UTC hour, the statistics are then computed from the messages only.
+        """
+        if not dify_config.APP_STATISTIC_ROLLUP_ENABLED:
+            return None
+
+        watermark = cls._get_watermark(session)
+        if watermark is None:
+            return None
+
+        rollup_start = watermark.rolled_from
+        if start is not None:
+            rollup_start = max(rollup_start, ceil_hour(_to_naive_utc(start)))
+        rollup_end = watermark.rolled_until
+        if end is not None:
+            rollup_end = min(rollup_end, floor_hour(_to_naive_utc(end)))
+
+        if rollup_start >= rollup_end:
+            return None
+
+        if not has_whole_hour_offsets(timezone, rollup_start, rollup_end):
+            return None
+
+        return rollup_start, rollup_end
+
+    @classmethod
+    def _get_watermark(cls, session: Session, for_update: bool = False) -> Optional[StatisticRollupWatermark]:
+        return session.get(
+            StatisticRollupWatermark, cls.watermark_name, with_for_update=for_update, populate_existing=True
+        )
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    hour = floor_hour(value)
+    return hour if hour == value else hour + ONE_HOUR
+
+
+def has_whole_hour_offsets(timezone: str, start: datetime, end: datetime) -> bool:
+    """
+    Check the UTC offsets of the timezone in [start, end) are whole hours, so that an UTC hour belongs to a single
+    day of the timezone.
+    """
+    tz = pytz.timezone(timezone)
+    # pytz does not expose the transitions of a timezone publicly
+    transition_times = getattr(tz, "_utc_transition_times", None)
+    transition_info = getattr(tz, "_transition_info", None)
+    if transition_times is None or transition_info is None:
+        offsets = [tz.utcoffset(start)]
+    else:
+        first = max(bisect_right(transition_times, start) - 1, 0)
+        last = max(bisect_left(transition_times, end) - 1, first)
+        offsets = [utcoffset for utcoffset, _, _ in transition_info[first : last + 1]]
+
+    return all(offset is not None and offset % ONE_HOUR == timedelta(0) for offset in offsets)
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
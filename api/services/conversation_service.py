@@ -1,14 +1,14 @@
-from collections.abc import Callable, Sequence
+from collections.abc import Sequence
 from datetime import UTC, datetime
 from typing import Optional, Union
 
-from sqlalchemy import asc, desc, func, or_, select
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.llm_generator.llm_generator import LLMGenerator
 from extensions.ext_database import db
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
 from models import ConversationVariable
 from models.account import Account
 from models.model import App, Conversation, EndUser, Message
@@ -51,52 +51,27 @@ class ConversationService:
         if exclude_ids is not None:
             stmt = stmt.where(~Conversation.id.in_(exclude_ids))
 
-        # define sort fields and directions
-        sort_field, sort_direction = cls._get_sort_params(sort_by)
+        # define sort fields and directions, the id breaks the ties of the sort field
+        sort_field, descending = cls._get_sort_params(sort_by)
 
-        if last_id:
-            last_conversation = session.scalar(stmt.where(Conversation.id == last_id))
-            if not last_conversation:
-                raise LastConversationNotExistsError()
-
-            # build filters based on sorting
-            filter_condition = cls._build_filter_condition(
-                sort_field=sort_field,
-                sort_direction=sort_direction,
-                reference_conversation=last_conversation,
-            )
-            stmt = stmt.where(filter_condition)
-        query_stmt = stmt.order_by(sort_direction(getattr(Conversation, sort_field))).limit(limit)
-        conversations = session.scalars(query_stmt).all()
-
-        has_more = False
-        if len(conversations) == limit:
-            current_page_last_conversation = conversations[-1]
-            rest_filter_condition = cls._build_filter_condition(
-                sort_field=sort_field,
-                sort_direction=sort_direction,
-                reference_conversation=current_page_last_conversation,
-            )
-            count_stmt = select(func.count()).select_from(stmt.where(rest_filter_condition).subquery())
-            rest_count = session.scalar(count_stmt) or 0
-            if rest_count > 0:
-                has_more = True
+        pagination = paginate_by_keyset(
+            session,
+            stmt,
+            keys=(getattr(Conversation, sort_field), Conversation.id),
+            limit=limit,
+            descending=descending,
+            anchor_id=last_id,
+        )
+        if pagination is None:
+            raise LastConversationNotExistsError()
 
-        return InfiniteScrollPagination(data=conversations, limit=limit, has_more=has_more)
+        return pagination
 
     @classmethod
-    def _get_sort_params(cls, sort_by: str):
+    def _get_sort_params(cls, sort_by: str) -> tuple[str, bool]:
         if sort_by.startswith("-"):
-            return sort_by[1:], desc
-        return sort_by, asc
-
-    @classmethod
-    def _build_filter_condition(cls, sort_field: str, sort_direction: Callable, reference_conversation: Conversation):
-        field_value = getattr(reference_conversation, sort_field)
-        if sort_direction == desc:
-            return getattr(Conversation, sort_field) < field_value
-        else:
-            return getattr(Conversation, sort_field) > field_value
+            return sort_by[1:], True
+        return sort_by, False
 
     @classmethod
     def rename(
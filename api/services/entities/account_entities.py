@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class AccountAdminUpdate(BaseModel):
+    """
+    Fields of an account editable from the dashboard
+    """
+
+    id: str
+    status: str
+    id_custom_plan: Optional[str] = None
+    plan_expiration: datetime
+    month_before_banned: int
+    max_of_apps: int
+    max_vector_space: int
+    max_annotation_quota_limit: int
+    max_documents_upload_quota: int
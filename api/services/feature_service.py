@@ -2,40 +2,23 @@
 from datetime import UTC, datetime
 from enum import StrEnum
 
-from pydantic import BaseModel, ConfigDict
-from sqlalchemy import func
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import select
 
 from configs import dify_config
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from models.account import (
     Account,
     TenantAccountJoin,
     TenantAccountRole,
 )
-from models.dataset import Dataset, Document
-from models.model import App, MessageAnnotation
-from models.system_custom_info import SystemCustomInfo
 from services.billing_service import BillingService
 from services.enterprise.enterprise_service import EnterpriseService
+from services.plan_catalog_service import PlanCatalogService
+from services.tenant_usage_service import TenantUsageService
 
 
-# Custom models for Pydantic validation
-class FeatureCustomModel(BaseModel):
-    members: int = 1
-    apps: int = dify_config.user_account_max_of_apps
-    vector_space: int = dify_config.user_account_max_vector_space
-    knowledge_rate_limit: int = dify_config.user_account_knowledge_rate_limit
-    annotation_quota_limit: int = dify_config.user_account_max_annotation_quota_limit
-    documents_upload_quota: int = dify_config.user_account_max_documents_upload_quota
-
-class PlanModel(BaseModel):
-    id: str
-    name: str
-    description: str
-    price: float
-    plan_expiration: int   # number of days until expiration
-    features: FeatureCustomModel
-
 # -----
 class SubscriptionModel(BaseModel):
     plan: str = "sandbox"
@@ -161,8 +144,33 @@ class SystemFeatureModel(BaseModel):
 
 
 class FeatureService:
+    _FEATURES_SNAPSHOT_KEY = "feature_snapshot:{}"
+
     @classmethod
     def get_features(cls, tenant_id: str) -> FeatureModel:
+        features = cls._get_features_snapshot(tenant_id)
+
+        # the usage is not part of the snapshot, quota checks must see the resources created in the meantime
+        usage = TenantUsageService.get_usage(tenant_id, db.session)
+        features.members.size = usage.members
+        features.apps.size = usage.apps
+        features.vector_space.size = usage.datasets
+        features.documents_upload_quota.size = usage.documents
+        features.annotation_quota_limit.size = usage.annotations
+
+        return features
+
+    @classmethod
+    def _get_features_snapshot(cls, tenant_id: str) -> FeatureModel:
+        """
+        Get the plan and limits of a tenant, cached for FEATURE_SNAPSHOT_TTL seconds
+        """
+        cache_key = cls._FEATURES_SNAPSHOT_KEY.format(tenant_id)
+        if dify_config.FEATURE_SNAPSHOT_TTL > 0:
+            snapshot = redis_client.get(cache_key)
+            if snapshot:
+                return FeatureModel.model_validate_json(snapshot)
+
         features = FeatureModel()
 
         cls._fulfill_params_from_env(features)
@@ -170,11 +178,31 @@ class FeatureService:
         # if dify_config.BILLING_ENABLED:
         #     cls._fulfill_params_from_billing_api(features, tenant_id)
         cls._fulfill_params_from_billing_self_host(features, tenant_id)
-        
+
         cls._fulfill_custom(features, tenant_id)
 
+        if dify_config.FEATURE_SNAPSHOT_TTL > 0:
+            redis_client.setex(cache_key, dify_config.FEATURE_SNAPSHOT_TTL, features.model_dump_json())
+
         return features
 
+    @classmethod
+    def invalidate_owner_features(cls, account_ids: list[str]):
+        """
+        Drop the cached features of the tenants owned by accounts, call it after their plan or limits changed
+        """
+        if dify_config.FEATURE_SNAPSHOT_TTL <= 0 or not account_ids:
+            return
+
+        tenant_ids = db.session.scalars(
+            select(TenantAccountJoin.tenant_id).where(
+                TenantAccountJoin.account_id.in_(account_ids),
+                TenantAccountJoin.role == TenantAccountRole.OWNER.value,
+            )
+        ).all()
+        if tenant_ids:
+            redis_client.delete(*(cls._FEATURES_SNAPSHOT_KEY.format(tenant_id) for tenant_id in tenant_ids))
+
     @classmethod
     def _fulfill_custom(cls, features: FeatureModel, tenant_id: str):
         join = (
@@ -196,22 +224,16 @@ class FeatureService:
             plan_expiration_aware = plan_expiration.replace(tzinfo=UTC)
             # Check if plan_expiration is greater than current date
             if plan_expiration_aware > datetime.now(UTC):
-                # Get list of plans
-                system_custom_info = db.session.query(SystemCustomInfo).filter(
-                    SystemCustomInfo.name.in_(["plan"])
-                ).first()
-                if system_custom_info:
-                    object_plans = [PlanModel.model_validate(plan) for plan in system_custom_info.value]
-                    # Get plan by id_current_plan
-                    plan = next((plan for plan in object_plans if plan.id == id_current_plan), None)
-                    if plan:
-                        # Get plan features
-                        features.members.limit = plan.features.members
-                        features.apps.limit = plan.features.apps
-                        features.vector_space.limit = plan.features.vector_space
-                        features.knowledge_rate_limit = plan.features.knowledge_rate_limit
-                        features.annotation_quota_limit.limit = plan.features.annotation_quota_limit
-                        features.documents_upload_quota.limit = plan.features.documents_upload_quota
+                # Get plan by id_current_plan from the plan catalog
+                plan = PlanCatalogService.get_plan(id_current_plan)
+                if plan:
+                    # Get plan features
+                    features.members.limit = plan.features.members
+                    features.apps.limit = plan.features.apps
+                    features.vector_space.limit = plan.features.vector_space
+                    features.knowledge_rate_limit = plan.features.knowledge_rate_limit
+                    features.annotation_quota_limit.limit = plan.features.annotation_quota_limit
+                    features.documents_upload_quota.limit = plan.features.documents_upload_quota
 
         # Edit the features here
         features.apps.limit = max(features.apps.limit, account_owner.max_of_apps)
@@ -268,15 +290,7 @@ class FeatureService:
         features.billing.subscription.plan = "sandbox"
         features.billing.subscription.interval = "month"
 
-        features.members.size = db.session.query(func.count(TenantAccountJoin.account_id)).filter(TenantAccountJoin.tenant_id == tenant_id).scalar()
-        features.apps.size = db.session.query(func.count(App.id)).filter(App.tenant_id == tenant_id).scalar()
-        features.vector_space.size = db.session.query(func.count(Dataset.id)).filter(Dataset.tenant_id == tenant_id).scalar()
-        features.documents_upload_quota.size = db.session.query(func.count(Document.id)).filter(Document.tenant_id == tenant_id).scalar()
-
-        # Get all app of the tenant, query get only column id
-        apps = db.session.query(App.id).filter(App.tenant_id == tenant_id).all()
-        app_ids = [app.id for app in apps]
-        features.annotation_quota_limit.size = db.session.query(func.count(MessageAnnotation.id)).filter(MessageAnnotation.app_id.in_(app_ids)).scalar()
+        # the usage sizes are filled in by get_features from the tenant usage counters
 
         features.docs_processing = "standard"
         features.can_replace_logo = False
@@ -0,0 +1,142 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.model import (
+    App,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageChain,
+    MessageFeedback,
+    MessageFile,
+)
+from models.web import SavedMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MessagePurgeCursor:
+    """
+    Position of a purge in the messages ordered by (created_at, id), the next batch starts after it.
+    """
+
+    created_at: datetime
+    id: str
+
+    def dumps(self) -> str:
+        return f"{self.created_at.isoformat()}|{self.id}"
+
+    @classmethod
+    def loads(cls, value: str) -> "MessagePurgeCursor":
+        created_at, message_id = value.split("|", 1)
+        return cls(created_at=datetime.fromisoformat(created_at), id=message_id)
+
+
+@dataclass
+class MessagePurgeResult:
+    # deleted rows by table name
+    deleted: Counter[str] = field(default_factory=Counter)
+    scanned: int = 0
+    # None once all the messages before the cutoff have been scanned
+    cursor: Optional[MessagePurgeCursor] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.cursor is None
+
+
+class MessagePurgeService:
+    # tables referencing messages, deleted before the messages themselves
+    child_models = (
+        MessageFeedback,
+        MessageAnnotation,
+        MessageChain,
+        MessageAgentThought,
+        MessageFile,
+        SavedMessage,
+    )
+
+    @classmethod
+    def purge(
+        cls,
+        session: Session,
+        *,
+        before: datetime,
+        is_tenant_eligible: Callable[[str], bool],
+        batch_size: int = 1000,
+        cursor: Optional[MessagePurgeCursor] = None,
+        time_budget: float = 0,
+    ) -> MessagePurgeResult:
+        """
+        Delete the messages created before the cutoff in the tenants eligible for the purge, with their related
+        records. The messages are scanned in batches, each batch deleted with one statement per table and committed
+        on its own.
+
+        :param session: database session
+        :param before: cutoff, only the messages created before it are deleted
+        :param is_tenant_eligible: whether the messages of a tenant are purged, called once per tenant
+        :param batch_size: number of messages scanned per batch
+        :param cursor: cursor returned by a previous purge to resume from
+        :param time_budget: seconds after which no new batch is started, 0 for no limit
+        :return: result with the deleted rows per table, and the cursor to resume from when unfinished
+        """
+        deadline = time.monotonic() + time_budget if time_budget else None
+        result = MessagePurgeResult()
+        app_tenants: dict[str, Optional[str]] = {}
+        eligible_tenants: dict[str, bool] = {}
+
+        while True:
+            stmt = select(Message.id, Message.app_id, Message.created_at).where(Message.created_at < before)
+            if cursor is not None:
+                stmt = stmt.where(tuple_(Message.created_at, Message.id) > (cursor.created_at, cursor.id))
+            rows = session.execute(stmt.order_by(Message.created_at, Message.id).limit(batch_size)).all()
+            if not rows:
+                result.cursor = None
+                return result
+
+            cls._resolve_app_tenants(session, {row.app_id for row in rows} - app_tenants.keys(), app_tenants)
+
+            message_ids = []
+            for row in rows:
+                tenant_id = app_tenants[row.app_id]
+                if tenant_id is None:
+                    continue
+                if tenant_id not in eligible_tenants:
+                    eligible_tenants[tenant_id] = is_tenant_eligible(tenant_id)
+                if eligible_tenants[tenant_id]:
+                    message_ids.append(row.id)
+
+            if message_ids:
+                for model in (*cls.child_models, Message):
+                    column = Message.id if model is Message else model.message_id
+                    deleted = session.execute(
+                        delete(model).where(column.in_(message_ids)).execution_options(synchronize_session=False)
+                    )
+                    result.deleted[model.__tablename__] += deleted.rowcount
+                session.commit()
+
+            result.scanned += len(rows)
+            cursor = result.cursor = MessagePurgeCursor(created_at=rows[-1].created_at, id=rows[-1].id)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return result
+
+    @staticmethod
+    def _resolve_app_tenants(session: Session, app_ids: set[str], app_tenants: dict[str, Optional[str]]) -> None:
+        if not app_ids:
+            return
+
+        for app_id, tenant_id in session.execute(select(App.id, App.tenant_id).where(App.id.in_(app_ids))):
+            app_tenants[app_id] = tenant_id
+        for app_id in app_ids - app_tenants.keys():
+            logger.warning("Expected App record to exist, but none was found, app_id=%s", app_id)
+            app_tenants[app_id] = None
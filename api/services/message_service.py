@@ -1,6 +1,10 @@
 import json
+from collections import defaultdict
+from collections.abc import Sequence
 from typing import Optional, Union
 
+from sqlalchemy import select
+
 from core.app.apps.advanced_chat.app_config_manager import AdvancedChatAppConfigManager
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.llm_generator.llm_generator import LLMGenerator
@@ -11,9 +15,20 @@ from core.ops.entities.trace_entity import TraceTaskName
 from core.ops.ops_trace_manager import TraceQueueManager, TraceTask
 from core.ops.utils import measure_time
 from extensions.ext_database import db
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
 from models.account import Account
-from models.model import App, AppMode, AppModelConfig, EndUser, Message, MessageFeedback
+from models.model import (
+    App,
+    AppAnnotationHitHistory,
+    AppMode,
+    AppModelConfig,
+    EndUser,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageFeedback,
+    MessageFile,
+)
 from services.conversation_service import ConversationService
 from services.errors.message import (
     FirstMessageNotExistsError,
@@ -45,47 +60,23 @@ class MessageService:
             app_model=app_model, user=user, conversation_id=conversation_id
         )
 
-        fetch_limit = limit + 1
-
-        if first_id:
-            first_message = (
-                db.session.query(Message)
-                .filter(Message.conversation_id == conversation.id, Message.id == first_id)
-                .first()
-            )
-
-            if not first_message:
-                raise FirstMessageNotExistsError()
-
-            history_messages = (
-                db.session.query(Message)
-                .filter(
-                    Message.conversation_id == conversation.id,
-                    Message.created_at < first_message.created_at,
-                    Message.id != first_message.id,
-                )
-                .order_by(Message.created_at.desc())
-                .limit(fetch_limit)
-                .all()
-            )
-        else:
-            history_messages = (
-                db.session.query(Message)
-                .filter(Message.conversation_id == conversation.id)
-                .order_by(Message.created_at.desc())
-                .limit(fetch_limit)
-                .all()
-            )
+        # pages go back in history from the first message of the previous page
+        pagination = paginate_by_keyset(
+            db.session,
+            select(Message).where(Message.conversation_id == conversation.id),
+            keys=(Message.created_at, Message.id),
+            limit=limit,
+            anchor_id=first_id,
+        )
+        if pagination is None:
+            raise FirstMessageNotExistsError()
 
-        has_more = False
-        if len(history_messages) > limit:
-            has_more = True
-            history_messages = history_messages[:-1]
+        cls.preload_relations(pagination.data, app_model)
 
         if order == "asc":
-            history_messages = list(reversed(history_messages))
+            pagination.data = list(reversed(pagination.data))
 
-        return InfiniteScrollPagination(data=history_messages, limit=limit, has_more=has_more)
+        return pagination
 
     @classmethod
     def pagination_by_last_id(
@@ -100,41 +91,86 @@ class MessageService:
         if not user:
             return InfiniteScrollPagination(data=[], limit=limit, has_more=False)
 
-        base_query = db.session.query(Message)
-
-        fetch_limit = limit + 1
+        stmt = select(Message)
 
         if conversation_id is not None:
             conversation = ConversationService.get_conversation(
                 app_model=app_model, user=user, conversation_id=conversation_id
             )
 
-            base_query = base_query.filter(Message.conversation_id == conversation.id)
+            stmt = stmt.where(Message.conversation_id == conversation.id)
 
         if include_ids is not None:
-            base_query = base_query.filter(Message.id.in_(include_ids))
+            stmt = stmt.where(Message.id.in_(include_ids))
 
-        if last_id:
-            last_message = base_query.filter(Message.id == last_id).first()
+        pagination = paginate_by_keyset(
+            db.session, stmt, keys=(Message.created_at, Message.id), limit=limit, anchor_id=last_id
+        )
+        if pagination is None:
+            raise LastMessageNotExistsError()
 
-            if not last_message:
-                raise LastMessageNotExistsError()
+        cls.preload_relations(pagination.data, app_model)
 
-            history_messages = (
-                base_query.filter(Message.created_at < last_message.created_at, Message.id != last_message.id)
-                .order_by(Message.created_at.desc())
-                .limit(fetch_limit)
-                .all()
-            )
-        else:
-            history_messages = base_query.order_by(Message.created_at.desc()).limit(fetch_limit).all()
+        return pagination
 
-        has_more = False
-        if len(history_messages) > limit:
-            has_more = True
-            history_messages = history_messages[:-1]
+    @classmethod
+    def preload_relations(cls, messages: Sequence[Message], app_model: App) -> None:
+        """
+        Load the feedbacks, annotations, agent thoughts and files of messages of the app with one query per relation
+        instead of one per message and relation.
+        """
+        if not messages:
+            return
+
+        message_ids = [message.id for message in messages]
+        feedbacks: dict[str, list[MessageFeedback]] = defaultdict(list)
+        for feedback in db.session.scalars(select(MessageFeedback).where(MessageFeedback.message_id.in_(message_ids))):
+            feedbacks[feedback.message_id].append(feedback)
+
+        annotations = {
+            annotation.message_id: annotation
+            for annotation in db.session.scalars(
+                select(MessageAnnotation).where(MessageAnnotation.message_id.in_(message_ids))
+            )
+        }
 
-        return InfiniteScrollPagination(data=history_messages, limit=limit, has_more=has_more)
+        hit_histories = {
+            hit_history.message_id: hit_history.annotation_id
+            for hit_history in db.session.scalars(
+                select(AppAnnotationHitHistory).where(AppAnnotationHitHistory.message_id.in_(message_ids))
+            )
+        }
+        hit_annotations = {}
+        if hit_histories:
+            hit_annotations = {
+                annotation.id: annotation
+                for annotation in db.session.scalars(
+                    select(MessageAnnotation).where(MessageAnnotation.id.in_(set(hit_histories.values())))
+                )
+            }
+
+        agent_thoughts: dict[str, list[MessageAgentThought]] = defaultdict(list)
+        for agent_thought in db.session.scalars(
+            select(MessageAgentThought)
+            .where(MessageAgentThought.message_id.in_(message_ids))
+            .order_by(MessageAgentThought.position.asc())
+        ):
+            agent_thoughts[agent_thought.message_id].append(agent_thought)
+
+        message_files: dict[str, list[MessageFile]] = defaultdict(list)
+        for message_file in db.session.scalars(select(MessageFile).where(MessageFile.message_id.in_(message_ids))):
+            message_files[message_file.message_id].append(message_file)
+
+        for message in messages:
+            hit_annotation_id = hit_histories.get(message.id)
+            message.preload_relations(
+                feedbacks=feedbacks[message.id],
+                annotation=annotations.get(message.id),
+                annotation_hit_history=hit_annotations.get(hit_annotation_id) if hit_annotation_id else None,
+                agent_thoughts=agent_thoughts[message.id],
+                message_files=message_files[message.id],
+                app=app_model,
+            )
 
     @classmethod
     def create_feedback(
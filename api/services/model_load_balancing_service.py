@@ -6,6 +6,7 @@ from typing import Optional, Union
 
 from constants import HIDDEN_VALUE
 from core.entities.provider_configuration import ProviderConfiguration
+from core.entities.provider_entities import LoadBalancingStrategy
 from core.helper import encrypter
 from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
 from core.model_manager import LBModelManager
@@ -26,7 +27,9 @@ class ModelLoadBalancingService:
     def __init__(self) -> None:
         self.provider_manager = ProviderManager()
 
-    def enable_model_load_balancing(self, tenant_id: str, provider: str, model: str, model_type: str) -> None:
+    def enable_model_load_balancing(
+        self, tenant_id: str, provider: str, model: str, model_type: str, strategy: Optional[str] = None
+    ) -> None:
         """
         enable model load balancing.
 
@@ -34,6 +37,7 @@ class ModelLoadBalancingService:
         :param provider: provider name
         :param model: model name
         :param model_type: model type
+        :param strategy: load balancing strategy, see LoadBalancingStrategy, unchanged if not provided
         :return:
         """
         # Get all provider configurations of the current workspace
@@ -44,8 +48,15 @@ class ModelLoadBalancingService:
         if not provider_configuration:
             raise ValueError(f"Provider {provider} does not exist.")
 
+        try:
+            load_balancing_strategy = LoadBalancingStrategy(strategy) if strategy else None
+        except ValueError:
+            raise ValueError(f"Invalid load balancing strategy {strategy}.")
+
         # Enable model load balancing
-        provider_configuration.enable_model_load_balancing(model=model, model_type=ModelType.value_of(model_type))
+        provider_configuration.enable_model_load_balancing(
+            model=model, model_type=ModelType.value_of(model_type), strategy=load_balancing_strategy
+        )
 
     def disable_model_load_balancing(self, tenant_id: str, provider: str, model: str, model_type: str) -> None:
         """
@@ -70,14 +81,14 @@ class ModelLoadBalancingService:
 
     def get_load_balancing_configs(
         self, tenant_id: str, provider: str, model: str, model_type: str
-    ) -> tuple[bool, list[dict]]:
+    ) -> tuple[bool, str, list[dict]]:
         """
         Get load balancing configurations.
         :param tenant_id: workspace id
         :param provider: provider name
         :param model: model name
         :param model_type: model type
-        :return:
+        :return: whether load balancing is enabled, its strategy and the configurations
         """
         # Get all provider configurations of the current workspace
         provider_configurations = self.provider_manager.get_configurations(tenant_id)
@@ -99,6 +110,11 @@ class ModelLoadBalancingService:
         is_load_balancing_enabled = False
         if provider_model_setting and provider_model_setting.load_balancing_enabled:
             is_load_balancing_enabled = True
+        load_balancing_strategy = (
+            provider_model_setting.load_balancing_strategy
+            if provider_model_setting
+            else LoadBalancingStrategy.ROUND_ROBIN.value
+        )
 
         # Get load balancing configurations
         load_balancing_configs = (
@@ -191,7 +207,7 @@ class ModelLoadBalancingService:
                 }
             )
 
-        return is_load_balancing_enabled, datas
+        return is_load_balancing_enabled, load_balancing_strategy, datas
 
     def get_load_balancing_config(
         self, tenant_id: str, provider: str, model: str, model_type: str, config_id: str
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any, Optional
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentConfirmationSubscriber:
+    """
+    Process-wide subscriber of the payment confirmations.
+
+    A single subscription is shared by all the requests waiting on a payment screen, confirmations published by
+    `PaymentConfirmationService.publish` are dispatched to the `threading.Event` registered for the account.
+    """
+
+    CHANNEL = "payment_confirmed"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: weakref.WeakValueDictionary[str, threading.Event] = weakref.WeakValueDictionary()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, account_id: str) -> Optional[threading.Event]:
+        """
+        Register an account and return the event set when its payment is confirmed,
+        or None if the subscription could not be established
+        :param account_id: account id
+        :return:
+        """
+        with self._lock:
+            if not self._ensure_started():
+                return None
+
+            event = self._events.get(account_id)
+            if event is None or event.is_set():
+                event = threading.Event()
+                self._events[account_id] = event
+            return event
+
+    def _ensure_started(self) -> bool:
+        if self._thread is not None and self._thread.is_alive():
+            return True
+
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.CHANNEL)
+        except Exception:
+            logger.exception("Failed to subscribe to payment confirmations, falling back to polling")
+            return False
+
+        self._thread = threading.Thread(target=self._run, args=(pubsub,), name="payment-confirmation", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, pubsub: Any) -> None:
+        try:
+            for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+
+                data = message.get("data")
+                account_id = data.decode("utf-8") if isinstance(data, bytes) else str(data)
+                with self._lock:
+                    event = self._events.get(account_id)
+                if event is not None:
+                    event.set()
+        except Exception:
+            logger.exception("Payment confirmation subscriber exited")
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+payment_confirmation_subscriber = PaymentConfirmationSubscriber()
+
+
+class PaymentConfirmationService:
+    # interval of the pending payment checks when the confirmations can not be subscribed
+    _FALLBACK_POLL_INTERVAL = 5
+
+    @classmethod
+    def publish(cls, account_id: str) -> None:
+        """
+        Notify the requests waiting on the payment of an account, call it after the payment was committed
+        """
+        try:
+            redis_client.publish(PaymentConfirmationSubscriber.CHANNEL, account_id)
+        except Exception:
+            # waiting requests check the pending payment again when their wait times out
+            logger.exception("Failed to publish the payment confirmation of account %s", account_id)
+
+    @classmethod
+    def wait(cls, account_id: str, timeout: float, is_pending: Callable[[], bool]) -> bool:
+        """
+        Wait for the confirmation of the pending payment of an account
+
+        :param timeout: maximum time to wait, in seconds
+        :param is_pending: checks that the payment is still pending, it runs once registered
+            so a confirmation published before the registration is not missed
+        :return: whether the payment was confirmed
+        """
+        event = payment_confirmation_subscriber.register(account_id)
+        if not is_pending():
+            return True
+
+        if event is None:
+            time.sleep(min(timeout, cls._FALLBACK_POLL_INTERVAL))
+            return not is_pending()
+
+        return event.wait(timeout)
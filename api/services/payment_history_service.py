@@ -0,0 +1,142 @@
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
+from models.payments_history_custom import PaymentsHistoryCustom, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentHistoryService:
+    @staticmethod
+    def parse_transaction_time(value: Any) -> Optional[datetime]:
+        """
+        Parse the transaction time sent by the payment gateway, e.g. `2025-01-01 10:30:00`
+        """
+        if not isinstance(value, str) or not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            logger.warning("Invalid payment transaction time: %s", value)
+            return None
+
+    @classmethod
+    def get_columns(cls, value: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Extract the typed columns from the payload of a payment, `transaction_at` is omitted if the date is invalid
+        """
+        columns: dict[str, Any] = {
+            "account_id": value.get("id_account") or None,
+            "plan_id": value.get("id_plan") or None,
+            "transaction_id": str(value["transactionID"]) if value.get("transactionID") else None,
+        }
+        try:
+            columns["amount"] = Decimal(str(value.get("amount") or 0))
+        except InvalidOperation:
+            columns["amount"] = Decimal(0)
+        transaction_at = cls.parse_transaction_time(value.get("date"))
+        if transaction_at:
+            columns["transaction_at"] = transaction_at
+        return columns
+
+    @staticmethod
+    def _filter(
+        stmt,
+        account_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ):
+        if account_id:
+            stmt = stmt.where(PaymentsHistoryCustom.account_id == account_id)
+        if plan_id:
+            stmt = stmt.where(PaymentsHistoryCustom.plan_id == plan_id)
+        if status:
+            stmt = stmt.where(PaymentsHistoryCustom.status == status)
+        if start:
+            stmt = stmt.where(PaymentsHistoryCustom.transaction_at >= start)
+        if end:
+            stmt = stmt.where(PaymentsHistoryCustom.transaction_at < end)
+        return stmt
+
+    @classmethod
+    def paginate(
+        cls,
+        session: Session,
+        *,
+        limit: int,
+        last_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Optional[InfiniteScrollPagination]:
+        """
+        Get a page of the payment history, from the latest payment
+
+        :param last_id: id of the last payment of the previous page
+        :return: the page, None if the last payment is not in the filtered history
+        """
+        stmt = cls._filter(select(PaymentsHistoryCustom), account_id, plan_id, status, start, end)
+        return paginate_by_keyset(
+            session,
+            stmt,
+            keys=(PaymentsHistoryCustom.transaction_at, PaymentsHistoryCustom.id),
+            limit=limit,
+            anchor_id=last_id,
+        )
+
+    @classmethod
+    def get_statistics(
+        cls,
+        session: Session,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> dict[str, Any]:
+        """
+        Aggregate the payment history: revenue of the completed payments per day and per plan,
+        and number of payments per status
+        """
+        revenue = func.coalesce(func.sum(PaymentsHistoryCustom.amount), 0)
+        count = func.count(PaymentsHistoryCustom.id)
+        completed = PaymentsHistoryCustom.status == PaymentStatus.COMPLETED.value
+
+        day = func.date(PaymentsHistoryCustom.transaction_at)
+        daily_rows = session.execute(
+            cls._filter(select(day.label("date"), revenue.label("revenue"), count.label("count")), start=start, end=end)
+            .where(completed)
+            .group_by(day)
+            .order_by(day)
+        ).all()
+
+        plan_rows = session.execute(
+            cls._filter(
+                select(PaymentsHistoryCustom.plan_id, revenue.label("revenue"), count.label("count")),
+                start=start,
+                end=end,
+            )
+            .where(completed)
+            .group_by(PaymentsHistoryCustom.plan_id)
+            .order_by(revenue.desc())
+        ).all()
+
+        status_rows = session.execute(
+            cls._filter(select(PaymentsHistoryCustom.status, count.label("count")), start=start, end=end).group_by(
+                PaymentsHistoryCustom.status
+            )
+        ).all()
+
+        return {
+            "daily": [{"date": str(row.date), "revenue": float(row.revenue), "count": row.count} for row in daily_rows],
+            "plans": [{"plan_id": row.plan_id, "revenue": float(row.revenue), "count": row.count} for row in plan_rows],
+            "statuses": {row.status: row.count for row in status_rows},
+        }
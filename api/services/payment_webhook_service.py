@@ -0,0 +1,246 @@
+import logging
+import re
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from extensions.ext_database import db
+from models.account import Account
+from models.alies_payments_custom import AliesPaymentsCustom
+from models.payments_history_custom import PaymentsHistoryCustom, PaymentStatus
+from services.entities.plan_entities import AliesPaymentsInfo, PaymentHistoryModel
+from services.payment_history_service import PaymentHistoryService
+from services.plan_catalog_service import PlanCatalogService
+from services.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentItemStatus(StrEnum):
+    # the payment upgraded the plan of its account
+    COMPLETED = "completed"
+    # the payment matched a payment request, but the plan or account is missing or the amount is too low
+    REJECTED = "rejected"
+    # the payment was recorded without matching a payment request
+    RECEIVED = "received"
+    # the transaction was already recorded, by a previous delivery or earlier in the batch
+    DUPLICATE = "duplicate"
+    # the payment could not be validated and was not recorded
+    INVALID = "invalid"
+
+
+class PaymentItemResult(BaseModel):
+    transaction_id: Optional[str] = None
+    status: PaymentItemStatus
+    message: str = ""
+
+
+class PaymentWebhookResult(BaseModel):
+    results: list[PaymentItemResult]
+    upgraded_account_ids: list[str]
+
+
+class _PendingPayment:
+    def __init__(self, index: int, payment: PaymentHistoryModel) -> None:
+        self.index = index
+        self.payment = payment
+        self.status = PaymentStatus.RECEIVED
+        self.message = ""
+        self.alies: Optional[AliesPaymentsCustom] = None
+        self.plan_expiration: Optional[int] = None
+
+    @property
+    def transaction_id(self) -> Optional[str]:
+        return str(self.payment.transactionID) if self.payment.transactionID else None
+
+
+class PaymentWebhookService:
+    """
+    Process the batches of payments delivered by the payment gateway webhook.
+
+    Payments are resolved with one query per table for the whole batch, and recorded with a single insert
+    skipping the transactions already recorded, so a retried delivery never applies a plan twice.
+    """
+
+    @staticmethod
+    def decode_alies(description: str) -> Optional[str]:
+        """
+        Extract the alies of the payment request from the transfer description, e.g. `PLAN12345678`
+        """
+        match = re.search(r"\bplan(\d{8})\b", (description or "").lower())
+        return match.group(1) if match else None
+
+    @classmethod
+    def process(cls, items: Sequence[Any]) -> PaymentWebhookResult:
+        results: list[Optional[PaymentItemResult]] = [None] * len(items)
+        pending = cls._validate(items, results)
+
+        cls._resolve_requests(pending)
+        recorded = cls._record(pending)
+
+        completed: list[_PendingPayment] = []
+        for item in pending:
+            if item.transaction_id is not None and item.transaction_id not in recorded:
+                results[item.index] = PaymentItemResult(
+                    transaction_id=item.transaction_id,
+                    status=PaymentItemStatus.DUPLICATE,
+                    message="Transaction already processed.",
+                )
+                continue
+            results[item.index] = PaymentItemResult(
+                transaction_id=item.transaction_id, status=PaymentItemStatus(item.status.value), message=item.message
+            )
+            if item.status == PaymentStatus.COMPLETED:
+                completed.append(item)
+
+        upgraded_account_ids = cls._apply_upgrades(completed)
+        db.session.commit()
+        # the plans are assigned by a bulk update, which bypasses the invalidation of the session changes
+        principal_cache.invalidate(principal_cache.scope("account", account_id) for account_id in upgraded_account_ids)
+
+        return PaymentWebhookResult(
+            results=[result for result in results if result is not None],
+            upgraded_account_ids=upgraded_account_ids,
+        )
+
+    @classmethod
+    def _validate(cls, items: Sequence[Any], results: list[Optional[PaymentItemResult]]) -> list[_PendingPayment]:
+        pending: list[_PendingPayment] = []
+        seen_transaction_ids: set[str] = set()
+        for index, item in enumerate(items):
+            try:
+                payment = PaymentHistoryModel.model_validate(item)
+            except ValidationError as e:
+                logger.warning("Invalid payment in webhook batch: %s", e)
+                transaction_id = item.get("transactionID") if isinstance(item, Mapping) else None
+                results[index] = PaymentItemResult(
+                    transaction_id=str(transaction_id) if transaction_id else None,
+                    status=PaymentItemStatus.INVALID,
+                    message="Invalid payment data.",
+                )
+                continue
+
+            pending_payment = _PendingPayment(index, payment)
+            transaction_id = pending_payment.transaction_id
+            if transaction_id is not None:
+                if transaction_id in seen_transaction_ids:
+                    results[index] = PaymentItemResult(
+                        transaction_id=transaction_id,
+                        status=PaymentItemStatus.DUPLICATE,
+                        message="Transaction repeated in the batch.",
+                    )
+                    continue
+                seen_transaction_ids.add(transaction_id)
+            pending.append(pending_payment)
+        return pending
+
+    @classmethod
+    def _resolve_requests(cls, pending: list[_PendingPayment]) -> None:
+        """
+        Match the payments to their payment requests, accounts and plans
+        """
+        alies_by_item = {id(item): cls.decode_alies(item.payment.description) for item in pending}
+        alies_ids = {alies for alies in alies_by_item.values() if alies}
+        if not alies_ids:
+            for item in pending:
+                item.message = "Payment request not found."
+            return
+
+        alies_payments = {
+            alies.alies: alies
+            for alies in db.session.scalars(
+                select(AliesPaymentsCustom).where(AliesPaymentsCustom.alies.in_(alies_ids))
+            ).all()
+        }
+        infos = {alies: AliesPaymentsInfo.model_validate(payment.value) for alies, payment in alies_payments.items()}
+        account_ids = {info.id_account for info in infos.values()}
+        accounts = (
+            set(db.session.scalars(select(Account.id).where(Account.id.in_(account_ids))).all())
+            if account_ids
+            else set()
+        )
+
+        for item in pending:
+            # a payment request is consumed by the first payment matching it
+            alies_id = alies_by_item[id(item)]
+            alies = alies_payments.pop(alies_id, None) if alies_id else None
+            if alies is None:
+                item.message = "Payment request not found."
+                continue
+
+            info = infos[alies.alies]
+            item.alies = alies
+            item.payment.id_account = info.id_account
+            item.payment.id_plan = info.id_plan
+
+            plan = PlanCatalogService.get_plan(info.id_plan)
+            if not plan:
+                item.status = PaymentStatus.REJECTED
+                item.message = "Plan not found."
+                continue
+            if info.id_account not in accounts or item.payment.amount < plan.price:
+                item.status = PaymentStatus.REJECTED
+                item.message = "Account not found or payment amount is less than plan price."
+                continue
+
+            item.status = PaymentStatus.COMPLETED
+            item.plan_expiration = plan.plan_expiration
+
+    @classmethod
+    def _record(cls, pending: list[_PendingPayment]) -> set[str]:
+        """
+        Insert the history of the payments, transactions already recorded are skipped
+
+        :return: ids of the transactions recorded by this batch
+        """
+        if not pending:
+            return set()
+
+        now = datetime.now(UTC).replace(tzinfo=None)
+        rows = []
+        for item in pending:
+            value = item.payment.model_dump(mode="json")
+            columns = PaymentHistoryService.get_columns(value)
+            columns.setdefault("transaction_at", now)
+            rows.append({"value": value, "status": item.status.value, **columns})
+
+        stmt = (
+            insert(PaymentsHistoryCustom)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[PaymentsHistoryCustom.transaction_id])
+            .returning(PaymentsHistoryCustom.transaction_id)
+        )
+        return {transaction_id for transaction_id in db.session.scalars(stmt).all() if transaction_id is not None}
+
+    @classmethod
+    def _apply_upgrades(cls, completed: list[_PendingPayment]) -> list[str]:
+        """
+        Assign the plans of the completed payments and consume their payment requests
+
+        :return: ids of the upgraded accounts
+        """
+        if not completed:
+            return []
+
+        # the last payment of an account in the batch sets its plan
+        now = datetime.now(UTC)
+        upgrades = {
+            item.payment.id_account: {
+                "id": item.payment.id_account,
+                "id_custom_plan": item.payment.id_plan,
+                "plan_expiration": now + timedelta(days=item.plan_expiration or 0),
+            }
+            for item in completed
+        }
+        db.session.execute(update(Account), list(upgrades.values()))
+        db.session.execute(
+            delete(AliesPaymentsCustom).where(
+                AliesPaymentsCustom.id.in_([item.alies.id for item in completed if item.alies is not None])
+            )
+        )
+        return list(upgrades)
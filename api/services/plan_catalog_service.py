@@ -0,0 +1,106 @@
+import logging
+import threading
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from sqlalchemy import select
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.system_custom_info import SystemCustomInfo
+from services.entities.plan_entities import PaymentSettingsModel, PlanModel
+
+logger = logging.getLogger(__name__)
+
+
+class PlanCatalog(BaseModel):
+    """
+    Parsed plans and payment settings, shared by every caller in the process, they must not be modified
+    """
+
+    version: int
+    plans: dict[str, PlanModel] = {}
+    # plans listed to the users and the dashboard, plans with a date as expiration are not listed
+    listed_plans: list[PlanModel] = []
+    payment_settings: Optional[PaymentSettingsModel] = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class PlanCatalogService:
+    """
+    Process-local catalog of the plans and payment settings stored in `system_custom_info`.
+
+    The catalog is loaded once per version of a stamp kept in Redis, so reading it costs a single Redis GET.
+    Endpoints changing the plans or payment settings must call `invalidate` after their commit.
+    """
+
+    _VERSION_KEY = "plan_catalog_version"
+    _lock = threading.Lock()
+    _catalog: Optional[PlanCatalog] = None
+
+    @classmethod
+    def get_catalog(cls) -> PlanCatalog:
+        version = cls._get_version()
+        catalog = cls._catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        with cls._lock:
+            catalog = cls._catalog
+            if catalog is None or catalog.version != version:
+                # the stamp is read before loading, a change committed meanwhile only causes one more reload
+                catalog = cls._load(version)
+                cls._catalog = catalog
+
+        return catalog
+
+    @classmethod
+    def get_plan(cls, plan_id: str) -> Optional[PlanModel]:
+        return cls.get_catalog().plans.get(plan_id)
+
+    @classmethod
+    def get_payment_settings(cls) -> Optional[PaymentSettingsModel]:
+        return cls.get_catalog().payment_settings
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Make every process reload the catalog, call it after the plans or payment settings were committed
+        """
+        redis_client.incr(cls._VERSION_KEY)
+
+    @classmethod
+    def _get_version(cls) -> int:
+        version = redis_client.get(cls._VERSION_KEY)
+        return int(version) if version else 0
+
+    @classmethod
+    def _load(cls, version: int) -> PlanCatalog:
+        rows = db.session.execute(
+            select(SystemCustomInfo.name, SystemCustomInfo.value).where(
+                SystemCustomInfo.name.in_(["plan", "payment_settings"])
+            )
+        ).all()
+        values = {row.name: row.value for row in rows}
+
+        plans: dict[str, PlanModel] = {}
+        listed_plans: list[PlanModel] = []
+        for raw_plan in values.get("plan") or []:
+            try:
+                plan = PlanModel.model_validate(raw_plan)
+            except ValidationError:
+                logger.warning("Skip invalid plan %s", raw_plan.get("id"), exc_info=True)
+                continue
+            plans[plan.id] = plan
+            if not isinstance(raw_plan.get("plan_expiration"), str):
+                listed_plans.append(plan)
+
+        payment_settings = None
+        if values.get("payment_settings") is not None:
+            try:
+                payment_settings = PaymentSettingsModel.model_validate(values["payment_settings"])
+            except ValidationError:
+                logger.warning("Skip invalid payment settings", exc_info=True)
+
+        return PlanCatalog(version=version, plans=plans, listed_plans=listed_plans, payment_settings=payment_settings)
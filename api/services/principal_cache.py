@@ -0,0 +1,153 @@
+import logging
+import threading
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Optional, TypeVar
+
+from cachetools import TTLCache
+from opentelemetry.metrics import get_meter
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_meter = get_meter("principal_cache")
+_request_counter = _meter.create_counter(
+    "auth.principal_cache.requests",
+    description="Number of authenticated principal lookups, by result (hit or miss)",
+    unit="{request}",
+)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    scopes: tuple[str, ...]
+    versions: tuple[int, ...]
+    principal: Mapping[str, Any]
+
+
+class PrincipalCache:
+    """
+    Process-local cache of the authenticated principals (account with its current tenant and role, end user and app).
+
+    Principals are kept as immutable snapshots of their column values, and restored into the request session
+    without querying. Each entry depends on scopes, e.g. `account:<id>` or `tenant:<id>`, whose versions are
+    kept in Redis: committing a change of an account, tenant, member, end user or app bumps the versions of its
+    scopes, so every process reloads the principals depending on it.
+    A change committed while a principal is loaded may be missed until the entry expires.
+    """
+
+    _VERSION_KEY_PREFIX = "principal_cache_version:"
+    # versions only need to outlive the cache entries
+    _VERSION_KEY_TTL = 86400
+
+    def __init__(self, ttl: int, max_size: int) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: TTLCache[str, _Entry] = TTLCache(maxsize=max_size, ttl=max(ttl, 1))
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    @staticmethod
+    def scope(kind: str, principal_id: str) -> str:
+        return f"{kind}:{principal_id}"
+
+    def get(self, key: str) -> Optional[Mapping[str, Any]]:
+        """
+        Get a principal, None if it is not cached or one of its scopes changed
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._read_versions(entry.scopes) == entry.versions:
+            _request_counter.add(1, {"result": "hit"})
+            return entry.principal
+
+        _request_counter.add(1, {"result": "miss"})
+        return None
+
+    def put(self, key: str, scopes: Sequence[str], principal: Mapping[str, Any]) -> None:
+        """
+        Cache a principal loaded from the database
+
+        :param scopes: scopes whose changes invalidate the principal
+        :param principal: snapshots of the principal, see `snapshot`
+        """
+        if not self.enabled:
+            return
+
+        versions = self._read_versions(scopes)
+        if versions is None:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(
+                scopes=tuple(scopes), versions=versions, principal=MappingProxyType(dict(principal))
+            )
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        """
+        Make every process reload the principals depending on the scopes, call it after the changes were committed
+        """
+        scopes = set(scopes)
+        if not scopes:
+            return
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for scope in scopes:
+                pipeline.incr(self._VERSION_KEY_PREFIX + scope)
+                pipeline.expire(self._VERSION_KEY_PREFIX + scope, self._VERSION_KEY_TTL)
+            pipeline.execute()
+        except Exception:
+            logger.exception("Failed to invalidate the principal cache")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _read_versions(self, scopes: Sequence[str]) -> Optional[tuple[int, ...]]:
+        if not scopes:
+            return ()
+        try:
+            values = redis_client.mget([self._VERSION_KEY_PREFIX + scope for scope in scopes])
+        except Exception:
+            logger.warning("Failed to read the principal cache versions", exc_info=True)
+            return None
+        return tuple(int(value) if value else 0 for value in values)
+
+    @staticmethod
+    def snapshot(instance: Any) -> Mapping[str, Any]:
+        """
+        Immutable copy of the column values of a loaded instance
+        """
+        mapper = inspect(instance).mapper
+        return MappingProxyType({attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs})
+
+    @staticmethod
+    def restore(session: Session, model: type[T], values: Mapping[str, Any]) -> T:
+        """
+        Attach an instance built from a snapshot to the session, as if it was loaded, without querying
+        """
+        mapper = inspect(model)
+        instance = mapper.class_manager.new_instance()
+        for key, value in values.items():
+            # mutable values are copied so the snapshot is never modified through the instance
+            set_committed_value(instance, key, value.copy() if isinstance(value, dict | list) else value)
+        make_transient_to_detached(instance)
+        return session.merge(instance, load=False)
+
+
+principal_cache = PrincipalCache(
+    ttl=dify_config.PRINCIPAL_CACHE_TTL,
+    max_size=dify_config.PRINCIPAL_CACHE_MAX_SIZE,
+)
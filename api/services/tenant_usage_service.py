@@ -0,0 +1,178 @@
+import logging
+from collections import Counter
+from enum import StrEnum
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+from models.account import TenantAccountJoin
+from models.dataset import Dataset, Document
+from models.model import App, MessageAnnotation
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: usage counters hash of a tenant
+# ARGV: pairs of resource and amount
+# counters are only changed when they exist, missing counters are counted from the database on next read
+_INCREMENT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# KEYS[1]: usage counters hash of a tenant
+# ARGV: counter ttl, overwrite existing counters (1 or 0), then pairs of resource and count
+_STORE_SCRIPT = """
+if ARGV[2] == '0' and redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class TenantUsageResource(StrEnum):
+    MEMBERS = "members"
+    APPS = "apps"
+    DATASETS = "datasets"
+    DOCUMENTS = "documents"
+    ANNOTATIONS = "annotations"
+
+
+class TenantUsage(BaseModel):
+    members: int = 0
+    apps: int = 0
+    datasets: int = 0
+    documents: int = 0
+    annotations: int = 0
+
+
+class TenantUsageService:
+    """
+    Usage counters of the quota limited resources of a tenant, kept in Redis.
+
+    Counters are counted from the database on first read and then changed by the committed inserts and deletes
+    of the resources (see `events.event_handlers.update_tenant_usage_when_resources_changed`). Changes made by
+    bulk statements are not seen, the counters expire after TENANT_USAGE_COUNTER_TTL seconds and are recounted
+    periodically by `schedule.reconcile_tenant_usage_task` to correct this drift.
+    """
+
+    _USAGE_KEY = "tenant_usage:{}"
+    _increment_script = None
+    _store_script = None
+
+    @classmethod
+    def get_usage(cls, tenant_id: str, session: Session) -> TenantUsage:
+        """
+        Get the usage of a tenant, count it from the database when the counters are missing
+
+        :param tenant_id: the tenant id
+        :param session: session to count the usage with
+        :return: usage of the tenant
+        """
+        if not dify_config.TENANT_USAGE_COUNTERS_ENABLED:
+            return cls.count_usage(tenant_id, session)
+
+        values = redis_client.hgetall(cls._USAGE_KEY.format(tenant_id))
+        counters = {key.decode(): int(value) for key, value in values.items()}
+        if all(resource.value in counters for resource in TenantUsageResource):
+            return TenantUsage.model_validate(counters)
+
+        usage = cls.count_usage(tenant_id, session)
+        cls._store(tenant_id, usage, overwrite=False)
+        return usage
+
+    @staticmethod
+    def count_usage(tenant_id: str, session: Session) -> TenantUsage:
+        """
+        Count the usage of a tenant from the database
+        """
+
+        def count(stmt) -> int:
+            return session.scalar(stmt) or 0
+
+        return TenantUsage(
+            members=count(select(func.count(TenantAccountJoin.id)).where(TenantAccountJoin.tenant_id == tenant_id)),
+            apps=count(select(func.count(App.id)).where(App.tenant_id == tenant_id)),
+            datasets=count(select(func.count(Dataset.id)).where(Dataset.tenant_id == tenant_id)),
+            documents=count(select(func.count(Document.id)).where(Document.tenant_id == tenant_id)),
+            annotations=count(
+                select(func.count(MessageAnnotation.id))
+                .join(App, App.id == MessageAnnotation.app_id)
+                .where(App.tenant_id == tenant_id)
+            ),
+        )
+
+    @classmethod
+    def increment(cls, deltas: Counter[tuple[str, TenantUsageResource]]) -> None:
+        """
+        Change the existing counters of tenants
+
+        :param deltas: amounts to add by tenant id and resource
+        """
+        if not dify_config.TENANT_USAGE_COUNTERS_ENABLED:
+            return
+
+        amounts_by_tenant: dict[str, list] = {}
+        for (tenant_id, resource), amount in deltas.items():
+            if amount:
+                amounts_by_tenant.setdefault(tenant_id, []).extend((resource.value, amount))
+
+        if cls._increment_script is None:
+            cls._increment_script = redis_client.register_script(_INCREMENT_SCRIPT)
+        for tenant_id, amounts in amounts_by_tenant.items():
+            cls._increment_script(keys=[cls._USAGE_KEY.format(tenant_id)], args=amounts)
+
+    @classmethod
+    def reset(cls, tenant_ids: set[str]) -> None:
+        """
+        Drop the counters of tenants, they are counted again from the database on next read
+        """
+        if not dify_config.TENANT_USAGE_COUNTERS_ENABLED or not tenant_ids:
+            return
+
+        redis_client.delete(*(cls._USAGE_KEY.format(tenant_id) for tenant_id in tenant_ids))
+
+    @classmethod
+    def reconcile(cls, session: Session) -> int:
+        """
+        Recount the existing counters of all tenants from the database
+
+        :return: number of tenants whose counters had drifted
+        """
+        if not dify_config.TENANT_USAGE_COUNTERS_ENABLED:
+            return 0
+
+        drifted = 0
+        for key in redis_client.scan_iter(match=cls._USAGE_KEY.format("*"), count=1000):
+            tenant_id = key.decode().removeprefix(cls._USAGE_KEY.format(""))
+            values = redis_client.hgetall(key)
+            counters = {field.decode(): int(value) for field, value in values.items()}
+            usage = cls.count_usage(tenant_id, session)
+            if counters != usage.model_dump():
+                drifted += 1
+                logger.info("Tenant usage counters of %s drifted: %s, counted: %s", tenant_id, counters, usage)
+                cls._store(tenant_id, usage, overwrite=True)
+
+        return drifted
+
+    @classmethod
+    def _store(cls, tenant_id: str, usage: TenantUsage, overwrite: bool) -> None:
+        if cls._store_script is None:
+            cls._store_script = redis_client.register_script(_STORE_SCRIPT)
+
+        args: list = [dify_config.TENANT_USAGE_COUNTER_TTL, 1 if overwrite else 0]
+        for resource, count in usage.model_dump().items():
+            args.extend((resource, count))
+        cls._store_script(keys=[cls._USAGE_KEY.format(tenant_id)], args=args)
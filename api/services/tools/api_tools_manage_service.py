@@ -18,6 +18,7 @@ from core.tools.entities.tool_entities import (
 )
 from core.tools.tool_label_manager import ToolLabelManager
 from core.tools.tool_manager import ToolManager
+from core.tools.tool_runtime_cache import tool_runtime_cache
 from core.tools.utils.configuration import ProviderConfigEncrypter
 from core.tools.utils.parser import ApiBasedToolSchemaParser
 from extensions.ext_database import db
@@ -319,6 +320,7 @@ class ApiToolManageService:
 
         # delete cache
         tool_configuration.delete_tool_credentials_cache()
+        tool_runtime_cache.invalidate(tenant_id)
 
         # update labels
         ToolLabelManager.update_tool_labels(provider_controller, labels)
@@ -344,6 +346,7 @@ class ApiToolManageService:
 
         db.session.delete(provider)
         db.session.commit()
+        tool_runtime_cache.invalidate(tenant_id)
 
         return {"result": "success"}
 
@@ -14,6 +14,7 @@ from core.tools.entities.api_entities import ToolApiEntity, ToolProviderApiEntit
 from core.tools.errors import ToolNotFoundError, ToolProviderCredentialValidationError, ToolProviderNotFoundError
 from core.tools.tool_label_manager import ToolLabelManager
 from core.tools.tool_manager import ToolManager
+from core.tools.tool_runtime_cache import tool_runtime_cache
 from core.tools.utils.configuration import ProviderConfigEncrypter
 from extensions.ext_database import db
 from models.tools import BuiltinToolProvider
@@ -166,6 +167,7 @@ class BuiltinToolManageService:
             tool_configuration.delete_tool_credentials_cache()
 
         db.session.commit()
+        tool_runtime_cache.invalidate(tenant_id)
         return {"result": "success"}
 
     @staticmethod
@@ -211,6 +213,7 @@ class BuiltinToolManageService:
             provider_identity=provider_controller.entity.identity.name,
         )
         tool_configuration.delete_tool_credentials_cache()
+        tool_runtime_cache.invalidate(tenant_id)
 
         return {"result": "success"}
 
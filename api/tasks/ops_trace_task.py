@@ -1,10 +1,12 @@
 import json
 import logging
+import zlib
+from collections.abc import Iterable, Iterator
 
 from celery import shared_task  # type: ignore
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_BATCH_FILE_PATH, OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -29,12 +31,7 @@ def process_trace_tasks(file_info):
     trace_info_type = file_data.get("trace_info_type")
     trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
-    if trace_info.get("message_data"):
-        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
-    if trace_info.get("workflow_data"):
-        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
-    if trace_info.get("documents"):
-        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+    trace_info = _load_trace_info(trace_info)
 
     try:
         if trace_instance:
@@ -53,3 +50,75 @@ def process_trace_tasks(file_info):
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
     finally:
         storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_batch_tasks(file_info):
+    """
+    Async process a batch of trace tasks, shipped as one gzip compressed, newline delimited JSON file
+    Usage: process_trace_batch_tasks.delay({"file_id": file_id})
+    """
+    from core.ops.ops_trace_manager import OpsTraceManager
+
+    file_path = f"{OPS_BATCH_FILE_PATH}{file_info.get('file_id')}.jsonl.gz"
+    trace_instances: dict = {}
+    succeeded, failed = 0, 0
+    try:
+        with current_app.app_context():
+            for line in _iter_gzip_lines(storage.load_stream(file_path)):
+                task_data = json.loads(line)
+                app_id = task_data.get("app_id")
+                if app_id not in trace_instances:
+                    trace_instances[app_id] = OpsTraceManager.get_ops_trace_instance(app_id)
+                trace_instance = trace_instances[app_id]
+                if not trace_instance or not task_data.get("trace_info"):
+                    continue
+
+                try:
+                    trace_info = _load_trace_info(task_data["trace_info"])
+                    trace_type = trace_info_info_map.get(task_data.get("trace_info_type"))
+                    if trace_type:
+                        trace_info = trace_type(**trace_info)
+                    trace_instance.trace(trace_info)
+                    succeeded += 1
+                except Exception:
+                    logging.exception(f"Processing trace task failed, app_id: {app_id}")
+                    redis_client.incr(f"{OPS_TRACE_FAILED_KEY}_{app_id}")
+                    failed += 1
+
+            # the providers buffer the traces and send them in batches, flush once per batch
+            for app_id, trace_instance in trace_instances.items():
+                if not trace_instance:
+                    continue
+                try:
+                    trace_instance.flush()
+                except Exception:
+                    logging.exception(f"Flushing traces failed, app_id: {app_id}")
+        logging.info(f"Processing trace batch tasks finished, succeeded: {succeeded}, failed: {failed}")
+    finally:
+        storage.delete(file_path)
+
+
+def _load_trace_info(trace_info: dict) -> dict:
+    if trace_info.get("message_data"):
+        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
+    if trace_info.get("workflow_data"):
+        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
+    if trace_info.get("documents"):
+        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+    return trace_info
+
+
+def _iter_gzip_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Decompress a gzip stream chunk by chunk and split it into lines
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = b""
+    for chunk in chunks:
+        buffer += decompressor.decompress(chunk)
+        *lines, buffer = buffer.split(b"\n")
+        yield from (line for line in lines if line)
+    buffer += decompressor.flush()
+    if buffer:
+        yield buffer
@@ -1,8 +1,7 @@
 import os
-from typing import Literal
 
+import httpx
 import pytest
-import requests
 from _pytest.monkeypatch import MonkeyPatch
 
 from core.plugin.entities.plugin_daemon import PluginDaemonBasicResponse
@@ -26,27 +25,18 @@ class MockedHttp:
         ]
 
     @classmethod
-    def requests_request(
-        cls, method: Literal["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD"], url: str, **kwargs
-    ) -> requests.Response:
+    def httpx_send(cls, client: httpx.Client, request: httpx.Request, **kwargs) -> httpx.Response:
         """
-        Mocked requests.request
+        Mocked httpx.Client.send
         """
-        request = requests.PreparedRequest()
-        request.method = method
-        request.url = url
-        if url.endswith("/tools"):
+        if request.url.path.endswith("/tools"):
             content = PluginDaemonBasicResponse[list[ToolProviderEntity]](
                 code=0, message="success", data=cls.list_tools()
             ).model_dump_json()
         else:
             raise ValueError("")
 
-        response = requests.Response()
-        response.status_code = 200
-        response.request = request
-        response._content = content.encode("utf-8")
-        return response
+        return httpx.Response(status_code=200, request=request, content=content.encode("utf-8"))
 
 
 MOCK_SWITCH = os.getenv("MOCK_SWITCH", "false").lower() == "true"
@@ -55,7 +45,7 @@ MOCK_SWITCH = os.getenv("MOCK_SWITCH", "false").lower() == "true"
 @pytest.fixture
 def setup_http_mock(request, monkeypatch: MonkeyPatch):
     if MOCK_SWITCH:
-        monkeypatch.setattr(requests, "request", MockedHttp.requests_request)
+        monkeypatch.setattr(httpx.Client, "send", MockedHttp.httpx_send)
 
         def unpatch():
             monkeypatch.undo()
@@ -0,0 +1,127 @@
+"""
+Benchmark of the message purge on a seeded local Postgres, the tables are created in a temporary schema.
+Requires the database configured by DB_HOST, DB_PORT, DB_USERNAME, DB_PASSWORD and DB_DATABASE.
+"""
+
+import uuid
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from services.message_purge_service import MessagePurgeService
+
+SCHEMA = f"message_purge_{uuid.uuid4().hex[:8]}"
+MESSAGES_PER_APP = 20000
+CHILD_TABLES = [
+    "message_feedbacks",
+    "message_annotations",
+    "message_chains",
+    "message_agent_thoughts",
+    "message_files",
+    "saved_messages",
+]
+SANDBOX_TENANT_ID = str(uuid.uuid4())
+PAID_TENANT_ID = str(uuid.uuid4())
+
+
+@pytest.fixture(scope="module")
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine(dify_config.SQLALCHEMY_DATABASE_URI, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    except OperationalError:
+        pytest.skip("local Postgres is not available")
+
+    yield engine
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@pytest.fixture
+def seeded(engine: Engine) -> Generator[None, None, None]:
+    """
+    One sandbox and one paid app with MESSAGES_PER_APP expired messages each, and a row per message in every
+    table referencing messages.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE apps (id uuid PRIMARY KEY, tenant_id uuid NOT NULL)"))
+        conn.execute(
+            text(
+                "CREATE TABLE messages (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), app_id uuid NOT NULL,"
+                " created_at timestamp NOT NULL)"
+            )
+        )
+        conn.execute(text("CREATE INDEX message_created_at_idx ON messages (created_at)"))
+        for table in CHILD_TABLES:
+            conn.execute(text(f"CREATE TABLE {table} (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), message_id uuid)"))
+            conn.execute(text(f"CREATE INDEX {table}_message_idx ON {table} (message_id)"))
+
+        for tenant_id in (SANDBOX_TENANT_ID, PAID_TENANT_ID):
+            conn.execute(
+                text("INSERT INTO apps (id, tenant_id) VALUES (gen_random_uuid(), :tenant_id)"),
+                {"tenant_id": tenant_id},
+            )
+        conn.execute(
+            text(
+                "INSERT INTO messages (app_id, created_at)"
+                " SELECT apps.id, now() - interval '60 days' - n * interval '1 second'"
+                " FROM apps, generate_series(1, :count) AS n"
+            ),
+            {"count": MESSAGES_PER_APP},
+        )
+        for table in CHILD_TABLES:
+            conn.execute(text(f"INSERT INTO {table} (message_id) SELECT id FROM messages"))
+        conn.execute(text("ANALYZE"))
+
+    yield
+
+    with engine.begin() as conn:
+        for table in ["apps", "messages", *CHILD_TABLES]:
+            conn.execute(text(f"DROP TABLE {table}"))
+
+
+def _count(engine: Engine, table: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+
+
+def _purge(engine: Engine, **kwargs):
+    with Session(engine) as session:
+        return MessagePurgeService.purge(
+            session,
+            before=datetime.now() - timedelta(days=30),
+            is_tenant_eligible=lambda tenant_id: tenant_id == SANDBOX_TENANT_ID,
+            **kwargs,
+        )
+
+
+def test_purge_benchmark(engine, seeded, benchmark):
+    result = benchmark.pedantic(_purge, args=(engine,), kwargs={"batch_size": 1000}, rounds=1, iterations=1)
+
+    assert result.finished
+    assert result.scanned == 2 * MESSAGES_PER_APP
+    assert result.deleted["messages"] == MESSAGES_PER_APP
+    for table in CHILD_TABLES:
+        assert result.deleted[table] == MESSAGES_PER_APP
+        assert _count(engine, table) == MESSAGES_PER_APP
+    assert _count(engine, "messages") == MESSAGES_PER_APP
+
+
+def test_purge_resumes_from_cursor(engine, seeded):
+    # a budget this small stops the purge after its first batch
+    result = _purge(engine, batch_size=5000, time_budget=1e-9)
+    assert not result.finished
+    assert result.scanned == 5000
+
+    result = _purge(engine, batch_size=5000, cursor=result.cursor)
+    assert result.finished
+    assert result.scanned == 2 * MESSAGES_PER_APP - 5000
+    assert _count(engine, "messages") == MESSAGES_PER_APP
@@ -0,0 +1,151 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError, PublishFrom
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueLLMChunkEvent,
+    QueuePingEvent,
+    QueueTextChunkEvent,
+    QueueWorkflowSucceededEvent,
+)
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+
+
+@pytest.fixture
+def mock_redis():
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    with patch("core.app.apps.base_app_queue_manager.redis_client", redis_client):
+        yield redis_client
+
+
+def _create_queue_manager(mock_redis, **config) -> WorkflowAppQueueManager:
+    defaults = {
+        "APP_QUEUE_MAX_SIZE": 0,
+        "APP_QUEUE_CHUNK_MERGE_ENABLED": False,
+        "APP_QUEUE_CHUNK_MERGE_MAX_CHARS": 256,
+        "APP_QUEUE_CHUNK_MERGE_MAX_DELAY_MS": 50,
+        "APP_QUEUE_STOP_SIGNAL_PUBSUB_ENABLED": False,
+    }
+    defaults.update(config)
+    with patch.multiple("core.app.apps.base_app_queue_manager.dify_config", **defaults):
+        return WorkflowAppQueueManager(
+            task_id="task-id", user_id="user-id", invoke_from=InvokeFrom.SERVICE_API, app_mode="workflow"
+        )
+
+
+def _drain(queue_manager: WorkflowAppQueueManager) -> list:
+    events = []
+    for message in queue_manager.listen():
+        if not isinstance(message.event, QueuePingEvent):
+            events.append(message.event)
+    return events
+
+
+def test_coalesce_consecutive_text_chunks(mock_redis):
+    queue_manager = _create_queue_manager(mock_redis, APP_QUEUE_CHUNK_MERGE_ENABLED=True)
+
+    for text in ["Hel", "lo", " world"]:
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(
+        QueueTextChunkEvent(text="!", from_variable_selector=["llm", "text"]), PublishFrom.APPLICATION_MANAGER
+    )
+    queue_manager.publish(QueueWorkflowSucceededEvent(outputs={}), PublishFrom.APPLICATION_MANAGER)
+
+    events = _drain(queue_manager)
+
+    assert [event.text for event in events if isinstance(event, QueueTextChunkEvent)] == ["Hello world", "!"]
+    assert isinstance(events[-1], QueueWorkflowSucceededEvent)
+
+
+def test_coalesce_flushes_at_size_budget(mock_redis):
+    queue_manager = _create_queue_manager(
+        mock_redis, APP_QUEUE_CHUNK_MERGE_ENABLED=True, APP_QUEUE_CHUNK_MERGE_MAX_CHARS=4
+    )
+
+    for text in ["ab", "cd", "ef"]:
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+
+    assert queue_manager.queue_depth == 1
+    assert queue_manager._q.get_nowait().event.text == "abcd"
+
+
+def test_coalesce_llm_chunks_keeps_final_chunk(mock_redis):
+    queue_manager = _create_queue_manager(mock_redis, APP_QUEUE_CHUNK_MERGE_ENABLED=True)
+
+    def llm_chunk(content: str, finish_reason=None) -> QueueLLMChunkEvent:
+        return QueueLLMChunkEvent(
+            chunk=LLMResultChunk(
+                model="gpt-4",
+                delta=LLMResultChunkDelta(
+                    index=0, message=AssistantPromptMessage(content=content), finish_reason=finish_reason
+                ),
+            )
+        )
+
+    queue_manager.publish(llm_chunk("a"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(llm_chunk("b"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(llm_chunk("c", finish_reason="stop"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueWorkflowSucceededEvent(outputs={}), PublishFrom.APPLICATION_MANAGER)
+
+    events = [event for event in _drain(queue_manager) if isinstance(event, QueueLLMChunkEvent)]
+
+    assert [event.chunk.delta.message.content for event in events] == ["ab", "c"]
+    assert events[-1].chunk.delta.finish_reason == "stop"
+
+
+def test_bounded_queue_blocks_producer(mock_redis):
+    queue_manager = _create_queue_manager(mock_redis, APP_QUEUE_MAX_SIZE=2)
+
+    def produce():
+        for i in range(10):
+            queue_manager.publish(QueueTextChunkEvent(text=str(i)), PublishFrom.APPLICATION_MANAGER)
+        queue_manager.publish(QueueWorkflowSucceededEvent(outputs={}), PublishFrom.APPLICATION_MANAGER)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.1)
+
+    assert queue_manager.queue_depth == 2
+
+    events = _drain(queue_manager)
+    producer.join(timeout=5)
+
+    assert [event.text for event in events if isinstance(event, QueueTextChunkEvent)] == [str(i) for i in range(10)]
+    assert queue_manager.max_queue_depth <= 3
+
+
+def test_bounded_queue_producer_stops_when_listener_closed(mock_redis):
+    queue_manager = _create_queue_manager(mock_redis, APP_QUEUE_MAX_SIZE=1)
+    queue_manager.publish(QueueTextChunkEvent(text="a"), PublishFrom.APPLICATION_MANAGER)
+
+    listener = queue_manager.listen()
+    next(listener)
+    queue_manager.publish(QueueTextChunkEvent(text="b"), PublishFrom.APPLICATION_MANAGER)
+    listener.close()
+
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueueTextChunkEvent(text="c"), PublishFrom.APPLICATION_MANAGER)
+
+
+def test_stop_signal_pushed_via_pubsub_skips_polling(mock_redis):
+    stop_event = threading.Event()
+    with patch("core.app.apps.base_app_queue_manager.task_stop_signal_subscriber") as subscriber:
+        subscriber.register = MagicMock(return_value=stop_event)
+        queue_manager = _create_queue_manager(mock_redis, APP_QUEUE_STOP_SIGNAL_PUBSUB_ENABLED=True)
+
+    assert not queue_manager._is_stopped()
+    assert not queue_manager._is_stopped()
+    assert mock_redis.get.call_count == 1
+
+    stop_event.set()
+
+    assert queue_manager._is_stopped()
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueueTextChunkEvent(text="a"), PublishFrom.APPLICATION_MANAGER)
@@ -0,0 +1,87 @@
+"""
+Load test of the database connections held by concurrent streams, with and without session checkpoints.
+"""
+
+import threading
+from collections.abc import Generator
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from core.app.apps.base_app_generator import BaseAppGenerator
+from extensions.ext_database import db
+
+
+@pytest.fixture
+def stream_app(tmp_path) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'streams.db'}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": 64,
+        "max_overflow": 0,
+        "pool_timeout": 5,
+        "connect_args": {"check_same_thread": False},
+    }
+    db.init_app(app)
+    return app
+
+
+def _pipeline(streaming: threading.Barrier, finished: threading.Event) -> Generator[dict, None, None]:
+    yield {"event": "message", "answer": "Hello"}
+    # every stream is waiting for the model
+    streaming.wait()
+    finished.wait()
+
+    # save the message
+    with Session(db.engine) as session:
+        session.execute(text("SELECT 1"))
+    yield {"event": "message_end"}
+
+
+def _request(app: Flask, streaming: threading.Barrier, finished: threading.Event, chunks: list[str]) -> None:
+    with app.app_context():
+        # the generate records are created with the request session
+        db.session.execute(text("SELECT 1"))
+        chunks.extend(BaseAppGenerator.convert_to_event_stream(_pipeline(streaming, finished)))
+
+
+@pytest.mark.parametrize(
+    ("concurrent_streams", "checkpoints_enabled", "expected_connections"),
+    [
+        (1, False, 1),
+        (8, False, 8),
+        (32, False, 32),
+        (1, True, 0),
+        (8, True, 0),
+        (32, True, 0),
+    ],
+)
+def test_connections_held_by_concurrent_streams(
+    monkeypatch, stream_app, concurrent_streams, checkpoints_enabled, expected_connections
+):
+    monkeypatch.setattr(dify_config, "APP_STREAM_SESSION_CHECKPOINTS_ENABLED", checkpoints_enabled)
+    with stream_app.app_context():
+        pool = db.engine.pool
+
+    streaming = threading.Barrier(concurrent_streams + 1, timeout=10)
+    finished = threading.Event()
+    chunks: list[str] = []
+    threads = [
+        threading.Thread(target=_request, args=(stream_app, streaming, finished, chunks))
+        for _ in range(concurrent_streams)
+    ]
+    for thread in threads:
+        thread.start()
+
+    streaming.wait()
+    connections = pool.checkedout()
+    finished.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert connections == expected_connections
+    assert len(chunks) == concurrent_streams * 2
+    assert pool.checkedout() == 0
@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.features.rate_limiting.rate_limit import RateLimit, RequestRateLimit
+from core.errors.error import AppInvokeQuotaExceededError
+
+
+@pytest.fixture
+def mock_redis():
+    redis_client = MagicMock()
+    redis_client.exists.return_value = False
+    with patch("core.app.features.rate_limiting.rate_limit.redis_client", redis_client):
+        yield redis_client
+    RateLimit._instance_dict.clear()
+    RequestRateLimit._script = None
+    RequestRateLimit._empty_until.clear()
+
+
+def test_enter_acquires_slot_atomically(mock_redis):
+    acquire_script = MagicMock(return_value=[1, 1])
+    mock_redis.register_script.return_value = acquire_script
+
+    rate_limit = RateLimit("app-1", 2)
+    request_id = rate_limit.enter("request-1")
+
+    assert request_id == "request-1"
+    acquire_script.assert_called_once()
+    kwargs = acquire_script.call_args.kwargs
+    assert kwargs["keys"] == ["dify:rate_limit:app-1:active_request_set"]
+    # the scripts read the time from redis, so no time of the caller is passed
+    assert kwargs["args"] == ["request-1", RateLimit._REQUEST_MAX_ALIVE_TIME, 2, 86400]
+    mock_redis.hlen.assert_not_called()
+
+
+def test_saturated_limit_rejects_locally_until_release(mock_redis):
+    acquire_script = MagicMock(return_value=[0, 2])
+    mock_redis.register_script.return_value = acquire_script
+
+    rate_limit = RateLimit("app-2", 2)
+    with pytest.raises(AppInvokeQuotaExceededError):
+        rate_limit.enter()
+    with pytest.raises(AppInvokeQuotaExceededError):
+        rate_limit.enter()
+    assert acquire_script.call_count == 1
+
+    rate_limit.exit("request-1")
+    mock_redis.zrem.assert_called_once_with("dify:rate_limit:app-2:active_request_set", "request-1")
+
+    acquire_script.return_value = [1, 2]
+    rate_limit.enter("request-2")
+    assert acquire_script.call_count == 2
+
+
+def test_disabled_rate_limit_skips_redis(mock_redis):
+    rate_limit = RateLimit("app-3", 0)
+
+    assert rate_limit.enter() == RateLimit._UNLIMITED_REQUEST_ID
+    rate_limit.exit(RateLimit._UNLIMITED_REQUEST_ID)
+    mock_redis.register_script.assert_not_called()
+    mock_redis.zrem.assert_not_called()
+
+
+def test_request_rate_limit_rejects_locally_while_bucket_is_empty(mock_redis):
+    bucket_script = MagicMock(return_value=0)
+    mock_redis.register_script.return_value = bucket_script
+
+    with pytest.raises(AppInvokeQuotaExceededError):
+        RequestRateLimit("app:app-4", 1).acquire()
+    with pytest.raises(AppInvokeQuotaExceededError):
+        RequestRateLimit("app:app-4", 1).acquire()
+    assert bucket_script.call_count == 1
+    assert bucket_script.call_args.kwargs["args"] == [1, 1]
+
+    bucket_script.return_value = 1
+    RequestRateLimit("app:app-5", 1).acquire()
+    assert bucket_script.call_count == 2
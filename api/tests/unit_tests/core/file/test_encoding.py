@@ -0,0 +1,89 @@
+import base64
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.file import File, FileTransferMethod, FileType, file_manager
+from core.file.encoding import EncodedFileCache, downscale_image
+
+
+def _local_file(storage_key: str, size: int = 4) -> File:
+    return File(
+        id="file1",
+        tenant_id="tenant1",
+        type=FileType.IMAGE,
+        transfer_method=FileTransferMethod.LOCAL_FILE,
+        related_id="upload_file1",
+        extension=".png",
+        mime_type="image/png",
+        size=size,
+        storage_key=storage_key,
+    )
+
+
+def _image(size: tuple[int, int], image_format: str) -> bytes:
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.effect_noise(size, 64).convert("RGB").save(output, format=image_format)
+    return output.getvalue()
+
+
+def test_encoded_file_cache_encodes_once():
+    cache = EncodedFileCache(max_size=1024)
+    encode = MagicMock(return_value="ZGF0YQ==")
+
+    assert cache.get(("key", 4), encode) == "ZGF0YQ=="
+    assert cache.get(("key", 4), encode) == "ZGF0YQ=="
+
+    encode.assert_called_once()
+
+
+def test_encoded_file_cache_skips_large_entries_and_disabled():
+    cache = EncodedFileCache(max_size=4)
+    encode = MagicMock(return_value="ZGF0YQ==")
+    cache.get("key", encode)
+    cache.get("key", encode)
+    assert encode.call_count == 2
+
+    disabled_cache = EncodedFileCache(max_size=0)
+    encode.reset_mock()
+    disabled_cache.get("key", encode)
+    disabled_cache.get("key", encode)
+    assert encode.call_count == 2
+
+
+def test_get_encoded_string_downloads_stored_file_once():
+    cache = EncodedFileCache(max_size=1024)
+    with (
+        patch.object(file_manager, "encoded_file_cache", cache),
+        patch.object(file_manager.storage, "load", return_value=b"data") as load,
+    ):
+        assert file_manager._get_encoded_string(_local_file("upload_files/a.png")) == base64.b64encode(b"data").decode()
+        assert file_manager._get_encoded_string(_local_file("upload_files/a.png")) == base64.b64encode(b"data").decode()
+        file_manager._get_encoded_string(_local_file("upload_files/b.png"))
+
+    assert [call.args[0] for call in load.call_args_list] == ["upload_files/a.png", "upload_files/b.png"]
+
+
+def test_downscale_image():
+    pytest.importorskip("PIL")
+    from PIL import Image
+
+    data = _image((1024, 512), "JPEG")
+
+    downscaled = downscale_image(data, max_resolution=256, quality=85)
+
+    assert len(downscaled) < len(data)
+    with Image.open(io.BytesIO(downscaled)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (256, 128)
+
+
+def test_downscale_image_keeps_small_and_unreadable_images():
+    pytest.importorskip("PIL")
+
+    data = _image((128, 64), "PNG")
+    assert downscale_image(data, max_resolution=256, quality=85) is data
+    assert downscale_image(b"not an image", max_resolution=256, quality=85) == b"not an image"
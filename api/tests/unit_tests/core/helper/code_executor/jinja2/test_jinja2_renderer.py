@@ -0,0 +1,29 @@
+import pytest
+
+from core.helper.code_executor.code_executor import CodeExecutionError
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2SandboxRenderer
+
+
+def test_render():
+    template = "Hello {{ name }}!{% for item in items %} {{ item }}{% endfor %}"
+    result = Jinja2SandboxRenderer.render(template=template, inputs={"name": "Dify", "items": (1, 2)})
+    assert result == "Hello Dify! 1 2"
+
+
+def test_render_reuses_compiled_template():
+    Jinja2SandboxRenderer._compile.cache_clear()
+    for i in range(3):
+        assert Jinja2SandboxRenderer.render(template="{{ n * 2 }}", inputs={"n": i}) == str(i * 2)
+    cache_info = Jinja2SandboxRenderer._compile.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 2
+
+
+def test_render_blocks_unsafe_access():
+    with pytest.raises(CodeExecutionError):
+        Jinja2SandboxRenderer.render(template="{{ name.__class__.__mro__ }}", inputs={"name": "a"})
+
+
+def test_render_invalid_template():
+    with pytest.raises(CodeExecutionError):
+        Jinja2SandboxRenderer.render(template="{% for %}", inputs={})
@@ -0,0 +1,22 @@
+import httpx
+
+from core.helper.code_executor.code_executor import CodeExecutor, CodeLanguage
+
+
+def test_execute_code_reuses_pooled_client(monkeypatch):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"code": 0, "message": "success", "data": {"stdout": "ok", "error": None}})
+
+    monkeypatch.setattr(CodeExecutor, "_client", None)
+    monkeypatch.setattr(CodeExecutor, "_client_pid", None)
+    client = CodeExecutor.get_client()
+    monkeypatch.setattr(client, "_transport", httpx.MockTransport(handler))
+
+    assert CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print('ok')") == "ok"
+    assert CodeExecutor.execute_code(CodeLanguage.PYTHON3, "", "print('ok')") == "ok"
+    assert CodeExecutor.get_client() is client
+    assert len(requests) == 2
+    assert requests[0].url.path == "/v1/sandbox/run"
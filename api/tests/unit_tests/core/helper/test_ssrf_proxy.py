@@ -1,52 +1,125 @@
 import secrets
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import httpx
 import pytest
 
-from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
+from core.helper import ssrf_proxy
+from core.helper.ssrf_proxy import (
+    SSRF_DEFAULT_MAX_RETRIES,
+    STATUS_FORCELIST,
+    RetryTransport,
+    make_request,
+    stream_request,
+)
 
 
-@patch("httpx.Client.request")
-def test_successful_request(mock_request):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_request.return_value = mock_response
+@pytest.fixture
+def mock_client():
+    requests: list[httpx.Request] = []
+    responses: list[httpx.Response] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses.pop(0)
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    with patch.object(ssrf_proxy, "get_client", return_value=client), patch("core.helper.ssrf_proxy.time.sleep"):
+        yield requests, responses
+    client.close()
+
+
+def test_successful_request(mock_client):
+    _, responses = mock_client
+    responses.append(httpx.Response(200))
 
     response = make_request("GET", "http://example.com")
     assert response.status_code == 200
 
 
-@patch("httpx.Client.request")
-def test_retry_exceed_max_retries(mock_request):
-    mock_response = MagicMock()
-    mock_response.status_code = 500
-
-    side_effects = [mock_response] * SSRF_DEFAULT_MAX_RETRIES
-    mock_request.side_effect = side_effects
+def test_retry_exceed_max_retries(mock_client):
+    _, responses = mock_client
+    responses.extend(httpx.Response(500) for _ in range(SSRF_DEFAULT_MAX_RETRIES))
 
     with pytest.raises(Exception) as e:
         make_request("GET", "http://example.com", max_retries=SSRF_DEFAULT_MAX_RETRIES - 1)
     assert str(e.value) == f"Reached maximum retries ({SSRF_DEFAULT_MAX_RETRIES - 1}) for URL http://example.com"
 
 
-@patch("httpx.Client.request")
-def test_retry_logic_success(mock_request):
-    side_effects = []
-
-    for _ in range(SSRF_DEFAULT_MAX_RETRIES):
-        status_code = secrets.choice(STATUS_FORCELIST)
-        mock_response = MagicMock()
-        mock_response.status_code = status_code
-        side_effects.append(mock_response)
-
-    mock_response_200 = MagicMock()
-    mock_response_200.status_code = 200
-    side_effects.append(mock_response_200)
-
-    mock_request.side_effect = side_effects
+def test_retry_logic_success(mock_client):
+    requests, responses = mock_client
+    responses.extend(httpx.Response(secrets.choice(STATUS_FORCELIST)) for _ in range(SSRF_DEFAULT_MAX_RETRIES))
+    responses.append(httpx.Response(200))
 
     response = make_request("GET", "http://example.com", max_retries=SSRF_DEFAULT_MAX_RETRIES)
 
     assert response.status_code == 200
-    assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
-    assert mock_request.call_args_list[0][1].get("method") == "GET"
+    assert len(requests) == SSRF_DEFAULT_MAX_RETRIES + 1
+    assert requests[0].method == "GET"
+
+
+def test_stream_request(mock_client):
+    _, responses = mock_client
+    responses.append(httpx.Response(503))
+    responses.append(httpx.Response(200, content=b"hello world"))
+
+    with stream_request("GET", "http://example.com", max_retries=1) as response:
+        assert response.status_code == 200
+        assert b"".join(response.iter_bytes()) == b"hello world"
+    assert response.is_closed
+
+
+def test_client_is_reused():
+    ssrf_proxy.close_clients()
+    try:
+        client = ssrf_proxy.get_client(ssl_verify=True)
+        assert ssrf_proxy.get_client(ssl_verify=True) is client
+        assert ssrf_proxy.get_client(ssl_verify=False) is not client
+    finally:
+        ssrf_proxy.close_clients()
+
+
+def test_client_keeps_no_cookies():
+    def handler(request: httpx.Request) -> httpx.Response:
+        cookie = request.headers.get("Cookie", "")
+        return httpx.Response(200, headers={"Set-Cookie": "session=secret; Path=/"}, text=cookie)
+
+    ssrf_proxy.close_clients()
+    try:
+        client = ssrf_proxy.get_client(ssl_verify=True)
+        with patch.object(httpx.HTTPTransport, "handle_request", side_effect=handler):
+            assert client.get("http://example.com").text == ""
+            assert client.get("http://example.com").text == ""
+            # cookies of a request are still sent
+            assert client.get("http://example.com", headers={"Cookie": "a=b"}).text == "a=b"
+        assert not client.cookies
+    finally:
+        ssrf_proxy.close_clients()
+
+
+def test_client_uses_environment_proxies(monkeypatch):
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.internal:3128")
+    monkeypatch.setenv("NO_PROXY", "localhost")
+
+    ssrf_proxy.close_clients()
+    try:
+        client = ssrf_proxy.get_client(ssl_verify=True)
+        assert client._transport_for_url(httpx.URL("https://example.com")) is not client._transport
+        assert client._transport_for_url(httpx.URL("https://localhost")) is not client._transport
+        assert client._transport_for_url(httpx.URL("http://example.com")) is client._transport
+    finally:
+        ssrf_proxy.close_clients()
+
+
+def test_max_connections_per_host():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"ok")
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler), max_connections_per_host=1))
+    with client:
+        with client.stream("GET", "http://example.com"):
+            # the only slot of the host is held by the open response
+            with pytest.raises(httpx.PoolTimeout):
+                client.get("http://example.com", timeout=httpx.Timeout(5, pool=0.01))
+            assert client.get("http://example.org").status_code == 200
+        assert client.get("http://example.com").status_code == 200
@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock, patch
+
+from flask import current_app
+
+from core.ops.entities.trace_entity import ModerationTraceInfo
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks.ops_trace_task import process_trace_batch_tasks
+
+
+def _trace_task(app_id: str, query: str) -> MagicMock:
+    task = MagicMock()
+    task.app_id = app_id
+    task.execute.return_value = ModerationTraceInfo(
+        message_id="message-id",
+        metadata={},
+        flagged=False,
+        action="direct_output",
+        preset_response="",
+        query=query,
+    )
+    return task
+
+
+def test_send_batch_to_celery():
+    files: dict[str, bytes] = {}
+    storage = MagicMock()
+    storage.save.side_effect = files.__setitem__
+    # served in small chunks, the batch file is decompressed and split while streaming
+    storage.load_stream.side_effect = lambda path: (files[path][i : i + 16] for i in range(0, len(files[path]), 16))
+
+    trace_instances = {"app-1": MagicMock(), "app-2": MagicMock()}
+
+    manager = TraceQueueManager.__new__(TraceQueueManager)
+    manager.flask_app = current_app._get_current_object()  # type: ignore
+    tasks = [_trace_task("app-1", "a"), _trace_task("app-2", "b"), _trace_task("app-1", "c")]
+
+    with (
+        patch("core.ops.ops_trace_manager.storage", storage),
+        patch("tasks.ops_trace_task.storage", storage),
+        patch("core.ops.ops_trace_manager.process_trace_batch_tasks.delay", process_trace_batch_tasks),
+        patch(
+            "core.ops.ops_trace_manager.OpsTraceManager.get_ops_trace_instance",
+            side_effect=trace_instances.get,
+        ) as get_ops_trace_instance,
+    ):
+        manager.send_batch_to_celery(tasks)
+
+    # one storage object and one task for the whole batch
+    storage.save.assert_called_once()
+    storage.delete.assert_called_once()
+    assert get_ops_trace_instance.call_count == 2
+
+    app_1_queries = [call.args[0].query for call in trace_instances["app-1"].trace.call_args_list]
+    assert app_1_queries == ["a", "c"]
+    assert isinstance(trace_instances["app-2"].trace.call_args.args[0], ModerationTraceInfo)
+    trace_instances["app-1"].flush.assert_called_once()
+    trace_instances["app-2"].flush.assert_called_once()
@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from core.plugin.entities.plugin_daemon import PluginDaemonInnerError
+from core.plugin.impl import http_client
+from core.plugin.impl.base import BasePluginClient
+
+
+@pytest.fixture
+def mock_transport():
+    handled_requests: list[httpx.Request] = []
+
+    def install(handler):
+        def record(request: httpx.Request) -> httpx.Response:
+            handled_requests.append(request)
+            return handler(request)
+
+        client = httpx.Client(transport=httpx.MockTransport(record))
+        return patch("core.plugin.impl.base.get_plugin_daemon_client", return_value=client)
+
+    install.requests = handled_requests
+    return install
+
+
+def test_stream_response_split_across_chunks(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        chunks = [
+            b'data: {"code": 0, "message": "", "data": {"a"',
+            b': 1}}\n\ndata: {"code": 0, "message": "", "data": {"a": 2}}\n',
+            b'{"code": 0, "message": "", "data": {"a": 3}}',
+        ]
+        return httpx.Response(200, content=iter(chunks))
+
+    with mock_transport(handler):
+        results = list(BasePluginClient()._request_with_plugin_daemon_response_stream("POST", "stream", dict))
+
+    assert results == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_stream_response_large_line(mock_transport):
+    payload = "x" * (4 * 1024 * 1024)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        line = f'data: {{"code": 0, "message": "", "data": {{"a": "{payload}"}}}}\n'.encode()
+        # a multi-MB line split into small chunks is joined once
+        return httpx.Response(200, content=(line[start : start + 1024] for start in range(0, len(line), 1024)))
+
+    with mock_transport(handler):
+        results = list(BasePluginClient()._request_with_plugin_daemon_response_stream("POST", "stream", dict))
+
+    assert results == [{"a": payload}]
+
+
+def test_stream_response_error_line(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b'data: {"error": "plugin crashed"}\n')
+
+    with mock_transport(handler), pytest.raises(ValueError, match="plugin crashed"):
+        list(BasePluginClient()._request_with_plugin_daemon_response_stream("POST", "stream", dict))
+
+
+def test_request_params_and_json_body(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"code": 0, "message": "", "data": True})
+
+    with mock_transport(handler):
+        result = BasePluginClient()._request_with_plugin_daemon_response(
+            "POST",
+            "plugin/tenant/management/list",
+            bool,
+            params={"page": 1, "plugin_id": None},
+            data={"key": "value"},
+            headers={"Content-Type": "application/json"},
+        )
+
+    assert result is True
+    request = mock_transport.requests[0]
+    assert dict(request.url.params) == {"page": "1"}
+    assert request.content == b'{"key": "value"}'
+    assert "X-Api-Key" in request.headers
+
+
+def test_request_connection_error(mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with mock_transport(handler), pytest.raises(PluginDaemonInnerError):
+        BasePluginClient()._request("GET", "plugin/tenant/asset/id")
+
+
+def test_pooled_client_is_reused_per_process():
+    http_client.close_plugin_daemon_client()
+    try:
+        client = http_client.get_plugin_daemon_client()
+        assert http_client.get_plugin_daemon_client() is client
+
+        with patch("core.plugin.impl.http_client.os.getpid", return_value=-1):
+            assert http_client.get_plugin_daemon_client() is not client
+
+        assert http_client.get_pool_stats()["connections"] == 0
+    finally:
+        http_client.close_plugin_daemon_client()
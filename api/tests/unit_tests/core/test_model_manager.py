@@ -1,11 +1,13 @@
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 import redis
 
-from core.entities.provider_entities import ModelLoadBalancingConfiguration
-from core.model_manager import LBModelManager
+from core.entities.provider_entities import LoadBalancingStrategy, ModelLoadBalancingConfiguration
+from core.model_manager import _LB_IN_FLIGHT_SCRIPT, LBConfigStatistics, LBModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.errors.invoke import InvokeRateLimitError
 from extensions.ext_redis import redis_client
 
 
@@ -70,3 +72,162 @@ def test_lb_model_manager_fetch_next(mocker, lb_model_manager):
 
         config = lb_model_manager.fetch_next()
         assert config == config3
+
+
+def _lb_model_manager(strategy: LoadBalancingStrategy) -> LBModelManager:
+    return LBModelManager(
+        tenant_id="tenant_id",
+        provider="openai",
+        model_type=ModelType.LLM,
+        model="gpt-4",
+        load_balancing_configs=[
+            ModelLoadBalancingConfiguration(id="id1", name="first", credentials={"openai_api_key": "fake_key"}),
+            ModelLoadBalancingConfiguration(id="id2", name="second", credentials={"openai_api_key": "fake_key"}),
+            ModelLoadBalancingConfiguration(id="id3", name="third", credentials={"openai_api_key": "fake_key"}),
+        ],
+        strategy=strategy,
+    )
+
+
+def test_least_outstanding_fetches_the_least_busy_config():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.LEAST_OUTSTANDING)
+    lb_model_manager.in_cooldown = MagicMock(side_effect=lambda config: config.id == "id3")
+    lb_model_manager.get_statistics = MagicMock(
+        return_value=[LBConfigStatistics(latency=100, in_flight=3), LBConfigStatistics(latency=900, in_flight=1)]
+    )
+
+    for _ in range(10):
+        assert lb_model_manager.fetch_next().id == "id2"
+    # configs in cooldown are skipped without reading their statistics
+    assert [config.id for config in lb_model_manager.get_statistics.call_args.args[0]] == ["id1", "id2"]
+
+
+def test_weights_follow_latency_and_error_rate():
+    weights = LBModelManager._get_weights(
+        [
+            LBConfigStatistics(latency=100),
+            LBConfigStatistics(latency=400),
+            LBConfigStatistics(latency=100, error_rate=0.5),
+            LBConfigStatistics(),
+            LBConfigStatistics(latency=100, error_rate=1),
+        ]
+    )
+
+    assert weights[0] == 4 * weights[1]
+    assert weights[0] == 2 * weights[2]
+    # credentials without latency get the average latency
+    assert weights[3] == pytest.approx(1 / 175)
+    assert weights[4] > 0
+
+
+def test_all_configs_in_cooldown():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.WEIGHTED)
+    lb_model_manager.in_cooldown = MagicMock(return_value=True)
+
+    assert lb_model_manager.fetch_next() is None
+
+
+def test_cooldown_state_is_cached_locally():
+    LBModelManager._cooldowns.clear()
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.ROUND_ROBIN)
+    config1, config2 = lb_model_manager._load_balancing_configs[:2]
+
+    with (
+        patch.object(redis_client, "pttl", return_value=-2) as pttl,
+        patch.object(redis_client, "setex", return_value=None),
+    ):
+        assert lb_model_manager.in_cooldown(config1) is False
+        assert lb_model_manager.in_cooldown(config1) is False
+        pttl.assert_called_once()
+
+        lb_model_manager.cooldown(config1, expire=60)
+        assert lb_model_manager.in_cooldown(config1) is True
+
+        pttl.return_value = 30000
+        assert lb_model_manager.in_cooldown(config2) is True
+        assert pttl.call_count == 2
+    LBModelManager._cooldowns.clear()
+
+
+def test_round_robin_does_not_record_invocations():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.ROUND_ROBIN)
+
+    with patch.object(redis_client, "pipeline") as pipeline, patch.object(redis_client, "register_script") as script:
+        invocation_id = lb_model_manager.start_invocation(lb_model_manager._load_balancing_configs[0])
+        lb_model_manager.end_invocation(lb_model_manager._load_balancing_configs[0], invocation_id, latency=1)
+
+    assert invocation_id is None
+    pipeline.assert_not_called()
+    script.assert_not_called()
+
+
+def test_get_statistics_counts_live_invocations():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.LEAST_OUTSTANDING)
+    configs = lb_model_manager._load_balancing_configs[:2]
+
+    with patch.object(redis_client, "pipeline") as pipeline:
+        pipeline.return_value.execute.return_value = [[b"120.5", b"0.25"], 2, [None, None], 0]
+        statistics = lb_model_manager.get_statistics(configs)
+
+    assert statistics == [
+        LBConfigStatistics(latency=120.5, error_rate=0.25, in_flight=2),
+        LBConfigStatistics(latency=None, error_rate=0.0, in_flight=0),
+    ]
+    # invocations older than the max alive time are dropped before counting
+    pipeline.return_value.eval.assert_any_call(
+        _LB_IN_FLIGHT_SCRIPT,
+        1,
+        "model_lb_in_flight:tenant_id:openai:llm:gpt-4:id1",
+        LBModelManager._INVOCATION_MAX_ALIVE_TIME,
+    )
+
+
+def test_end_invocation_without_outcome_keeps_statistics():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.WEIGHTED)
+    config = lb_model_manager._load_balancing_configs[0]
+
+    with (
+        patch.object(LBModelManager, "_start_invocation_script", MagicMock()),
+        patch.object(LBModelManager, "_statistics_script", MagicMock()) as statistics_script,
+        patch.object(redis_client, "zrem") as zrem,
+    ):
+        invocation_id = lb_model_manager.start_invocation(config)
+        lb_model_manager.end_invocation(config, invocation_id)
+        zrem.assert_called_once_with("model_lb_in_flight:tenant_id:openai:llm:gpt-4:id1", invocation_id)
+        statistics_script.assert_not_called()
+
+        lb_model_manager.end_invocation(config, invocation_id, failed=True)
+        assert statistics_script.call_args.kwargs["args"][1:3] == [1, -1]
+
+
+def test_stream_is_recorded_once_consumed():
+    lb_model_manager = _lb_model_manager(LoadBalancingStrategy.WEIGHTED)
+    lb_model_manager.end_invocation = MagicMock()
+    config = lb_model_manager._load_balancing_configs[0]
+
+    stream = lb_model_manager.track_stream(config, "invocation-1", _iter_chunks(["a", "b"]), time.perf_counter())
+    assert next(stream) == "a"
+    lb_model_manager.end_invocation.assert_not_called()
+    assert list(stream) == ["b"]
+    assert lb_model_manager.end_invocation.call_args.kwargs["latency"] >= 0
+    assert lb_model_manager.end_invocation.call_args.kwargs["failed"] is False
+
+    stream = lb_model_manager.track_stream(
+        config, "invocation-2", _iter_chunks(["a"], InvokeRateLimitError("limited")), 0
+    )
+    with pytest.raises(InvokeRateLimitError):
+        list(stream)
+    assert lb_model_manager.end_invocation.call_args.kwargs == {"latency": None, "failed": True}
+
+    # the outcome of an abandoned stream is unknown, the invocation is only ended
+    stream = lb_model_manager.track_stream(config, "invocation-3", _iter_chunks(["a", "b"]), 0)
+    assert next(stream) == "a"
+    stream.close()
+    assert lb_model_manager.end_invocation.call_args.args == (config, "invocation-3")
+    assert lb_model_manager.end_invocation.call_args.kwargs == {"latency": None, "failed": None}
+
+
+def _iter_chunks(chunks, error=None):
+    yield from chunks
+    if error:
+        raise error
@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.tools.__base.tool import Tool
+from core.tools.__base.tool_runtime import ToolRuntime
+from core.tools.entities.tool_entities import ToolInvokeFrom, ToolProviderType
+from core.tools.tool_runtime_cache import ToolRuntimeCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, int] = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    with patch("core.tools.tool_runtime_cache.redis_client", _FakeRedis()) as redis:
+        yield redis
+
+
+def _resolved_tool() -> MagicMock:
+    tool = MagicMock(spec=Tool)
+    tool.runtime = ToolRuntime(tenant_id="tenant1", credentials={"api_key": "secret"})
+    tool.fork_tool_runtime.side_effect = lambda runtime: MagicMock(spec=Tool, runtime=runtime)
+    return tool
+
+
+def _runtime() -> ToolRuntime:
+    return ToolRuntime(tenant_id="tenant1", invoke_from=InvokeFrom.WEB_APP, tool_invoke_from=ToolInvokeFrom.AGENT)
+
+
+def _get(cache: ToolRuntimeCache, resolve, tenant_id: str = "tenant1", tool_name: str = "search"):
+    return cache.get(
+        tenant_id=tenant_id,
+        provider_type=ToolProviderType.BUILT_IN,
+        provider_id="provider",
+        tool_name=tool_name,
+        runtime=_runtime(),
+        resolve=resolve,
+    )
+
+
+def test_get_resolves_once_and_forks_runtime():
+    cache = ToolRuntimeCache(ttl=300, max_size=16)
+    resolve = MagicMock(return_value=_resolved_tool())
+
+    first = _get(cache, resolve)
+    second = _get(cache, resolve)
+
+    resolve.assert_called_once()
+    assert first.runtime is not second.runtime
+    assert first.runtime.credentials == {"api_key": "secret"}
+    assert first.runtime.invoke_from == InvokeFrom.WEB_APP
+    # a caller updating the runtime of its tool does not change the cached credentials
+    first.runtime.credentials["api_key"] = "changed"
+    assert second.runtime.credentials == {"api_key": "secret"}
+    assert _get(cache, resolve).runtime.credentials == {"api_key": "secret"}
+
+
+def test_get_is_scoped_by_tenant_and_tool():
+    cache = ToolRuntimeCache(ttl=300, max_size=16)
+    resolve = MagicMock(side_effect=lambda: _resolved_tool())
+
+    _get(cache, resolve)
+    _get(cache, resolve, tenant_id="tenant2")
+    _get(cache, resolve, tool_name="other")
+
+    assert resolve.call_count == 3
+
+
+def test_invalidate_tenant():
+    cache = ToolRuntimeCache(ttl=300, max_size=16)
+    resolve = MagicMock(side_effect=lambda: _resolved_tool())
+
+    _get(cache, resolve)
+    _get(cache, resolve, tenant_id="tenant2")
+    cache.invalidate("tenant1")
+    _get(cache, resolve)
+    _get(cache, resolve, tenant_id="tenant2")
+
+    assert resolve.call_count == 3
+
+
+def test_disabled_cache_always_resolves(fake_redis):
+    cache = ToolRuntimeCache(ttl=0, max_size=16)
+    resolve = MagicMock(side_effect=lambda: _resolved_tool())
+
+    _get(cache, resolve)
+    _get(cache, resolve)
+    cache.invalidate("tenant1")
+
+    assert resolve.call_count == 2
+    assert fake_redis.data == {}
@@ -0,0 +1,119 @@
+import json
+from unittest import mock
+
+import pytest
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.graph_engine import GraphInitParams, GraphRuntimeState
+from core.workflow.graph_engine.graph_cache import GraphCache
+from core.workflow.nodes.llm import llm_utils
+from core.workflow.nodes.llm.node import LLMNode
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+GRAPH = json.dumps(
+    {
+        "edges": [
+            {"id": "start-source-answer-target", "source": "start", "target": "answer"},
+        ],
+        "nodes": [
+            {"data": {"type": "start", "title": "start", "variables": []}, "id": "start"},
+            {"data": {"type": "answer", "title": "answer", "answer": "{{#sys.query#}}"}, "id": "answer"},
+        ],
+    }
+)
+
+
+def test_get_reuses_compiled_graph_of_same_version():
+    graph_cache = GraphCache(max_size=2)
+
+    compiled_graph = graph_cache.get("workflow-1", GRAPH)
+
+    assert graph_cache.get("workflow-1", GRAPH) is compiled_graph
+    assert compiled_graph.graph.root_node_id == "start"
+    assert compiled_graph.graph.node_ids == ["start", "answer"]
+    assert compiled_graph.graph_config["nodes"][1]["id"] == "answer"
+
+
+def test_get_recompiles_updated_graph():
+    graph_cache = GraphCache(max_size=2)
+    compiled_graph = graph_cache.get("workflow-1", GRAPH)
+
+    updated_graph = json.loads(GRAPH)
+    updated_graph["nodes"][1]["data"]["answer"] = "updated"
+
+    assert graph_cache.get("workflow-1", json.dumps(updated_graph)) is not compiled_graph
+
+
+def test_get_evicts_least_recently_used():
+    graph_cache = GraphCache(max_size=1)
+    compiled_graph = graph_cache.get("workflow-1", GRAPH)
+    graph_cache.get("workflow-2", GRAPH)
+
+    assert graph_cache.get("workflow-1", GRAPH) is not compiled_graph
+
+
+def test_disabled_cache_always_compiles():
+    graph_cache = GraphCache(max_size=0)
+
+    assert graph_cache.get("workflow-1", GRAPH) is not graph_cache.get("workflow-1", GRAPH)
+
+
+def test_compile_rejects_invalid_graph():
+    with pytest.raises(ValueError, match="nodes or edges not found in workflow graph"):
+        GraphCache.compile(json.dumps({"nodes": []}))
+
+
+def test_cached_graph_is_not_changed_by_runs():
+    llm_graph = json.loads(GRAPH)
+    llm_graph["nodes"][1] = {
+        "data": {
+            "type": "llm",
+            "title": "llm",
+            "model": {
+                "provider": "openai",
+                "name": "gpt-4o",
+                "mode": "chat",
+                "completion_params": {"stop": ["\n"], "temperature": 0.1},
+            },
+            "prompt_template": [],
+            "context": {"enabled": False},
+        },
+        "id": "answer",
+    }
+    graph_cache = GraphCache(max_size=1)
+
+    stops = []
+    for _ in range(2):
+        compiled_graph = graph_cache.get("workflow-1", json.dumps(llm_graph))
+        node = LLMNode(
+            id="answer",
+            config=compiled_graph.graph.node_id_config_mapping["answer"],
+            graph_init_params=GraphInitParams(
+                tenant_id="1",
+                app_id="1",
+                workflow_type=WorkflowType.WORKFLOW,
+                workflow_id="workflow-1",
+                graph_config=compiled_graph.graph_config,
+                user_id="1",
+                user_from=UserFrom.ACCOUNT,
+                invoke_from=InvokeFrom.SERVICE_API,
+                call_depth=0,
+            ),
+            graph=compiled_graph.graph,
+            graph_runtime_state=GraphRuntimeState(
+                variable_pool=VariablePool(system_variables={}, user_inputs={}), start_at=0
+            ),
+            llm_file_saver=mock.MagicMock(),
+        )
+        with (
+            mock.patch.object(llm_utils, "ModelManager"),
+            mock.patch.object(llm_utils, "ModelConfigWithCredentialsEntity", side_effect=dict),
+        ):
+            _, model_config = llm_utils.fetch_model_config(tenant_id="1", node_data_model=node.node_data.model)
+        stops.append(model_config["stop"])
+
+    assert stops == [["\n"], ["\n"]]
+    node_config = compiled_graph.graph.node_id_config_mapping["answer"]
+    assert node_config["data"]["model"]["completion_params"] == {"stop": ["\n"], "temperature": 0.1}
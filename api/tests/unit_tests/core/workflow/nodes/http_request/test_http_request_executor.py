@@ -1,3 +1,10 @@
+import gzip
+
+import httpx
+import pytest
+
+from configs import dify_config
+from core.helper import ssrf_proxy
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.nodes.http_request import (
     BodyData,
@@ -6,6 +13,7 @@ from core.workflow.nodes.http_request import (
     HttpRequestNodeData,
 )
 from core.workflow.nodes.http_request.entities import HttpRequestNodeTimeout
+from core.workflow.nodes.http_request.exc import ResponseSizeError
 from core.workflow.nodes.http_request.executor import Executor
 
 
@@ -336,3 +344,82 @@ def test_init_params():
     executor = create_executor("key1:value1\n\nkey2:value2\n\n")
     executor._init_params()
     assert executor.params == [("key1", "value1"), ("key2", "value2")]
+
+
+def _create_streaming_executor(monkeypatch, handler) -> Executor:
+    monkeypatch.setattr(dify_config, "HTTP_REQUEST_NODE_STREAMING_ENABLED", True)
+    monkeypatch.setattr(dify_config, "HTTP_REQUEST_NODE_STREAMING_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(dify_config, "HTTP_REQUEST_NODE_MAX_TEXT_SIZE", 16 * 1024)
+    monkeypatch.setattr(dify_config, "HTTP_REQUEST_NODE_MAX_BINARY_SIZE", 64 * 1024)
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ssrf_proxy, "get_client", lambda *args, **kwargs: client)
+
+    node_data = HttpRequestNodeData(
+        title="test",
+        method="get",
+        url="http://example.com",
+        headers="",
+        params="",
+        authorization=HttpRequestNodeAuthorization(type="no-auth"),
+    )
+    timeout = HttpRequestNodeTimeout(connect=10, read=30, write=30)
+    return Executor(node_data=node_data, timeout=timeout, variable_pool=VariablePool(), max_retries=0)
+
+
+def test_streaming_response_is_decoded(monkeypatch):
+    text = '{"message": "hello"}' * 100
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json", "content-encoding": "gzip"},
+            content=gzip.compress(text.encode()),
+        )
+
+    response = _create_streaming_executor(monkeypatch, handler).invoke()
+    assert not response.is_file
+    assert response.size == len(text)
+    assert response.text == text
+    response.close()
+
+
+def test_streaming_response_over_size_limit_stops_reading(monkeypatch):
+    read_chunks = 0
+
+    def body():
+        nonlocal read_chunks
+        for _ in range(1024):
+            read_chunks += 1
+            yield b"a" * 1024
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/plain"}, content=body())
+
+    with pytest.raises(ResponseSizeError):
+        _create_streaming_executor(monkeypatch, handler).invoke()
+    # the text limit is 16 KB, reading stops right after it is exceeded
+    assert read_chunks == 17
+
+
+def test_streaming_response_over_content_length_is_rejected(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "application/pdf", "content-length": str(1024 * 1024)})
+
+    with pytest.raises(ResponseSizeError, match="content length"):
+        _create_streaming_executor(monkeypatch, handler).invoke()
+
+
+def test_streaming_file_response_is_spooled(monkeypatch):
+    content = bytes([0x00, 0xFF]) * 16 * 1024
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "application/pdf"}, content=iter([content]))
+
+    response = _create_streaming_executor(monkeypatch, handler).invoke()
+    assert response.is_file
+    assert response.body is not None
+    # over the max text size, the body has rolled over to disk
+    assert response.body._rolled  # type: ignore[attr-defined]
+    assert response.size == len(content)
+    assert response.content == content
+    response.close()
@@ -7,6 +7,7 @@ from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.event import IterationRunNextEvent
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
@@ -859,3 +860,121 @@ def test_iteration_run_error_handle():
             assert item.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
             assert item.run_result.outputs == {"output": []}
     assert count == 14
+
+
+def test_run_parallel_in_bounded_window():
+    graph_config = {
+        "edges": [
+            {
+                "id": "start-source-iteration-1-target",
+                "source": "start",
+                "target": "iteration-1",
+            },
+            {
+                "id": "iteration-start-source-tt-target",
+                "source": "iteration-start",
+                "target": "tt",
+            },
+        ],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {
+                "data": {
+                    "iterator_selector": ["start", "items"],
+                    "output_selector": ["tt", "output"],
+                    "output_type": "array[string]",
+                    "start_node_id": "iteration-start",
+                    "title": "iteration",
+                    "type": "iteration",
+                },
+                "id": "iteration-1",
+            },
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "title": "iteration-start",
+                    "type": "iteration-start",
+                },
+                "id": "iteration-start",
+            },
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "template": "{{ arg1 }}",
+                    "title": "template transform",
+                    "type": "template-transform",
+                    "variables": [{"value_selector": ["iteration-1", "item"], "variable": "arg1"}],
+                },
+                "id": "tt",
+            },
+        ],
+    }
+
+    graph = Graph.init(graph_config=graph_config)
+
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+
+    pool = VariablePool(
+        system_variables={SystemVariableKey.FILES: [], SystemVariableKey.USER_ID: "1"},
+        user_inputs={},
+        environment_variables=[],
+    )
+    items = [f"item-{i}" for i in range(150)]
+    pool.add(["start", "items"], items)
+
+    iteration_node = IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=init_params,
+        graph=graph,
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config={
+            "data": {
+                "iterator_selector": ["start", "items"],
+                "output_selector": ["tt", "output"],
+                "output_type": "array[string]",
+                "start_node_id": "iteration-start",
+                "title": "iteration",
+                "type": "iteration",
+                "is_parallel": True,
+                "parallel_nums": 4,
+            },
+            "id": "iteration-1",
+        },
+    )
+
+    def tt_generator(self):
+        item = self.graph_runtime_state.variable_pool.get(["iteration-1", "item"]).value
+        # finish the items out of order
+        time.sleep(0.005 * (int(item.split("-")[1]) % 3))
+        return NodeRunResult(
+            status=WorkflowNodeExecutionStatus.SUCCEEDED,
+            inputs={"arg1": item},
+            outputs={"output": f"{item} done"},
+        )
+
+    with (
+        patch.object(TemplateTransformNode, "_run", new=tt_generator),
+        patch.multiple(
+            "core.workflow.nodes.iteration.iteration_node.dify_config",
+            WORKFLOW_ITERATION_PARALLEL_WINDOW_SIZE=8,
+        ),
+    ):
+        events = list(iteration_node._run())
+
+    next_indexes = [event.index for event in events if isinstance(event, IterationRunNextEvent)]
+    assert next_indexes == list(range(len(items) + 1))
+
+    completed_events = [event for event in events if isinstance(event, RunCompletedEvent)]
+    assert len(completed_events) == 1
+    assert completed_events[0].run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert completed_events[0].run_result.outputs == {"output": [f"{item} done" for item in items]}
@@ -0,0 +1,28 @@
+import pytest
+
+from core.workflow.nodes.iteration.output_buffer import IterationOutputBuffer
+
+
+def test_outputs_are_committed_in_order():
+    buffer = IterationOutputBuffer(4)
+
+    buffer[2] = "c"
+    buffer[1] = "b"
+    assert buffer.committed_count == 0
+    assert buffer.pending_count == 2
+
+    buffer[0] = "a"
+    assert buffer.committed_count == 3
+    assert buffer.pending_count == 0
+
+    assert buffer.to_list() == ["a", "b", "c", None]
+
+
+def test_committed_output_can_be_overwritten():
+    buffer = IterationOutputBuffer(3)
+    buffer[0] = "a"
+    buffer[0] = "b"
+
+    assert buffer.to_list() == ["b", None, None]
+    with pytest.raises(IndexError):
+        buffer[3] = "d"
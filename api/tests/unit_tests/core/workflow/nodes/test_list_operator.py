@@ -3,7 +3,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from core.file import File, FileTransferMethod, FileType
-from core.variables import ArrayFileSegment
+from core.variables import ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.nodes.list_operator.entities import (
     ExtractConfig,
@@ -166,3 +166,77 @@ def test_get_file_extract_string_func():
     # Test invalid key
     with pytest.raises(InvalidKeyError):
         _get_file_extract_string_func(key="invalid_key")
+
+
+def _create_node(filter_by: FilterBy, order_by: OrderBy) -> ListOperatorNode:
+    node_data = ListOperatorNodeData(
+        title="Test Title",
+        variable=["test_variable"],
+        filter_by=filter_by,
+        order_by=order_by,
+        limit=Limit(enabled=False),
+    )
+    node = ListOperatorNode(
+        id="test_node_id",
+        config={"id": "test_node_id", "data": node_data.model_dump()},
+        graph_init_params=MagicMock(),
+        graph=MagicMock(),
+        graph_runtime_state=MagicMock(),
+    )
+    node.graph_runtime_state = MagicMock()
+    node.graph_runtime_state.variable_pool.convert_template.side_effect = lambda template: MagicMock(text=template)
+    return node
+
+
+def test_filter_strings_with_multiple_conditions():
+    node = _create_node(
+        FilterBy(
+            enabled=True,
+            conditions=[
+                FilterCondition(comparison_operator="start with", value="item"),
+                FilterCondition(comparison_operator="is not", value="item-2"),
+            ],
+        ),
+        OrderBy(enabled=True, value="desc"),
+    )
+    node.graph_runtime_state.variable_pool.get.return_value = ArrayStringSegment(
+        value=["item-1", "other", "item-2", "item-3"]
+    )
+
+    result = node._run()
+
+    assert result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert result.outputs["result"] == ["item-3", "item-1"]
+
+
+def test_filter_100k_strings_benchmark(benchmark):
+    node = _create_node(
+        FilterBy(enabled=True, conditions=[FilterCondition(comparison_operator="contains", value="7")]),
+        OrderBy(enabled=False),
+    )
+    variable = ArrayStringSegment(value=[f"item-{i}" for i in range(100_000)])
+
+    result = benchmark(node._apply_filter, variable)
+
+    assert len(result.value) == sum("7" in f"item-{i}" for i in range(100_000))
+
+
+def test_filter_and_order_100k_numbers_benchmark(benchmark):
+    node = _create_node(
+        FilterBy(
+            enabled=True,
+            conditions=[
+                FilterCondition(comparison_operator="≥", value="1000"),
+                FilterCondition(comparison_operator="<", value="90000"),
+            ],
+        ),
+        OrderBy(enabled=True, value="desc"),
+    )
+    variable = ArrayNumberSegment(value=[(i * 7919) % 100_000 for i in range(100_000)])
+
+    def filter_and_order():
+        return node._apply_order(node._apply_filter(variable))
+
+    result = benchmark(filter_and_order)
+
+    assert result.value == list(range(89_999, 999, -1))
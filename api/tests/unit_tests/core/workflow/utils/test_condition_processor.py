@@ -0,0 +1,56 @@
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.utils.condition.entities import Condition
+from core.workflow.utils.condition.processor import CompiledConditions, ConditionProcessor
+
+
+def _variable_pool() -> VariablePool:
+    variable_pool = VariablePool(system_variables={}, user_inputs={}, environment_variables=[])
+    variable_pool.add(["start", "name"], "dify")
+    variable_pool.add(["start", "count"], 3)
+    variable_pool.add(["start", "expected"], "dify")
+    return variable_pool
+
+
+def test_compiled_conditions_match_processor():
+    conditions = [
+        Condition(variable_selector=["start", "name"], comparison_operator="is", value="{{#start.expected#}}"),
+        Condition(variable_selector=["start", "count"], comparison_operator="≥", value="2"),
+        Condition(variable_selector=["start", "name"], comparison_operator="start with", value="di"),
+    ]
+    variable_pool = _variable_pool()
+
+    compiled = CompiledConditions(conditions=conditions, operator="and")
+
+    assert compiled.evaluate(variable_pool) == ConditionProcessor().process_conditions(
+        variable_pool=variable_pool, conditions=conditions, operator="and"
+    )
+    input_conditions, group_results, final_result = compiled.evaluate(variable_pool)
+    assert input_conditions[0]["expected_value"] == "dify"
+    assert group_results == [True, True, True]
+    assert final_result is True
+
+
+def test_compiled_conditions_are_reusable_across_pool_updates():
+    conditions = [
+        Condition(variable_selector=["start", "count"], comparison_operator=">", value="{{#start.limit#}}"),
+    ]
+    variable_pool = _variable_pool()
+    compiled = CompiledConditions(conditions=conditions, operator="or")
+
+    for limit, expected in [(1, True), (5, False), (2, True)]:
+        variable_pool.add(["start", "limit"], limit)
+        assert compiled.evaluate(variable_pool)[2] is expected
+
+
+def test_compiled_conditions_short_circuit():
+    conditions = [
+        Condition(variable_selector=["start", "name"], comparison_operator="is", value="other"),
+        Condition(variable_selector=["start", "missing"], comparison_operator="is", value="dify"),
+    ]
+
+    _, group_results, final_result = CompiledConditions(conditions=conditions, operator="and").evaluate(
+        _variable_pool()
+    )
+
+    assert group_results == [False]
+    assert final_result is False
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import DateTime, String, create_engine, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from libs.infinite_scroll_pagination import paginate_by_keyset
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Item(_Base):
+    __tablename__ = "items"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    group: Mapped[str] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    _Base.metadata.create_all(engine)
+    now = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        # items 0 to 9, items 4 to 6 share the same creation time
+        session.add_all(
+            _Item(id=f"item-{i}", group="a", created_at=now + timedelta(minutes=4 if 4 <= i <= 6 else i))
+            for i in range(10)
+        )
+        session.add(_Item(id="other", group="b", created_at=now))
+        session.commit()
+        yield session
+
+
+def _pages(session: Session, limit: int, descending: bool = True) -> list[list[str]]:
+    stmt = select(_Item).where(_Item.group == "a")
+    pages = []
+    anchor_id = None
+    while True:
+        pagination = paginate_by_keyset(
+            session, stmt, keys=(_Item.created_at, _Item.id), limit=limit, descending=descending, anchor_id=anchor_id
+        )
+        assert pagination is not None
+        pages.append([item.id for item in pagination.data])
+        if not pagination.has_more:
+            return pages
+        anchor_id = pagination.data[-1].id
+
+
+def test_paginate_by_keyset_descending(session):
+    pages = _pages(session, limit=3)
+
+    assert pages == [
+        ["item-9", "item-8", "item-7"],
+        ["item-6", "item-5", "item-4"],
+        ["item-3", "item-2", "item-1"],
+        ["item-0"],
+    ]
+
+
+def test_paginate_by_keyset_does_not_skip_ties(session):
+    pages = _pages(session, limit=2, descending=False)
+
+    assert [item_id for page in pages for item_id in page] == [f"item-{i}" for i in range(10)]
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 2]
+
+
+def test_paginate_by_keyset_unknown_anchor(session):
+    stmt = select(_Item).where(_Item.group == "a")
+
+    assert paginate_by_keyset(session, stmt, keys=(_Item.created_at, _Item.id), limit=3, anchor_id="missing") is None
+    # a row filtered out by the statement is not an anchor
+    assert paginate_by_keyset(session, stmt, keys=(_Item.created_at, _Item.id), limit=3, anchor_id="other") is None
+
+
+def test_paginate_by_keyset_last_page(session):
+    stmt = select(_Item).where(_Item.group == "a")
+
+    pagination = paginate_by_keyset(session, stmt, keys=(_Item.created_at, _Item.id), limit=3, anchor_id="item-0")
+
+    assert pagination is not None
+    assert pagination.data == []
+    assert pagination.has_more is False
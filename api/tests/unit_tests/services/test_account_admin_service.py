@@ -0,0 +1,82 @@
+from datetime import UTC, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.account_admin_service import AccountAdminService
+from services.entities.account_entities import AccountAdminUpdate
+
+ACCOUNT_ID = "5b2c7d1e-8f4a-4e3b-9c6d-0a1b2c3d4e5f"
+
+
+def _compile(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_get_fields():
+    assert AccountAdminService.get_fields(None) == list(AccountAdminService.LISTED_FIELDS)
+    assert AccountAdminService.get_fields(["plan_expiration", "email"]) == ["id", "email", "plan_expiration"]
+    with pytest.raises(ValueError, match="password"):
+        AccountAdminService.get_fields(["email", "password"])
+
+
+def test_paginate_loads_only_requested_fields():
+    session = MagicMock()
+    session.scalars.return_value.all.return_value = []
+
+    AccountAdminService.paginate(session, limit=50, fields=["id", "email"], email="example.com", plan_id="basic")
+
+    sql = str(_compile(session.scalars.call_args.args[0]))
+    assert sql.startswith("SELECT accounts.id, accounts.email \nFROM accounts")
+    assert "accounts.email ILIKE" in sql
+    assert "accounts.id_custom_plan =" in sql
+    assert "ORDER BY accounts.created_at ASC, accounts.id ASC" in sql
+
+
+def test_bulk_update_runs_a_single_statement():
+    session = MagicMock()
+    session.scalars.return_value.all.return_value = [ACCOUNT_ID]
+    accounts = [
+        AccountAdminUpdate(
+            id=ACCOUNT_ID,
+            status="active",
+            id_custom_plan=None,
+            plan_expiration=datetime(2025, 1, 1, 7, tzinfo=timezone(timedelta(hours=7))),
+            month_before_banned=3,
+            max_of_apps=10,
+            max_vector_space=200,
+            max_annotation_quota_limit=10,
+            max_documents_upload_quota=50,
+        ),
+        AccountAdminUpdate(
+            id="6c3d8e2f-9a5b-4f4c-8d7e-1b2c3d4e5f60",
+            status="banned",
+            id_custom_plan="basic",
+            plan_expiration=datetime(2025, 2, 1, tzinfo=UTC),
+            month_before_banned=3,
+            max_of_apps=10,
+            max_vector_space=200,
+            max_annotation_quota_limit=10,
+            max_documents_upload_quota=50,
+        ),
+    ]
+
+    assert AccountAdminService.bulk_update(session, accounts) == [ACCOUNT_ID]
+
+    session.scalars.assert_called_once()
+    compiled = _compile(session.scalars.call_args.args[0])
+    sql = str(compiled)
+    assert sql.startswith("UPDATE accounts SET")
+    assert "FROM (VALUES" in sql
+    assert "WHERE accounts.id = CAST(account_updates.id AS UUID) RETURNING accounts.id" in sql
+    # aware times are stored as naive UTC times
+    assert "2025-01-01T00:00:00" in compiled.params.values()
+    assert "banned" in compiled.params.values()
+
+
+def test_bulk_update_without_accounts():
+    session = MagicMock()
+
+    assert AccountAdminService.bulk_update(session, []) == []
+    session.scalars.assert_not_called()
@@ -0,0 +1,155 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis.exceptions import ResponseError
+from sqlalchemy.dialects import postgresql
+
+from models.model import ApiToken
+from services.api_token_cache import ApiTokenCache
+
+TOKEN_ID = "5b2c7d1e-8f4a-4e3b-9c6d-0a1b2c3d4e5f"
+
+
+@pytest.fixture
+def redis_client():
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    with patch("services.api_token_cache.redis_client", redis_client):
+        yield redis_client
+
+
+@pytest.fixture
+def database_token():
+    token = ApiToken(
+        id=TOKEN_ID,
+        app_id="app-1",
+        tenant_id="tenant-1",
+        type="app",
+        token="app-secret",
+        last_used_at=None,
+        created_at=datetime(2025, 1, 1),
+    )
+    with patch("services.api_token_cache.Session") as session_class, patch("services.api_token_cache.db"):
+        session = session_class.return_value.__enter__.return_value
+        session.scalar.return_value = token
+        yield session
+
+
+def test_token_is_cached_in_redis_and_locally(redis_client, database_token):
+    cache = ApiTokenCache(ttl=600, local_ttl=5, max_size=10)
+
+    token = cache.get("app", "app-secret")
+    assert token.id == TOKEN_ID
+    assert token.created_at == datetime(2025, 1, 1)
+    key, ttl, data = redis_client.setex.call_args.args
+    assert key.startswith("api_token:app:")
+    assert "app-secret" not in key
+    assert "app-secret" not in data
+    assert ttl == 600
+
+    assert cache.get("app", "app-secret").app_id == "app-1"
+    database_token.scalar.assert_called_once()
+    redis_client.get.assert_called_once()
+
+    # another process reads the token from Redis
+    redis_client.get.return_value = data
+    token = ApiTokenCache(ttl=600, local_ttl=5, max_size=10).get("app", "app-secret")
+    assert token.created_at == datetime(2025, 1, 1)
+    assert token.token == "app-secret"
+    database_token.scalar.assert_called_once()
+
+
+def test_unknown_token_is_not_cached(redis_client, database_token):
+    database_token.scalar.return_value = None
+    cache = ApiTokenCache(ttl=600, local_ttl=5, max_size=10)
+
+    assert cache.get("app", "unknown") is None
+    redis_client.setex.assert_not_called()
+
+
+def test_invalidate_removes_the_token(redis_client, database_token):
+    cache = ApiTokenCache(ttl=600, local_ttl=5, max_size=10)
+    cache.get("app", "app-secret")
+
+    cache.invalidate("app", "app-secret")
+
+    redis_client.delete.assert_called_once_with(redis_client.setex.call_args.args[0])
+    database_token.scalar.return_value = None
+    assert cache.get("app", "app-secret") is None
+
+
+def test_usage_is_pushed_to_redis_in_batches(redis_client):
+    cache = ApiTokenCache(ttl=600, local_ttl=5, max_size=10, usage_buffer_seconds=60)
+
+    cache.record_usage(TOKEN_ID)
+    cache.record_usage("6c3d8e2f-9a5b-4f4c-8d7e-1b2c3d4e5f60")
+    redis_client.hset.assert_not_called()
+
+    cache._usage_buffer_seconds = 0
+    cache.record_usage(TOKEN_ID)
+    mapping = redis_client.hset.call_args.kwargs["mapping"]
+    assert set(mapping) == {TOKEN_ID, "6c3d8e2f-9a5b-4f4c-8d7e-1b2c3d4e5f60"}
+
+
+def test_flush_last_used_runs_batched_updates(redis_client):
+    redis_client.exists.side_effect = lambda key: key == "api_token_last_used"
+    redis_client.renamenx.return_value = True
+    redis_client.hgetall.return_value = {TOKEN_ID.encode(): b"2025-01-01T00:00:00"}
+    session = MagicMock()
+
+    assert ApiTokenCache(ttl=600, local_ttl=5, max_size=10).flush_last_used(session) == 1
+
+    redis_client.renamenx.assert_called_once_with("api_token_last_used", "api_token_last_used:flushing")
+    compiled = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith(
+        "UPDATE api_tokens SET last_used_at=CAST(token_usages.last_used_at AS TIMESTAMP WITHOUT TIME ZONE)"
+    )
+    assert "FROM (VALUES" in sql
+    assert "api_tokens.last_used_at IS NULL OR api_tokens.last_used_at <" in sql
+    assert "2025-01-01T00:00:00" in compiled.params.values()
+    session.commit.assert_called_once()
+    redis_client.delete.assert_called_once_with("api_token_last_used:flushing")
+
+
+def test_flush_last_used_without_usage(redis_client):
+    redis_client.exists.return_value = False
+    session = MagicMock()
+
+    assert ApiTokenCache(ttl=600, local_ttl=5, max_size=10).flush_last_used(session) == 0
+    session.execute.assert_not_called()
+
+
+def test_flush_last_used_flushes_leftover_of_failed_flush(redis_client):
+    redis_client.exists.return_value = True
+    redis_client.renamenx.return_value = True
+    redis_client.hgetall.side_effect = [
+        {TOKEN_ID.encode(): b"2025-01-01T00:00:00"},
+        {TOKEN_ID.encode(): b"2025-01-02T00:00:00"},
+    ]
+    session = MagicMock()
+
+    assert ApiTokenCache(ttl=600, local_ttl=5, max_size=10).flush_last_used(session) == 2
+
+    # the leftover hash is flushed and deleted before the new uses are renamed over it
+    assert [call[0] for call in redis_client.method_calls if call[0] in ("delete", "renamenx")] == [
+        "delete",
+        "renamenx",
+        "delete",
+    ]
+    assert session.commit.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "renamenx", [MagicMock(return_value=False), MagicMock(side_effect=ResponseError("no such key"))]
+)
+def test_flush_last_used_skips_running_flush(redis_client, renamenx):
+    redis_client.exists.side_effect = lambda key: key == "api_token_last_used"
+    redis_client.renamenx = renamenx
+    session = MagicMock()
+
+    assert ApiTokenCache(ttl=600, local_ttl=5, max_size=10).flush_last_used(session) == 0
+    redis_client.hgetall.assert_not_called()
+    redis_client.delete.assert_not_called()
+    session.execute.assert_not_called()
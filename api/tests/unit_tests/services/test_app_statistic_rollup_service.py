@@ -0,0 +1,114 @@
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from models.statistic import StatisticRollupWatermark
+from services.app_statistic_rollup_service import (
+    AppStatisticRollupService,
+    ceil_hour,
+    floor_hour,
+    has_whole_hour_offsets,
+)
+
+
+def _session_with_watermark(rolled_from: datetime, rolled_until: datetime) -> MagicMock:
+    session = MagicMock()
+    session.get.return_value = StatisticRollupWatermark(
+        name=AppStatisticRollupService.watermark_name, rolled_from=rolled_from, rolled_until=rolled_until
+    )
+    return session
+
+
+@pytest.fixture
+def rollup_enabled():
+    with patch("services.app_statistic_rollup_service.dify_config") as config:
+        config.APP_STATISTIC_ROLLUP_ENABLED = True
+        yield config
+
+
+def test_floor_and_ceil_hour():
+    assert floor_hour(datetime(2025, 1, 1, 10, 30, 5)) == datetime(2025, 1, 1, 10)
+    assert ceil_hour(datetime(2025, 1, 1, 10, 30, 5)) == datetime(2025, 1, 1, 11)
+    assert ceil_hour(datetime(2025, 1, 1, 10)) == datetime(2025, 1, 1, 10)
+
+
+@pytest.mark.parametrize(
+    ("timezone", "expected"),
+    [
+        ("UTC", True),
+        ("Asia/Shanghai", True),
+        ("America/New_York", True),
+        ("Asia/Kolkata", False),
+        ("America/St_Johns", False),
+        # +10:30 in winter and +11:00 in summer
+        ("Australia/Lord_Howe", False),
+    ],
+)
+def test_has_whole_hour_offsets(timezone, expected):
+    assert has_whole_hour_offsets(timezone, datetime(2024, 1, 1), datetime(2025, 1, 1)) is expected
+
+
+def test_get_rollup_range_within_watermark(rollup_enabled):
+    session = _session_with_watermark(datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+    rollup_range = AppStatisticRollupService.get_rollup_range(
+        session,
+        datetime(2025, 1, 10, 8, 30, tzinfo=UTC),
+        datetime(2025, 1, 20, 8, 30, tzinfo=UTC),
+        "Asia/Shanghai",
+    )
+
+    assert rollup_range == (datetime(2025, 1, 10, 9), datetime(2025, 1, 20, 8))
+
+
+def test_get_rollup_range_clipped_by_watermark(rollup_enabled):
+    session = _session_with_watermark(datetime(2025, 1, 1), datetime(2025, 2, 1, 5))
+
+    assert AppStatisticRollupService.get_rollup_range(session, None, None, "UTC") == (
+        datetime(2025, 1, 1),
+        datetime(2025, 2, 1, 5),
+    )
+
+
+def test_get_rollup_range_falls_back_to_messages(rollup_enabled):
+    session = _session_with_watermark(datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+    # range not covered by the rollups
+    assert AppStatisticRollupService.get_rollup_range(session, datetime(2025, 3, 1, tzinfo=UTC), None, "UTC") is None
+    # range shorter than an hour
+    assert (
+        AppStatisticRollupService.get_rollup_range(
+            session, datetime(2025, 1, 5, 10, 10, tzinfo=UTC), datetime(2025, 1, 5, 10, 50, tzinfo=UTC), "UTC"
+        )
+        is None
+    )
+    # days not starting on an UTC hour
+    assert AppStatisticRollupService.get_rollup_range(session, None, None, "Asia/Kolkata") is None
+
+    session.get.return_value = None
+    assert AppStatisticRollupService.get_rollup_range(session, None, None, "UTC") is None
+
+
+def test_get_rollup_range_disabled():
+    session = _session_with_watermark(datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+    with patch("services.app_statistic_rollup_service.dify_config") as config:
+        config.APP_STATISTIC_ROLLUP_ENABLED = False
+        assert AppStatisticRollupService.get_rollup_range(session, None, None, "UTC") is None
+
+    session.get.assert_not_called()
+
+
+def test_roll_up_groups_by_hour():
+    session = MagicMock()
+
+    AppStatisticRollupService.roll_up(session, datetime(2025, 1, 1), datetime(2025, 1, 2))
+
+    statements = [call.args[0] for call in session.execute.call_args_list]
+    # one delete and one insert per rollup table
+    assert len(statements) == 6
+    sql = str(statements[3].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO app_hourly_message_statistics" in sql
+    assert "GROUP BY messages.app_id, date_trunc('hour', messages.created_at)" in sql
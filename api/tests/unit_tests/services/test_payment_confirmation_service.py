@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from services.payment_confirmation_service import (
+    PaymentConfirmationService,
+    PaymentConfirmationSubscriber,
+    payment_confirmation_subscriber,
+)
+
+
+def test_subscriber_sets_event_of_confirmed_account():
+    subscriber = PaymentConfirmationSubscriber()
+    registered = threading.Event()
+
+    def listen():
+        registered.wait(timeout=1)
+        yield {"type": "subscribe", "data": 1}
+        yield {"type": "message", "data": b"account-1"}
+
+    pubsub = MagicMock()
+    pubsub.listen.side_effect = listen
+
+    with patch("services.payment_confirmation_service.redis_client", MagicMock(pubsub=lambda **_: pubsub)):
+        event = subscriber.register("account-1")
+        other_event = subscriber.register("account-2")
+        registered.set()
+        subscriber._thread.join(timeout=1)
+
+    assert event.is_set()
+    assert not other_event.is_set()
+    pubsub.subscribe.assert_called_once_with(PaymentConfirmationSubscriber.CHANNEL)
+    pubsub.close.assert_called_once()
+
+
+def test_wait_returns_when_payment_is_no_longer_pending():
+    event = threading.Event()
+    with patch.object(payment_confirmation_subscriber, "register", return_value=event):
+        assert PaymentConfirmationService.wait("account-1", timeout=10, is_pending=lambda: False)
+
+
+def test_wait_returns_on_confirmation_or_timeout():
+    event = threading.Event()
+    with patch.object(payment_confirmation_subscriber, "register", return_value=event):
+        assert not PaymentConfirmationService.wait("account-1", timeout=0.01, is_pending=lambda: True)
+
+        threading.Timer(0.01, event.set).start()
+        assert PaymentConfirmationService.wait("account-1", timeout=10, is_pending=lambda: True)
+
+
+def test_wait_polls_when_subscription_is_unavailable():
+    is_pending = MagicMock(side_effect=[True, False])
+    with (
+        patch.object(payment_confirmation_subscriber, "register", return_value=None),
+        patch("services.payment_confirmation_service.time.sleep") as sleep,
+    ):
+        assert PaymentConfirmationService.wait("account-1", timeout=25, is_pending=is_pending)
+
+    sleep.assert_called_once_with(5)
+
+
+def test_publish_failure_is_not_raised():
+    redis_client = MagicMock()
+    redis_client.publish.side_effect = ConnectionError()
+    with patch("services.payment_confirmation_service.redis_client", redis_client):
+        PaymentConfirmationService.publish("account-1")
+
+    redis_client.publish.assert_called_once_with(PaymentConfirmationSubscriber.CHANNEL, "account-1")
@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from services.payment_history_service import PaymentHistoryService
+
+PAYMENT = {
+    "id": 1,
+    "id_account": "5b2c7d1e-8f4a-4e3b-9c6d-0a1b2c3d4e5f",
+    "id_plan": "basic",
+    "type": "in",
+    "transactionID": 42,
+    "amount": 100000,
+    "description": "PAY ABC",
+    "date": "2025-01-01 10:30:00",
+    "bank": "VCB",
+}
+
+
+def test_get_columns_extracts_typed_values():
+    assert PaymentHistoryService.get_columns(PAYMENT) == {
+        "account_id": PAYMENT["id_account"],
+        "plan_id": "basic",
+        "transaction_id": "42",
+        "amount": Decimal(100000),
+        "transaction_at": datetime(2025, 1, 1, 10, 30),
+    }
+
+
+def test_get_columns_keeps_invalid_values_empty():
+    columns = PaymentHistoryService.get_columns(
+        {**PAYMENT, "id_account": "", "id_plan": "", "amount": "invalid", "date": "01/01/2025"}
+    )
+
+    assert columns["account_id"] is None
+    assert columns["plan_id"] is None
+    assert columns["amount"] == Decimal(0)
+    assert "transaction_at" not in columns
+
+
+def test_parse_transaction_time():
+    assert PaymentHistoryService.parse_transaction_time("2025-01-01") == datetime(2025, 1, 1)
+    assert PaymentHistoryService.parse_transaction_time("not a date") is None
+    assert PaymentHistoryService.parse_transaction_time(None) is None
+
+
+def test_statistics_are_aggregated_by_the_database():
+    session = MagicMock()
+    session.execute.side_effect = [
+        MagicMock(all=lambda: [SimpleNamespace(date="2025-01-01", revenue=Decimal(200000), count=2)]),
+        MagicMock(all=lambda: [SimpleNamespace(plan_id="basic", revenue=Decimal(200000), count=2)]),
+        MagicMock(
+            all=lambda: [SimpleNamespace(status="completed", count=2), SimpleNamespace(status="rejected", count=1)]
+        ),
+    ]
+
+    statistics = PaymentHistoryService.get_statistics(session, start=datetime(2025, 1, 1))
+
+    assert statistics == {
+        "daily": [{"date": "2025-01-01", "revenue": 200000.0, "count": 2}],
+        "plans": [{"plan_id": "basic", "revenue": 200000.0, "count": 2}],
+        "statuses": {"completed": 2, "rejected": 1},
+    }
+    daily_sql = str(session.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "GROUP BY date(payments_history_custom.transaction_at)" in daily_sql
+    assert "payments_history_custom.transaction_at >=" in daily_sql
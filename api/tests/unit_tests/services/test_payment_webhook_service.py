@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.payment_webhook_service import PaymentItemStatus, PaymentWebhookService
+
+ACCOUNT_ID = "5b2c7d1e-8f4a-4e3b-9c6d-0a1b2c3d4e5f"
+
+
+def _payment(transaction_id: str, description: str, amount: float = 100000) -> dict:
+    return {
+        "id": transaction_id,
+        "type": "in",
+        "transactionID": transaction_id,
+        "amount": amount,
+        "description": description,
+        "date": "2025-01-01 10:30:00",
+        "bank": "VCB",
+    }
+
+
+@pytest.fixture
+def db():
+    db = MagicMock()
+    alies = SimpleNamespace(id="alies-1", alies="12345678", value={"id_account": ACCOUNT_ID, "id_plan": "basic"})
+    plan = SimpleNamespace(price=100000, plan_expiration=30)
+    with (
+        patch("services.payment_webhook_service.db", db),
+        patch("services.payment_webhook_service.PlanCatalogService.get_plan", return_value=plan),
+    ):
+        db.alies = alies
+        yield db
+
+
+def _scalars(*results):
+    return [MagicMock(all=MagicMock(return_value=result)) for result in results]
+
+
+def test_decode_alies():
+    assert PaymentWebhookService.decode_alies("Transfer PLAN12345678 thanks") == "12345678"
+    assert PaymentWebhookService.decode_alies("plan1234") is None
+
+
+def test_batch_is_resolved_with_one_query_per_table(db):
+    db.session.scalars.side_effect = _scalars([db.alies], [ACCOUNT_ID], ["1", "2", "4"])
+
+    result = PaymentWebhookService.process(
+        [
+            _payment("1", "PLAN12345678"),
+            _payment("1", "PLAN12345678"),
+            _payment("2", "no request"),
+            {"transactionID": "3"},
+            _payment("4", "PLAN87654321"),
+        ]
+    )
+
+    assert [(item.transaction_id, item.status) for item in result.results] == [
+        ("1", PaymentItemStatus.COMPLETED),
+        ("1", PaymentItemStatus.DUPLICATE),
+        ("2", PaymentItemStatus.RECEIVED),
+        ("3", PaymentItemStatus.INVALID),
+        ("4", PaymentItemStatus.RECEIVED),
+    ]
+    assert result.upgraded_account_ids == [ACCOUNT_ID]
+    assert db.session.scalars.call_count == 3
+    # plans are assigned with one bulk update, then the payment request is consumed
+    upgrades = db.session.execute.call_args_list[0].args[1]
+    assert [(upgrade["id"], upgrade["id_custom_plan"]) for upgrade in upgrades] == [(ACCOUNT_ID, "basic")]
+    db.session.commit.assert_called_once()
+
+
+def test_low_amount_is_rejected(db):
+    db.session.scalars.side_effect = _scalars([db.alies], [ACCOUNT_ID], ["1"])
+
+    result = PaymentWebhookService.process([_payment("1", "PLAN12345678", amount=1000)])
+
+    assert result.results[0].status == PaymentItemStatus.REJECTED
+    assert result.upgraded_account_ids == []
+    db.session.execute.assert_not_called()
+
+
+def test_retried_transaction_is_not_applied_again(db):
+    # the insert skips the transaction already recorded by the first delivery
+    db.session.scalars.side_effect = _scalars([db.alies], [ACCOUNT_ID], [])
+
+    result = PaymentWebhookService.process([_payment("1", "PLAN12345678")])
+
+    assert result.results[0].status == PaymentItemStatus.DUPLICATE
+    assert result.upgraded_account_ids == []
+    db.session.execute.assert_not_called()
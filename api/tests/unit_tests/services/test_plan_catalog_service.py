@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.plan_catalog_service import PlanCatalogService
+
+
+def _plan(plan_id: str, plan_expiration=30) -> dict:
+    return {
+        "id": plan_id,
+        "name": f"Plan {plan_id}",
+        "description": "",
+        "price": 100000,
+        "plan_expiration": plan_expiration,
+        "features": {"members": 5, "apps": 20},
+    }
+
+
+@pytest.fixture
+def stored():
+    redis_client = MagicMock()
+    redis_client.get.return_value = b"1"
+    db = MagicMock()
+    values = {
+        "plan": [_plan("basic"), _plan("legacy", plan_expiration="30"), {"id": "broken"}],
+        "payment_settings": {"access_token": "token", "account_name": "Dify", "account_id": "1", "bank_id": "2"},
+    }
+    db.session.execute.side_effect = lambda stmt: MagicMock(
+        all=lambda: [SimpleNamespace(name=name, value=value) for name, value in values.items()]
+    )
+    with (
+        patch("services.plan_catalog_service.redis_client", redis_client),
+        patch("services.plan_catalog_service.db", db),
+        patch.object(PlanCatalogService, "_catalog", None),
+    ):
+        yield SimpleNamespace(redis=redis_client, db=db, values=values)
+
+
+def test_catalog_is_parsed_once_per_version(stored):
+    catalog = PlanCatalogService.get_catalog()
+
+    assert PlanCatalogService.get_catalog() is catalog
+    assert stored.db.session.execute.call_count == 1
+    assert set(catalog.plans) == {"basic", "legacy"}
+    assert [plan.id for plan in catalog.listed_plans] == ["basic"]
+    assert PlanCatalogService.get_plan("basic").features.members == 5
+    assert PlanCatalogService.get_plan("missing") is None
+    assert PlanCatalogService.get_payment_settings().access_token == "token"
+
+
+def test_catalog_is_reloaded_when_version_changes(stored):
+    PlanCatalogService.get_catalog()
+
+    stored.values["plan"] = [_plan("pro")]
+    stored.redis.get.return_value = b"2"
+
+    assert set(PlanCatalogService.get_catalog().plans) == {"pro"}
+    assert stored.db.session.execute.call_count == 2
+
+
+def test_invalidate_bumps_version(stored):
+    PlanCatalogService.invalidate()
+
+    stored.redis.incr.assert_called_once_with("plan_catalog_version")
@@ -0,0 +1,100 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from models.account import Account, Tenant
+from services.principal_cache import PrincipalCache
+
+ACCOUNT_ID = "5b2c7d1e-8f4a-4e3b-9c6d-0a1b2c3d4e5f"
+
+
+@pytest.fixture
+def redis_client():
+    redis_client = MagicMock()
+    versions: dict[str, int] = {}
+    redis_client.mget.side_effect = lambda keys: [versions.get(key) for key in keys]
+    redis_client.versions = versions
+    with patch("services.principal_cache.redis_client", redis_client):
+        yield redis_client
+
+
+def _account(**values) -> Account:
+    account = Account(id=ACCOUNT_ID, name="Dify", email="dify@example.com", status="active")
+    for key, value in values.items():
+        setattr(account, key, value)
+    return account
+
+
+def test_principal_is_served_until_a_scope_changes(redis_client):
+    cache = PrincipalCache(ttl=60, max_size=10)
+    scopes = [cache.scope("account", ACCOUNT_ID), cache.scope("tenant", "tenant-1")]
+
+    assert cache.get("account:1") is None
+    cache.put("account:1", scopes, {"role": "owner"})
+    assert cache.get("account:1")["role"] == "owner"
+
+    redis_client.versions["principal_cache_version:tenant:tenant-1"] = 1
+    assert cache.get("account:1") is None
+
+
+def test_principal_is_not_served_without_versions(redis_client):
+    cache = PrincipalCache(ttl=60, max_size=10)
+    cache.put("account:1", ["account:1"], {"role": "owner"})
+
+    redis_client.mget.side_effect = ConnectionError()
+    assert cache.get("account:1") is None
+
+
+def test_disabled_cache(redis_client):
+    cache = PrincipalCache(ttl=0, max_size=10)
+    cache.put("account:1", ["account:1"], {"role": "owner"})
+
+    assert cache.get("account:1") is None
+    redis_client.mget.assert_not_called()
+
+
+def test_invalidate_bumps_versions(redis_client):
+    cache = PrincipalCache(ttl=60, max_size=10)
+
+    cache.invalidate(["account:1", "account:1", "tenant:1"])
+
+    pipeline = redis_client.pipeline.return_value
+    assert sorted(call.args[0] for call in pipeline.incr.call_args_list) == [
+        "principal_cache_version:account:1",
+        "principal_cache_version:tenant:1",
+    ]
+    pipeline.execute.assert_called_once()
+
+
+def test_snapshot_is_restored_without_querying():
+    account = _account(last_active_at=datetime(2025, 1, 1))
+    snapshot = PrincipalCache.snapshot(account)
+    with pytest.raises(TypeError):
+        snapshot["name"] = "changed"
+
+    session = Session()
+    restored = PrincipalCache.restore(session, Account, snapshot)
+
+    state = inspect(restored)
+    assert state.persistent
+    assert restored.email == "dify@example.com"
+    assert restored.last_active_at == datetime(2025, 1, 1)
+    assert not session.dirty
+
+    restored.name = "changed"
+    assert session.is_modified(restored)
+    assert snapshot["name"] == "Dify"
+
+
+def test_restored_account_keeps_current_tenant():
+    session = Session()
+    account = PrincipalCache.restore(session, Account, PrincipalCache.snapshot(_account()))
+    tenant = PrincipalCache.restore(session, Tenant, PrincipalCache.snapshot(Tenant(id="tenant-1", name="Team")))
+
+    account.set_current_tenant(tenant, "owner")
+
+    assert account.current_tenant_id == "tenant-1"
+    assert account.current_role == "owner"
@@ -0,0 +1,118 @@
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from events.event_handlers.update_tenant_usage_when_resources_changed import (
+    apply_usage_changes,
+    discard_usage_changes,
+    handle,
+)
+from models.dataset import Document
+from models.model import App, MessageAnnotation
+from services.tenant_usage_service import TenantUsage, TenantUsageResource, TenantUsageService
+
+
+@pytest.fixture
+def redis():
+    redis_client = MagicMock()
+    with (
+        patch("services.tenant_usage_service.redis_client", redis_client),
+        patch("services.tenant_usage_service.dify_config") as config,
+    ):
+        config.TENANT_USAGE_COUNTERS_ENABLED = True
+        config.TENANT_USAGE_COUNTER_TTL = 3600
+        script = MagicMock()
+        redis_client.register_script.return_value = script
+        redis_client.script = script
+        TenantUsageService._increment_script = None
+        TenantUsageService._store_script = None
+        yield redis_client
+
+
+def _flushed_session(new=(), deleted=()) -> MagicMock:
+    session = MagicMock()
+    session.info = {}
+    session.new = list(new)
+    session.deleted = list(deleted)
+    session.identity_map.get.return_value = None
+    return session
+
+
+def test_get_usage_from_counters(redis):
+    redis.hgetall.return_value = {
+        b"members": b"2",
+        b"apps": b"3",
+        b"datasets": b"1",
+        b"documents": b"10",
+        b"annotations": b"0",
+    }
+    session = MagicMock()
+
+    usage = TenantUsageService.get_usage("tenant1", session)
+
+    assert usage == TenantUsage(members=2, apps=3, datasets=1, documents=10, annotations=0)
+    session.scalar.assert_not_called()
+
+
+def test_get_usage_counts_missing_counters(redis):
+    redis.hgetall.return_value = {b"apps": b"3"}
+    session = MagicMock()
+    session.scalar.side_effect = [2, 3, 1, 10, 4]
+
+    usage = TenantUsageService.get_usage("tenant1", session)
+
+    assert usage == TenantUsage(members=2, apps=3, datasets=1, documents=10, annotations=4)
+    redis.script.assert_called_once_with(
+        keys=["tenant_usage:tenant1"],
+        args=[3600, 0, "members", 2, "apps", 3, "datasets", 1, "documents", 10, "annotations", 4],
+    )
+
+
+def test_committed_changes_update_counters(redis):
+    session = _flushed_session(
+        new=[
+            App(tenant_id="tenant1"),
+            Document(tenant_id="tenant1"),
+            Document(tenant_id="tenant1"),
+            MessageAnnotation(app_id="app1"),
+        ],
+        deleted=[Document(tenant_id="tenant2")],
+    )
+    session.connection.return_value.scalar.return_value = "tenant1"
+
+    handle(session, None)
+    apply_usage_changes(session)
+
+    calls = {call.kwargs["keys"][0]: call.kwargs["args"] for call in redis.script.call_args_list}
+    assert calls == {
+        "tenant_usage:tenant1": ["apps", 1, "documents", 2, "annotations", 1],
+        "tenant_usage:tenant2": ["documents", -1],
+    }
+    assert session.info == {}
+
+
+def test_deleted_app_resets_counters(redis):
+    session = _flushed_session(new=[Document(tenant_id="tenant2")], deleted=[App(tenant_id="tenant1")])
+
+    handle(session, None)
+    apply_usage_changes(session)
+
+    redis.delete.assert_called_once_with("tenant_usage:tenant1")
+    redis.script.assert_called_once_with(keys=["tenant_usage:tenant2"], args=["documents", 1])
+
+
+def test_rolled_back_changes_are_discarded(redis):
+    session = _flushed_session(new=[App(tenant_id="tenant1")])
+
+    handle(session, None)
+    discard_usage_changes(session)
+    apply_usage_changes(session)
+
+    redis.script.assert_not_called()
+
+
+def test_increment_skips_zero_deltas(redis):
+    TenantUsageService.increment(Counter({("tenant1", TenantUsageResource.APPS): 0}))
+
+    redis.script.assert_not_called()
@@ -4,11 +4,43 @@ import streamlit as st
 from config import api_url
 from modules.request import requestAuth
 
-# Cache data
-
-
-def get_accounts():
-    res = requestAuth.get("accounts")
+ACCOUNT_COLUMNS = [
+    "id",
+    "name",
+    "email",
+    "status",
+
+    "id_custom_plan",
+    "plan_expiration",
+    "month_before_banned",
+    "max_of_apps",
+    "max_vector_space",
+    "max_annotation_quota_limit",
+    "max_documents_upload_quota",
+
+    "last_login_at",
+    "last_login_ip",
+    "last_active_at",
+    "created_at",
+    "updated_at"
+]
+
+EDITABLE_COLUMNS = [
+    "status",
+    "id_custom_plan",
+    "plan_expiration",
+    "month_before_banned",
+    "max_of_apps",
+    "max_vector_space",
+    "max_annotation_quota_limit",
+    "max_documents_upload_quota",
+]
+
+
+# Cache data, a page is fetched again only when its filters or cursor change
+@st.cache_data(ttl=30, show_spinner=False)
+def get_accounts(params):
+    res = requestAuth.get("accounts", params=params)
     if res.status_code == 200:
         return res.json()
     else:
@@ -21,39 +53,44 @@ def render():
 
     # Button to refresh
     if st.button("Refresh"):
+        st.cache_data.clear()
         st.rerun()
 
+    # Filters are applied by the API
+    col1, col2, col3, col4, col5 = st.columns(5)
+    email = col1.text_input("Email")
+    plan_id = col2.text_input("Plan ID")
+    expiration_start = col3.date_input("Expires from", value=None)
+    expiration_end = col4.date_input("Expires to", value=None)
+    limit = col5.selectbox("Page size", options=[50, 100, 200, 500], index=1)
+    params = {"limit": limit}
+    if email:
+        params["email"] = email
+    if plan_id:
+        params["plan_id"] = plan_id
+    if expiration_start:
+        params["expiration_start"] = expiration_start.strftime("%Y-%m-%d")
+    if expiration_end:
+        params["expiration_end"] = expiration_end.strftime("%Y-%m-%d")
+
+    # Pages are chained by the id of their last account, the cursors of the visited pages are kept to go back
+    if st.session_state.get("accounts_params") != params:
+        st.session_state.accounts_params = params
+        st.session_state.accounts_cursors = [None]
+    cursor = st.session_state.accounts_cursors[-1]
+    page_params = {**params, "last_id": cursor} if cursor else params
+
     # Get accounts from API flask
     with st.spinner("Loading accounts..."):
-        accounts = get_accounts()
+        page = get_accounts(page_params)
+    accounts = page["data"]
 
     if len(accounts) == 0:
         st.warning("No accounts found.")
         st.stop()
 
     # Load to dataframe
-    df = pd.DataFrame(accounts, columns=[
-        "id",
-        "name",
-        "email",
-        "status",
-
-        "id_custom_plan",
-        "plan_expiration",
-        "month_before_banned",
-        "max_of_apps",
-        "max_vector_space",
-        "max_annotation_quota_limit",
-        "max_documents_upload_quota",
-
-        "last_login_at",
-        "last_login_ip",
-        "last_active_at",
-        "created_at",
-        "updated_at"
-    ])
-
-    df = df.sort_values(by=['created_at'])
+    df = pd.DataFrame(accounts, columns=ACCOUNT_COLUMNS)
 
     # Convert plan_expiration strings to datetime for editing
     df['plan_expiration'] = pd.to_datetime(df['plan_expiration'])
@@ -118,24 +155,40 @@ def render():
         hide_index=True,
     )
 
-    # Save changes
-    edited_df = edited_df.to_dict(orient="records")
-    if df.to_dict(orient="records") == edited_df:
-        pass
-    else:
-        # Convert any pandas Timestamps to JSON-serializable strings
-        for rec in edited_df:
+    # Page navigation
+    col1, col2, col3 = st.columns([1, 1, 4])
+    if col1.button("Previous", disabled=len(st.session_state.accounts_cursors) == 1):
+        st.session_state.accounts_cursors.pop()
+        st.rerun()
+    if col2.button("Next", disabled=not page["has_more"]):
+        st.session_state.accounts_cursors.append(accounts[-1]["id"])
+        st.rerun()
+    col3.write(f"Page {len(st.session_state.accounts_cursors)}")
+
+    # Save changes, only the edited accounts are sent
+    original_records = df.to_dict(orient="records")
+    edited_records = edited_df.to_dict(orient="records")
+    changed = [
+        edited for original, edited in zip(original_records, edited_records)
+        if original != edited
+    ]
+    if changed:
+        updates = []
+        for rec in changed:
+            # Convert any pandas Timestamps to JSON-serializable strings
             ts = rec.get("plan_expiration")
             if isinstance(ts, pd.Timestamp):
                 rec["plan_expiration"] = ts.isoformat()
+            updates.append({"id": rec["id"], **{column: rec[column] for column in EDITABLE_COLUMNS}})
 
         res = requestAuth.put(
             "accounts",
-            json=edited_df,
+            json=updates,
         )
 
         if res.status_code == 200:
             st.success("Changes saved successfully.")
+            st.cache_data.clear()
             st.rerun()
         else:
             st.error("Failed to save changes.")
@@ -161,6 +214,7 @@ def render():
                     if resjson['status'] == "success":
                         st.success(
                             f"Account {delete_id} deleted successfully.")
+                        st.cache_data.clear()
                         st.rerun()
                     else:
                         st.error(f"Error: {resjson['message']}")
@@ -20,9 +20,9 @@ def get_payment_settings():
         return None  # Return None or a default dict if loading fails
 
 
-# helper to fetch payment history
-def get_payment_history():
-    res = requestAuth.get("payment_history")
+# helper to fetch a page of the payment history
+def get_payment_history(params):
+    res = requestAuth.get("payment_history", params=params)
     if res.status_code == 200:
         return res.json()
     else:
@@ -34,6 +34,34 @@ def get_payment_history():
         return None
 
 
+# helper to fetch the payment history aggregates, computed by the API
+def get_payment_statistics(params):
+    res = requestAuth.get("payment_history/statistics", params=params)
+    if res.status_code == 200:
+        return res.json()
+    else:
+        st.error(f"Failed to load payment statistics. Status code: {res.status_code}")
+        try:
+            st.error(f"Error details: {res.json()}")
+        except:
+            st.error(f"Error details: {res.text}")
+        return None
+
+
+# append the next page of the payment history to the loaded rows
+def load_payment_history_page():
+    params = dict(st.session_state.payment_history_params)
+    if st.session_state.payment_history_rows:
+        params['last_id'] = st.session_state.payment_history_rows[-1]['history_id']
+    with st.spinner("Loading payment history..."):
+        page = get_payment_history(params)
+    if page is None:
+        st.session_state.payment_history_has_more = False
+        return
+    st.session_state.payment_history_rows.extend(page['data'])
+    st.session_state.payment_history_has_more = page['has_more']
+
+
 def render():
     st.subheader("Payment Settings")
 
@@ -152,15 +180,53 @@ def render():
 
     # === Payment History Section ===
     st.subheader("Payment History")
-    with st.spinner("Loading payment history..."):
-        history = get_payment_history()
-    if history is not None:
-        if len(history) > 0:
-            df = pd.DataFrame(history, columns=[
-                'id', 'id_account', 'id_plan', 'type', 'transactionID', 'amount', 'description', 'date', 'bank'
-            ])
-            st.dataframe(df)
-        else:
-            st.info("No payment history records found.")
+    col1, col2, col3 = st.columns(3)
+    start_date = col1.date_input("From", value=None)
+    end_date = col2.date_input("To", value=None)
+    status = col3.selectbox("Status", options=["", "completed", "rejected", "received"],
+                            format_func=lambda value: value.capitalize() if value else "All")
+    date_params = {}
+    if start_date:
+        date_params['start'] = start_date.strftime("%Y-%m-%d")
+    if end_date:
+        date_params['end'] = end_date.strftime("%Y-%m-%d")
+
+    # Aggregates are computed by the API, only the totals are sent to the dashboard
+    with st.spinner("Loading payment statistics..."):
+        statistics = get_payment_statistics(date_params)
+    if statistics is not None:
+        statuses = statistics.get('statuses', {})
+        plans = statistics.get('plans', [])
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Revenue", f"{sum(plan['revenue'] for plan in plans):,.0f}")
+        col2.metric("Completed", statuses.get('completed', 0))
+        col3.metric("Rejected", statuses.get('rejected', 0))
+        col4.metric("Received", statuses.get('received', 0))
+        if statistics.get('daily'):
+            daily_df = pd.DataFrame(statistics['daily']).set_index('date')
+            st.bar_chart(daily_df['revenue'])
+        if plans:
+            st.dataframe(pd.DataFrame(plans, columns=['plan_id', 'revenue', 'count']), hide_index=True)
+
+    # Payments are loaded page by page, the filters restart from the latest payment
+    history_params = {**date_params, 'limit': 50}
+    if status:
+        history_params['status'] = status
+    if st.session_state.get('payment_history_params') != history_params:
+        st.session_state.payment_history_params = history_params
+        st.session_state.payment_history_rows = []
+        st.session_state.payment_history_has_more = True
+
+    if not st.session_state.payment_history_rows and st.session_state.payment_history_has_more:
+        load_payment_history_page()
+    if st.session_state.payment_history_rows:
+        df = pd.DataFrame(st.session_state.payment_history_rows, columns=[
+            'history_id', 'id_account', 'id_plan', 'status', 'transactionID', 'amount', 'description',
+            'transaction_at', 'bank'
+        ])
+        st.dataframe(df, hide_index=True)
+        if st.session_state.payment_history_has_more and st.button("Load more"):
+            load_payment_history_page()
+            st.rerun()
     else:
-        st.error("Could not load payment history.")
+        st.info("No payment history records found.")
@@ -1,9 +1,9 @@
-import React, { useState, useEffect, useRef } from 'react'
+import React, { useEffect, useState } from 'react'
 import type { FC, ReactNode } from 'react'
 import { RiApps2Line, RiGroupLine, RiHardDrive3Line, RiQuestionLine, RiRssLine, RiSpeedUpLine } from '@remixicon/react'
 import useSWRMutation from 'swr/mutation'
 import Toast from '../../base/toast'
-import type { CustomPlanResponse, PayRequestResponse } from '@/models/common'
+import type { CustomPlanResponse, PayRequestResponse, PayRequestWaitResponse } from '@/models/common'
 import { post, get } from '@/service/base'
 import { useAppContext } from '@/context/app-context'
 import Tooltip from '../../base/tooltip'
@@ -47,61 +47,58 @@ const CustomPlan: FC<Props> = ({ plan }) => {
   const [qrUrl, setQrUrl] = useState<string>()
   const [isQrModalOpen, setIsQrModalOpen] = useState(false)
   const [currentAlies, setCurrentAlies] = useState<string | null>(null)
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   const { trigger, isMutating } = useSWRMutation('/custom/pay_request', payRequestFetcher)
 
-  const stopPolling = () => {
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
-      intervalRef.current = null
-    }
-  }
-
   useEffect(() => {
-    if (isQrModalOpen && currentAlies && userProfile?.id) {
-      intervalRef.current = setInterval(async () => {
-        try {
-          const url = `/custom/pay_request/${userProfile.id}`
-          const result = await get<{ status: string; message: string; alies?: string }>(url)
+    if (!isQrModalOpen || !currentAlies || !userProfile?.id)
+      return
 
-          if (result.status === 'success' && result.alies === currentAlies) {
-            console.log('Payment pending, alies matches.')
+    // Each request waits on the server until the payment is confirmed or the wait times out
+    let cancelled = false
+    const waitForPayment = async () => {
+      while (!cancelled) {
+        try {
+          const url = `/custom/pay_request/${userProfile.id}/wait`
+          const result = await get<PayRequestWaitResponse>(url, { params: { alies: currentAlies } })
+          if (cancelled)
             return
-          } else if (result.status === 'success' && result.alies !== currentAlies) {
-            console.error('Alies mismatch. Stopping poll.')
-            Toast.notify({ type: 'error', message: 'Alies không khớp.' })
-            stopPolling()
-            setIsQrModalOpen(false)
-          } else if (result.status === 'success') {
-            console.warn('Unexpected success response format:', result)
-          } else {
-            console.error('Unexpected status:', result.status, result.message)
-            Toast.notify({ type: 'error', message: result.message || 'Kiểm tra thanh toán thất bại.' })
-            stopPolling()
-          }
-        } catch (error: any) {
-          if (error.status === 404) {
-            console.log('Payment likely successful (404). Stopping poll.')
+
+          if (result.status === 'success' && result.paid) {
             Toast.notify({ type: 'success', message: 'Thanh toán thành công.' })
-            stopPolling()
             setIsQrModalOpen(false)
             mutateUserProfile()
             // Reload the page to reflect the new plan status
             window.location.reload()
-          } else {
+            return
+          }
+          if (result.status !== 'success') {
+            console.error('Unexpected status:', result.status, result.message)
+            Toast.notify({ type: 'error', message: result.message || 'Kiểm tra thanh toán thất bại.' })
+            return
+          }
+        }
+        catch (error: any) {
+          if (cancelled)
+            return
+
+          if (error.status === 409) {
+            console.error('Alies mismatch. Stopping wait.')
+            Toast.notify({ type: 'error', message: 'Alies không khớp.' })
+            setIsQrModalOpen(false)
+          }
+          else {
             console.error('Error checking payment status:', error)
             Toast.notify({ type: 'error', message: error.message || 'Kiểm tra thanh toán thất bại.' })
-            stopPolling()
           }
+          return
         }
-      }, 5000)
-    } else {
-      stopPolling()
+      }
     }
+    waitForPayment()
 
     return () => {
-      stopPolling()
+      cancelled = true
     }
   }, [isQrModalOpen, currentAlies, userProfile?.id, mutateUserProfile])
 
@@ -109,7 +106,6 @@ const CustomPlan: FC<Props> = ({ plan }) => {
     if (isMutating || isCurrent) return
     setQrUrl(undefined)
     setCurrentAlies(null)
-    stopPolling()
     try {
       const result = await trigger({ id_plan: plan.id, id_account: userProfile.id })
       if (result && result.status === 'success' && typeof result.url === 'string' && typeof result.alies === 'string') {
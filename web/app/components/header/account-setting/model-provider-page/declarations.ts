@@ -265,7 +265,10 @@ export type ModelLoadBalancingConfigEntry = {
   ttl?: number
 }
 
+export type ModelLoadBalancingStrategy = 'round_robin' | 'weighted' | 'least_outstanding'
+
 export type ModelLoadBalancingConfig = {
   enabled: boolean
+  strategy?: ModelLoadBalancingStrategy
   configs: ModelLoadBalancingConfigEntry[]
 }
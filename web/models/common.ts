@@ -84,6 +84,12 @@ export type PayRequestResponse = {
   url?: string // URL is optional, only present on success
 }
 
+export type PayRequestWaitResponse = {
+  status: 'success' | 'error'
+  message?: string
+  paid?: boolean // Whether the payment was confirmed before the wait timed out
+}
+
 export type PayRequestOriginResponse = {
   json: () => Promise<PayRequestResponse>
   bodyUsed: boolean